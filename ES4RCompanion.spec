@@ -1,5 +1,11 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
 
+# Regenerate data/manifest.json so the bundled app can trust it at startup
+sys.path.insert(0, SPECPATH)
+from src.manifest import write_manifest
+write_manifest(os.path.join(SPECPATH, 'data'))
 
 a = Analysis(
     ['app.py'],
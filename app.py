@@ -23,13 +23,19 @@ from src.data_loader import (
     save_json_data, # Assuming save_json_data is needed for favorites
     DATA_DIR,       # Assuming needed for favorites path
     FAVORITES_FILE,  # Assuming needed for favorites
-    BATTLES_FILE
+    BATTLES_FILE,
+    flush_user_stores,
+    user_store_errors
 )
 from src.command_builder import build_additem_command, build_placeatme_command
 # Import the new logic layer
 from src import app_logic 
 # Import the new CLI entry point
 from src.cli_ui import run_companion_cli
+from src import json_codec
+from src.catalog import get_catalog
+from src.data_watcher import DataWatcher
+from src.progress import ProgressDispatcher
 # Import the setup_logging function
 from src.config import setup_logging
 # from src.game_connector import GameConnector # Commented out - file missing
@@ -40,6 +46,7 @@ automator = WindowAutomator(TARGET_EXECUTABLE)
 # game_found = False # Removed global - use automator state
 # log_file = 'companion_log.txt' # Moved to config.py
 window = None # Global reference to the pywebview window
+progress_dispatcher = None # Pushes job progress to the window (GUI mode only)
 # Removed stop_event
 # stop_event = threading.Event() 
 
@@ -64,7 +71,7 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 class Api:
     def __init__(self):
         self.item_categories = get_item_categories()
-        self.all_locations = load_all_locations()
+        self.all_locations = get_catalog().sorted_views.all_locations()
         # Load favorites on init too
         self.favorites = self._load_favorites_internal()
 
@@ -81,6 +88,14 @@ class Api:
         logging.info(f"API: check_status returning: {result}")
         return result
 
+    def bootstrap(self):
+        """Returns everything the GUI needs for first paint in one payload."""
+        logging.info("API: bootstrap called.")
+        result = app_logic.bootstrap_logic() # Delegate
+        logging.info(f"API: bootstrap returning {len(result.get('sections', {}))} sections "
+                     f"in {result.get('elapsed_ms')} ms (failed: {list(result.get('errors', {}))}).")
+        return result
+
     def run_single_command(self, command):
         """Runs a single command using the automator."""
         if not command or not isinstance(command, str):
@@ -88,6 +103,7 @@ class Api:
              return {"success": False, "message": "Invalid command format."}
         
         logging.info(f"Running command: {command}")
+        app_logic.record_command_logic(command, source="gui")
         try:
             # Use WindowAutomator's execute_command method (correct name)
             # success, message = automator.run_command(command) # Old incorrect name
@@ -118,7 +134,7 @@ class Api:
     def run_preset_battle(self, preset_name):
         """Runs a sequence of commands from a named battle preset."""
         logging.info(f"API: run_preset_battle called for preset: '{preset_name}'")
-        result = app_logic.run_preset_logic(preset_name, "battle") # Delegate
+        result = app_logic.run_preset_logic(preset_name, "battle", progress=progress_dispatcher) # Delegate
         logging.info(f"API: run_preset_battle result: {result}")
         return result
 
@@ -130,11 +146,23 @@ class Api:
         logging.info(f"API: get_item_categories_api returning {len(result.get('categories',{}))} categories.")
         return result
 
-    def get_items_in_category(self, filename):
-        """Loads items from a specific category file."""
-        logging.info(f"API: get_items_in_category called for file: '{filename}'")
-        result = app_logic.get_items_in_category_logic(filename) # Delegate
-        logging.info(f"API: get_items_in_category returning {len(result.get('items',{}))} items.")
+    def get_items_in_category(self, filename, sort="name", known_version=None):
+        """Loads items from a specific category file, as a versioned response.
+
+        Returns {"version", "not_modified": True} when `known_version` is
+        still current, else {"version", "body"} with the result as a JSON string.
+        """
+        logging.info(f"API: get_items_in_category called for file: '{filename}' (known version {known_version})")
+        result = app_logic.get_items_in_category_versioned_logic(filename, sort, known_version) # Delegate
+        logging.info(f"API: get_items_in_category returning version {result.get('version')}"
+                     f"{' (not modified)' if result.get('not_modified') else ''}.")
+        return result
+
+    def get_item_details(self, item_id):
+        """Full record of one item (the item lists only carry names and IDs)."""
+        logging.info(f"API: get_item_details called for ID: {item_id}")
+        result = app_logic.get_item_details_logic(item_id) # Delegate
+        logging.info(f"API: get_item_details returning success={result.get('success')}.")
         return result
 
     def add_item(self, item_id, quantity):
@@ -146,10 +174,12 @@ class Api:
         return result # Result now includes {"success": bool, "message": str, "command": str}
 
     # --- Custom Battle API Methods ---
-    def get_npcs(self):
-        logging.info("API: get_npcs called.")
-        result = app_logic.get_npcs_logic()
-        logging.info(f"API: get_npcs returning {len(result.get('npcs',{}))} NPCs.")
+    def get_npcs(self, known_version=None):
+        """Loads the NPC list as a versioned response (see get_items_in_category)."""
+        logging.info(f"API: get_npcs called (known version {known_version}).")
+        result = app_logic.get_npcs_versioned_logic(known_version)
+        logging.info(f"API: get_npcs returning version {result.get('version')}"
+                     f"{' (not modified)' if result.get('not_modified') else ''}.")
         return result
 
     def build_placeatme_command(self, npc_id, quantity):
@@ -173,7 +203,7 @@ class Api:
         
     def run_custom_battle(self, command_list):
         logging.info(f"API: run_custom_battle called: Commands={len(command_list)}")
-        result = app_logic.run_command_sequence_logic(command_list, "custom battle")
+        result = app_logic.run_command_sequence_logic(command_list, "custom battle", progress=progress_dispatcher)
         logging.info(f"API: run_custom_battle result: {result}")
         return result
 
@@ -182,7 +212,7 @@ class Api:
     def get_favorites(self):
         """Loads and returns the list of favorite commands."""
         logging.info("API: get_favorites called.")
-        result = app_logic.load_favorites_logic()
+        result = app_logic.load_favorites_logic(annotate=True)
         logging.info(f"API: get_favorites returning {len(result.get('favorites',[]))} favorites.")
         return result
 
@@ -216,20 +246,122 @@ class Api:
         logging.info(f"API: get_location_categories_api returning {len(result.get('categories',{}))} categories.")
         return result
 
-    def get_locations_in_category_api(self, category_filename):
-        """API endpoint to get locations within a specific category file."""
-        logging.info(f"API: get_locations_in_category_api called for file: '{category_filename}'")
-        result = app_logic.get_locations_in_category_logic(category_filename) # Delegate
-        logging.info(f"API: get_locations_in_category_api returning {len(result.get('locations',{}))} locations.")
+    def get_locations_in_category_api(self, category_filename, known_version=None):
+        """API endpoint to get locations within a specific category file, as a versioned response."""
+        logging.info(f"API: get_locations_in_category_api called for file: '{category_filename}' "
+                     f"(known version {known_version})")
+        result = app_logic.get_locations_in_category_versioned_logic(category_filename, known_version) # Delegate
+        logging.info(f"API: get_locations_in_category_api returning version {result.get('version')}"
+                     f"{' (not modified)' if result.get('not_modified') else ''}.")
+        return result
+
+    def get_location_tree(self, key=None):
+        """API endpoint to browse one level of the location hierarchy."""
+        logging.info(f"API: get_location_tree called for key: '{key}'")
+        result = app_logic.get_location_tree_logic(key)
+        logging.info(f"API: get_location_tree returning {len(result.get('nodes', []))} nodes.")
         return result
 
-    def teleport_to_location_api(self, location_id):
+    def get_related_locations(self, location_id):
+        """API endpoint to get the floors and neighbouring cells of a location."""
+        logging.info(f"API: get_related_locations called for ID: '{location_id}'")
+        result = app_logic.get_related_locations_logic(location_id)
+        logging.info(f"API: get_related_locations returning {len(result.get('floors', []))} floors.")
+        return result
+
+    def teleport_to_location_api(self, location_id, force=False):
         """API endpoint to teleport the player to a location ID."""
         logging.info(f"API: teleport_to_location_api called for ID: '{location_id}'")
-        result = app_logic.teleport_to_location_logic(location_id) # Delegate
+        result = app_logic.teleport_to_location_logic(location_id, force=bool(force)) # Delegate
         logging.info(f"API: teleport_to_location_api result: {result}")
         return result
 
+    # --- Search API Methods ---
+
+    def search(self, query, kind=None, category=None, limit=25):
+        """Searches the whole catalog (items, NPCs, locations) by name or ID."""
+        logging.info(f"API: search called: Query='{query}', Kind={kind}, Category={category}")
+        result = app_logic.search_catalog_logic(query, kind, category, limit) # Delegate
+        logging.info(f"API: search returning {len(result.get('results',[]))} of {result.get('total', 0)} results.")
+        return result
+
+    def query_items(self, predicates=None, sort=None, descending=False, limit=50, offset=0,
+                    category=None, subcategory=None):
+        """Filters, sorts and pages items across all categories by their stats."""
+        logging.info(f"API: query_items called: Predicates={predicates}, Sort={sort}, Desc={descending}, "
+                     f"Limit={limit}, Offset={offset}, Category={category}, Subcategory={subcategory}")
+        result = app_logic.query_items_logic(predicates, sort, descending, limit, offset,
+                                             category, subcategory) # Delegate
+        logging.info(f"API: query_items returning {len(result.get('results',[]))} of {result.get('total', 0)} results.")
+        return result
+
+    def list_page(self, kind, query=None, offset=0, limit=100, source=None):
+        """One page of a name-ordered catalog list (for lists that render only visible rows)."""
+        logging.debug(f"API: list_page called: Kind={kind}, Query='{query}', Offset={offset}, "
+                      f"Limit={limit}, Source={source}")
+        result = app_logic.list_page_logic(kind, query, offset, limit, source) # Delegate (called while scrolling, keep quiet)
+        logging.debug(f"API: list_page returning {len(result.get('rows', []))} of {result.get('total', 0)} rows.")
+        return result
+
+    def fuzzy_match(self, text, kind=None, limit=5):
+        """Returns catalog entries within a few typos of the given name or ID."""
+        logging.info(f"API: fuzzy_match called: Text='{text}', Kind={kind}")
+        result = app_logic.fuzzy_match_logic(text, kind, limit) # Delegate
+        logging.info(f"API: fuzzy_match returning {len(result.get('matches',[]))} matches.")
+        return result
+
+    def complete(self, text, limit=10):
+        """Typeahead completions for the single-command box."""
+        result = app_logic.complete_logic(text, limit) # Delegate (called per keystroke, keep quiet)
+        logging.debug(f"API: complete returning {len(result.get('completions',[]))} completions.")
+        return result
+
+    def get_history(self, prefix=None, contains=None, limit=50):
+        """Past commands (GUI and CLI, all sessions), most recent first."""
+        logging.info(f"API: get_history called: Prefix='{prefix}', Contains='{contains}'")
+        result = app_logic.get_history_logic(prefix, contains, limit) # Delegate
+        logging.info(f"API: get_history returning {len(result.get('history',[]))} of {result.get('total')} commands.")
+        return result
+
+# --- Data Hot Reload ---
+def push_catalog_changes(changes):
+    """Catalog listener: forwards record-level changes to the GUI.
+
+    Runs on the watcher thread; the page re-renders only the dropdowns whose
+    data file changed (see onCatalogChanged in gui/js/handlers.js).
+    """
+    if window is None:
+        return
+    payload = json_codec.dumps([change._asdict() for change in changes])
+    logging.info(f"Pushing {len(changes)} catalog change(s) to the GUI.")
+    try:
+        window.evaluate_js(f"onCatalogChanged({payload})")
+    except Exception:
+        logging.exception("Failed to push catalog changes to the GUI")
+
+
+# --- Job Progress ---
+def push_job_progress(events):
+    """ProgressDispatcher sink: forwards a batch of job events to the GUI.
+
+    Runs on the dispatcher thread while the job's own bridge call is still
+    open (see onJobProgress in gui/js/handlers.js).
+    """
+    if window is None:
+        return
+    window.evaluate_js(f"onJobProgress({json_codec.dumps(events)})")
+
+
+def flush_user_stores_on_exit():
+    """Writes the favorite/preset edits still held back; says so if some could not be saved."""
+    if flush_user_stores():
+        return True
+    for message in user_store_errors():
+        logging.error(f"Unsaved on exit: {message}")
+        print(f"ERROR: {message}. Recent favorite/preset changes were not saved.")
+    return False
+
+
 # --- Main Execution Logic --- 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="ES4R Companion - GUI or CLI")
@@ -242,6 +374,7 @@ if __name__ == '__main__':
         # Run the CLI version (defined in cli_ui.py)
         print("Starting CLI mode...")
         run_companion_cli(automator)
+        flush_user_stores_on_exit() # Favorite/preset edits are written behind; don't wait for atexit
     else:
         # Start the pywebview GUI
         print("Starting GUI mode...")
@@ -256,6 +389,13 @@ if __name__ == '__main__':
                 resizable=True
             )
 
+            # Hot reload: watch the data directory and push changes to the page
+            catalog = get_catalog()
+            catalog.add_listener(push_catalog_changes)
+            data_watcher = DataWatcher(catalog).start()
+            # Battles report their steps while they run
+            progress_dispatcher = ProgressDispatcher(push_job_progress).start()
+
             # --- Threading Setup --- Removed section
             # status_thread = threading.Thread(...)
             # status_thread.start()
@@ -267,6 +407,9 @@ if __name__ == '__main__':
 
             # Start the event loop
             webview.start(debug=False) # Keep debug=False for release maybe
+            data_watcher.stop()
+            progress_dispatcher.stop()
+            flush_user_stores_on_exit()
         except Exception as e:
             logging.exception("Failed to start GUI")
             print(f"FATAL: Failed to start GUI: {e}")
@@ -3,11 +3,33 @@ console.log("Loading api.js...");
 // --- API Abstraction Layer ---
 // These functions wrap the pywebview calls
 
+// Catalog list endpoints (NPCs, items and locations of a category) reply with
+// a version and a JSON string body. The parsed body is kept per request with
+// its version, which goes back with the next identical request; the server
+// then answers "not modified" and the kept copy is reused.
+function rememberResponse(key, version, data) {
+    if (version) catalogResponses.set(key, { version, data });
+}
+
+async function versionedApiCall(key, call) {
+    const cached = catalogResponses.get(key);
+    const reply = await call(cached ? cached.version : null);
+    if (reply.not_modified && cached) return cached.data;
+    const data = typeof reply.body === 'string' ? JSON.parse(reply.body) : reply.body;
+    rememberResponse(key, reply.version, data);
+    return data;
+}
+
 async function checkGameStatusApi() {
     logMessage('API: Checking game status...');
     return await window.pywebview.api.check_status();
 }
 
+async function bootstrapApi() {
+    logMessage('API: Loading everything for first paint...');
+    return await window.pywebview.api.bootstrap();
+}
+
 async function runSingleCommandApi(command) {
     logMessage(`API: Sending single command: ${command}`);
     return await window.pywebview.api.run_single_command(command);
@@ -28,9 +50,9 @@ async function loadItemTypesAndSubcategoriesApi() {
     return await window.pywebview.api.get_item_categories_api();
 }
 
-async function loadItemsForCategoryApi(filename) {
-    logMessage(`API: Loading items for category file: ${filename}`);
-    return await window.pywebview.api.get_items_in_category(filename);
+async function getItemDetailsApi(itemId) {
+    logMessage(`API: Getting details for item: ${itemId}`);
+    return await window.pywebview.api.get_item_details(itemId);
 }
 
 async function addItemApi(itemId, quantity) {
@@ -38,9 +60,9 @@ async function addItemApi(itemId, quantity) {
     return await window.pywebview.api.add_item(itemId, quantity);
 }
 
-async function loadNpcsApi() {
-    logMessage('API: Loading NPCs...');
-    return await window.pywebview.api.get_npcs();
+async function listPageApi(kind, query, offset, limit, source = null) {
+    // Called on every scroll/filter step, so not logged
+    return await window.pywebview.api.list_page(kind, query, offset, limit, source);
 }
 
 async function buildPlaceatmeCommandApi(npcId, quantity) {
@@ -85,12 +107,45 @@ async function loadLocationCategoriesApi() {
 
 async function loadLocationsForCategoryApi(selectedCategoryFile) {
     logMessage(`API: Loading locations for category file: ${selectedCategoryFile}...`);
-    return await window.pywebview.api.get_locations_in_category_api(selectedCategoryFile);
+    return await versionedApiCall(`locations:${selectedCategoryFile}`,
+        known => window.pywebview.api.get_locations_in_category_api(selectedCategoryFile, known));
+}
+
+async function loadLocationTreeApi(key = null) {
+    logMessage(`API: Loading location area ${key || '(regions)'}...`);
+    return await window.pywebview.api.get_location_tree(key);
+}
+
+async function loadRelatedLocationsApi(locationId) {
+    logMessage(`API: Loading floors for ${locationId}...`);
+    return await window.pywebview.api.get_related_locations(locationId);
+}
+
+async function teleportPlayerApi(locationId, force = false) {
+    logMessage(`API: Attempting to teleport to ${locationId}${force ? ' (sent as typed)' : ''}...`);
+    return await window.pywebview.api.teleport_to_location_api(locationId, force);
+}
+
+async function searchCatalogApi(query, kind = null, category = null, limit = 25) {
+    logMessage(`API: Searching catalog for "${query}"...`);
+    return await window.pywebview.api.search(query, kind, category, limit);
+}
+
+async function queryItemsApi(predicates = [], sort = null, descending = false, limit = 50, offset = 0,
+                             category = null, subcategory = null) {
+    return await window.pywebview.api.query_items(predicates, sort, descending, limit, offset, category, subcategory);
+}
+
+async function fuzzyMatchApi(text, kind = null, limit = 5) {
+    return await window.pywebview.api.fuzzy_match(text, kind, limit);
+}
+
+async function completeApi(text, limit = 10) {
+    return await window.pywebview.api.complete(text, limit);
 }
 
-async function teleportPlayerApi(locationId) {
-    logMessage(`API: Attempting to teleport to ${locationId}...`);
-    return await window.pywebview.api.teleport_to_location_api(locationId);
+async function loadHistoryApi(prefix = null, contains = null, limit = 50) {
+    return await window.pywebview.api.get_history(prefix, contains, limit);
 }
 
 console.log("api.js loaded."); 
\ No newline at end of file
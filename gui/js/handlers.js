@@ -2,13 +2,17 @@ console.log("Loading handlers.js...");
 
 // --- Event Handlers ---
 
+function showGameStatus(result) {
+    updateStatusIndicator(result.status);
+    logMessage(`Status check result: ${result.status}`);
+    (result.save_errors || []).forEach(message => logMessage(`Not saved: ${message}`, 'error'));
+}
+
 async function handleCheckGameStatus() {
     logMessage('Checking game status...');
     updateStatusIndicator('Checking...');
     try {
-        const result = await checkGameStatusApi();
-        updateStatusIndicator(result.status);
-        logMessage(`Status check result: ${result.status}`);
+        showGameStatus(await checkGameStatusApi());
     } catch (error) {
         setStatusIndicatorError('Error');
         logMessage(`Error checking status: ${error}`, 'error');
@@ -29,6 +33,7 @@ async function handleRunSingleCommand() {
         if (result.success) {
             logMessage(`Single command executed successfully.`);
             commandInput.value = ''; 
+            resetHistoryRecall();
         } else {
             logMessage(`Failed to execute single command: ${result.message || 'Unknown error'}`, 'error');
         }
@@ -41,12 +46,66 @@ async function handleRunSingleCommand() {
     }
 }
 
+// Typeahead for the command box: wait for a short pause in typing, and drop
+// responses that arrive after the input has changed again.
+const TYPEAHEAD_DELAY_MS = 120;
+let typeaheadTimer = null;
+let typeaheadSeq = 0;
+
+function handleCommandInputTypeahead() {
+    clearTimeout(typeaheadTimer);
+    const text = commandInput.value;
+    if (!text.trim()) {
+        populateCommandSuggestions([]);
+        return;
+    }
+    typeaheadTimer = setTimeout(async () => {
+        const seq = ++typeaheadSeq;
+        try {
+            const result = await completeApi(text);
+            if (seq === typeaheadSeq) populateCommandSuggestions(result.completions);
+        } catch (error) {
+            console.error("Typeahead Error:", error);
+        }
+    }, TYPEAHEAD_DELAY_MS);
+}
+
+// Shell-style recall in the command box: Up/Down step through past commands
+// (this and earlier sessions, GUI and CLI) that start with what was typed
+// before the first Up.
+const HISTORY_RECALL_LIMIT = 100;
+
+async function handleCommandHistoryKey(event) {
+    if (event.key !== 'ArrowUp' && event.key !== 'ArrowDown') return;
+    event.preventDefault(); // Keep the caret (and the suggestion list) where it is
+    if (!historyRecall) {
+        const prefix = commandInput.value;
+        try {
+            const result = await loadHistoryApi(prefix.trim() || null, null, HISTORY_RECALL_LIMIT);
+            historyRecall = { prefix, commands: result.history || [], index: -1 };
+        } catch (error) {
+            logMessage(`Error loading command history: ${error}`, 'error');
+            return;
+        }
+    }
+    const step = event.key === 'ArrowUp' ? 1 : -1;
+    historyRecall.index = Math.min(Math.max(historyRecall.index + step, -1), historyRecall.commands.length - 1);
+    commandInput.value = historyRecall.index === -1 ? historyRecall.prefix : historyRecall.commands[historyRecall.index];
+}
+
+function resetHistoryRecall() {
+    historyRecall = null;
+}
+
+function showPresets(result) {
+    populatePresets(result.presets || [], result.descriptions || {});
+}
+
 async function handleLoadPresets() {
     logMessage('Handling load presets...');
     populateDropdown(presetSelect, [], '-- Loading... --');
     try {
-        const result = await loadPresetsApi();
-        populatePresets(result.presets || []);
+        showPresets(await loadPresetsApi());
     } catch (error) {
         logMessage(`Error loading presets: ${error}`, 'error');
         populateDropdown(presetSelect, [], '-- Error Loading --');
@@ -72,15 +131,18 @@ async function handleRunPresetBattle() {
     }
 }
 
+function showItemTypes(result) {
+    Object.assign(categoryRecordCounts, result.counts || {});
+    populateItemTypes(result.categories || {});
+}
+
 async function handleLoadItemTypes() {
     logMessage('Handling load item types...');
     populateDropdown(itemTypeSelect, [], '-- Loading... --');
     setElementDisabled(itemCategorySelect, true);
-    setElementDisabled(itemSelect, true);
     setElementDisabled(addItemBtn, true);
     try {
-        const result = await loadItemTypesAndSubcategoriesApi();
-        populateItemTypes(result.categories || {});
+        showItemTypes(await loadItemTypesAndSubcategoriesApi());
     } catch (error) {
         logMessage(`Error loading item types: ${error}`, 'error');
         populateDropdown(itemTypeSelect, [], '-- Error Loading --');
@@ -90,47 +152,48 @@ async function handleLoadItemTypes() {
 // Handler for when item type changes - delegates to UI function
 function handleItemTypeChange() {
     populateItemSubcategories();
+    resetItemList();
 }
 
-// Handler for when item category changes
+// Handler for when item category changes. The item list pages through the
+// category with list_page, so large categories cost no more than small ones.
 async function handleLoadItemsForCategory() {
     const selectedFilename = itemCategorySelect.value;
-    populateDropdown(itemSelect, [], '-- Loading Items... --');
     setElementDisabled(addItemBtn, true);
     displayItemDetails(null);
+    if (selectedFilename) logMessage(`Handling load items for category: ${selectedFilename}`);
+    await itemList.setSource(selectedFilename); // Errors are logged by the list
+}
 
-    if (!selectedFilename) {
-        populateDropdown(itemSelect, [], '-- Select Category First --');
-        return;
-    }
-    logMessage(`Handling load items for category: ${selectedFilename}`);
-    try {
-        const result = await loadItemsForCategoryApi(selectedFilename);
-        populateItems(result.items || {});
-    } catch (error) {
-         logMessage(`Error loading items: ${error}`, 'error');
-         populateDropdown(itemSelect, [], '-- Error Loading Items --');
-    }
+// After the shown category file changed on disk: same file, filter and selection
+async function reloadItemList() {
+    if (itemList.source !== itemCategorySelect.value) return handleLoadItemsForCategory();
+    await itemList.reload();
+    if (itemList.value) handleItemSelectionChange(); // The selected record may have changed
 }
 
-// Handler for when item selection changes
-function handleItemSelectionChange() {
-    setElementDisabled(addItemBtn, !itemSelect.value);
-    const selectedOption = itemSelect.options[itemSelect.selectedIndex];
-    let details = null;
-    if (selectedOption && selectedOption.dataset.details) {
-        try {
-            details = JSON.parse(selectedOption.dataset.details);
-            details.name = selectedOption.textContent; // Add name for display function
-        } catch (e) {
-            logMessage('Error parsing item details from dropdown', 'error');
+// Handler for when item selection changes. The item list only holds names and
+// IDs, so the selected item's record is fetched on its own.
+async function handleItemSelectionChange() {
+    const itemId = itemList.value;
+    setElementDisabled(addItemBtn, !itemId);
+    displayItemDetails(null);
+    if (!itemId) return;
+    try {
+        const result = await getItemDetailsApi(itemId);
+        if (itemList.value !== itemId) return; // Selection moved on while this was loading
+        if (result.success) {
+            displayItemDetails(result.item);
+        } else {
+            logMessage(`Could not load item details: ${result.message}`, 'warn');
         }
+    } catch (error) {
+        logMessage(`Error loading item details: ${error}`, 'error');
     }
-    displayItemDetails(details);
 }
 
 async function handleAddItem() {
-    const itemId = itemSelect.value;
+    const itemId = itemList.value;
     const quantity = itemQuantityInput.value;
 
     if (!itemId) {
@@ -171,20 +234,17 @@ async function handleAddItem() {
     }
 }
 
+function showNpcs(result) {
+    npcList.seed(result);
+}
+
 async function handleLoadNpcs() {
     logMessage('Handling load NPCs...');
-    populateDropdown(npcSelect, [], '-- Loading... --');
-    try {
-        const result = await loadNpcsApi();
-        populateNpcs(result.npcs || {});
-    } catch (error) {
-        logMessage(`Error loading NPCs: ${error}`, 'error');
-        populateDropdown(npcSelect, [], '-- Error Loading NPCs --');
-    }
+    await npcList.reload(); // Keeps the filter and selection; errors are logged by the list
 }
 
 async function handleAddNpcGroup() {
-    const npcId = npcSelect.value;
+    const npcId = npcList.value;
     const quantity = npcQuantityInput.value;
 
     if (!npcId) {
@@ -261,20 +321,22 @@ async function handleRunCustomBattle() {
     }
 }
 
+function showFavorites(result) {
+    if (!result.success || !result.favorites) {
+        throw new Error("Failed to load favorites or invalid data received.");
+    }
+    populateFavorites(result.favorites, result.quick || []);
+    if (result.favorites.length === 0) {
+        populateDropdown(favoriteSelect, [], '-- No Favorites Saved --');
+    }
+}
+
 async function handleLoadFavorites() {
     logMessage("Handling load favorites...");
     populateDropdown(favoriteSelect, [], '-- Loading... --');
     setBatchDisabled([runFavoriteBtn, deleteFavoriteBtn], true);
     try {
-        const result = await loadFavoritesApi();
-        if (result.success && result.favorites) {
-            populateFavorites(result.favorites);
-             if(result.favorites.length === 0) {
-                 populateDropdown(favoriteSelect, [], '-- No Favorites Saved --');
-             }
-        } else {
-            throw new Error("Failed to load favorites or invalid data received.");
-        }
+        showFavorites(await loadFavoritesApi());
     } catch (error) {
         logMessage(`Error loading favorites: ${error}`, 'error');
         populateDropdown(favoriteSelect, [], '-- Error Loading --');
@@ -296,26 +358,40 @@ async function handleSaveFavorite(name, command, type) {
     }
 }
 
-async function handleRunFavorite() {
-    const selectedName = favoriteSelect.value;
+async function handleRunFavorite(selectedName = favoriteSelect.value) {
     if (!selectedName) {
         logMessage("No favorite selected to run.", 'warn');
         return;
     }
     setBatchDisabled([runFavoriteBtn, deleteFavoriteBtn], true);
     logMessage(`Handling run favorite: ${selectedName}...`);
+    let ran = false;
     try {
         const result = await runFavoriteApi(selectedName);
         logMessage(result.message || `Favorite run attempt finished. Success: ${result.success}`, result.success ? 'info' : 'error');
+        ran = true;
     } catch (error) {
         logMessage(`Error running favorite: ${error}`, 'error');
     } finally {
+        if (ran) {
+            // The run moved it up the ranking; reload the order and quick slots, keeping the selection
+            const selection = favoriteSelect.value;
+            await handleLoadFavorites();
+            favoriteSelect.value = selection;
+        }
         setBatchDisabled([runFavoriteBtn, deleteFavoriteBtn], false);
         handleFavoriteSelection(); // Update button state based on selection
         handleCheckGameStatus();
     }
 }
 
+function handleQuickSlotClick(event) {
+    const button = event.target.closest('.quick-slot-btn');
+    if (button) {
+        handleRunFavorite(button.dataset.favorite);
+    }
+}
+
 async function handleDeleteFavorite() {
     const selectedName = favoriteSelect.value;
     if (!selectedName) {
@@ -347,6 +423,11 @@ async function handleDeleteFavorite() {
 }
 
 // --- Location Handlers ---
+function showLocationCategories(result) {
+    Object.assign(categoryRecordCounts, result.counts || {});
+    populateLocationCategories(result.categories || {});
+}
+
 async function handleLoadLocationCategories() {
     logMessage('Handling load location categories...');
     populateDropdown(locationCategorySelect, [], '-- Loading... --');
@@ -355,7 +436,7 @@ async function handleLoadLocationCategories() {
     try {
         const result = await loadLocationCategoriesApi();
         console.log("[HANDLER] Received categories result:", JSON.stringify(result)); 
-        populateLocationCategories(result.categories || {});
+        showLocationCategories(result);
     } catch (error) {
         logMessage(`Error loading location categories: ${error}`, 'error');
         populateDropdown(locationCategorySelect, [], '-- Error Loading --');
@@ -383,25 +464,85 @@ async function handleLoadLocationsForCategory() {
     }
 }
 
-// Handler for when location selection changes - delegates to UI
+// Handler for when location selection changes - shows the floors of its building
 function handleLocationSelectionChange() {
     if (teleportButton) {
         teleportButton.disabled = !locationSelect.value;
     }
+    handleLoadLocationFloors(locationSelect.value);
 }
 
-async function handleTeleportPlayer() {
-    const locationId = locationSelect.value;
+async function handleLoadLocationFloors(locationId) {
     if (!locationId) {
+        populateLocationFloors([], null);
+        return;
+    }
+    try {
+        const result = await loadRelatedLocationsApi(locationId);
+        populateLocationFloors(result.floors || [], locationId);
+    } catch (error) {
+        logMessage(`Error loading floors: ${error}`, 'error');
+        populateLocationFloors([], null);
+    }
+}
+
+// The floor dropdown overrides the location dropdown once a floor is picked
+function handleLocationFloorChange() {
+    if (teleportButton) {
+        teleportButton.disabled = !(locationFloorSelect.value || locationSelect.value);
+    }
+}
+
+function showLocationArea(result, key = null) {
+    locationAreaKey = key;
+    populateLocationArea(result);
+}
+
+async function handleLoadLocationArea(key = null) {
+    try {
+        showLocationArea(await loadLocationTreeApi(key), key);
+    } catch (error) {
+        logMessage(`Error loading location areas: ${error}`, 'error');
+    }
+}
+
+function handleLocationAreaChange() {
+    const option = locationAreaSelect.options[locationAreaSelect.selectedIndex];
+    if (!option || !option.value) return;
+    if (option.value === '..') {
+        handleLoadLocationArea(option.dataset.key || null);
+    } else if (option.dataset.cell) {
+        handleLoadLocationFloors(option.dataset.cell).then(handleLocationFloorChange);
+    } else {
+        handleLoadLocationArea(option.value);
+    }
+}
+
+function selectedTeleportTarget() {
+    const select = locationFloorSelect && locationFloorSelect.value ? locationFloorSelect : locationSelect;
+    if (!select.value) return null;
+    return { id: select.value, name: select.options[select.selectedIndex].text.trim() };
+}
+
+async function handleTeleportPlayer() {
+    const target = selectedTeleportTarget();
+    if (!target) {
         logMessage('Please select a location first.', 'warning');
         return;
     }
-    const locationName = locationSelect.options[locationSelect.selectedIndex].text;
+    const locationId = target.id;
+    const locationName = target.name;
     
     setBatchDisabled([teleportButton, locationCategorySelect, locationSelect], true);
     logMessage(`Handling teleport to ${locationName} (ID: ${locationId})...`);
     try {
-        const result = await teleportPlayerApi(locationId);
+        let result = await teleportPlayerApi(locationId);
+        // Cells missing from the bundled catalog are refused with suggestions;
+        // the catalog does not list every cell, so offer to send it as typed
+        if (result && !result.success && Array.isArray(result.suggestions) &&
+            confirm(`${result.message}\n\nSend "coc ${locationId}" as typed anyway?`)) {
+            result = await teleportPlayerApi(locationId, true);
+        }
         if (result && result.success) {
             logMessage(`Teleport command for ${locationName} sent successfully. Command: ${result.command}`, 'success');
         } else {
@@ -412,9 +553,120 @@ async function handleTeleportPlayer() {
         logMessage(`Error calling teleport API: ${error}`, 'error');
     } finally {
          setBatchDisabled([locationCategorySelect, locationSelect], false);
-         handleLocationSelectionChange(); // Re-enable button based on selection
+         handleLocationFloorChange(); // Re-enable button based on selection
          handleCheckGameStatus();
     }
 }
 
-console.log("handlers.js loaded."); 
\ No newline at end of file
+// --- Startup ---
+// One bootstrap call returns every list shown on first paint. Each section is
+// rendered exactly like its own load handler would; a section the server could
+// not build (or the whole call failing) falls back to that handler.
+const BOOTSTRAP_SECTIONS = [
+    ['status', showGameStatus, handleCheckGameStatus],
+    ['presets', showPresets, handleLoadPresets],
+    ['item_types', showItemTypes, handleLoadItemTypes],
+    ['npcs', showNpcs, handleLoadNpcs],
+    ['favorites', showFavorites, handleLoadFavorites],
+    ['location_categories', showLocationCategories, handleLoadLocationCategories],
+    ['location_tree', showLocationArea, handleLoadLocationArea],
+];
+
+async function handleBootstrap() {
+    let payload;
+    try {
+        payload = await bootstrapApi();
+    } catch (error) {
+        logMessage(`Bootstrap failed, loading each list on its own: ${error}`, 'warn');
+        BOOTSTRAP_SECTIONS.forEach(([, , load]) => load());
+        return;
+    }
+    const sections = payload.sections || {};
+    BOOTSTRAP_SECTIONS.forEach(([name, show, load]) => {
+        if (!(name in sections)) {
+            logMessage(`Bootstrap had no ${name} (${(payload.errors || {})[name] || 'missing'}), loading it on its own.`, 'warn');
+            load();
+            return;
+        }
+        try {
+            show(sections[name]);
+            sectionVersions[name] = (payload.versions || {})[name];
+        } catch (error) {
+            logMessage(`Error showing ${name}: ${error}`, 'error');
+            load();
+        }
+    });
+    // performance.now() counts from navigation start, so this is the time until every list is usable
+    logMessage(`Time to interactive: ${Math.round(performance.now())} ms (bootstrap built in ${payload.elapsed_ms} ms).`);
+}
+
+// --- Data Hot Reload ---
+// Called from Python (window.evaluate_js) with the CatalogChange list whenever
+// the data directory watcher re-parsed files. Only dropdowns showing a
+// changed file are reloaded; a rebuilt catalog reloads every data dropdown.
+function onCatalogChanged(changes) {
+    if (!Array.isArray(changes) || changes.length === 0) return;
+    if (changes.some(change => change.rebuilt)) {
+        logMessage('Data categories changed on disk, reloading lists.');
+        handleLoadItemTypes();
+        handleLoadNpcs();
+        handleLoadLocationCategories();
+        handleLoadLocationArea();
+        return;
+    }
+    let reloadItems = false, reloadLocations = false, reloadNpcs = false, reloadAreas = false;
+    changes.forEach(change => {
+        logMessage(`Data file updated: ${change.source} (+${change.added.length} -${change.removed.length} ~${change.changed.length})`);
+        categoryRecordCounts[change.source] = change.records;
+        if (change.kind === 'npc') reloadNpcs = true;
+        if (change.kind === 'location') reloadAreas = true;
+        if (change.source === itemCategorySelect.value) reloadItems = true;
+        if (change.source === locationCategorySelect.value) reloadLocations = true;
+    });
+    // Sub-category labels show record counts; re-render them only if one of
+    // the files listed under the selected item type changed
+    const shownFiles = Object.values(allItemCategories[itemTypeSelect.value] || {});
+    if (changes.some(change => shownFiles.includes(change.source))) {
+        const selected = itemCategorySelect.value;
+        populateItemSubcategories();
+        itemCategorySelect.value = selected;
+        reloadItems = reloadItems || !!selected;
+    }
+    if (reloadItems) reloadItemList();
+    if (reloadLocations) reloadKeepingSelection(locationSelect, handleLoadLocationsForCategory, handleLocationSelectionChange);
+    if (reloadNpcs) handleLoadNpcs();
+    if (reloadAreas) handleLoadLocationArea(locationAreaKey);
+}
+
+async function reloadKeepingSelection(selectElement, loadHandler, changeHandler = null) {
+    const selected = selectElement.value;
+    await loadHandler();
+    if (selected && Array.from(selectElement.options).some(option => option.value === selected)) {
+        selectElement.value = selected;
+        if (changeHandler) changeHandler();
+    }
+}
+
+// --- Job Progress ---
+// Called from Python (window.evaluate_js) with a batch of progress events of
+// running battles (see src/progress.py), at most every 100 ms. Only the last
+// event is drawn; failures and results are also written to the log.
+const JOB_PROGRESS_LINGER_MS = 5000;
+
+function onJobProgress(events) {
+    if (!Array.isArray(events) || events.length === 0) return;
+    events.forEach(event => {
+        if (event.type === 'failed') {
+            const where = event.step ? `step ${event.step} of ${event.total} (${event.command})` : 'start';
+            logMessage(`${event.name}: ${where} failed: ${event.message}`, 'error');
+        }
+    });
+    clearTimeout(jobProgressHideTimer);
+    const last = events[events.length - 1];
+    displayJobProgress(last);
+    if (last.type === 'finished') {
+        jobProgressHideTimer = setTimeout(() => { jobProgressPanel.hidden = true; }, JOB_PROGRESS_LINGER_MS);
+    }
+}
+
+console.log("handlers.js loaded."); 
@@ -10,17 +10,24 @@ function setupEventListeners() {
     if (addNpcGroupBtn) addNpcGroupBtn.addEventListener('click', handleAddNpcGroup);
     if (savePresetBtn) savePresetBtn.addEventListener('click', handleSavePreset);
     if (runCustomBattleBtn) runCustomBattleBtn.addEventListener('click', handleRunCustomBattle);
-    if (runFavoriteBtn) runFavoriteBtn.addEventListener('click', handleRunFavorite);
+    if (runFavoriteBtn) runFavoriteBtn.addEventListener('click', () => handleRunFavorite());
+    if (favoriteQuickSlots) favoriteQuickSlots.addEventListener('click', handleQuickSlotClick);
     if (deleteFavoriteBtn) deleteFavoriteBtn.addEventListener('click', handleDeleteFavorite);
     if (teleportButton) teleportButton.addEventListener('click', handleTeleportPlayer);
 
     // --- Select Changes ---
     if (itemTypeSelect) itemTypeSelect.addEventListener('change', handleItemTypeChange);
     if (itemCategorySelect) itemCategorySelect.addEventListener('change', handleLoadItemsForCategory);
-    if (itemSelect) itemSelect.addEventListener('change', handleItemSelectionChange);
+    if (itemListContainer) itemListContainer.addEventListener('change', handleItemSelectionChange);
     if (favoriteSelect) favoriteSelect.addEventListener('change', handleFavoriteSelection); // UI only
     if (locationCategorySelect) locationCategorySelect.addEventListener('change', handleLoadLocationsForCategory);
     if (locationSelect) locationSelect.addEventListener('change', handleLocationSelectionChange); // UI only
+    if (locationAreaSelect) locationAreaSelect.addEventListener('change', handleLocationAreaChange);
+    if (locationFloorSelect) locationFloorSelect.addEventListener('change', handleLocationFloorChange); // UI only
+
+    // --- Virtualized Lists ---
+    if (itemListContainer) itemList = createVirtualList(itemListContainer, { kind: 'item', placeholder: 'Filter items...', noun: 'items', noSourceText: 'Select a sub-category first' });
+    if (npcListContainer) npcList = createVirtualList(npcListContainer, { kind: 'npc', placeholder: 'Filter NPCs...', noun: 'NPCs' });
 
     // --- Other UI Interactions ---
     // Setup collapsible sections/toggles
@@ -34,6 +41,11 @@ function setupEventListeners() {
                  handleRunSingleCommand();
              }
          });
+         commandInput.addEventListener('keydown', handleCommandHistoryKey);
+         commandInput.addEventListener('input', () => {
+             resetHistoryRecall(); // Typing starts a new recall from the edited text
+             handleCommandInputTypeahead();
+         });
      }
      
      // Add listeners for favorite checkboxes/inputs (if needed for dynamic display)
@@ -52,12 +64,8 @@ function performInitialLoad() {
     logMessage('GUI Initialized and pywebview API ready.');
     try {
         logMessage('Calling initial loading functions...');
-        handleCheckGameStatus(); // Use handler to update UI correctly
-        handleLoadPresets();
-        handleLoadItemTypes(); 
-        handleLoadNpcs();
-        handleLoadFavorites();
-        handleLoadLocationCategories();
+        updateStatusIndicator('Checking...');
+        handleBootstrap(); // One bridge call for status, presets, item types, NPCs, favorites and locations
         updateBattleCommandDisplay(); // Initial UI state update
         logMessage('Initial loading functions called.');
     } catch (error) {
@@ -3,5 +3,13 @@ console.log("Loading state.js...");
 // Global state for application
 let currentBattleCommandList = [];
 let allItemCategories = {}; // Store the nested category structure
+let categoryRecordCounts = {}; // { data file: record count } from the data manifest
+let locationAreaKey = null; // Location hierarchy level shown in the Browse dropdown (null = regions)
+let sectionVersions = {}; // { bootstrap section: version tag } of the data each list was rendered from
+let catalogResponses = new Map(); // Request key -> { version, data } of versioned catalog replies (see api.js)
+let jobProgressHideTimer = null; // Hides the job progress panel a while after the last job finished
+let itemList = null; // Virtualized item list of the selected sub-category, created in setupEventListeners
+let npcList = null; // Virtualized NPC list (see virtual_list.js), created in setupEventListeners
+let historyRecall = null; // Up/Down recall in the command box: { prefix, commands, index }, null when not recalling
 
 console.log("state.js loaded."); 
\ No newline at end of file
@@ -2,27 +2,33 @@ console.log("Loading ui.js...");
 
 // --- DOM Element References ---
 const commandInput = document.getElementById('command-input');
+const commandSuggestions = document.getElementById('command-suggestions');
 const runSingleBtn = document.getElementById('run-single-btn');
 const presetSelect = document.getElementById('preset-select');
 const runPresetBtn = document.getElementById('run-preset-btn');
 const logOutputEl = document.getElementById('log-output');
 const itemTypeSelect = document.getElementById('item-type-select');
 const itemCategorySelect = document.getElementById('item-category-select');
-const itemSelect = document.getElementById('item-select');
+const itemListContainer = document.getElementById('item-list');
 const itemQuantityInput = document.getElementById('item-quantity-input');
 const addItemBtn = document.getElementById('add-item-btn');
-const npcSelect = document.getElementById('npc-select');
+const npcListContainer = document.getElementById('npc-list');
 const npcQuantityInput = document.getElementById('npc-quantity-input');
 const addNpcGroupBtn = document.getElementById('add-npc-group-btn');
 const currentBattleCommandsDiv = document.getElementById('current-battle-commands');
 const presetNameInput = document.getElementById('preset-name-input');
 const savePresetBtn = document.getElementById('save-preset-btn');
 const runCustomBattleBtn = document.getElementById('run-custom-battle-btn');
+const jobProgressPanel = document.getElementById('job-progress');
+const jobProgressLabel = document.getElementById('job-progress-label');
+const jobProgressBar = document.getElementById('job-progress-bar');
+const jobProgressDetail = document.getElementById('job-progress-detail');
 const addItemSaveFavorite = document.getElementById('add-item-save-favorite');
 const addItemFavoriteName = document.getElementById('add-item-favorite-name');
 const favoriteSelect = document.getElementById('favorite-select');
 const runFavoriteBtn = document.getElementById('run-favorite-btn');
 const deleteFavoriteBtn = document.getElementById('delete-favorite-btn');
+const favoriteQuickSlots = document.getElementById('favorite-quick-slots');
 const logOutputContainer = document.getElementById('log-output-container');
 const toggleLogBtn = document.getElementById('toggle-log-btn');
 const battleStageColumn = document.getElementById('battle-stage-column');
@@ -38,6 +44,8 @@ const favoritesDropdown = document.getElementById('favorites-dropdown');
 const locationCategorySelect = document.getElementById('location-category-select');
 const locationSelect = document.getElementById('location-select');
 const teleportButton = document.getElementById('teleport-button');
+const locationAreaSelect = document.getElementById('location-area-select');
+const locationFloorSelect = document.getElementById('location-floor-select');
 const teleportContainer = document.getElementById('teleport-section'); 
 const teleportContent = document.getElementById('teleport-content'); 
 const toggleTeleportBtn = document.getElementById('toggle-teleport-btn'); 
@@ -97,7 +105,7 @@ function populateDropdown(selectElement, options, defaultOptionText, valueKey =
             const option = document.createElement('option');
             option.value = item[valueKey];
             option.textContent = item[textKey];
-             // Add data attributes if needed (e.g., item details)
+             // Add data attributes if needed (e.g., location tree keys)
              if (item.dataAttributes) {
                  Object.entries(item.dataAttributes).forEach(([key, value]) => {
                      option.dataset[key] = value;
@@ -113,25 +121,44 @@ function populateDropdown(selectElement, options, defaultOptionText, valueKey =
     }
 }
 
-function populatePresets(presets) {
-    const options = presets.map(name => ({ value: name, textContent: name }));
+function populatePresets(presets, descriptions = {}) {
+    const options = presets.map(name => ({
+        value: name,
+        textContent: descriptions[name] ? `${name} (${descriptions[name]})` : name
+    }));
     populateDropdown(presetSelect, options, '-- Select a Preset --');
 }
 
-function populateNpcs(npcs) {
-    const sortedNpcs = Object.entries(npcs).sort(([, a], [, b]) => a.localeCompare(b));
-    const options = sortedNpcs.map(([name, id]) => ({ value: id, textContent: name }));
-    populateDropdown(npcSelect, options, '-- Select NPC --');
-}
-
-function populateFavorites(favorites) {
-    const sortedFavorites = favorites.sort((a, b) => a.name.localeCompare(b.name));
-    const options = sortedFavorites.map(fav => ({ value: fav.name, textContent: fav.name }));
+// Favorites arrive most used first; `quick` names the top few for the quick slot buttons
+function populateFavorites(favorites, quick = []) {
+    const options = favorites.map(fav => ({
+        value: fav.name,
+        textContent: fav.description ? `${fav.name} (${fav.description})` : fav.name
+    }));
     populateDropdown(favoriteSelect, options, '-- Select Favorite --');
+    populateFavoriteQuickSlots(quick);
     // Enable/disable buttons after populating
     handleFavoriteSelection();
 }
 
+function populateFavoriteQuickSlots(quick) {
+    if (!favoriteQuickSlots) return;
+    favoriteQuickSlots.innerHTML = '';
+    quick.forEach((name, i) => {
+        const button = document.createElement('button');
+        button.className = 'quick-slot-btn';
+        button.textContent = name;
+        button.title = `Quick slot ${i + 1}: run "${name}"`;
+        button.dataset.favorite = name; // Clicks are handled by the container (see main.js)
+        favoriteQuickSlots.appendChild(button);
+    });
+}
+
+function withRecordCount(name, filename) {
+    const count = categoryRecordCounts[filename];
+    return count === undefined ? name : `${name} (${count})`;
+}
+
 function populateItemTypes(categories) {
     allItemCategories = categories; // Update global state
     const typeNames = Object.keys(categories).sort();
@@ -139,16 +166,20 @@ function populateItemTypes(categories) {
     populateDropdown(itemTypeSelect, options, '-- Select Type --');
     // Reset dependent dropdowns
     populateItemSubcategories(); 
+    resetItemList();
+}
+
+// Empties the item list until a sub-category is picked
+function resetItemList() {
+    if (itemList) itemList.setSource(null);
+    addItemBtn.disabled = true;
+    displayItemDetails(null); // Clear details display
 }
 
 function populateItemSubcategories() {
     const selectedType = itemTypeSelect.value;
     itemCategorySelect.innerHTML = '<option value="">-- Loading... --</option>';
-    itemSelect.innerHTML = '<option value="">-- Select Sub-Category --</option>';
     itemCategorySelect.disabled = true;
-    itemSelect.disabled = true;
-    addItemBtn.disabled = true;
-    displayItemDetails(null); // Clear details display
 
     if (!selectedType || !allItemCategories[selectedType]) {
         populateDropdown(itemCategorySelect, [], '-- Select Type First --');
@@ -159,40 +190,18 @@ function populateItemSubcategories() {
     const subCategoryNames = Object.keys(subCategories).sort();
     const options = subCategoryNames.map(name => ({ 
         value: subCategories[name], // Filename is value
-        textContent: name 
+        textContent: withRecordCount(name, subCategories[name])
     }));
     populateDropdown(itemCategorySelect, options, '-- Select Sub-Category --');
 }
 
-function populateItems(items) {
-    itemSelect.innerHTML = '<option value="">-- Loading... --</option>';
-    addItemBtn.disabled = true;
-    displayItemDetails(null); // Clear details
-
-    if (!items || Object.keys(items).length === 0) {
-        populateDropdown(itemSelect, [], '-- No Items Found --');
-        return;
-    }
-    
-    const itemEntries = Object.entries(items);
-    // Consider sorting if backend doesn't guarantee it
-    // itemEntries.sort((a, b) => a[0].localeCompare(b[0])); 
-    
-    const options = itemEntries.map(([name, details]) => ({
-        value: details.id, 
-        textContent: name,
-        dataAttributes: { details: JSON.stringify(details) } // Store details
-    }));
-    populateDropdown(itemSelect, options, '-- Select Item --');
-}
-
 function populateLocationCategories(categories) {
     const categoryEntries = Object.entries(categories);
     // Backend should sort, but can sort here if needed
     // categoryEntries.sort((a, b) => a[0].localeCompare(b[0])); 
     const options = categoryEntries.map(([name, filename]) => ({ 
         value: filename, 
-        textContent: name 
+        textContent: withRecordCount(name, filename)
     }));
     populateDropdown(locationCategorySelect, options, '-- Select Category --');
     // Reset dependent dropdown
@@ -214,8 +223,65 @@ function populateLocations(locations) {
     populateDropdown(locationSelect, options, '-- Select Location --');
 }
 
+// Browse dropdown: groups drill down a level, cells pick a teleport target.
+function populateLocationArea(result) {
+    const path = result.path || [];
+    const options = [];
+    if (path.length > 0) {
+        const parent = path.length > 1 ? path[path.length - 2] : null;
+        options.push({ value: '..', textContent: `\u2190 Back to ${parent ? parent.label : 'all regions'}`,
+                       dataAttributes: { key: parent ? parent.key : '' } });
+    }
+    (result.nodes || []).forEach(node => options.push({
+        value: node.key,
+        textContent: node.cell ? (node.children ? `${node.label} (+${node.children})` : node.label)
+                               : `${node.label} \u25B8`,
+        dataAttributes: { cell: node.cell || '' }
+    }));
+    const placeholder = path.length > 0 ? `-- ${path.map(node => node.label).join(' / ')} --` : '-- Browse Areas --';
+    populateDropdown(locationAreaSelect, options, placeholder);
+}
+
+// Floor dropdown: the building of the selected cell and all its sub-cells, indented by depth.
+function populateLocationFloors(floors, selectedCell) {
+    const options = (floors || []).map(node => ({
+        value: node.cell,
+        textContent: `${'\u00A0\u00A0'.repeat(node.depth)}${node.label}`
+    }));
+    populateDropdown(locationFloorSelect, options, floors && floors.length ? '-- Select Floor --' : '-- No Floors --');
+    if (selectedCell && options.some(option => option.value === selectedCell)) {
+        locationFloorSelect.value = selectedCell;
+    }
+}
 
 // --- UI Updates --- 
+function formatSeconds(seconds) {
+    const total = Math.round(seconds);
+    return total >= 60 ? `${Math.floor(total / 60)}m ${total % 60}s` : `${total}s`;
+}
+
+// Shows the latest progress event of a running job (see onJobProgress)
+function displayJobProgress(event) {
+    if (!jobProgressPanel) return;
+    jobProgressPanel.hidden = false;
+    jobProgressBar.max = event.total || 1;
+    if (event.type === 'finished') {
+        jobProgressBar.value = event.success ? jobProgressBar.max : jobProgressBar.value;
+        jobProgressLabel.textContent = `${event.name}: ${event.success ? 'done' : 'failed'} after ${formatSeconds(event.elapsed_s)}`;
+        jobProgressDetail.textContent = event.message || '';
+        return;
+    }
+    if (event.type === 'failed') {
+        jobProgressDetail.textContent = `Failed${event.step ? ` at step ${event.step}` : ''}: ${event.message || ''}`;
+        return;
+    }
+    const step = event.step || 0;
+    jobProgressBar.value = Math.max(step - 1, 0); // Steps are reported as they start
+    const eta = event.eta_s !== null && event.eta_s !== undefined ? `, about ${formatSeconds(event.eta_s)} left` : '';
+    jobProgressLabel.textContent = `${event.name}: step ${step} of ${event.total}${eta}`;
+    jobProgressDetail.textContent = event.command || '';
+}
+
 function displayItemDetails(details) {
     const detailsDiv = document.getElementById('item-details-display');
     if (!detailsDiv) return;
@@ -340,4 +406,16 @@ function setupToggleListeners() {
     }
 }
 
+function populateCommandSuggestions(completions) {
+    if (!commandSuggestions) return;
+    commandSuggestions.innerHTML = '';
+    (completions || []).forEach(completion => {
+        if (!completion.command) return; // Presets have no single command to insert
+        const option = document.createElement('option');
+        option.value = completion.command;
+        option.label = `${completion.label} (${completion.kind})`;
+        commandSuggestions.appendChild(option);
+    });
+}
+
 console.log("ui.js loaded."); 
\ No newline at end of file
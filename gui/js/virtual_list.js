@@ -0,0 +1,235 @@
+console.log("Loading virtual_list.js...");
+
+// --- Virtualized Lists ---
+// A scrolling list over Api.list_page for catalogs too big for a <select>.
+// Only the rows in view (plus a few beyond each edge) exist in the DOM, and
+// they are reused as the list scrolls; rows arrive a page at a time as they
+// come into view, so 50k entries cost about as much as 50. Typing in the
+// filter box asks the server for the matching rows after a short pause.
+//
+// The list fires 'change' on its container when a row is selected, and holds
+// the selection in .value (record ID) and .label (name), like a <select>.
+// A list can be limited to one category file (source), and switched to
+// another one with setSource().
+
+const VIRTUAL_ROW_HEIGHT = 24; // px, must match .virtual-list-row in style.css
+const VIRTUAL_PAGE_SIZE = 100; // Rows per list_page call
+const VIRTUAL_OVERSCAN = 8; // Rows rendered past each edge of the viewport
+const VIRTUAL_FILTER_DELAY_MS = 150;
+
+function createVirtualList(container, { kind, source = null, placeholder = 'Type to filter...', noun = 'entries',
+                                          noSourceText = null }) {
+    container.classList.add('virtual-list');
+    container.innerHTML = '';
+    const filterInput = document.createElement('input');
+    filterInput.type = 'text';
+    filterInput.className = 'virtual-list-filter';
+    filterInput.placeholder = placeholder;
+    const viewport = document.createElement('div');
+    viewport.className = 'virtual-list-viewport';
+    viewport.tabIndex = 0;
+    const spacer = document.createElement('div'); // Full list height, so the scrollbar is right
+    spacer.className = 'virtual-list-spacer';
+    viewport.appendChild(spacer);
+    const statusLine = document.createElement('div');
+    statusLine.className = 'virtual-list-status';
+    container.append(filterInput, viewport, statusLine);
+
+    const list = {
+        source,
+        value: '',
+        label: '',
+        selectedIndex: -1,
+        query: '',
+        total: 0,
+        version: null,
+        pages: new Map(), // Page index -> rows (array) or the Promise still fetching them
+        seq: 0, // Bumped whenever the list starts over; replies for an older list are dropped
+        rowPool: [],
+        renderQueued: false,
+        filterTimer: null,
+        loaded: false,
+    };
+
+    function rowAt(index) {
+        const page = list.pages.get(Math.floor(index / VIRTUAL_PAGE_SIZE));
+        return Array.isArray(page) ? page[index % VIRTUAL_PAGE_SIZE] : undefined;
+    }
+
+    function setTotal(total) {
+        list.total = total;
+        spacer.style.height = `${total * VIRTUAL_ROW_HEIGHT}px`;
+        statusLine.textContent = total === 0
+            ? (list.query ? 'No matches' : `No ${noun}`)
+            : `${total.toLocaleString()} ${noun}${list.query ? ' matching' : ''}`;
+    }
+
+    function fetchPage(index) {
+        const existing = list.pages.get(index);
+        if (existing) return Promise.resolve(existing);
+        const seq = list.seq;
+        const pending = listPageApi(kind, list.query || null, index * VIRTUAL_PAGE_SIZE, VIRTUAL_PAGE_SIZE, list.source)
+            .then(result => {
+                if (seq !== list.seq) return null;
+                if (!result.success) throw new Error(result.message || 'list_page failed');
+                acceptPage(index, result);
+                return result.rows;
+            })
+            .catch(error => {
+                if (seq === list.seq) list.pages.delete(index); // Retried when it scrolls into view again
+                logMessage(`Error loading ${noun}: ${error}`, 'error');
+                return null;
+            });
+        list.pages.set(index, pending);
+        return pending;
+    }
+
+    function acceptPage(index, result) {
+        if (list.version !== null && result.version !== list.version) {
+            // The catalog changed since the other pages were fetched; they are stale
+            list.pages = new Map();
+        }
+        list.version = result.version;
+        list.pages.set(index, result.rows || []);
+        list.loaded = true;
+        setTotal(result.total || 0);
+        scheduleRender();
+    }
+
+    function scheduleRender() {
+        if (list.renderQueued) return;
+        list.renderQueued = true;
+        requestAnimationFrame(render);
+    }
+
+    function render() {
+        list.renderQueued = false;
+        const height = viewport.clientHeight || VIRTUAL_ROW_HEIGHT * 10;
+        const first = Math.max(0, Math.floor(viewport.scrollTop / VIRTUAL_ROW_HEIGHT) - VIRTUAL_OVERSCAN);
+        const last = Math.min(list.total, Math.ceil((viewport.scrollTop + height) / VIRTUAL_ROW_HEIGHT) + VIRTUAL_OVERSCAN);
+        for (let page = Math.floor(first / VIRTUAL_PAGE_SIZE); page * VIRTUAL_PAGE_SIZE < last; page++) {
+            if (!list.pages.has(page)) fetchPage(page);
+        }
+        const count = Math.max(0, last - first);
+        while (list.rowPool.length < count) {
+            const rowEl = document.createElement('div');
+            rowEl.className = 'virtual-list-row';
+            spacer.appendChild(rowEl);
+            list.rowPool.push(rowEl);
+        }
+        list.rowPool.forEach((rowEl, i) => {
+            if (i >= count) {
+                rowEl.style.display = 'none';
+                return;
+            }
+            const index = first + i;
+            const row = rowAt(index);
+            rowEl.style.display = '';
+            rowEl.style.transform = `translateY(${index * VIRTUAL_ROW_HEIGHT}px)`;
+            rowEl.dataset.index = index;
+            rowEl.textContent = row ? row.name : '…';
+            rowEl.title = row ? `${row.name} (${row.id})` : '';
+            rowEl.classList.toggle('selected', !!row && row.id === list.value);
+        });
+    }
+
+    function startOver() {
+        list.seq++;
+        list.pages = new Map();
+        list.version = null;
+        return fetchPage(Math.floor(viewport.scrollTop / VIRTUAL_ROW_HEIGHT / VIRTUAL_PAGE_SIZE));
+    }
+
+    function select(index) {
+        const row = rowAt(index);
+        if (!row) return;
+        list.selectedIndex = index;
+        list.value = row.id;
+        list.label = row.name;
+        const top = index * VIRTUAL_ROW_HEIGHT;
+        if (top < viewport.scrollTop) viewport.scrollTop = top;
+        else if (top + VIRTUAL_ROW_HEIGHT > viewport.scrollTop + viewport.clientHeight) {
+            viewport.scrollTop = top + VIRTUAL_ROW_HEIGHT - viewport.clientHeight;
+        }
+        scheduleRender();
+        container.dispatchEvent(new Event('change'));
+    }
+
+    function handleKey(event) {
+        if (event.key !== 'ArrowDown' && event.key !== 'ArrowUp') return;
+        event.preventDefault();
+        if (list.total === 0) return;
+        const step = event.key === 'ArrowDown' ? 1 : -1;
+        const index = Math.min(Math.max(list.selectedIndex + step, 0), list.total - 1);
+        if (rowAt(index)) select(index);
+        else fetchPage(Math.floor(index / VIRTUAL_PAGE_SIZE)).then(() => select(index));
+    }
+
+    viewport.addEventListener('scroll', scheduleRender, { passive: true });
+    viewport.addEventListener('click', event => {
+        const rowEl = event.target.closest('.virtual-list-row');
+        if (rowEl) select(Number(rowEl.dataset.index));
+    });
+    viewport.addEventListener('keydown', handleKey);
+    filterInput.addEventListener('keydown', handleKey);
+    filterInput.addEventListener('change', event => event.stopPropagation()); // Only row selection is a 'change'
+    filterInput.addEventListener('input', () => {
+        clearTimeout(list.filterTimer);
+        list.filterTimer = setTimeout(() => {
+            const query = filterInput.value.trim();
+            if (query === list.query) return;
+            list.query = query;
+            list.selectedIndex = -1; // The selected row (if still listed) is somewhere else now
+            viewport.scrollTop = 0;
+            statusLine.textContent = 'Filtering...';
+            startOver();
+        }, VIRTUAL_FILTER_DELAY_MS);
+    });
+
+    // Shows a list_page result (e.g. from the bootstrap payload) as the first page
+    list.seed = result => {
+        list.seq++;
+        list.pages = new Map();
+        list.version = null;
+        acceptPage(0, result);
+    };
+    // Fetches the rows in view again (after the catalog changed), keeping the filter and selection
+    list.reload = () => {
+        if (!list.loaded) statusLine.textContent = 'Loading...';
+        return startOver();
+    };
+    // Shows another category file (null: none, when noSourceText is set), with a fresh filter and selection
+    list.setSource = newSource => {
+        clearTimeout(list.filterTimer);
+        list.source = newSource || null;
+        list.value = '';
+        list.label = '';
+        list.selectedIndex = -1;
+        list.query = '';
+        filterInput.value = '';
+        viewport.scrollTop = 0;
+        if (!list.source && noSourceText) {
+            list.seq++;
+            list.pages = new Map();
+            list.version = null;
+            setTotal(0);
+            statusLine.textContent = noSourceText;
+            filterInput.disabled = true;
+            scheduleRender();
+            return Promise.resolve(null);
+        }
+        filterInput.disabled = false;
+        statusLine.textContent = 'Loading...';
+        return startOver();
+    };
+    list.clearSelection = () => {
+        list.value = '';
+        list.label = '';
+        list.selectedIndex = -1;
+        scheduleRender();
+    };
+    if (!source && noSourceText) list.setSource(null);
+    return list;
+}
+
+console.log("virtual_list.js loaded.");
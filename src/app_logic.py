@@ -2,6 +2,7 @@
 Core application logic/service layer, independent of UI (GUI or CLI).
 Handles interaction with automator, data loader, and command builder.
 """
+import hashlib
 import time
 import logging
 import os
@@ -15,6 +16,13 @@ import app
 
 from src import data_loader
 from src import command_builder
+from src import json_codec
+from src.catalog import get_catalog
+from src.cell_index import DISTRICT_PREFIX, REGION_PREFIX
+from src.manifest import record_counts
+from src.prefix_index import CompletionEntry, KIND_FAVORITE, KIND_PRESET
+from src.response_cache import ResponseCache
+from src.sorted_views import SORT_KEYS
 from src.data_loader import load_json_data, get_item_categories, add_battle_preset, save_json_data, FAVORITES_FILE
 from src.command_builder import build_additem_command, build_placeatme_command, build_teleport_command
 
@@ -40,7 +48,12 @@ def check_game_status_logic():
         status_msg = "Game Not Found"
         logging.warning("Checked game status: Game Not Found (and not in debug mode)")
 
-    return {"status": status_msg}
+    result = {"status": status_msg}
+    # Favorite/preset edits are written behind; a failed write shows up with the next status check
+    save_errors = data_loader.user_store_errors()
+    if save_errors:
+        result["save_errors"] = save_errors
+    return result
 
 def run_single_command_logic(command):
     """Handles validation and execution for a single command string."""
@@ -76,16 +89,23 @@ def get_presets_logic(preset_type="battle"):
     preset_data = load_json_data(filename)
     if preset_data and isinstance(preset_data, dict):
         presets = list(preset_data.keys())
+        descriptions = {name: describe_commands(commands) for name, commands in preset_data.items()
+                        if isinstance(commands, list)}
         print(f"LOGIC: Found presets: {presets}")
         logging.debug(f"Exiting get_presets_logic, found {len(presets)} presets.")
-        return {"presets": presets}
+        return {"presets": presets, "descriptions": descriptions}
     else:
         print(f"LOGIC: No presets found or error loading {filename}.")
         logging.debug(f"Exiting get_presets_logic, found 0 presets.")
-        return {"presets": []}
+        return {"presets": [], "descriptions": {}}
+
+def run_command_sequence_logic(commands, sequence_name="sequence", progress=None):
+     """Opens console, runs a list of commands, closes console.
 
-def run_command_sequence_logic(commands, sequence_name="sequence"):
-     """Opens console, runs a list of commands, closes console."""
+     Args:
+         progress (ProgressDispatcher, optional): Receives the step, failure and
+             finish events of the run as one job (see src/progress.py).
+     """
      logging.debug(f"Entering run_command_sequence_logic: sequence='{sequence_name}', commands={len(commands)}")
      # Removed app.game_found check - automator.open_console handles it now.
      # if not app.game_found:
@@ -94,6 +114,7 @@ def run_command_sequence_logic(commands, sequence_name="sequence"):
           logging.warning(f"Invalid command list for sequence '{sequence_name}'.")
           return {"success": False, "message": "Invalid command list"}
 
+     job = progress.start_job(sequence_name, len(commands)) if progress is not None else None
      all_succeeded = False
      # Use the shared automator instance
      # open_console now performs the check
@@ -103,9 +124,11 @@ def run_command_sequence_logic(commands, sequence_name="sequence"):
          all_succeeded = True
          for i, cmd in enumerate(commands):
              logging.info(f"Executing {sequence_name} step {i+1}: {cmd}")
+             if job: job.step(i, cmd)
              success = app.automator.execute_command_in_console(cmd, verbose=False)
              if not success:
                  logging.error(f"Command '{cmd}' failed in {sequence_name}. Stopping sequence.")
+                 if job: job.failed(i, cmd, "Command failed; stopping sequence")
                  all_succeeded = False
                  break
              time.sleep(0.5) # Keep delay between commands
@@ -117,17 +140,19 @@ def run_command_sequence_logic(commands, sequence_name="sequence"):
              # For now, let all_succeeded reflect command execution status.
      else:
          logging.error(f"Failed to open console for {sequence_name} execution.")
+         if job: job.failed(-1, None, "Could not open the console")
          all_succeeded = False
          
      logging.info(f"Sequence '{sequence_name}' execution finished. Overall success: {all_succeeded}")
      result = {"success": all_succeeded}
      if not all_succeeded:
          result['message'] = f"One or more commands failed during {sequence_name} execution."
+     if job: job.finish(all_succeeded, result.get('message'))
      logging.debug(f"Exiting run_command_sequence_logic, result: {result}")
      return result
 
-def run_preset_logic(preset_name, preset_type="battle"):
-    """Loads a preset and runs its command sequence."""
+def run_preset_logic(preset_name, preset_type="battle", progress=None):
+    """Loads a preset and runs its command sequence (progress: see run_command_sequence_logic)."""
     logging.debug(f"Entering run_preset_logic: name='{preset_name}', type='{preset_type}'")
     filename = f"{preset_type}s.json"
     print(f"LOGIC: Running preset '{preset_name}' from {filename}...")
@@ -143,8 +168,10 @@ def run_preset_logic(preset_name, preset_type="battle"):
          return {"success": False, "message": f"Invalid commands for '{preset_name}'"}
          
     # Delegate to the sequence execution logic
+    if filename == data_loader.BATTLES_FILE:
+        data_loader.user_store(filename).touch(preset_name)
     logging.debug(f"Exiting run_preset_logic for '{preset_name}'")
-    return run_command_sequence_logic(commands, sequence_name=f"preset '{preset_name}'")
+    return run_command_sequence_logic(commands, sequence_name=f"preset '{preset_name}'", progress=progress)
 
 def get_item_categories_logic():
     """Loads and returns item category names and filenames."""
@@ -154,23 +181,51 @@ def get_item_categories_logic():
     if categories:
         print(f"LOGIC: Found categories: {list(categories.keys())}")
         logging.debug(f"Exiting get_item_categories_logic, found {len(categories)} categories.")
-        return {"categories": categories}
+        # Record counts per file come from the manifest, without opening any data file
+        return {"categories": categories, "counts": record_counts()}
     else:
         print("LOGIC: No item categories found.")
         logging.debug(f"Exiting get_item_categories_logic, found 0 categories.")
-        return {"categories": {}}
+        return {"categories": {}, "counts": {}}
+
+def _catalog_view(filename, sort="name", details=True):
+    """The catalog's cached sorted view of a category file, or None if the catalog lacks it."""
+    catalog = get_catalog()
+    if catalog.source_file(filename) is None:
+        return None
+    return catalog.sorted_views.view(filename, sort, details)
+
+def get_items_in_category_logic(filename, sort="name"):
+    """Loads the item names and IDs of a specific category file.
+
+    Only what a dropdown shows is returned; get_item_details_logic serves the
+    full record of the selected item.
 
-def get_items_in_category_logic(filename):
-    """Loads items from a specific category file."""
+    Args:
+        filename (str): Category file relative to the data dir.
+        sort (str): "name", "value" or "weight".
+
+    Returns:
+        dict: { "items": { item_name: item_id, ... } } in `sort` order (a name
+              used by several items maps to the list of IDs). The mapping is
+              the catalog's shared read-only view, not a copy.
+    """
     logging.debug(f"Entering get_items_in_category_logic: filename='{filename}'")
     print(f"LOGIC: Getting items for category file: {filename}")
     if not filename or '..' in filename or filename.startswith('/') or filename.startswith('\\'):
         print("LOGIC: Invalid or potentially unsafe filename rejected.")
         return {"items": {}} # Return empty dict for invalid filename
-        
-    item_data = load_json_data(filename) # Returns dict {name: id} or None
+    if sort not in SORT_KEYS:
+        return {"items": {}, "message": f"Unknown sort key '{sort}'"}
+
+    view = _catalog_view(filename, sort, details=False)
+    if view is not None:
+        logging.debug(f"Exiting get_items_in_category_logic, found {len(view)} items.")
+        return {"items": view}
+    item_data = load_json_data(filename) # Returns dict {name: id or record} or None
     if item_data and isinstance(item_data, dict):
-        sorted_items = dict(sorted(item_data.items()))
+        sorted_items = {name: value.get("id") if isinstance(value, dict) else value
+                        for name, value in sorted(item_data.items())}
         print(f"LOGIC: Found {len(sorted_items)} items.")
         logging.debug(f"Exiting get_items_in_category_logic, found {len(sorted_items)} items.")
         return {"items": sorted_items}
@@ -179,6 +234,30 @@ def get_items_in_category_logic(filename):
         logging.debug(f"Exiting get_items_in_category_logic, found 0 items.")
         return {"items": {}}
 
+def get_item_details_logic(item_id):
+    """Looks up the full record of one item by form ID (for the details panel).
+
+    Args:
+        item_id (str or int): Form ID, in any form parse_form_id accepts.
+
+    Returns:
+        dict: { "success": True, "item": { "name", "id", "category", "subcategory", <record fields> } }
+              or { "success": False, "message": str } if no item uses the ID.
+    """
+    logging.debug(f"Entering get_item_details_logic: ID={item_id}")
+    catalog = get_catalog()
+    catalog.refresh_if_stale()
+    with catalog.lock:
+        record = catalog.ref_index.lookup(item_id, kind="item") if item_id else None
+    if record is None:
+        logging.debug(f"Exiting get_item_details_logic: no item '{item_id}'.")
+        return {"success": False, "message": f"No item with ID '{item_id}'"}
+    item = dict(record.details or {})
+    item.update({"name": record.name, "id": record.ref, "category": record.category,
+                 "subcategory": record.subcategory})
+    logging.debug(f"Exiting get_item_details_logic: {record.name}")
+    return {"success": True, "item": item}
+
 def add_item_logic(item_id, quantity):
     """Builds and executes the additem command."""
     logging.debug(f"Entering add_item_logic: ID={item_id}, Qty={quantity}")
@@ -211,6 +290,9 @@ def get_npcs_logic():
     """Loads NPC data for selection."""
     filename = "npcs.json"
     print(f"LOGIC: Getting NPCs from {filename}...")
+    view = _catalog_view(data_loader.NPCS_FILE)
+    if view is not None:
+        return {"npcs": view}
     npc_data = load_json_data(filename)
     if npc_data and isinstance(npc_data, dict):
         # Return dict {name: id} - GUI can sort if needed
@@ -227,6 +309,7 @@ def save_battle_preset_logic(preset_name, command_list):
     status = add_battle_preset(preset_name, command_list)
     message = ""
     if status == "success":
+        _add_user_completion(KIND_PRESET, preset_name.strip(), preset_name.strip())
         message = f"Preset '{preset_name}' saved successfully."
     elif status == "exists":
         message = f"Preset name '{preset_name}' already exists. Please choose another."
@@ -237,8 +320,32 @@ def save_battle_preset_logic(preset_name, command_list):
 
 # --- Favorites Logic --- 
 
-def load_favorites_logic():
-    """Loads the list of favorites from the JSON file."""
+# Most-used favorites offered as one-click/one-keystroke quick slots
+QUICK_SLOTS = 5
+
+def _rank_favorites(favorites, ranked_names):
+    """Orders favorites by the store's usage ranking, then the never-used ones in saved order.
+
+    Walks the already-ranked names instead of sorting, so this is linear in
+    the number of favorites. Returns (favorites, names of the ranked ones).
+    """
+    by_name = {fav.get('name'): fav for fav in favorites if isinstance(fav, dict)}
+    ranked = [name for name in ranked_names if name in by_name]
+    ranked_set = set(ranked)
+    rest = [fav for fav in favorites if not (isinstance(fav, dict) and fav.get('name') in ranked_set)]
+    return [by_name[name] for name in ranked] + rest, ranked
+
+def load_favorites_logic(annotate=False):
+    """Loads the list of favorites, most used first.
+
+    Favorites are ranked by how often and how recently they were run (see
+    usage_rank); "quick" holds the names of the top QUICK_SLOTS.
+
+    Args:
+        annotate (bool): If True, return copies of the favorites with a
+                         readable "description" of their command (for display only,
+                         never written back to favorites.json).
+    """
     print(f"LOGIC: Loading favorites from {FAVORITES_FILE}...")
     favorites_data = load_json_data(FAVORITES_FILE)
     
@@ -256,7 +363,11 @@ def load_favorites_logic():
 
     # Ensure required keys exist? Maybe too strict. Assume correct structure for now.
     print(f"LOGIC: Found {len(favorites_data)} favorites.")
-    return {"success": True, "favorites": favorites_data} # Always return a list
+    favorites_data, ranked = _rank_favorites(favorites_data, data_loader.user_store(FAVORITES_FILE).most_used())
+    if annotate:
+        favorites_data = [dict(fav, description=describe_command(fav.get('command')))
+                          if isinstance(fav, dict) else fav for fav in favorites_data]
+    return {"success": True, "favorites": favorites_data, "quick": ranked[:QUICK_SLOTS]} # Always return a list
 
 def save_favorite_logic(name, command, command_type):
     """Adds a new favorite command to the list.
@@ -281,31 +392,26 @@ def save_favorite_logic(name, command, command_type):
     name = name.strip() # Clean whitespace
     command = command.strip()
 
-    load_result = load_favorites_logic()
-    # load_favorites_logic should always return success: True and a list now
-    favorites = load_result['favorites']
-    
-    # Check for existing name (case-insensitive check? Let's do exact for now)
-    if any(fav['name'] == name for fav in favorites if isinstance(fav, dict) and 'name' in fav):
-        message = f"A favorite with the name '{name}' already exists." 
-        print(f"LOGIC: {message}")
-        return {"status": "exists", "message": message}
-
     new_favorite = {
         "name": name,
         "command": command,
         "type": command_type
     }
-    favorites.append(new_favorite)
+    # Exact-name check and append happen in one journal write (see src/user_store.py)
+    status = data_loader.user_store(FAVORITES_FILE).add(name, new_favorite)
+    if status == "exists":
+        message = f"A favorite with the name '{name}' already exists." 
+        print(f"LOGIC: {message}")
+        return {"status": "exists", "message": message}
 
-    if save_json_data(FAVORITES_FILE, favorites):
+    if status == "success":
+        _add_user_completion(KIND_FAVORITE, name, command)
         message = f"Favorite '{name}' saved successfully."
         print(f"LOGIC: {message}")
         return {"status": "success", "message": message}
     else:
-        message = f"Failed to save favorite '{name}' to file." # Error logged by save_json_data
+        message = f"Failed to save favorite '{name}' to file." # Error logged by the user store
         print(f"LOGIC: {message}")
-        # Attempt to revert in-memory list? Maybe not necessary.
         return {"status": "error", "message": message}
 
 def delete_favorite_logic(name):
@@ -314,19 +420,16 @@ def delete_favorite_logic(name):
     if not name:
         return {"success": False, "message": "No favorite name provided."}
         
-    load_result = load_favorites_logic()
-    favorites = load_result['favorites']
-    
-    initial_length = len(favorites)
-    # Filter out the favorite(s) with the matching name
-    updated_favorites = [fav for fav in favorites if not (isinstance(fav, dict) and fav.get('name') == name)]
-    
-    if len(updated_favorites) == initial_length:
+    store = data_loader.user_store(FAVORITES_FILE)
+    favorite = store.get(name)
+    status = store.delete(name)
+    if status == "missing":
         message = f"Favorite '{name}' not found."
         print(f"LOGIC: {message}")
         return {"success": False, "message": message}
         
-    if save_json_data(FAVORITES_FILE, updated_favorites):
+    if status == "success":
+        _remove_user_completion(KIND_FAVORITE, name, (favorite or {}).get('command', ''))
         message = f"Favorite '{name}' deleted successfully."
         print(f"LOGIC: {message}")
         return {"success": True, "message": message}
@@ -342,16 +445,9 @@ def run_favorite_logic(name):
     if not name:
         return {"success": False, "message": "No favorite name provided."}
         
-    load_result = load_favorites_logic()
-    favorites = load_result['favorites']
-    
-    found_fav = None
-    for fav in favorites:
-        if isinstance(fav, dict) and fav.get('name') == name:
-            found_fav = fav
-            break
-            
-    if not found_fav:
+    store = data_loader.user_store(FAVORITES_FILE)
+    found_fav = store.get(name)
+    if not isinstance(found_fav, dict):
         message = f"Favorite '{name}' not found."
         print(f"LOGIC: {message}")
         return {"success": False, "message": message}
@@ -364,6 +460,7 @@ def run_favorite_logic(name):
          
     # Delegate execution to the existing single command runner
     logging.info(f"Running favorite '{name}' command: {command_to_run}")
+    store.touch(name)
     result = run_single_command_logic(command_to_run)
     # Add context that this was run from a favorite
     result['message'] = f"Ran favorite '{name}': {command_to_run}. Result: {result.get('message', 'Success' if result.get('success') else 'Failure')}"
@@ -375,18 +472,27 @@ def run_favorite_logic(name):
 def get_location_categories_logic():
     """Gets location categories from the data loader.
 
+    Categories whose file the manifest lists as missing are left out.
+
     Returns:
-        dict: { "categories": { category_name: category_file, ... } }
-              or { "categories": {} } on failure.
+        dict: { "categories": { category_name: category_file, ... },
+                "counts": { category_file: record_count, ... } }
+              or { "categories": {}, "counts": {} } on failure.
     """
     logging.debug("Entering get_location_categories_logic")
     try:
         categories = data_loader.get_location_categories()
+        counts = record_counts()
+        if counts:
+            missing = [name for name, filename in categories.items() if filename not in counts]
+            if missing:
+                logging.info(f"Hiding location categories with missing files: {missing}")
+            categories = {name: filename for name, filename in categories.items() if filename in counts}
         logging.debug(f"Exiting get_location_categories_logic with {len(categories)} categories.")
-        return {"categories": categories}
+        return {"categories": categories, "counts": counts}
     except Exception as e:
         logging.exception("Exception in get_location_categories_logic")
-        return {"categories": {}}
+        return {"categories": {}, "counts": {}}
 
 def get_locations_in_category_logic(category_filename):
     """Gets locations for a specific category file from the data loader.
@@ -403,27 +509,130 @@ def get_locations_in_category_logic(category_filename):
         logging.warning("Invalid category filename received in logic.")
         return {"locations": {}}
     try:
-        locations = data_loader.load_locations_for_category(category_filename)
+        locations = _catalog_view(category_filename)
+        if locations is None:
+            locations = data_loader.load_locations_for_category(category_filename)
         logging.debug(f"Exiting get_locations_in_category_logic with {len(locations)} locations.")
         return {"locations": locations}
     except Exception as e:
         logging.exception("Exception in get_locations_in_category_logic")
         return {"locations": {}}
 
-def teleport_to_location_logic(location_id):
+def _cell_node_to_result(node):
+    cells = get_catalog().cells
+    return {"key": node.key, "label": node.label, "cell": node.cell,
+            "children": len(cells.children_of(node.key))}
+
+def get_location_tree_logic(key=None):
+    """Lists one level of the location hierarchy (region > district > building > floor).
+
+    Args:
+        key (str, optional): A group key or cell ID from a previous call, or a region
+            name; None (or an unknown key) lists the regions.
+
+    Returns:
+        dict: { "nodes": [ {key, label, cell, children}, ... ],
+                "path": [ {key, label, cell, children}, ... ] }
+              "cell" is None for region/district groups; "children" is the number of
+              nodes below. "path" leads from the region down to `key`.
+    """
+    logging.debug(f"Entering get_location_tree_logic for key: {key}")
+    try:
+        cells = get_catalog().cells
+        node = cells.node(key) if key else None
+        if node is None:
+            for prefix in (REGION_PREFIX, DISTRICT_PREFIX):  # Plain region/district names
+                node = cells.node(prefix + key.replace(" ", "")) if key else None
+                if node is not None:
+                    break
+        if node is None:  # Unknown (or since removed) keys show the regions
+            return {"nodes": [_cell_node_to_result(root) for root in cells.roots()], "path": []}
+        nodes = cells.children_of(node.key)
+        path = cells.path_of(node.key)
+        return {"nodes": [_cell_node_to_result(node) for node in nodes],
+                "path": [_cell_node_to_result(node) for node in path]}
+    except Exception:
+        logging.exception("Exception in get_location_tree_logic")
+        return {"nodes": [], "path": []}
+
+def get_related_locations_logic(location_id):
+    """Gets the floors of the building containing a cell, and the cells next to it.
+
+    Returns:
+        dict: { "floors": [ {key, label, cell, children, depth}, ... ],
+                "siblings": [ {key, label, cell, children}, ... ] }
+              "floors" starts with the building itself and is empty for unknown cells;
+              "depth" counts levels below the building.
+    """
+    logging.debug(f"Entering get_related_locations_logic for ID: {location_id}")
+    if not location_id or not isinstance(location_id, str) or not location_id.strip():
+        return {"floors": [], "siblings": []}
+    try:
+        cells = get_catalog().cells
+        floors = cells.floors_of(location_id)
+        base_depth = floors[0].depth if floors else 0
+        return {"floors": [dict(_cell_node_to_result(node), depth=node.depth - base_depth) for node in floors],
+                "siblings": [_cell_node_to_result(node) for node in cells.siblings_of(location_id)]}
+    except Exception:
+        logging.exception("Exception in get_related_locations_logic")
+        return {"floors": [], "siblings": []}
+
+def _unknown_cell_suggestions(location_id, limit=5):
+    """Returns close cell IDs if location_id is not a known cell, else None.
+
+    None is also returned when the catalog has no locations to validate
+    against, so teleporting never gets blocked by a missing data directory.
+    """
+    catalog = get_catalog()
+    fuzzy = catalog.fuzzy_index
+    wanted = location_id.strip().lower()
+    if any(catalog.get(rid).ref.lower() == wanted for rid in fuzzy.exact(wanted, kind="location")):
+        return None
+    matches = fuzzy.match(location_id, kind="location", limit=None)
+    if not matches and not any(r.kind == "location" for _, r in catalog.items()):
+        return None
+    suggestions = []
+    for distance, record_id in matches:
+        record = catalog.get(record_id)
+        if any(s["id"] == record.ref for s in suggestions):
+            continue
+        suggestions.append({"name": record.name, "id": record.ref, "distance": distance})
+        if len(suggestions) >= limit:
+            break
+    return suggestions
+
+def teleport_to_location_logic(location_id, force=False):
     """Builds and executes a teleport command.
 
+    Unknown cell IDs are not sent to the game; the result instead carries the
+    nearest known cells under "suggestions". Pass force=True to send anyway.
+
     Args:
         location_id (str): The target location ID (cell name).
+        force (bool): Skip the known-cell check.
 
     Returns:
-        dict: { "success": bool, "message": str, "command": str or None }
+        dict: { "success": bool, "message": str, "command": str or None,
+                "suggestions": [ {name, id, distance}, ... ] (unknown cells only) }
     """
     logging.debug(f"Entering teleport_to_location_logic for ID: {location_id}")
     if not location_id or not isinstance(location_id, str) or not location_id.strip():
         logging.warning("Invalid location ID provided for teleport.")
         return {"success": False, "message": "Invalid location ID provided."}
 
+    if not force:
+        try:
+            suggestions = _unknown_cell_suggestions(location_id)
+        except Exception:
+            logging.exception("Could not validate cell ID against the catalog; sending as-is.")
+            suggestions = None
+        if suggestions is not None:
+            message = f"Unknown cell '{location_id.strip()}'."
+            if suggestions:
+                message += " Did you mean: " + ", ".join(s["id"] for s in suggestions) + "?"
+            logging.warning(message)
+            return {"success": False, "message": message, "command": None, "suggestions": suggestions}
+
     # Need to call it via the imported module
     command = command_builder.build_teleport_command(location_id)
 
@@ -441,4 +650,424 @@ def teleport_to_location_logic(location_id):
         result['message'] = "Teleport command executed."
         
     logging.debug(f"Exiting teleport_to_location_logic, result: {result}")
-    return result 
\ No newline at end of file
+    return result 
+
+# --- Catalog Search Logic ---
+
+def _record_to_result(record):
+    """Flattens a catalog record into the dict shape returned to the UIs."""
+    return {
+        "name": record.name,
+        "id": record.ref,
+        "kind": record.kind,
+        "category": record.category,
+        "subcategory": record.subcategory,
+    }
+
+def search_catalog_logic(query, kind=None, category=None, limit=25):
+    """Searches items, NPCs and locations by name or ID.
+
+    Args:
+        query (str): Free text, e.g. "bravil mages" or "000479F5".
+        kind (str, optional): "item", "npc" or "location".
+        category (str, optional): Category or sub-category name to filter on.
+        limit (int, optional): Maximum number of results to return.
+
+    Returns:
+        dict: { "results": [ {name, id, kind, category, subcategory}, ... ], "total": int }
+    """
+    logging.debug(f"Entering search_catalog_logic: query='{query}', kind={kind}, category={category}")
+    if not query or not isinstance(query, str) or not query.strip():
+        return {"results": [], "total": 0}
+    try:
+        limit = int(limit) if limit is not None else None
+    except (ValueError, TypeError):
+        limit = 25
+    try:
+        catalog = get_catalog()
+        catalog.refresh_if_stale()
+        matches, total = catalog.search_index.search(query, kind=kind or None,
+                                                     category=category or None, limit=limit)
+        results = [_record_to_result(record) for _, record in matches]
+        logging.debug(f"Exiting search_catalog_logic with {len(results)} of {total} results.")
+        return {"results": results, "total": total}
+    except Exception:
+        logging.exception("Exception in search_catalog_logic")
+        return {"results": [], "total": 0}
+
+LIST_PAGE_DEFAULT_LIMIT = 100
+LIST_PAGE_MAX_LIMIT = 500
+LIST_KINDS = ("item", "npc", "location")
+
+def list_page_logic(kind, query=None, offset=0, limit=LIST_PAGE_DEFAULT_LIMIT, source=None):
+    """One page of a name-ordered catalog list, for lists that render only the visible rows.
+
+    Args:
+        kind (str): "item", "npc" or "location".
+        query (str, optional): Only records whose name or ID contains these
+            words (the last one as a prefix), as in search.
+        offset (int): Rows to skip.
+        limit (int): Page size (capped at LIST_PAGE_MAX_LIMIT).
+        source (str, optional): Only records from this category file.
+
+    Returns:
+        dict: { "success": bool, "rows": [ {name, id, kind, category, subcategory}, ... ],
+                "total": matching rows, "offset": int, "version": catalog version tag,
+                "message"?: str }
+              The version changes whenever the list's records do, so a client
+              holding pages of an older version should drop them.
+    """
+    logging.debug(f"Entering list_page_logic: kind={kind}, query='{query}', offset={offset}, "
+                  f"limit={limit}, source={source}")
+    if kind not in LIST_KINDS:
+        return {"success": False, "rows": [], "total": 0, "offset": 0, "version": None,
+                "message": f"Unknown kind '{kind}'"}
+    try:
+        limit = min(max(int(limit), 0), LIST_PAGE_MAX_LIMIT) if limit is not None else LIST_PAGE_DEFAULT_LIMIT
+        offset = max(int(offset or 0), 0)
+    except (ValueError, TypeError) as e:
+        return {"success": False, "rows": [], "total": 0, "offset": 0, "version": None, "message": str(e)}
+    try:
+        catalog = get_catalog()
+        catalog.refresh_if_stale()
+        with catalog.lock:
+            if source and (catalog.source_file(source) is None or catalog.source_file(source).kind != kind):
+                return {"success": False, "rows": [], "total": 0, "offset": offset, "version": None,
+                        "message": f"No {kind} category file '{source}'"}
+            listing = catalog.sorted_views.listing(kind, source or None, query if isinstance(query, str) else None)
+            rows = [_record_to_result(catalog.get(record_id)) for record_id in listing[offset:offset + limit]]
+            version = f"c{catalog.version(source) if source else catalog.version()}"
+    except Exception as e:
+        logging.exception("Exception in list_page_logic")
+        return {"success": False, "rows": [], "total": 0, "offset": offset, "version": None,
+                "message": f"Python error: {e}"}
+    logging.debug(f"Exiting list_page_logic with {len(rows)} of {len(listing)} rows.")
+    return {"success": True, "rows": rows, "total": len(listing), "offset": offset, "version": version}
+
+QUERY_DEFAULT_LIMIT = 50
+QUERY_MAX_LIMIT = 500
+
+def _query_filters(predicates):
+    """Splits predicate dicts into (numeric filters, name text).
+
+    Each predicate is {"field", "op", "value"}; op is one of <, <=, >, >=,
+    =, != (numbers), "between" (value is [low, high]) or "contains"
+    (field "name", value is text).
+
+    Raises:
+        ValueError: For a malformed predicate.
+    """
+    filters, texts = [], []
+    for predicate in predicates or []:
+        if not isinstance(predicate, dict):
+            raise ValueError(f"Invalid predicate: {predicate!r}")
+        field, op, value = predicate.get('field'), predicate.get('op'), predicate.get('value')
+        if op == "contains":
+            if field != "name" or not isinstance(value, str):
+                raise ValueError("'contains' is only supported on name")
+            texts.append(value)
+        elif op == "between":
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise ValueError(f"'between' on {field} needs [low, high]")
+            filters.append((field, ">=", float(value[0])))
+            filters.append((field, "<=", float(value[1])))
+        else:
+            filters.append((field, op, float(value)))
+    return filters, " ".join(texts)
+
+def query_items_logic(predicates=None, sort=None, descending=False, limit=QUERY_DEFAULT_LIMIT,
+                      offset=0, category=None, subcategory=None):
+    """Filters, sorts and pages items across every item category.
+
+    Args:
+        predicates (list, optional): e.g. [{"field": "weight", "op": "<", "value": 5},
+            {"field": "name", "op": "contains", "value": "glass"}].
+        sort (str, optional): Numeric field ("value", "damage", ...) or "name".
+        descending (bool): Sort largest first.
+        limit (int): Page size (capped at QUERY_MAX_LIMIT).
+        offset (int): Number of matches to skip.
+        category (str, optional): Item type, e.g. "Armor".
+        subcategory (str, optional): Text contained in the sub-category, e.g. "light".
+
+    Returns:
+        dict: { "success": bool, "results": [ {name, id, kind, category, subcategory,
+                attributes}, ... ], "total": int, "message"?: str }
+    """
+    logging.debug(f"Entering query_items_logic: predicates={predicates}, sort={sort}, "
+                  f"limit={limit}, offset={offset}, category={category}, subcategory={subcategory}")
+    try:
+        limit = min(max(int(limit), 0), QUERY_MAX_LIMIT) if limit is not None else QUERY_DEFAULT_LIMIT
+        offset = max(int(offset or 0), 0)
+        filters, text = _query_filters(predicates)
+    except (ValueError, TypeError) as e:
+        return {"success": False, "results": [], "total": 0, "message": str(e)}
+    try:
+        catalog = get_catalog()
+        catalog.refresh_if_stale()
+        within = catalog.search_index.match_ids(text) if text.strip() else None
+        record_ids, total = catalog.attributes.query(
+            kind="item", category=category or None, subcategory=subcategory or None,
+            filters=filters, sort=sort or "name", descending=bool(descending),
+            limit=limit, offset=offset, within=within)
+    except ValueError as e:
+        return {"success": False, "results": [], "total": 0, "message": str(e)}
+    except Exception as e:
+        logging.exception("Exception in query_items_logic")
+        return {"success": False, "results": [], "total": 0, "message": f"Python error: {e}"}
+    results = []
+    for record_id in record_ids.tolist():
+        result = _record_to_result(catalog.get(record_id))
+        result["attributes"] = catalog.attributes.attributes(record_id)
+        results.append(result)
+    logging.debug(f"Exiting query_items_logic with {len(results)} of {total} results.")
+    return {"success": True, "results": results, "total": total}
+
+def fuzzy_match_logic(text, kind=None, limit=5):
+    """Returns catalog entries whose name or ID is within a few typos of text.
+
+    Returns:
+        dict: { "matches": [ {name, id, kind, category, subcategory, distance}, ... ] }
+    """
+    if not text or not isinstance(text, str) or not text.strip():
+        return {"matches": []}
+    try:
+        catalog = get_catalog()
+        matches = []
+        for distance, record_id in catalog.fuzzy_index.match(text, kind=kind or None, limit=limit):
+            entry = _record_to_result(catalog.get(record_id))
+            entry["distance"] = distance
+            matches.append(entry)
+        return {"matches": matches}
+    except Exception:
+        logging.exception("Exception in fuzzy_match_logic")
+        return {"matches": []}
+
+# --- Command Annotation Logic ---
+
+_VERB_KINDS = {"player.additem": "item", "player.placeatme": None, "coc": "location"}
+
+def describe_command(command):
+    """Returns a readable description of a stored command, or None.
+
+    Uses the catalog's reverse form-ID/cell-ID index, so no data files are
+    read: "player.placeatme 000479F5 2" -> "Cat x2",
+    "coc BravilMagesGuild" -> "Bravil Mages Guild (Guild Halls)".
+    """
+    parsed = command_builder.parse_command(command)
+    if not parsed:
+        return None
+    try:
+        record = get_catalog().ref_index.lookup(parsed["ref"], kind=_VERB_KINDS[parsed["verb"]])
+    except Exception:
+        logging.exception(f"Exception describing command '{command}'")
+        return None
+    if record is None:
+        return None
+    if parsed["quantity"] is None:
+        return f"{record.name} ({record.category})"
+    return f"{record.name} x{parsed['quantity']}"
+
+def describe_commands(commands):
+    """Joins the descriptions of a command list ("Cat x2, Goblin x2"); unknown commands are shown raw."""
+    return ", ".join(describe_command(command) or str(command) for command in commands)
+
+# --- Typeahead Logic ---
+
+# Console verbs whose argument is completed against a catalog kind.
+COMMAND_ARGUMENT_KINDS = {
+    "player.additem": "item",
+    "player.placeatme": "npc",
+    "coc": "location",
+}
+
+# Prefix index that currently holds the favorites/presets (None until first use)
+_user_completions_index = None
+
+def _add_user_completion(kind, label, value):
+    """Inserts a favorite/preset into the typeahead index, if it has been built."""
+    if _user_completions_index is not None and label:
+        _user_completions_index.insert(label, CompletionEntry(kind, label, value))
+
+def _remove_user_completion(kind, label, value):
+    if _user_completions_index is not None and label:
+        _user_completions_index.delete(label, CompletionEntry(kind, label, value))
+
+def _ensure_user_completions(index):
+    """Loads favorites and battle presets into the typeahead index once."""
+    global _user_completions_index
+    if _user_completions_index is index:
+        return
+    favorites = load_json_data(FAVORITES_FILE)
+    for fav in favorites if isinstance(favorites, list) else []:
+        if isinstance(fav, dict) and fav.get('name') and fav.get('command'):
+            index.insert(fav['name'], CompletionEntry(KIND_FAVORITE, fav['name'], fav['command']))
+    presets = load_json_data(data_loader.BATTLES_FILE)
+    for preset_name in presets if isinstance(presets, dict) else {}:
+        index.insert(preset_name, CompletionEntry(KIND_PRESET, preset_name, preset_name))
+    _user_completions_index = index
+
+def _completion_command(entry):
+    """The command line a completion entry expands to, if it has one."""
+    if entry.kind == "item":
+        return build_additem_command(entry.value, 1)
+    if entry.kind == "npc":
+        return build_placeatme_command(entry.value, 1)
+    if entry.kind == "location":
+        return command_builder.build_teleport_command(entry.value)
+    if entry.kind == KIND_FAVORITE:
+        return entry.value
+    return None
+
+def complete_logic(text, limit=10):
+    """Typeahead for the command box / CLI prompt.
+
+    Text after "player.additem", "player.placeatme" or "coc" is completed
+    against items, NPCs or cells (by name, cell ID or form ID); anything else
+    is completed against favorites, presets and every catalog name.
+
+    Returns:
+        dict: { "completions": [ {label, value, kind, command}, ... ] }
+              where "command" is the full console line to insert (None for presets).
+    """
+    if not text or not isinstance(text, str) or not text.strip():
+        return {"completions": []}
+    try:
+        index = get_catalog().prefix_index
+        _ensure_user_completions(index)
+        text = text.lstrip()
+        verb, _, argument = text.partition(" ")
+        kind = COMMAND_ARGUMENT_KINDS.get(verb.lower()) if argument.strip() else None
+        if kind:
+            entries = index.complete(argument.strip(), limit=limit, kinds=(kind,))
+        else:
+            entries = index.complete(text, limit=limit)
+        completions = [{
+            "label": entry.label,
+            "value": entry.value,
+            "kind": entry.kind,
+            "command": _completion_command(entry),
+        } for entry in entries]
+        return {"completions": completions}
+    except Exception:
+        logging.exception("Exception in complete_logic")
+        return {"completions": []}
+
+# --- Command History Logic ---
+
+def record_command_logic(command, source=None):
+    """Adds a command typed in the GUI or CLI to the shared history.
+
+    Returns:
+        dict: { "recorded": bool } (False for empty commands and repeats of the last one)
+    """
+    if not isinstance(command, str):
+        return {"recorded": False}
+    return {"recorded": data_loader.command_history().add(command, source=source)}
+
+def get_history_logic(prefix=None, contains=None, limit=50):
+    """Past commands from every session, most recent first, each listed once.
+
+    Args:
+        prefix (str): Only commands starting with this (case-insensitive).
+        contains (str): Only commands containing this (case-insensitive).
+        limit (int): Most commands returned.
+
+    Returns:
+        dict: { "history": [command, ...], "total": commands kept }
+    """
+    try:
+        history = data_loader.command_history()
+        return {"history": history.search(prefix=prefix, contains=contains, limit=int(limit)),
+                "total": len(history)}
+    except Exception:
+        logging.exception("Exception in get_history_logic")
+        return {"history": [], "total": 0}
+
+# --- Versioned Catalog Responses ---
+
+# Serialized list responses for the GUI, reused until their catalog file changes
+_responses = ResponseCache()
+
+def _catalog_file_version(relpath):
+    """Version tag of a catalog file's records, or None if the catalog does not hold the file."""
+    catalog = get_catalog()
+    if not isinstance(relpath, str) or catalog.source_file(relpath) is None:
+        return None
+    return f"c{catalog.version(relpath)}"
+
+def get_npcs_versioned_logic(known_version=None):
+    """get_npcs_logic as a versioned response (see response_cache).
+
+    Returns:
+        dict: { "version": tag, "not_modified": True } if `known_version` is current,
+              else { "version": tag, "body": JSON of get_npcs_logic() }
+    """
+    return _responses.respond(("npcs",), _catalog_file_version(data_loader.NPCS_FILE), known_version,
+                              get_npcs_logic)
+
+def get_items_in_category_versioned_logic(filename, sort="name", known_version=None):
+    """get_items_in_category_logic as a versioned response (see get_npcs_versioned_logic)."""
+    return _responses.respond(("items", filename, sort), _catalog_file_version(filename), known_version,
+                              lambda: get_items_in_category_logic(filename, sort))
+
+def get_locations_in_category_versioned_logic(category_filename, known_version=None):
+    """get_locations_in_category_logic as a versioned response (see get_npcs_versioned_logic)."""
+    return _responses.respond(("locations", category_filename), _catalog_file_version(category_filename),
+                              known_version, lambda: get_locations_in_category_logic(category_filename))
+
+# --- GUI Bootstrap Logic ---
+
+def _content_version(payload):
+    """Version tag for a small payload without a change counter of its own: a hash of its JSON."""
+    return "h" + hashlib.blake2b(json_codec.dumps(payload).encode("utf-8"), digest_size=8).hexdigest()
+
+def _first_npc_page():
+    page = list_page_logic("npc")
+    if not page["success"]:
+        raise RuntimeError(page.get("message", "NPC list unavailable"))
+    return page
+
+def bootstrap_logic():
+    """Everything the GUI shows on first paint, in one call.
+
+    Each section holds exactly what the matching single call returns (status:
+    check_status, presets: get_battle_presets, item_types:
+    get_item_categories_api, npcs: the first list_page of NPCs, favorites:
+    get_favorites, location_categories: get_location_categories_api,
+    location_tree: get_location_tree), so the GUI renders both the same way.
+    Catalog sections are tagged with the catalog's change counter ("c<n>"),
+    the rest with a hash of their content ("h<hex>"); a tag changes exactly
+    when its section does. A section that fails is left out and listed in "errors", so the GUI
+    can fall back to loading it on its own.
+
+    Returns:
+        dict: { "success": True, "sections": {name: result, ...},
+                "versions": {name: tag, ...}, "errors": {name: message, ...},
+                "elapsed_ms": float }
+    """
+    logging.debug("Entering bootstrap_logic")
+    started = time.perf_counter()
+    catalog = get_catalog()
+    catalog_version = f"c{catalog.version()}"
+    loaders = (
+        ("status", check_game_status_logic, None),
+        ("presets", get_presets_logic, None),
+        ("item_types", get_item_categories_logic, catalog_version),
+        ("npcs", _first_npc_page, catalog_version),
+        ("favorites", lambda: load_favorites_logic(annotate=True), None),
+        ("location_categories", get_location_categories_logic, catalog_version),
+        ("location_tree", get_location_tree_logic, catalog_version),
+    )
+    sections, versions, errors = {}, {}, {}
+    for name, loader, version in loaders:
+        try:
+            sections[name] = loader()
+            versions[name] = version or _content_version(sections[name])
+        except Exception as e:
+            logging.exception(f"Exception loading bootstrap section '{name}'")
+            sections.pop(name, None)
+            errors[name] = str(e)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logging.debug(f"Exiting bootstrap_logic: {len(sections)} sections in {elapsed_ms:.1f} ms")
+    return {"success": True, "sections": sections, "versions": versions, "errors": errors,
+            "elapsed_ms": round(elapsed_ms, 2)}
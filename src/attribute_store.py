@@ -0,0 +1,183 @@
+"""
+Numeric item attributes (weight, value, armor, ...) held as NumPy columns.
+
+Every catalog record gets a row, keyed by its catalog record ID. Each numeric
+field is a float64 column with a matching boolean "present" mask, so records
+that do not carry a field (or carry null) are never matched by a filter on
+it. Kind and source file are kept as small integer columns, which lets a
+query such as "light armor under 5 weight sorted by value" run as a handful
+of vectorized comparisons over the whole catalog.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NUMERIC_FIELDS = ("weight", "value", "armor", "health", "damage", "damage_obr", "charge", "level")
+
+FILTER_OPS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "=": np.equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+_KIND_CODES = {"item": 1, "npc": 2, "location": 3}
+_INITIAL_CAPACITY = 1024
+
+
+class AttributeStore:
+    """Catalog index storing numeric item fields column-wise."""
+
+    def __init__(self):
+        self._capacity = 0
+        self._kinds = np.zeros(0, dtype=np.uint8)      # 0 = no record in this row
+        self._sources = np.zeros(0, dtype=np.uint16)   # Index into _source_meta
+        self.values: Dict[str, np.ndarray] = {}
+        self.present: Dict[str, np.ndarray] = {}
+        self._source_codes: Dict[str, int] = {}
+        self._source_meta: List[Tuple[str, str]] = []  # (category, subcategory) per source code
+        self._names: List[Optional[str]] = []
+        self._name_rank: Optional[np.ndarray] = None  # Built on the first name sort after a change
+        self._grow(_INITIAL_CAPACITY)
+
+    def _grow(self, minimum):
+        capacity = max(minimum, self._capacity * 2)
+        def resized(column):
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            return grown
+        self._kinds = resized(self._kinds)
+        self._names.extend([None] * (capacity - len(self._names)))
+        self._sources = resized(self._sources)
+        for field in NUMERIC_FIELDS:
+            self.values[field] = resized(self.values.get(field, np.zeros(0, dtype=np.float64)))
+            self.present[field] = resized(self.present.get(field, np.zeros(0, dtype=bool)))
+        self._capacity = capacity
+
+    def _source_code(self, record):
+        code = self._source_codes.get(record.source)
+        if code is None:
+            code = self._source_codes[record.source] = len(self._source_meta)
+            self._source_meta.append(((record.category or "").lower(), (record.subcategory or "").lower()))
+        return code
+
+    # --- Catalog index protocol ---
+
+    def add(self, record_id, record):
+        if record_id >= self._capacity:
+            self._grow(record_id + 1)
+        self._kinds[record_id] = _KIND_CODES.get(record.kind, 0)
+        self._sources[record_id] = self._source_code(record)
+        self._names[record_id] = record.name
+        self._name_rank = None
+        details = record.details or {}
+        for field in NUMERIC_FIELDS:
+            value = details.get(field)
+            has_value = isinstance(value, (int, float)) and not isinstance(value, bool)
+            self.values[field][record_id] = value if has_value else 0.0
+            self.present[field][record_id] = has_value
+
+    def remove(self, record_id, record):
+        if record_id >= self._capacity:
+            return
+        self._kinds[record_id] = 0
+        self._names[record_id] = None
+        self._name_rank = None
+        for field in NUMERIC_FIELDS:
+            self.present[field][record_id] = False
+
+    # --- Querying ---
+
+    def _name_ranks(self):
+        """Position of every row in case-insensitive name order."""
+        if self._name_rank is None:
+            order = sorted((i for i, name in enumerate(self._names) if name is not None),
+                           key=lambda i: self._names[i].lower())
+            rank = np.zeros(self._capacity, dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            self._name_rank = rank
+        return self._name_rank
+
+    def mask(self, kind=None, category=None, subcategory=None, filters: Sequence = (),
+             within=None) -> np.ndarray:
+        """Boolean row mask for the given restrictions.
+
+        Args:
+            kind (str, optional): "item", "npc" or "location".
+            category (str, optional): Category name, case-insensitive ("Armor").
+            subcategory (str, optional): Case-insensitive substring of the
+                sub-category name ("light" matches "Elven (Light)").
+            filters: (field, op, number) tuples, e.g. ("weight", "<", 5).
+                Rows missing the field never match.
+            within (iterable, optional): Only consider these record IDs.
+
+        Raises:
+            ValueError: For an unknown field or operator.
+        """
+        selected = self._kinds != 0
+        if within is not None:
+            restrict = np.zeros(self._capacity, dtype=bool)
+            restrict[np.fromiter(within, dtype=np.int64)] = True
+            selected &= restrict
+        if kind is not None:
+            selected &= self._kinds == _KIND_CODES.get(kind, -1)
+        if category is not None or subcategory is not None:
+            wanted_category = category.lower() if category is not None else None
+            wanted_sub = subcategory.lower() if subcategory is not None else None
+            codes = [code for code, (cat, sub) in enumerate(self._source_meta)
+                     if (wanted_category is None or cat == wanted_category)
+                     and (wanted_sub is None or wanted_sub in sub)]
+            selected &= np.isin(self._sources, codes)
+        for field, op, number in filters:
+            if field not in self.values:
+                raise ValueError(f"Unknown attribute '{field}'")
+            if op not in FILTER_OPS:
+                raise ValueError(f"Unknown operator '{op}'")
+            selected &= self.present[field] & FILTER_OPS[op](self.values[field], float(number))
+        return selected
+
+    def query(self, kind=None, category=None, subcategory=None, filters: Sequence = (),
+              sort: Optional[str] = None, descending=False,
+              limit: Optional[int] = None, offset=0, within=None) -> Tuple[np.ndarray, int]:
+        """Record IDs matching the restrictions, optionally sorted.
+
+        `sort` is a numeric field or "name". Records missing the sort field
+        come last; ties are broken by name.
+
+        Returns:
+            tuple: (array of record IDs for the requested page, total matches)
+        """
+        record_ids = np.flatnonzero(self.mask(kind, category, subcategory, filters, within))
+        total = len(record_ids)
+        if sort == "name":
+            keys = self._name_ranks()[record_ids]
+            record_ids = record_ids[np.argsort(-keys if descending else keys, kind="stable")]
+        elif sort is not None:
+            if sort not in self.values:
+                raise ValueError(f"Unknown attribute '{sort}'")
+            keys = self.values[sort][record_ids]
+            if descending:
+                keys = -keys
+            missing = ~self.present[sort][record_ids]
+            # lexsort uses the last key as the primary one
+            record_ids = record_ids[np.lexsort((self._name_ranks()[record_ids], keys, missing))]
+        end = None if limit is None else offset + limit
+        return record_ids[offset:end], total
+
+    def attributes(self, record_id) -> Dict[str, object]:
+        """All numeric fields a record carries, as {field: number}."""
+        return {field: self.value(record_id, field) for field in NUMERIC_FIELDS
+                if record_id < self._capacity and self.present[field][record_id]}
+
+    def value(self, record_id, field):
+        """A single field value, or None if the record does not carry it."""
+        if record_id >= self._capacity or not self.present[field][record_id]:
+            return None
+        number = self.values[field][record_id]
+        return int(number) if number.is_integer() else float(number)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._kinds))
@@ -0,0 +1,539 @@
+"""
+In-memory catalog of every item, NPC and location the companion knows about.
+
+The catalog is built once from the JSON files in the data directory and keeps
+track of which records came from which file, so that a changed file can be
+re-parsed on its own and the difference applied to any attached indexes.
+Indexes get add(record_id, record) and remove(record_id, record) calls; a
+full load hands them all records at once through add_many/remove_many when
+an index has those (the sorted-list indexes, which would otherwise insert
+one key at a time).
+
+Records are stored column-wise: form IDs as 32-bit integers in an array,
+kinds and source files as small integer codes, and names as interned strings.
+CatalogRecord tuples are only built on demand by get() and items().
+"""
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from src import data_loader, json_codec
+from src.attribute_store import AttributeStore
+from src.cell_index import CellHierarchy
+from src.command_builder import format_form_id, parse_form_id
+from src.fuzzy_index import FuzzyIndex
+from src.manifest import CategoryFile, STATUS_MISSING, discover_category_files, invalidate_manifest, load_manifest
+from src.prefix_index import PrefixIndex
+from src.ref_index import RefIndex
+from src.search_index import SearchIndex
+from src.sorted_views import SortedViews
+
+KIND_ITEM = "item"
+KIND_NPC = "npc"
+KIND_LOCATION = "location"
+
+NPCS_CATEGORY = "NPCs"
+
+# Catalog index files, relative to the data directory.
+ITEM_CATEGORIES_FILE = data_loader.ITEM_CATEGORIES_FILE
+LOCATION_CATEGORIES_FILE = data_loader.LOCATION_CATEGORIES_FILE
+NPCS_FILE = data_loader.NPCS_FILE
+LOCATIONS_SUBDIR = data_loader.LOCATIONS_SUBDIR
+
+# Minimum number of seconds between two mtime sweeps in refresh_if_stale().
+REFRESH_INTERVAL = 2.0
+
+
+# Source of Catalog.version() values, shared by every Catalog so that a
+# version never means two different things within one process.
+_versions = itertools.count(1)
+
+# Kind codes stored in the kind column; 0 marks a free (deleted) row.
+_KIND_CODES = {KIND_ITEM: 1, KIND_NPC: 2, KIND_LOCATION: 3}
+_KIND_NAMES = (None, KIND_ITEM, KIND_NPC, KIND_LOCATION)
+
+
+class CatalogRecord(NamedTuple):
+    """A single searchable entry (item, NPC or location cell)."""
+    kind: str
+    name: str
+    ref: str                  # Form ID (8 hex digits) for items/NPCs, cell ID for locations
+    category: str             # Item type, "NPCs" or location category
+    subcategory: Optional[str]
+    source: str               # Data file (relative to the data dir) it came from
+    details: Optional[dict]   # Full item record, if the file stores one
+    form_id: Optional[int] = None  # Integer form ID for items/NPCs
+
+
+class CatalogChange(NamedTuple):
+    """Record-level difference found when one catalog file was re-parsed.
+
+    A change with ``rebuilt`` set (and no source) means a category index file
+    changed and the whole catalog was reloaded.
+    """
+    source: Optional[str]
+    kind: Optional[str]
+    category: Optional[str]
+    subcategory: Optional[str]
+    added: List[str]
+    removed: List[str]
+    changed: List[str]        # Same name and reference, different details
+    records: int              # Records now held for the source file
+    rebuilt: bool = False
+
+    def __bool__(self):
+        return bool(self.rebuilt or self.added or self.removed or self.changed)
+
+
+_SourceFile = CategoryFile
+
+
+def records_from_data(data, kind, category, subcategory, source):
+    """Converts the parsed content of one catalog file into records.
+
+    Item files map names to either an ID string or a dict with an "id" key.
+    Location files map names to a cell ID or to a list of cell IDs (one record
+    is produced per cell in that case).
+    """
+    records = []
+    if not isinstance(data, dict):
+        return records
+    for name, value in data.items():
+        if isinstance(value, dict):
+            ref = value.get("id")
+            details = value
+        else:
+            ref = value
+            details = None
+        refs = ref if isinstance(ref, list) else [ref]
+        for single_ref in refs:
+            if not isinstance(single_ref, str) or not single_ref.strip():
+                continue
+            records.append(CatalogRecord(kind, name, single_ref.strip(), category,
+                                         subcategory, source, details))
+    return records
+
+
+def _update_index(index, method, pairs):
+    """Calls index.<method>_many(pairs) if the index has it, else index.<method>() per record."""
+    if not pairs:
+        return
+    many = getattr(index, f"{method}_many", None)
+    if many is not None:
+        many(pairs)
+        return
+    single = getattr(index, method)
+    for record_id, record in pairs:
+        single(record_id, record)
+
+
+class Catalog:
+    """Holds all catalog records and keeps attached indexes in sync.
+
+    Indexes are plain objects exposing ``add(record_id, record)`` and
+    ``remove(record_id, record)``; they are fed every record on attach and
+    then only the per-file differences on refresh().
+    """
+
+    def __init__(self, data_dir=None, overlay_dir=None):
+        if data_dir is None:
+            data_dir, overlay_dir = data_loader.DATA_DIR, overlay_dir or data_loader.USER_DATA_DIR
+        self.data_dir = data_dir
+        self.overlay_dir = overlay_dir  # User overlay merged over data_dir (see data_loader.merge_overlay)
+        # Record columns, indexed by record ID. Deleted rows are kept (kind 0)
+        # and reused through _free_ids.
+        self._kinds = array('B')
+        self._form_ids = array('I')     # 0 for locations
+        self._source_codes = array('H') # Index into _source_paths
+        self._names: List[str] = []
+        self._cells: List[Optional[str]] = []
+        self._details: Dict[int, dict] = {}  # Sparse, only for files storing full records
+        self._free_ids: List[int] = []
+        self._count = 0
+        self._source_paths: List[str] = []
+        self._source_codes_by_path: Dict[str, int] = {}
+        self._sources: Dict[str, _SourceFile] = {}
+        self._file_records: Dict[str, List[int]] = {}
+        self._mtimes: Dict[str, float] = {}
+        # Bumped by every load and every file change that altered records, so
+        # callers can tell whether data they already hold is still current.
+        self._generation = 0
+        self._file_versions: Dict[str, int] = {}
+        self._indexes = []
+        self._batch = None  # ([(record_id, record) dropped], [record_id added]) while load() defers indexing
+        self._listeners = []
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+        self.search_index = self.attach(SearchIndex(self))
+        self.fuzzy_index = self.attach(FuzzyIndex(self))
+        self.prefix_index = self.attach(PrefixIndex())
+        self.ref_index = self.attach(RefIndex(self))
+        self.attributes = self.attach(AttributeStore())
+        self.sorted_views = self.attach(SortedViews(self))
+        self.cells = self.attach(CellHierarchy(self))
+
+    # --- Loading ---
+
+    def _path(self, relpath):
+        return os.path.join(self.data_dir, relpath)
+
+    def _stat_mtime(self, relpath):
+        """mtime of the bundled file, paired with its overlay's when there is an overlay."""
+        paths = [self._path(relpath)]
+        if self.overlay_dir:
+            paths.append(os.path.join(self.overlay_dir, relpath))
+        mtimes = []
+        for filepath in paths:
+            try:
+                mtimes.append(os.stat(filepath).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes) if self.overlay_dir else mtimes[0]
+
+    def _read(self, relpath):
+        """Parsed content of a catalog file with the user overlay merged in."""
+        return data_loader.load_layered_json(self.data_dir, self.overlay_dir, relpath, self._read_file)
+
+    def _read_file(self, filepath):
+        try:
+            with open(filepath, 'rb') as f:
+                return json_codec.load(f)
+        except FileNotFoundError:
+            logging.warning(f"Catalog file not found: {filepath}")
+        except json.JSONDecodeError:
+            logging.error(f"Could not decode catalog file {filepath}. Check for syntax errors.")
+        except Exception:
+            logging.exception(f"Unexpected error reading catalog file {filepath}")
+        return None
+
+    def _discover_sources(self):
+        """Builds the {relpath: _SourceFile} map.
+
+        A valid manifest already lists every category file, so files it marks
+        missing are dropped here instead of failing one by one in _read(). The
+        manifest only describes the bundled data, so it is not used when the
+        user overlay has its own category index files.
+        """
+        overlay_exists = lambda relpath: bool(self.overlay_dir) and os.path.exists(
+            os.path.join(self.overlay_dir, relpath))
+        manifest = None
+        if not any(overlay_exists(f) for f in (ITEM_CATEGORIES_FILE, LOCATION_CATEGORIES_FILE)):
+            manifest = load_manifest(self.data_dir)
+        if manifest is not None:
+            return {relpath: _SourceFile(entry["kind"], entry["category"], entry["subcategory"])
+                    for relpath, entry in manifest["files"].items()
+                    if entry["status"] != STATUS_MISSING or overlay_exists(relpath)}
+        return discover_category_files(self._read)
+
+    def load(self):
+        """(Re)builds the whole catalog from disk."""
+        with self._lock:
+            self._batch = ([], [])
+            try:
+                for relpath in list(self._file_records):
+                    self._drop_file(relpath)
+                self._sources = self._discover_sources()
+                for meta_file in (ITEM_CATEGORIES_FILE, LOCATION_CATEGORIES_FILE):
+                    self._mtimes[meta_file] = self._stat_mtime(meta_file)
+                for relpath in self._sources:
+                    self._load_file(relpath)
+            finally:
+                dropped, added = self._batch
+                self._batch = None
+                added = [(record_id, self.get(record_id)) for record_id in added]
+                for index in self._indexes:
+                    _update_index(index, "remove", dropped)
+                    _update_index(index, "add", added)
+            self._generation = next(_versions)
+            self._file_versions = dict.fromkeys(self._sources, self._generation)
+            self._last_refresh = time.monotonic()
+            logging.info(f"Catalog loaded {self._count} records from {len(self._sources)} files.")
+        return self
+
+    def _source_code(self, relpath):
+        code = self._source_codes_by_path.get(relpath)
+        if code is None:
+            code = self._source_codes_by_path[relpath] = len(self._source_paths)
+            self._source_paths.append(relpath)
+        return code
+
+    def _store(self, record, source_code):
+        """Writes a parsed record into the columns and returns its record ID."""
+        if record.kind == KIND_LOCATION:
+            form_id, cell = 0, sys.intern(record.ref)
+        else:
+            form_id, cell = parse_form_id(record.ref), None
+            if form_id is None:
+                logging.warning(f"Skipping '{record.name}' in {record.source}: invalid form ID '{record.ref}'")
+                return None
+        row = (_KIND_CODES[record.kind], form_id, source_code, sys.intern(record.name), cell)
+        if self._free_ids:
+            record_id = self._free_ids.pop()
+            self._kinds[record_id], self._form_ids[record_id], self._source_codes[record_id], \
+                self._names[record_id], self._cells[record_id] = row
+        else:
+            record_id = len(self._kinds)
+            self._kinds.append(row[0])
+            self._form_ids.append(row[1])
+            self._source_codes.append(row[2])
+            self._names.append(row[3])
+            self._cells.append(row[4])
+        if record.details is not None:
+            self._details[record_id] = record.details
+        self._count += 1
+        return record_id
+
+    def _load_file(self, relpath):
+        source = self._sources[relpath]
+        self._mtimes[relpath] = self._stat_mtime(relpath)
+        data = self._read(relpath)
+        new_records = records_from_data(data, source.kind, source.category, source.subcategory, relpath)
+        source_code = self._source_code(relpath)
+        ids = []
+        for parsed in new_records:
+            record_id = self._store(parsed, source_code)
+            if record_id is None:
+                continue
+            ids.append(record_id)
+            self._index_record(record_id)
+        self._file_records[relpath] = ids
+
+    def _drop_record(self, record_id):
+        record = self.get(record_id)
+        if record is None:
+            return None
+        if self._batch is not None:
+            self._batch[0].append((record_id, record))
+        else:
+            for index in self._indexes:
+                index.remove(record_id, record)
+        self._kinds[record_id] = 0
+        self._names[record_id] = None
+        self._cells[record_id] = None
+        self._details.pop(record_id, None)
+        self._free_ids.append(record_id)
+        self._count -= 1
+        return record
+
+    def _drop_file(self, relpath):
+        for record_id in self._file_records.pop(relpath, []):
+            self._drop_record(record_id)
+
+    def _reload_file(self, relpath) -> CatalogChange:
+        """Re-parses one file and applies only the records that differ.
+
+        Records are matched on (name, reference); unchanged ones keep their
+        record ID and are not touched in any index.
+        """
+        source = self._sources[relpath]
+        self._mtimes[relpath] = self._stat_mtime(relpath)
+        parsed = records_from_data(self._read(relpath), source.kind, source.category,
+                                   source.subcategory, relpath)
+        old = {}
+        for record_id in self._file_records.get(relpath, []):
+            record = self.get(record_id)
+            if record is not None:
+                old.setdefault((record.name, record.ref), []).append(record_id)
+        source_code = self._source_code(relpath)
+        ids, added, changed = [], [], []
+        for record in parsed:
+            if record.kind != KIND_LOCATION:
+                form_id = parse_form_id(record.ref)
+                # Match on the canonical form ID, so "f" and "0000000F" are the same record
+                key = (record.name, format_form_id(form_id) if form_id is not None else record.ref)
+            else:
+                key = (record.name, record.ref)
+            previous = old.get(key)
+            if previous:
+                record_id = previous.pop(0)
+                if self._details.get(record_id) != record.details:
+                    self._drop_record(record_id)
+                    record_id = self._store(record, source_code)
+                    self._index_record(record_id)
+                    changed.append(record.name)
+                ids.append(record_id)
+                continue
+            record_id = self._store(record, source_code)
+            if record_id is None:
+                continue
+            self._index_record(record_id)
+            ids.append(record_id)
+            added.append(record.name)
+        removed = []
+        for leftover in old.values():
+            for record_id in leftover:
+                removed.append(self._drop_record(record_id).name)
+        self._file_records[relpath] = ids
+        if added or removed or changed:
+            self._generation = next(_versions)
+            self._file_versions[relpath] = self._generation
+        return CatalogChange(relpath, source.kind, source.category, source.subcategory,
+                             added, removed, changed, len(ids))
+
+    def _index_record(self, record_id):
+        if self._batch is not None:
+            self._batch[1].append(record_id)
+            return
+        record = self.get(record_id)
+        for index in self._indexes:
+            index.add(record_id, record)
+
+    # --- Incremental updates ---
+
+    def refresh(self):
+        """Re-parses catalog files whose mtime changed since the last load.
+
+        Returns:
+            list: Relative paths of the files that were reloaded.
+        """
+        changes = self._refresh()
+        if changes and changes[0].rebuilt:
+            return list(self._sources)
+        return [change.source for change in changes]
+
+    def refresh_changes(self) -> List[CatalogChange]:
+        """Like refresh(), but returns the non-empty record-level changes."""
+        return [change for change in self._refresh() if change]
+
+    def _refresh(self):
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            meta_files = (ITEM_CATEGORIES_FILE, LOCATION_CATEGORIES_FILE)
+            if any(self._stat_mtime(f) != self._mtimes.get(f) for f in meta_files):
+                logging.info("Catalog category index changed; rebuilding catalog.")
+                invalidate_manifest(self.data_dir)
+                self.load()
+                changes = [CatalogChange(None, None, None, None, [], [], [], self._count, rebuilt=True)]
+            else:
+                changes = []
+                for relpath in self._sources:
+                    if self._stat_mtime(relpath) != self._mtimes.get(relpath):
+                        logging.info(f"Catalog file changed, reloading: {relpath}")
+                        changes.append(self._reload_file(relpath))
+                if changes:
+                    invalidate_manifest(self.data_dir)  # Its record counts are re-checked on next use
+            listeners = list(self._listeners)
+        notify = [change for change in changes if change]
+        if notify:
+            for listener in listeners:
+                try:
+                    listener(notify)
+                except Exception:
+                    logging.exception("Catalog change listener failed")
+        return changes
+
+    def add_listener(self, callback):
+        """Calls callback(list of CatalogChange) after every refresh that changed records."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def refresh_if_stale(self, interval=REFRESH_INTERVAL):
+        """Calls refresh() at most once per `interval` seconds."""
+        if time.monotonic() - self._last_refresh >= interval:
+            return self.refresh()
+        return []
+
+    # --- Indexes ---
+
+    def attach(self, index):
+        """Registers an index and feeds it every current record."""
+        with self._lock:
+            self._indexes.append(index)
+            _update_index(index, "add", list(self.items()))
+        return index
+
+    # --- Record access ---
+
+    def get(self, record_id) -> Optional[CatalogRecord]:
+        """Builds the CatalogRecord for a record ID, or None if there is none."""
+        if not 0 <= record_id < len(self._kinds):
+            return None
+        kind = _KIND_NAMES[self._kinds[record_id]]
+        if kind is None:
+            return None
+        relpath = self._source_paths[self._source_codes[record_id]]
+        source = self._sources.get(relpath)
+        if kind == KIND_LOCATION:
+            ref, form_id = self._cells[record_id], None
+        else:
+            form_id = self._form_ids[record_id]
+            ref = format_form_id(form_id)
+        return CatalogRecord(kind, self._names[record_id], ref,
+                             source.category if source else None, source.subcategory if source else None,
+                             relpath, self._details.get(record_id), form_id)
+
+    def items(self) -> Iterator[Tuple[int, CatalogRecord]]:
+        """Yields (record_id, record) for every record."""
+        for record_id in range(len(self._kinds)):
+            if self._kinds[record_id]:
+                yield record_id, self.get(record_id)
+
+    @property
+    def lock(self):
+        """Held while records change; take it to read several records consistently."""
+        return self._lock
+
+    def version(self, relpath=None) -> int:
+        """Change counter of one catalog file, or of the whole catalog.
+
+        It only grows, and a file's version changes exactly when its records
+        do (a rebuild changes every file's). Versions are unique across all
+        catalogs in the process. 0 for unknown files.
+        """
+        if relpath is None:
+            return self._generation
+        return self._file_versions.get(relpath, 0)
+
+    def source_paths(self) -> List[str]:
+        """Relative paths of every catalog file currently loaded."""
+        return list(self._sources)
+
+    def source_file(self, relpath) -> Optional[_SourceFile]:
+        return self._sources.get(relpath)
+
+    def file_record_ids(self, relpath) -> List[int]:
+        """Record IDs parsed from one catalog file, in file order."""
+        return list(self._file_records.get(relpath, ()))
+
+    def kind_of(self, record_id) -> Optional[str]:
+        return _KIND_NAMES[self._kinds[record_id]]
+
+    def name_of(self, record_id) -> Optional[str]:
+        return self._names[record_id]
+
+    def form_id_of(self, record_id) -> Optional[int]:
+        """Integer form ID of an item/NPC record (None for locations)."""
+        if self._kinds[record_id] in (0, _KIND_CODES[KIND_LOCATION]):
+            return None
+        return self._form_ids[record_id]
+
+    def cell_of(self, record_id) -> Optional[str]:
+        return self._cells[record_id]
+
+    def __len__(self):
+        return self._count
+
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """Returns the shared catalog, building it on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = Catalog().load()
+    return _catalog
@@ -0,0 +1,213 @@
+"""
+Hierarchy of location cells derived from their cell IDs.
+
+Cell IDs are CamelCase paths: "BravilMagesGuild2ndFloor" is a floor of
+"BravilMagesGuild", which is a building in Bravil. A cell's parent is the
+longest other known cell ID that is a prefix of it on a word boundary;
+cells without such a parent are buildings, grouped by region (the first
+word of the ID, "IC" for the Imperial City). Regions with many buildings
+get one more level for the district ("ICTempleDistrict...").
+
+The tree is rebuilt lazily after location records change, so children_of()
+and siblings_of() are dictionary lookups on a prebuilt table.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Readable labels for region prefixes that are abbreviations.
+REGION_LABELS = {"IC": "Imperial City"}
+# Regions with more buildings than this are split into districts.
+DISTRICT_THRESHOLD = 20
+
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+(?:st|nd|rd|th)?")
+
+REGION_PREFIX = "region:"
+DISTRICT_PREFIX = "district:"
+
+
+class CellNode(NamedTuple):
+    key: str              # Folded cell ID, or "region:<id>" / "district:<id>" for groups
+    label: str            # Location name, or a label derived from the ID for groups
+    cell: Optional[str]   # Cell ID to teleport to (None for groups)
+    parent: Optional[str]
+    depth: int            # 0 for regions
+
+
+def word_starts(cell_id) -> List[int]:
+    """Offsets where a CamelCase word starts in a cell ID."""
+    return [match.start() for match in _WORD_RE.finditer(cell_id)]
+
+
+def _words(text) -> List[str]:
+    return _WORD_RE.findall(text)
+
+
+class CellHierarchy:
+    """Catalog index exposing location cells as a region/building/floor tree."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+        self._dirty = True
+        self._nodes: Dict[str, CellNode] = {}
+        self._children: Dict[Optional[str], Tuple[CellNode, ...]] = {}
+
+    # --- Catalog index protocol ---
+
+    def add(self, record_id, record):
+        if record.kind == "location":
+            self._dirty = True
+
+    def remove(self, record_id, record):
+        if record.kind == "location":
+            self._dirty = True
+
+    # --- Building ---
+
+    def _cells(self) -> Dict[str, Tuple[str, str]]:
+        """{folded cell ID: (cell ID, name)}; the first record wins for a shared cell."""
+        cells = {}
+        catalog = self._catalog
+        for relpath in sorted(catalog.source_paths()):
+            source = catalog.source_file(relpath)
+            if source is None or source.kind != "location":
+                continue
+            for record_id in catalog.file_record_ids(relpath):
+                cell = catalog.cell_of(record_id)
+                if cell and cell.lower() not in cells:
+                    cells[cell.lower()] = (cell, catalog.name_of(record_id))
+        return cells
+
+    def _build(self):
+        with self._catalog.lock:
+            cells = self._cells()
+            self._dirty = False
+        nodes: Dict[str, dict] = {}
+        children: Dict[Optional[str], List[str]] = {}
+
+        def place(key, label, cell, parent):
+            nodes[key] = {"label": label, "cell": cell, "parent": parent}
+            children.setdefault(parent, []).append(key)
+
+        buildings: Dict[str, List[str]] = {}  # Region word -> top-level cell keys
+        parents = {}
+        for key, (cell, _) in cells.items():
+            starts = word_starts(cell)
+            parent = None
+            for start in reversed(starts[1:]):
+                prefix = key[:start]
+                if prefix in cells:
+                    parent = prefix
+                    break
+            if parent is not None:
+                parents[key] = parent
+            else:
+                region = cell[:starts[1]] if len(starts) > 1 else cell
+                buildings.setdefault(region, []).append(key)
+
+        for region, members in buildings.items():
+            region_key = REGION_PREFIX + region.lower()
+            place(region_key, REGION_LABELS.get(region, region), None, None)
+            districts: Dict[str, List[str]] = {}
+            for key in members:
+                cell = cells[key][0]
+                starts = word_starts(cell) + [len(cell)]
+                districts.setdefault(cell[:starts[2]] if len(starts) > 2 else cell, []).append(key)
+            split = len(members) > DISTRICT_THRESHOLD and len(districts) > 1
+            for district, district_members in districts.items():
+                parent = region_key
+                if split and len(district_members) > 1:
+                    # Label with the words every member shares after the region
+                    shared = _words(cells[district_members[0]][0])
+                    for key in district_members[1:]:
+                        other = _words(cells[key][0])
+                        length = 0
+                        while length < min(len(shared), len(other)) and \
+                                shared[length].lower() == other[length].lower():
+                            length += 1
+                        shared = shared[:length]
+                    parent = DISTRICT_PREFIX + district.lower()
+                    place(parent, " ".join(shared[1:]) or district, None, region_key)
+                for key in district_members:
+                    place(key, cells[key][1], cells[key][0], parent)
+
+        # Sub-cells, placed once their parent exists
+        pending = dict(parents)
+        while pending:
+            placed = [key for key, parent in pending.items() if parent in nodes]
+            for key in placed:
+                place(key, cells[key][1], cells[key][0], pending.pop(key))
+            if not placed:  # Unreachable for prefix parents, but never loop forever
+                break
+
+        def depth(key):
+            level = 0
+            while nodes[key]["parent"] is not None:
+                key = nodes[key]["parent"]
+                level += 1
+            return level
+
+        self._nodes = {key: CellNode(key, entry["label"], entry["cell"], entry["parent"], depth(key))
+                       for key, entry in nodes.items()}
+        self._children = {parent: tuple(sorted((self._nodes[key] for key in keys),
+                                               key=lambda node: node.label.lower()))
+                          for parent, keys in children.items()}
+
+    def _ensure(self):
+        if self._dirty:
+            self._build()
+
+    # --- Querying ---
+
+    def node(self, key_or_cell) -> Optional[CellNode]:
+        """Node for a cell ID (any case) or a group key."""
+        self._ensure()
+        return self._nodes.get((key_or_cell or "").strip().lower())
+
+    def roots(self) -> Tuple[CellNode, ...]:
+        """Region nodes, by label."""
+        self._ensure()
+        return self._children.get(None, ())
+
+    def children_of(self, key_or_cell) -> Tuple[CellNode, ...]:
+        self._ensure()
+        return self._children.get((key_or_cell or "").strip().lower(), ())
+
+    def siblings_of(self, key_or_cell) -> Tuple[CellNode, ...]:
+        """Other nodes under the same parent."""
+        node = self.node(key_or_cell)
+        if node is None:
+            return ()
+        return tuple(other for other in self._children.get(node.parent, ()) if other.key != node.key)
+
+    def building_of(self, key_or_cell) -> Optional[CellNode]:
+        """Top-level cell (building) containing a cell, or the cell itself."""
+        node = self.node(key_or_cell)
+        while node is not None and node.parent is not None and self._nodes[node.parent].cell is not None:
+            node = self._nodes[node.parent]
+        return node if node is not None and node.cell is not None else None
+
+    def floors_of(self, key_or_cell) -> List[CellNode]:
+        """The building containing a cell followed by all its sub-cells, depth first."""
+        building = self.building_of(key_or_cell)
+        if building is None:
+            return []
+        floors = []
+        stack = [building]
+        while stack:
+            node = stack.pop()
+            floors.append(node)
+            stack.extend(reversed(self._children.get(node.key, ())))
+        return floors
+
+    def path_of(self, key_or_cell) -> List[CellNode]:
+        """Nodes from the region down to the given node."""
+        node = self.node(key_or_cell)
+        path = []
+        while node is not None:
+            path.append(node)
+            node = self._nodes.get(node.parent) if node.parent is not None else None
+        return list(reversed(path))
+
+    def __len__(self):
+        self._ensure()
+        return sum(1 for node in self._nodes.values() if node.cell is not None)
@@ -3,10 +3,15 @@ Handles the Command Line Interface (CLI) user interactions and flow.
 """
 import sys
 import os
+import re
 import time
 import colorama
 from colorama import Fore, Back, Style
 import logging
+try:
+    import readline # Tab completion where available (not on stock Windows Python)
+except ImportError:
+    readline = None
 
 # Ensure correct import path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -26,7 +31,8 @@ COLOR_WARN = Fore.MAGENTA
 COLOR_ERROR = Fore.RED
 COLOR_RESET = Style.RESET_ALL
 
-COMMAND_HISTORY = [] # Simple in-memory history for the session
+HISTORY_PAGE = 20 # Past commands listed by 'h' and 'history'
+READLINE_HISTORY = 200 # Past commands preloaded for the arrow keys
 
 # Global automator instance for the CLI session
 cli_automator: WindowAutomator = None
@@ -80,16 +86,15 @@ def cli_run_single_command():
 
     command = input(f"{COLOR_PROMPT}Enter command (or 'h' for history): {COLOR_RESET}").strip()
     if command == 'h':
-        if not COMMAND_HISTORY:
+        history = app_logic.get_history_logic(limit=HISTORY_PAGE)['history']
+        if not history:
             print(f"{COLOR_INFO}Command history is empty.{COLOR_RESET}")
             return
-        print("--- Command History ---")
-        for i, cmd in enumerate(reversed(COMMAND_HISTORY)): # Show most recent first
-            print(f"  {i+1}: {cmd}")
+        print_history(history)
         try:
             choice = int(input(f"{COLOR_PROMPT}Enter history number to run: {COLOR_RESET}"))
-            if 1 <= choice <= len(COMMAND_HISTORY):
-                command = COMMAND_HISTORY[-choice] # Get command from reversed index
+            if 1 <= choice <= len(history):
+                command = history[choice - 1] # Most recent first
                 print(f"{COLOR_INFO}Selected from history: {command}{COLOR_RESET}")
             else:
                 print(f"{COLOR_ERROR}Invalid history number.{COLOR_RESET}")
@@ -103,7 +108,7 @@ def cli_run_single_command():
         return
 
     print(f"{COLOR_INFO}Executing: {command}...{COLOR_RESET}")
-    COMMAND_HISTORY.append(command)
+    app_logic.record_command_logic(command, source="cli")
     result = app_logic.run_single_command_logic(command)
     if result["success"]:
         print(f"{COLOR_INFO}Command executed successfully.{COLOR_RESET}")
@@ -119,6 +124,32 @@ def cli_run_single_command():
     else:
         print(f"{COLOR_ERROR}Command failed: {result.get('message', 'Unknown error')}{COLOR_RESET}")
 
+def print_history(history):
+    """Prints past commands, most recent first, numbered from 1."""
+    print("--- Command History ---")
+    for i, cmd in enumerate(history):
+        description = app_logic.describe_command(cmd)
+        print(f"  {i+1}: {cmd}" + (f"  {COLOR_INFO}# {description}{COLOR_RESET}" if description else ""))
+
+def cli_history(arg):
+    """'history' lists recent commands; 'history <prefix>' or 'history /<text>' searches them."""
+    if arg.startswith('/'):
+        result = app_logic.get_history_logic(contains=arg[1:], limit=HISTORY_PAGE)
+    else:
+        result = app_logic.get_history_logic(prefix=arg or None, limit=HISTORY_PAGE)
+    if not result['history']:
+        print(f"{COLOR_INFO}No matching commands in the history ({result['total']} kept).{COLOR_RESET}")
+        return
+    print_history(result['history'])
+
+def cli_recall(prefix):
+    """'!<prefix>' runs the most recent command starting with prefix ('!!' runs the last one)."""
+    history = app_logic.get_history_logic(prefix=prefix or None, limit=1)['history']
+    if not history:
+        print(f"{COLOR_WARN}No command in the history starts with '{prefix}'.{COLOR_RESET}")
+        return
+    execute_cli_command(history[0])
+
 def cli_run_preset_battle():
     print_header("Run Preset Battle")
     if not print_status():
@@ -132,8 +163,9 @@ def cli_run_preset_battle():
         return
         
     print("Available Presets:")
+    descriptions = presets_result.get('descriptions', {})
     for i, name in enumerate(presets):
-        print(f"  {i+1}: {name}")
+        print(f"  {i+1}: {name}" + (f" - {descriptions[name]}" if descriptions.get(name) else ""))
         
     try:
         choice_idx = int(get_choice("Select preset number: ")) - 1
@@ -241,20 +273,19 @@ def cli_add_item():
 
 def cli_list_favorites():
     print_header("List Favorites")
-    fav_result = app_logic.load_favorites_logic()
+    fav_result = app_logic.load_favorites_logic(annotate=True)
     favorites = fav_result.get('favorites', [])
     if not favorites:
         print(f"{COLOR_INFO}You have no saved favorites.{COLOR_RESET}")
         return
         
-    print(f"{COLOR_INFO}Saved Favorites ({len(favorites)}):{COLOR_RESET}")
-    # Sort by name for display
-    favorites.sort(key=lambda x: x.get('name', ''))
+    print(f"{COLOR_INFO}Saved Favorites ({len(favorites)}), most used first:{COLOR_RESET}")
     for i, fav in enumerate(favorites):
         name = fav.get('name', 'Unnamed')
         cmd = fav.get('command', 'No Command')
         typ = fav.get('type', 'unknown')
-        print(f"  {COLOR_MENU}{i+1}{COLOR_RESET}: {name} ({typ}) - `{cmd}`")
+        description = fav.get('description')
+        print(f"  {COLOR_MENU}{i+1}{COLOR_RESET}: {name} ({typ}) - `{cmd}`" + (f" [{description}]" if description else ""))
         
 def cli_run_favorite():
     print_header("Run Favorite")
@@ -268,8 +299,7 @@ def cli_run_favorite():
         print(f"{COLOR_INFO}You have no saved favorites to run.{COLOR_RESET}")
         return
         
-    print("Select Favorite to Run:")
-    favorites.sort(key=lambda x: x.get('name', ''))
+    print("Select Favorite to Run (most used first):")
     for i, fav in enumerate(favorites):
          print(f"  {COLOR_MENU}{i+1}{COLOR_RESET}: {fav.get('name', 'Unnamed')}")
          
@@ -291,6 +321,33 @@ def cli_run_favorite():
     except ValueError:
         print(f"{COLOR_ERROR}Invalid input.{COLOR_RESET}")
         
+def print_quick_slots(quick):
+    """Prints the most-used favorites as numbered quick slots ('fav <n>' runs one)."""
+    if not quick:
+        print(f"{COLOR_INFO}No quick slots yet; run a favorite to fill them.{COLOR_RESET}")
+        return
+    print(f"{COLOR_INFO}Quick slots:{COLOR_RESET} " +
+          "  ".join(f"{COLOR_MENU}{i+1}{COLOR_RESET}: {name}" for i, name in enumerate(quick)))
+
+def cli_quick_favorite(arg):
+    """'fav' shows the quick slots; 'fav <slot number|name>' runs that favorite."""
+    quick = app_logic.load_favorites_logic().get('quick', [])
+    if not arg:
+        print_quick_slots(quick)
+        return
+    name = arg
+    if arg.isdigit():
+        slot = int(arg)
+        if not 1 <= slot <= len(quick):
+            print(f"{COLOR_WARN}No quick slot {slot}.{COLOR_RESET}")
+            print_quick_slots(quick)
+            return
+        name = quick[slot - 1]
+    print(f"{COLOR_INFO}Running favorite: {name}...{COLOR_RESET}")
+    result = app_logic.run_favorite_logic(name)
+    msg_color = COLOR_INFO if result['success'] else COLOR_ERROR
+    print(f"{msg_color}{result.get('message', 'Execution complete.')}{COLOR_RESET}")
+
 def cli_add_favorite():
     print_header("Add Favorite Manually")
     fav_name = input(f"{COLOR_PROMPT}Enter name for the new favorite: {COLOR_RESET}").strip()
@@ -366,6 +423,40 @@ def cli_manage_favorites():
             print(f"{COLOR_ERROR}Invalid choice.{COLOR_RESET}")
         input(f"\n{COLOR_INFO}Press Enter to return to Favorites Menu...{COLOR_RESET}")
 
+# --- Tab Completion ---
+
+def _complete_line(text, state):
+    """readline completer: completes the whole input line via app_logic.complete_logic."""
+    if state == 0:
+        line = readline.get_line_buffer()
+        prefix = ""
+        if line.lower().startswith("exec "):
+            prefix, line = line[:len("exec ")], line[len("exec "):]
+        elif line.lower().startswith(("teleport ", "coc ")):
+            verb, _, rest = line.partition(" ")
+            prefix, line = f"{verb} ", f"coc {rest}"
+        completions = app_logic.complete_logic(line).get('completions', [])
+        _complete_line.matches = []
+        for completion in completions:
+            command = completion.get('command')
+            if not command:
+                continue
+            if prefix and not prefix.lower().startswith("exec") and command.lower().startswith("coc "):
+                command = command[len("coc "):] # "teleport <cell>" / "coc <cell>" keep their verb
+            _complete_line.matches.append(prefix + command)
+    matches = getattr(_complete_line, 'matches', [])
+    return matches[state] if state < len(matches) else None
+
+def _setup_completion():
+    if readline is None:
+        return
+    readline.set_completer(_complete_line)
+    readline.set_completer_delims('') # Complete the full line, names contain spaces
+    readline.parse_and_bind('tab: complete')
+    # Let the arrow keys reach commands from earlier sessions (and the GUI)
+    for command in reversed(app_logic.get_history_logic(limit=READLINE_HISTORY)['history']):
+        readline.add_history(f"exec {command}")
+
 # --- Main CLI Loop ---
 
 def run_companion_cli(automator_instance: WindowAutomator):
@@ -380,6 +471,10 @@ def run_companion_cli(automator_instance: WindowAutomator):
 
     # Initial status check
     print_status()
+    quick = app_logic.load_favorites_logic().get('quick', [])
+    if quick:
+        print_quick_slots(quick)
+    _setup_completion()
 
     while True:
         try:
@@ -396,6 +491,143 @@ def run_companion_cli(automator_instance: WindowAutomator):
             print(f"{COLOR_ERROR}\nAn unexpected error occurred: {e}{COLOR_RESET}")
             logging.exception("Unexpected CLI error")
 
+def print_help():
+    """Prints the commands understood by the CLI prompt."""
+    print_header("Commands")
+    print(f"  {COLOR_MENU}status{COLOR_RESET}: Re-check the game status")
+    print(f"  {COLOR_MENU}exec <command>{COLOR_RESET}: Run a raw console command")
+    print(f"  {COLOR_MENU}additem <item_id> <quantity>{COLOR_RESET}: Add an item by form ID")
+    print(f"  {COLOR_MENU}teleport <cell id>{COLOR_RESET}: Teleport to a cell (suggests close matches for typos)")
+    print(f"  {COLOR_MENU}cells [<region|cell id>]{COLOR_RESET}: Browse locations by region, building and floor")
+    print(f"  {COLOR_MENU}find [kind:item|npc|location] [in:<category>] <text>{COLOR_RESET}: Search items, NPCs and locations")
+    print(f"  {COLOR_MENU}query [in:<category>] [sub:<text>] [weight<5] [sort:-value] [page:N] [text]{COLOR_RESET}: Filter and sort items by stats")
+    print(f"  {COLOR_MENU}history [<prefix>|/<text>]{COLOR_RESET}: List past commands (all sessions), or search them")
+    print(f"  {COLOR_MENU}!<prefix>{COLOR_RESET}: Run the last command starting with <prefix> ('!!' repeats the last one)")
+    print(f"  {COLOR_MENU}fav [<slot>|<name>]{COLOR_RESET}: Show the most-used favorites as quick slots, or run one")
+    print(f"  {COLOR_MENU}help{COLOR_RESET}: Show this list")
+    print(f"  {COLOR_MENU}exit{COLOR_RESET}: Quit")
+
+FIND_FILTER_RE = re.compile(r'\b(kind|in):(?:"([^"]*)"|(\S+))')
+
+def cli_find(query_text):
+    """Searches the catalog and prints the ranked matches with their IDs."""
+    filters = {}
+    for match in FIND_FILTER_RE.finditer(query_text):
+        filters[match.group(1)] = match.group(2) if match.group(2) is not None else match.group(3)
+    query = FIND_FILTER_RE.sub(" ", query_text).strip()
+    if not query:
+        print(f"{COLOR_WARN}Usage: find [kind:item|npc|location] [in:<category>] <text>{COLOR_RESET}")
+        return
+    result = app_logic.search_catalog_logic(query, kind=filters.get('kind'), category=filters.get('in'))
+    results = result.get('results', [])
+    if not results:
+        print(f"{COLOR_WARN}No matches for '{query}'.{COLOR_RESET}")
+        return
+    print(f"{COLOR_INFO}Showing {len(results)} of {result.get('total', len(results))} matches for '{query}':{COLOR_RESET}")
+    for i, entry in enumerate(results):
+        category = entry['category'] if not entry.get('subcategory') else f"{entry['category']} / {entry['subcategory']}"
+        print(f"  {COLOR_MENU}{i+1}{COLOR_RESET}: {entry['name']} ({entry['id']}) [{entry['kind']}: {category}]")
+
+QUERY_OPTION_RE = re.compile(r'\b(in|sub|sort|limit|page):(?:"([^"]*)"|(\S+))')
+QUERY_PREDICATE_RE = re.compile(r'^([a-z_]+)(<=|>=|!=|<|>|=)(-?\d+(?:\.\d+)?)$')
+QUERY_RANGE_RE = re.compile(r'^([a-z_]+):(-?\d+(?:\.\d+)?)\.\.(-?\d+(?:\.\d+)?)$')
+QUERY_PAGE_SIZE = 20
+
+def cli_query(query_text):
+    """Filters items by their stats, e.g. 'query in:armor sub:light weight<5 sort:value'."""
+    options = {}
+    for match in QUERY_OPTION_RE.finditer(query_text):
+        options[match.group(1)] = match.group(2) if match.group(2) is not None else match.group(3)
+    predicates, words = [], []
+    for token in QUERY_OPTION_RE.sub(" ", query_text).split():
+        predicate = QUERY_PREDICATE_RE.match(token.lower())
+        value_range = QUERY_RANGE_RE.match(token.lower())
+        if predicate:
+            predicates.append({"field": predicate.group(1), "op": predicate.group(2), "value": float(predicate.group(3))})
+        elif value_range:
+            predicates.append({"field": value_range.group(1), "op": "between",
+                               "value": [float(value_range.group(2)), float(value_range.group(3))]})
+        else:
+            words.append(token)
+    if words:
+        predicates.append({"field": "name", "op": "contains", "value": " ".join(words)})
+
+    sort = options.get('sort', 'name')
+    descending = sort.startswith('-')
+    try:
+        limit = int(options.get('limit', QUERY_PAGE_SIZE))
+        page = max(int(options.get('page', 1)), 1)
+    except ValueError:
+        print(f"{COLOR_WARN}limit: and page: take numbers.{COLOR_RESET}")
+        return
+    result = app_logic.query_items_logic(predicates, sort=sort.lstrip('-'), descending=descending,
+                                         limit=limit, offset=(page - 1) * limit,
+                                         category=options.get('in'), subcategory=options.get('sub'))
+    if not result.get('success'):
+        print(f"{COLOR_ERROR}{result.get('message', 'Query failed.')}{COLOR_RESET}")
+        print(f"{COLOR_WARN}Usage: query [in:<category>] [sub:<text>] [field<op>number] [field:low..high] "
+              f"[sort:[-]field] [limit:N] [page:N] [name text]{COLOR_RESET}")
+        return
+    results = result.get('results', [])
+    total = result.get('total', 0)
+    if not results:
+        print(f"{COLOR_WARN}No items match.{COLOR_RESET}")
+        return
+    first = (page - 1) * limit + 1
+    print(f"{COLOR_INFO}Items {first}-{first + len(results) - 1} of {total}:{COLOR_RESET}")
+    for i, entry in enumerate(results, first):
+        stats = ", ".join(f"{field} {value}" for field, value in entry['attributes'].items())
+        print(f"  {COLOR_MENU}{i}{COLOR_RESET}: {entry['name']} ({entry['id']}) [{entry['subcategory'] or entry['category']}] {stats}")
+
+def cli_teleport(cell_id):
+    """Teleports to a cell, offering the closest known cells for a typo.
+
+    The bundled catalog does not list every cell, so the cell can also be
+    sent as typed.
+    """
+    result = app_logic.teleport_to_location_logic(cell_id)
+    if 'suggestions' in result:
+        print(f"{COLOR_WARN}{result['message']}{COLOR_RESET}")
+        suggestions = result['suggestions']
+        for i, suggestion in enumerate(suggestions):
+            print(f"  {COLOR_MENU}{i+1}{COLOR_RESET}: {suggestion['id']} ({suggestion['name']})")
+        print(f"  {COLOR_MENU}s{COLOR_RESET}: Send '{cell_id}' as typed")
+        choice = get_choice("Teleport to which cell? (number, 's', Enter to cancel): ").strip().lower()
+        if choice == 's':
+            result = app_logic.teleport_to_location_logic(cell_id, force=True)
+        elif choice.isdigit() and 1 <= int(choice) <= len(suggestions):
+            result = app_logic.teleport_to_location_logic(suggestions[int(choice) - 1]['id'])
+        else:
+            print(f"{COLOR_INFO}Teleport cancelled.{COLOR_RESET}")
+            return
+    if result.get('command'):
+        app_logic.record_command_logic(result['command'], source="cli")
+    msg_color = COLOR_INFO if result.get('success') else COLOR_ERROR
+    print(f"{msg_color}{result.get('message', 'Teleport attempt finished.')}{COLOR_RESET}")
+
+def cli_cells(key):
+    """Browses the location hierarchy: regions, a region's buildings, or a building's floors."""
+    result = app_logic.get_location_tree_logic(key or None)
+    path = result.get('path', [])
+    if key and not path:
+        print(f"{COLOR_WARN}No area or cell '{key}'; showing the regions.{COLOR_RESET}")
+    if path and path[-1]['cell']:
+        related = app_logic.get_related_locations_logic(path[-1]['cell'])
+        print(f"{COLOR_INFO}{' / '.join(node['label'] for node in path[:-1])}{COLOR_RESET}")
+        for node in related.get('floors', []):
+            marker = '*' if node['key'] == path[-1]['key'] else ' '
+            print(f"  {marker} {'  ' * node['depth']}{COLOR_MENU}{node['cell']}{COLOR_RESET} ({node['label']})")
+        print(f"{COLOR_INFO}'teleport <cell id>' to go there.{COLOR_RESET}")
+        return
+    if path:
+        print(f"{COLOR_INFO}{' / '.join(node['label'] for node in path)}:{COLOR_RESET}")
+    for node in result.get('nodes', []):
+        if node['cell']:
+            floors = f" [+{node['children']} floors/sub-cells]" if node['children'] else ""
+            print(f"  {COLOR_MENU}{node['cell']}{COLOR_RESET} ({node['label']}){floors}")
+        else:
+            print(f"  {COLOR_MENU}{node['key']}{COLOR_RESET} {node['label']} ({node['children']})")
+
 def handle_input(user_input):
     """Processes user input from the CLI."""
     global cli_automator # Needed to potentially re-check status
@@ -405,6 +637,10 @@ def handle_input(user_input):
 
     command = parts[0]
 
+    if command.startswith('!'):
+        prefix = user_input.strip()[1:]
+        cli_recall('' if prefix == '!' else prefix)
+        return True
     if command in ['exit', 'quit']:
         print("Exiting ES4R Companion CLI.")
         return False # Stop loop
@@ -418,10 +654,25 @@ def handle_input(user_input):
         print_status()
     elif command == 'exec':
         if len(parts) > 1:
-            full_command = user_input[len("exec "):].strip()
-            execute_cli_command(full_command)
+            full_command = user_input.strip()[len("exec "):].strip()
+            execute_cli_command(full_command) # Raw: sent exactly as typed
         else:
             print(f"{COLOR_WARN}Usage: exec <full console command>{COLOR_RESET}")
+    elif command in ['teleport', 'coc']:
+        if len(parts) > 1:
+            cli_teleport(user_input.strip()[len(command):].strip())
+        else:
+            print(f"{COLOR_WARN}Usage: teleport <cell id>{COLOR_RESET}")
+    elif command == 'cells':
+        cli_cells(user_input.strip()[len("cells"):].strip())
+    elif command == 'find':
+        cli_find(user_input.strip()[len("find"):].strip())
+    elif command == 'query':
+        cli_query(user_input.strip()[len("query"):].strip())
+    elif command == 'history':
+        cli_history(user_input.strip()[len("history"):].strip())
+    elif command in ['fav', 'favorite']:
+        cli_quick_favorite(user_input.strip()[len(command):].strip())
     elif command == 'additem':
         # Simplified: expects 'additem <item_id> <quantity>'
         if len(parts) == 3:
@@ -456,6 +707,7 @@ def execute_cli_command(command_str):
         return
 
     print(f"{COLOR_INFO}Executing: {command_str}...{COLOR_RESET}")
+    app_logic.record_command_logic(command_str, source="cli")
     # Use the passed automator instance directly
     success = cli_automator.execute_command(command_str, verbose=True) # Use verbose for CLI
 
@@ -1,4 +1,34 @@
 # Placeholder for command construction logic 
+import re
+
+# Form IDs are 32-bit values; the console accepts them as up to 8 hex digits.
+FORM_ID_MAX = 0xFFFFFFFF
+_FORM_ID_RE = re.compile(r'^(?:0x)?([0-9a-f]{1,8})$', re.IGNORECASE)
+
+def parse_form_id(value):
+    """Converts a form ID ("0001C6CE", "000243cd", "F", "0xF" or an int) to its integer key.
+
+    Returns:
+        int: The form ID, or None if value is not a valid 32-bit form ID.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if 0 <= value <= FORM_ID_MAX else None
+    if not isinstance(value, str):
+        return None
+    match = _FORM_ID_RE.match(value.strip())
+    return int(match.group(1), 16) if match else None
+
+def format_form_id(form_id):
+    """Formats an integer form ID the way the console and data files spell it ("0001C6CE")."""
+    return f"{form_id:08X}"
+
+def _command_ref(item_id):
+    """Integer form IDs are formatted here; string IDs are passed through as given."""
+    if isinstance(item_id, int) and not isinstance(item_id, bool):
+        return format_form_id(item_id) if parse_form_id(item_id) is not None else None
+    if not isinstance(item_id, str) or not item_id.strip():
+        return None
+    return item_id.strip()
 
 def build_simple_command(command_name):
     """Builds simple commands like 'walk' or 'ghost'."""
@@ -8,20 +38,22 @@ def build_simple_command(command_name):
     return None
 
 def build_placeatme_command(item_id, quantity):
-    """Builds the 'player.placeatme' command."""
-    if not isinstance(item_id, str) or not item_id:
+    """Builds the 'player.placeatme' command (item_id may be a string or integer form ID)."""
+    ref = _command_ref(item_id)
+    if ref is None:
         return None
     if not isinstance(quantity, int) or quantity <= 0:
         return None
-    return f"player.placeatme {item_id.strip()} {quantity}"
+    return f"player.placeatme {ref} {quantity}"
 
 def build_additem_command(item_id, quantity):
-    """Builds the 'player.additem' command."""
-    if not isinstance(item_id, str) or not item_id:
+    """Builds the 'player.additem' command (item_id may be a string or integer form ID)."""
+    ref = _command_ref(item_id)
+    if ref is None:
         return None
     if not isinstance(quantity, int) or quantity <= 0:
         return None
-    return f"player.additem {item_id.strip()} {int(quantity)}"
+    return f"player.additem {ref} {int(quantity)}"
 
 def build_teleport_command(location_id):
     """Builds the 'coc' (Center on Cell) command.
@@ -35,4 +67,31 @@ def build_teleport_command(location_id):
     if not location_id or not isinstance(location_id, str) or not location_id.strip():
         return None
     # No complex validation needed for location IDs usually, they are strings.
-    return f"coc {location_id.strip()}" 
\ No newline at end of file
+    return f"coc {location_id.strip()}" 
+
+def parse_command(command):
+    """Splits a built command back into its parts (the inverse of the builders above).
+
+    Args:
+        command (str): A console command such as "player.placeatme 000479F5 2".
+
+    Returns:
+        dict: {"verb", "ref", "quantity"} for additem/placeatme/coc commands
+              (quantity is None for coc), or None for anything else.
+    """
+    if not isinstance(command, str):
+        return None
+    parts = command.split()
+    if not parts:
+        return None
+    verb = parts[0].lower()
+    if verb in ("player.additem", "player.placeatme") and len(parts) in (2, 3):
+        quantity = 1
+        if len(parts) == 3:
+            if not parts[2].isdigit():
+                return None
+            quantity = int(parts[2])
+        return {"verb": verb, "ref": parts[1], "quantity": quantity}
+    if verb == "coc" and len(parts) >= 2:
+        return {"verb": verb, "ref": command.strip()[len(parts[0]):].strip(), "quantity": None}
+    return None
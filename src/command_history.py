@@ -0,0 +1,289 @@
+"""
+Command history shared by the GUI and the CLI, kept across sessions.
+
+Commands are appended to an append-only JSON lines file (HistoryFile), one
+{"command", "source", "at"} object per line; nothing is rewritten per
+command. Once the file holds more than twice `capacity` lines it is
+rewritten once with the newest `capacity` commands. With ES4R_USER_STORE=sqlite
+the history table of the user database takes the file's place (see
+sqlite_store.SqliteHistory).
+
+In memory the newest `capacity` commands sit in a ring buffer, and a command
+that falls off the ring leaves the indexes with it. Running the same command
+twice in a row records it once. Lookups are case-insensitive and go through
+two indexes over the distinct commands:
+
+    prefix:    one sorted list, so "last command starting with
+               player.placeatme" is a binary search and a scan of the range
+               (or, when most commands match, a short walk back from the
+               newest entry)
+    substring: trigram -> commands, so searching for "79f5" only checks the
+               commands that contain all of its trigrams
+
+Every add first reads whatever the log gained since the last read, so the
+GUI and the CLI see each other's commands. The read, the append and any
+rewrite happen under the log's cross-process lock (HistoryFile's lock file,
+see file_lock), so a trim in one process never drops a command the other
+has just appended.
+"""
+import bisect
+import contextlib
+import heapq
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from src import json_codec
+from src.file_lock import FileLock
+
+# Commands kept in memory (and on disk after a rewrite).
+MAX_ENTRIES = 10000
+DEFAULT_LIMIT = 50
+
+
+class HistoryEntry(NamedTuple):
+    seq: int                # Position in the history, counting from the first command ever read
+    command: str
+    source: Optional[str]   # "gui", "cli", ...
+    at: float
+
+
+def _trigrams(text) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class HistoryFile:
+    """Append-only JSON lines log of commands.
+
+    read_new() returns the lines added since the previous call, by this
+    process or any other; it starts over if the file was replaced or cut.
+    With a lock_path, locked() holds a lock shared with other processes.
+    """
+
+    def __init__(self, path, lock_path=None):
+        self.path = path
+        self._offset = 0
+        self._identity = None
+        self._file_lock = FileLock(lock_path) if lock_path else None
+
+    def locked(self):
+        """Context manager excluding other processes' appends and rewrites."""
+        return self._file_lock if self._file_lock is not None else contextlib.nullcontext()
+
+    def append(self, command, source, at):
+        line = (json_codec.dumps({"command": command, "source": source, "at": at}) + "\n").encode("utf-8")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(line)
+
+    def read_new(self) -> Tuple[List[Tuple[str, Optional[str], float]], bool]:
+        """(new (command, source, at) tuples, True if the log started over)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            reset = self._identity is not None
+            self._offset, self._identity = 0, None
+            return [], reset
+        identity = (st.st_dev, st.st_ino)
+        reset = identity != self._identity or st.st_size < self._offset
+        if reset:
+            self._offset, self._identity = 0, identity
+        if st.st_size == self._offset:
+            return [], reset
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1  # A torn last line is read once it is finished
+        self._offset += complete
+        entries = []
+        for raw in data[:complete].splitlines():
+            try:
+                record = json_codec.loads(raw)
+                entries.append((str(record["command"]), record.get("source"), float(record.get("at") or 0)))
+            except (ValueError, KeyError, TypeError) as e:
+                logging.warning(f"Skipping bad line in {self.path}: {e}")
+        return entries, reset
+
+    def rewrite(self, entries: List[HistoryEntry]):
+        """Replaces the log with `entries` (oldest first)."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for entry in entries:
+                f.write((json_codec.dumps({"command": entry.command, "source": entry.source, "at": entry.at})
+                         + "\n").encode("utf-8"))
+        os.replace(tmp_path, self.path)
+        st = os.stat(self.path)
+        self._offset, self._identity = st.st_size, (st.st_dev, st.st_ino)
+
+
+class CommandHistory:
+    """The newest commands in a ring buffer, with prefix and substring indexes.
+
+    Args:
+        log: Where commands are persisted: a HistoryFile or anything with the
+             same locked/append/read_new/rewrite methods.
+        capacity: Commands kept; older ones are forgotten.
+    """
+
+    def __init__(self, log, capacity=MAX_ENTRIES):
+        self._log = log
+        self.capacity = capacity
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._ring: List[Optional[HistoryEntry]] = [None] * self.capacity
+        self._next_seq = 0
+        self._latest: Dict[str, int] = {}         # Distinct command -> seq of its newest run
+        self._sorted: List[Tuple[str, str]] = []  # (lowercased, command), sorted
+        self._by_trigram: Dict[str, Set[str]] = {}
+        self._logged = 0                          # Lines in the log
+
+    # --- Ring and indexes ---
+
+    def _last(self) -> Optional[HistoryEntry]:
+        return self._ring[(self._next_seq - 1) % self.capacity] if self._next_seq else None
+
+    def _push(self, command, source, at):
+        last = self._last()
+        if last is not None and last.command == command:
+            return
+        slot = self._next_seq % self.capacity
+        evicted = self._ring[slot]
+        if evicted is not None and self._latest.get(evicted.command) == evicted.seq:
+            self._forget(evicted.command)  # Its newest run is leaving the ring, so every run is gone
+        self._ring[slot] = HistoryEntry(self._next_seq, command, source, at)
+        if command not in self._latest:
+            lowered = command.lower()
+            bisect.insort(self._sorted, (lowered, command))
+            for trigram in _trigrams(lowered):
+                self._by_trigram.setdefault(trigram, set()).add(command)
+        self._latest[command] = self._next_seq
+        self._next_seq += 1
+
+    def _forget(self, command):
+        del self._latest[command]
+        lowered = command.lower()
+        pos = bisect.bisect_left(self._sorted, (lowered, command))
+        del self._sorted[pos]
+        for trigram in _trigrams(lowered):
+            commands = self._by_trigram[trigram]
+            commands.discard(command)
+            if not commands:
+                del self._by_trigram[trigram]
+
+    def _sync(self):
+        try:
+            entries, reset = self._log.read_new()
+        except OSError as e:
+            logging.warning(f"Could not read command history: {e}")
+            return
+        if reset:
+            self._clear()
+        for command, source, at in entries[-self.capacity:]:  # Anything older would fall off the ring anyway
+            self._push(command, source, at)
+        self._logged += len(entries)
+
+    def entries(self) -> List[HistoryEntry]:
+        """Everything in the ring, oldest first."""
+        with self._lock:
+            start = max(0, self._next_seq - self.capacity)
+            return [self._ring[seq % self.capacity] for seq in range(start, self._next_seq)]
+
+    # --- Recording ---
+
+    def add(self, command, source=None, when=None) -> bool:
+        """Records a command; False if it was empty or repeats the last one."""
+        command = (command or "").strip()
+        if not command:
+            return False
+        with self._lock, self._log.locked():
+            self._sync()
+            last = self._last()
+            if last is not None and last.command == command:
+                return False
+            at = time.time() if when is None else when
+            try:
+                self._log.append(command, source, at)
+            except OSError as e:
+                logging.error(f"Could not save command history: {e}")
+                self._push(command, source, at)  # Still recalled this session
+                return True
+            self._sync()
+            if self._logged > 2 * self.capacity:
+                self._trim()
+            return True
+
+    def _trim(self):
+        entries = self.entries()
+        try:
+            self._log.rewrite(entries)
+        except OSError as e:
+            logging.warning(f"Could not trim command history: {e}")
+            return
+        self._logged = len(entries)
+
+    # --- Lookups ---
+
+    def _candidates(self, prefix, contains):
+        """Distinct commands matching both filters (either may be empty)."""
+        found = None
+        if prefix:
+            lo = bisect.bisect_left(self._sorted, (prefix,))
+            hi = bisect.bisect_left(self._sorted, (prefix + "\U0010ffff",))
+            found = [command for _, command in self._sorted[lo:hi]]
+        if contains:
+            if found is None:
+                if len(contains) >= 3:
+                    sets = sorted((self._by_trigram.get(t, set()) for t in _trigrams(contains)), key=len)
+                    found = set(sets[0]).intersection(*sets[1:]) if sets[0] else set()
+                else:
+                    found = self._latest.keys()
+            found = [command for command in found if contains in command.lower()]
+        return self._latest.keys() if found is None else found
+
+    def search(self, prefix=None, contains=None, limit=DEFAULT_LIMIT) -> List[str]:
+        """Distinct commands, most recently run first.
+
+        Args:
+            prefix: Only commands starting with this (case-insensitive).
+            contains: Only commands containing this (case-insensitive).
+            limit: Most commands returned.
+        """
+        prefix, contains = (prefix or "").lower(), (contains or "").lower()
+        with self._lock:
+            self._sync()
+            candidates = self._candidates(prefix, contains)
+            kept = min(self._next_seq, self.capacity)
+            if len(candidates) ** 2 > limit * kept:
+                # Common matches: the newest few are a short walk back from the end of the ring
+                return self._newest_matching(prefix, contains, limit)
+            return heapq.nlargest(limit, candidates, key=self._latest.__getitem__)
+
+    def _newest_matching(self, prefix, contains, limit):
+        found, seen = [], set()
+        for seq in range(self._next_seq - 1, max(-1, self._next_seq - 1 - self.capacity), -1):
+            command = self._ring[seq % self.capacity].command
+            if command in seen:
+                continue
+            seen.add(command)
+            lowered = command.lower()
+            if lowered.startswith(prefix) and contains in lowered:
+                found.append(command)
+                if len(found) == limit:
+                    break
+        return found
+
+    def last(self, prefix=None) -> Optional[str]:
+        """The most recent command starting with `prefix`, or None."""
+        found = self.search(prefix=prefix, limit=1)
+        return found[0] if found else None
+
+    def __len__(self):
+        with self._lock:
+            self._sync()
+            return min(self._next_seq, self.capacity)
@@ -4,8 +4,22 @@ import json
 import os
 import sys # Added
 import logging
+import tempfile
 from typing import Dict, List, Optional
 
+import platformdirs
+
+from src import json_codec
+from src.command_history import CommandHistory, HistoryFile
+from src.file_lock import lock_path_for
+from src.sorted_views import FrozenDict, freeze
+from src.sqlite_store import DB_FILENAME, open_store
+from src.user_store import JournaledStore, flush_all as _flush_journals, journal_path_for
+
+APP_NAME = "ES4RCompanion"
+# Environment variable that points the user overlay at another directory
+USER_DATA_DIR_ENV = "ES4R_USER_DATA_DIR"
+
 # Determine base path for data files (works for script and frozen exe)
 if getattr(sys, 'frozen', False):
     # Running as a bundled executable (PyInstaller)
@@ -19,17 +33,149 @@ DATA_DIR = os.path.join(BASE_DIR, 'data') # Adjusted path
 ITEM_CATEGORIES_FILE = "item_categories.json"
 BATTLES_FILE = "battles.json"
 FAVORITES_FILE = "favorites.json" # Added constant
+HISTORY_FILE = "history.jsonl" # Command history shared by the GUI and CLI (append-only)
 NPCS_FILE = "npcs.json" # Added constant for NPC file
 LOCATION_CATEGORIES_FILE = "location_categories.json" # Removed path join here
 LOCATIONS_SUBDIR = "locations"
 LOCATIONS_DIR = os.path.join(DATA_DIR, LOCATIONS_SUBDIR) # Define full path separately
+# Files written by the app on every change; saved compact instead of indented
+USER_STORE_FILES = {FAVORITES_FILE, BATTLES_FILE}
+# Key field of each user store's entries (None: the file is a {key: value} object)
+USER_STORE_KEYS = {FAVORITES_FILE: "name", BATTLES_FILE: None}
+# Where user stores live: "json" (the files above plus journals) or "sqlite" (src/sqlite_store.py)
+USER_STORE_ENV = "ES4R_USER_STORE"
+USER_STORE_JSON = "json"
+USER_STORE_SQLITE = "sqlite"
+_SQLITE_TABLES = {FAVORITES_FILE: "favorites", BATTLES_FILE: "presets"}
+
+def _user_store_backend():
+    backend = os.environ.get(USER_STORE_ENV, USER_STORE_JSON).strip().lower()
+    if backend not in (USER_STORE_JSON, USER_STORE_SQLITE):
+        logging.warning(f"Unknown {USER_STORE_ENV} '{backend}'; using {USER_STORE_JSON}.")
+        return USER_STORE_JSON
+    return backend
+
+USER_STORE_BACKEND = _user_store_backend()
+
+def _default_user_data_dir():
+    """Writable overlay directory layered on top of DATA_DIR, or None.
+
+    A frozen build unpacks DATA_DIR into a temporary directory, so anything
+    saved there is lost on exit; it gets a per-user directory instead. When
+    running from source DATA_DIR is writable and no overlay is used unless the
+    environment variable asks for one.
+    """
+    override = os.environ.get(USER_DATA_DIR_ENV)
+    if override:
+        return os.path.abspath(override)
+    if getattr(sys, 'frozen', False):
+        return platformdirs.user_data_dir(APP_NAME, appauthor=False)
+    return None
+
+USER_DATA_DIR = _default_user_data_dir()
+
+# {filename: ((bundled path, mtime, overlay path, mtime), merged data)}; rebuilt when either file changes
+_merged_cache = {}
+
+def overlay_path(filename, user_data_dir=None):
+    """Path of `filename` in the user overlay, or None if no overlay is configured."""
+    user_data_dir = user_data_dir or USER_DATA_DIR
+    return os.path.join(user_data_dir, filename) if user_data_dir else None
+
+def merge_overlay(base, overlay):
+    """Layers overlay data on top of bundled data.
+
+    JSON objects are merged key by key (recursively), and a null value in the
+    overlay removes the key; any other value (lists included) replaces the
+    bundled one.
+    """
+    if not isinstance(base, dict) or not isinstance(overlay, dict):
+        return overlay
+    merged = dict(base)
+    for key, value in overlay.items():
+        if value is None:
+            merged.pop(key, None)
+        elif key in merged:
+            merged[key] = merge_overlay(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+def _file_mtime(filepath):
+    if filepath is None:
+        return None
+    try:
+        return os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+
+def load_layered_json(data_dir, user_data_dir, filename, read_json):
+    """Reads `filename` from data_dir with its user overlay (if any) merged on top.
+
+    Args:
+        read_json: Callable taking a file path and returning parsed JSON or None.
+
+    Returns:
+        The merged data, or None if neither layer could be read.
+    """
+    bundled_path = os.path.join(data_dir, filename)
+    user_path = overlay_path(filename, user_data_dir)
+    if user_path is None or not os.path.exists(user_path):
+        return read_json(bundled_path)
+    overlay = read_json(user_path)
+    # Files only present in the overlay (custom additions) are normal
+    bundled = read_json(bundled_path) if os.path.exists(bundled_path) else None
+    if overlay is None:
+        return bundled
+    if bundled is None:
+        return overlay
+    return merge_overlay(bundled, overlay)
+
+def _read_json_file(filepath):
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json_codec.load(f)
+
+def _load_overlaid(filename, user_path):
+    """Merged view of a file that has a user overlay, cached until either layer changes.
+
+    Every caller shares the cached data, so it is read-only (see
+    sorted_views.freeze); copy.deepcopy it before changing it.
+    """
+    bundled_path = os.path.join(DATA_DIR, filename)
+    key = (bundled_path, _file_mtime(bundled_path), user_path, _file_mtime(user_path))
+    cached = _merged_cache.get(filename)
+    if cached is None or cached[0] != key:
+        def read(filepath):
+            try:
+                return _read_json_file(filepath)
+            except FileNotFoundError:
+                return None
+            except json.JSONDecodeError:
+                logging.error(f"Could not decode JSON from {filepath}. Check for syntax errors.")
+                return None
+        merged = freeze(load_layered_json(DATA_DIR, USER_DATA_DIR, filename, read))
+        cached = _merged_cache[filename] = (key, merged)
+    return cached[1]
 
 def load_json_data(filename):
-    """Loads data from a JSON file in the data directory."""
+    """Loads data from a JSON file in the data directory.
+
+    If the user overlay has the same file, its content is merged on top (see
+    merge_overlay). User stores (favorites, presets) also replay their
+    journal (see user_store).
+    """
+    if filename in USER_STORE_KEYS:
+        return user_store(filename).data()
+    return _load_json_file(filename)
+
+def _load_json_file(filename):
+    user_path = overlay_path(filename)
+    if user_path is not None and os.path.exists(user_path):
+        return _load_overlaid(filename, user_path)
     filepath = os.path.join(DATA_DIR, filename) # Uses the adjusted DATA_DIR
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+            data = json_codec.load(f)
             logging.debug(f"Successfully loaded data from {filename}")
             return data
     except FileNotFoundError:
@@ -42,6 +188,11 @@ def load_json_data(filename):
         logging.exception(f"An unexpected error occurred loading {filename}")
         return None
 
+def _trusted_manifest():
+    """The data directory's manifest if present and still valid, else None (see src/manifest.py)."""
+    from src.manifest import load_manifest # Imported here: src.manifest imports this module
+    return load_manifest(DATA_DIR)
+
 def get_item_categories():
     """Loads item categories and their filenames from the ITEM_CATEGORIES_FILE."""
     logging.debug(f"Loading item categories from {ITEM_CATEGORIES_FILE}")
@@ -61,22 +212,65 @@ def save_json_data(filename, data):
         filename (str): The name of the file (relative to DATA_DIR).
         data: The Python object to serialize and save.
 
+    With a user overlay configured the file is written there instead, and
+    top-level keys of the bundled file missing from `data` are saved as null
+    so they stay deleted in the merged view. The file is replaced atomically.
+    For user stores this is a full save that also resets their journal; use
+    user_store(filename) to change single entries.
+
     Returns:
         bool: True if saving was successful, False otherwise.
     """
-    filepath = os.path.join(DATA_DIR, filename)
+    if filename in USER_STORE_KEYS:
+        return user_store(filename).replace(data)
+    return _save_json_file(filename, data)
+
+def _write_atomic(filepath, text):
+    """Writes a temp file next to `filepath`, fsyncs it and renames it over `filepath`."""
+    directory = os.path.dirname(filepath)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(filepath) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _save_json_file(filename, data):
+    user_path = overlay_path(filename)
+    if user_path is not None:
+        filepath = user_path
+        target_dir = os.path.dirname(user_path)
+        bundled_path = os.path.join(DATA_DIR, filename)
+        if isinstance(data, dict) and os.path.exists(bundled_path):
+            try:
+                bundled = _read_json_file(bundled_path)
+            except (OSError, ValueError):
+                bundled = None
+            if isinstance(bundled, dict):
+                data = {**{key: None for key in bundled if key not in data}, **data}
+        _merged_cache.pop(filename, None)
+    else:
+        filepath = os.path.join(DATA_DIR, filename)
+        target_dir = DATA_DIR
     try:
         # Ensure the target directory exists
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR, exist_ok=True)
+        if not os.path.exists(target_dir):
+            os.makedirs(target_dir, exist_ok=True)
     except OSError as e:
-        logging.error(f"Could not create directory {DATA_DIR}: {e}")
-        print(f"Error: Could not create directory {DATA_DIR}.")
+        logging.error(f"Could not create directory {target_dir}: {e}")
+        print(f"Error: Could not create directory {target_dir}.")
         return False # Return False if directory creation fails
 
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2) # Use indent for readability
+        # Indented only for files people edit by hand; user stores stay compact
+        _write_atomic(filepath, json_codec.dumps(data, pretty=filename not in USER_STORE_FILES))
         logging.debug(f"Successfully saved data to {filepath}") # Changed to debug
         return True
     except IOError as e:
@@ -92,6 +286,86 @@ def save_json_data(filename, data):
     
     return False # Return False for any exception during open/dump
 
+# {journal path: JournaledStore}
+_user_stores = {}
+_histories = {}
+# {(filename, backend, USER_DATA_DIR, DATA_DIR): store}, and {database path: SqliteUserStore}
+# once its migration ran; user_store() is on every favorite/preset call
+_store_handles = {}
+_databases = {}
+
+def _snapshot_stamp(filename):
+    return _file_mtime(os.path.join(DATA_DIR, filename)), _file_mtime(overlay_path(filename))
+
+def user_store(filename):
+    """The store holding a user store file (FAVORITES_FILE, BATTLES_FILE).
+
+    A JournaledStore over the JSON file by default, or its table in the user
+    database with ES4R_USER_STORE=sqlite; both have the same interface.
+    """
+    key = (filename, USER_STORE_BACKEND, USER_DATA_DIR, DATA_DIR)
+    store = _store_handles.get(key)
+    if store is None:
+        database = user_database()
+        if database is None:
+            store = _store_handles[key] = _json_user_store(filename)
+        else:
+            store = getattr(database, _SQLITE_TABLES[filename])
+            if database.migrated:
+                _store_handles[key] = store
+    return store
+
+def user_database():
+    """The SQLite user database, or None unless ES4R_USER_STORE=sqlite.
+
+    It lives next to saved files (the user overlay if configured, else
+    DATA_DIR); the JSON stores are copied in the first time it is opened.
+    """
+    if USER_STORE_BACKEND != USER_STORE_SQLITE:
+        return None
+    path = os.path.join(USER_DATA_DIR or DATA_DIR, DB_FILENAME)
+    database = _databases.get(path)
+    if database is None:
+        database = open_store(path)
+        database.migrate_from_json({_SQLITE_TABLES[filename]: _json_user_store(filename).data
+                                    for filename in USER_STORE_KEYS})
+        if database.migrated:  # Tried again next time if the copy failed
+            _databases[path] = database
+    return database
+
+def command_history():
+    """The shared CommandHistory: HISTORY_FILE where saves go, or the user database's history table."""
+    database = user_database()
+    key = database.path if database is not None else (overlay_path(HISTORY_FILE) or os.path.join(DATA_DIR, HISTORY_FILE))
+    history = _histories.get(key)
+    if history is None:
+        history = _histories[key] = CommandHistory(database.command_log if database is not None
+                                                  else HistoryFile(key, lock_path=lock_path_for(key)))
+    return history
+
+def flush_user_stores():
+    """Writes edits the user stores are still holding back (see user_store.flush_all)."""
+    return _flush_journals()
+
+def user_store_errors() -> List[str]:
+    """Why edits of the user stores have not been saved (see JournaledStore.write_error); [] if all were."""
+    return [store.write_error for store in list(_user_stores.values()) if store.write_error]
+
+def _json_user_store(filename):
+    """The JournaledStore for a user store file; its journal and lock file live where saves go."""
+    snapshot_path = overlay_path(filename) or os.path.join(DATA_DIR, filename)
+    journal_path = journal_path_for(snapshot_path)
+    store = _user_stores.get(journal_path)
+    if store is None:
+        store = _user_stores[journal_path] = JournaledStore(
+            journal_path,
+            load_snapshot=lambda: _load_json_file(filename),
+            save_snapshot=lambda data: _save_json_file(filename, data),
+            stamp=lambda: _snapshot_stamp(filename),
+            key_field=USER_STORE_KEYS[filename],
+            lock_path=lock_path_for(snapshot_path))
+    return store
+
 def add_battle_preset(preset_name, command_list):
     """Adds a new battle preset to battles.json.
 
@@ -109,34 +383,17 @@ def add_battle_preset(preset_name, command_list):
         print("Error: Invalid command list provided.")
         return "error"
 
-    filename = "battles.json"
-    presets = load_json_data(filename)
-    
-    # Handle case where file doesn't exist or is empty/invalid
-    if presets is None:
-        presets = {} # Start fresh if loading failed
-    elif not isinstance(presets, dict):
-        print(f"Error: Existing {filename} does not contain a valid JSON object. Cannot add preset.")
-        # Consider backing up the invalid file here?
-        return "error"
-
+    filename = BATTLES_FILE
     preset_name = preset_name.strip()
-    if preset_name in presets:
-        # print(f"Error: Preset name '{preset_name}' already exists.")
+    # Appends one journal line; a battles.json that is not a JSON object is never overwritten
+    status = user_store(filename).add(preset_name, command_list)
+    if status == "exists":
         logging.warning(f"Preset name '{preset_name}' already exists.")
-        return "exists" # Signal that the name exists
-
-    # Add the new preset
-    presets[preset_name] = command_list
-
-    # Save the updated dictionary
-    if save_json_data(filename, presets):
-        # print(f"Preset '{preset_name}' saved successfully to {filename}.")
+    elif status == "success":
         logging.info(f"Preset '{preset_name}' saved successfully to {filename}.")
-        return "success"
     else:
-        # save_json_data would have printed an error
-        return "error" 
+        print(f"Error: Could not save preset '{preset_name}' to {filename}.")
+    return status
 
 # --- Initialization --- 
 def ensure_data_files_exist():
@@ -151,7 +408,8 @@ def ensure_data_files_exist():
         filepath = os.path.join(DATA_DIR, filename)
         if not os.path.exists(filepath):
             logging.warning(f"Data file not found: {filepath}. Creating empty file.")
-            if not save_json_data(filename, default_content):
+            # Written directly: a full save would also empty a user store kept elsewhere (SQLite)
+            if not _save_json_file(filename, default_content):
                 logging.error(f"Failed to create default data file: {filepath}")
                 # Decide if this is fatal? For now, just log error.
 
@@ -171,12 +429,19 @@ def load_items_for_category(category_name: str) -> Optional[Dict[str, dict]]:
         # Handle nested categories (subdirectories)
         filepath = os.path.join(DATA_DIR, relative_filepath)
 
-        if not os.path.exists(filepath):
+        manifest = _trusted_manifest()
+        if manifest is not None:
+            # The manifest already knows which files exist
+            entry = manifest["files"].get(relative_filepath)
+            file_exists = entry is not None and entry["status"] != "missing"
+        else:
+            file_exists = os.path.exists(filepath)
+        if not file_exists:
             logger.error(f"Data file not found for category '{category_name}' at path: {filepath}")
             return None
 
         with open(filepath, 'r') as f:
-            data = json.load(f)
+            data = json_codec.load(f)
             logger.debug(f"Successfully loaded {len(data)} items for category '{category_name}' from {filepath}")
             return data
     except json.JSONDecodeError as e:
@@ -187,16 +452,25 @@ def load_items_for_category(category_name: str) -> Optional[Dict[str, dict]]:
         return None
 
 # --- Location Loading ---
+_location_categories_cache = {}
+
 def get_location_categories():
     """Loads the mapping of location category names to their filenames.
 
     Returns:
         dict: A dictionary mapping category names (e.g., "Cities") 
               to their relative file paths (e.g., "locations/cities.json"), 
-              sorted by category name. Returns an empty dict on error.
+              sorted by category name, as a read-only mapping shared between
+              calls. Returns an empty dict on error.
     """
     # Ensure the path uses DATA_DIR dynamically
     category_file_path = os.path.join(DATA_DIR, LOCATION_CATEGORIES_FILE) 
+    user_path = overlay_path(LOCATION_CATEGORIES_FILE)
+    cache_key = (category_file_path, _file_mtime(category_file_path),
+                 user_path, _file_mtime(user_path) if user_path else None)
+    cached = _location_categories_cache.get("view")
+    if cached is not None and cached[0] == cache_key:
+        return cached[1] # Shared read-only view, rebuilt only when the index file changes
     logging.debug(f"Attempting to load location categories from: {category_file_path}")
     categories = load_json_data(LOCATION_CATEGORIES_FILE) 
     if not categories or not isinstance(categories, dict):
@@ -208,7 +482,8 @@ def get_location_categories():
                            for name, filename in categories.items()}
     
     # Sort by category name
-    sorted_categories = dict(sorted(prefixed_categories.items()))
+    sorted_categories = FrozenDict(sorted(prefixed_categories.items()))
+    _location_categories_cache["view"] = (cache_key, sorted_categories)
     logging.info(f"Loaded {len(sorted_categories)} location categories.")
     return sorted_categories
 
@@ -265,17 +540,25 @@ if __name__ == "__main__":
 def load_all_locations(locations_dir=LOCATIONS_DIR):
     """Loads all location data from JSON files in the specified directory."""
     all_locations = {}
-    if not os.path.isdir(locations_dir):
+    manifest = _trusted_manifest() if locations_dir == LOCATIONS_DIR else None
+    if manifest is not None:
+        # Take the file list from the manifest instead of listing the directory
+        prefix = f"{LOCATIONS_SUBDIR}/"
+        listed = [relpath for relpath, entry in manifest["files"].items() if entry["status"] != "missing"]
+        listed += list(manifest.get("unreferenced", {}))
+        filenames = sorted(relpath[len(prefix):] for relpath in listed
+                           if relpath.startswith(prefix) and "/" not in relpath[len(prefix):])
+    elif not os.path.isdir(locations_dir):
         logging.error(f"Locations directory not found: {locations_dir}")
         return all_locations
 
     try:
-        for filename in os.listdir(locations_dir):
+        for filename in (filenames if manifest is not None else os.listdir(locations_dir)):
             if filename.endswith('.json'):
                 file_path = os.path.join(locations_dir, filename)
                 try:
                     with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+                        data = json_codec.load(f)
                         if isinstance(data, dict):
                             # Check for duplicate keys before merging
                             duplicates = set(data.keys()) & set(all_locations.keys())
@@ -317,12 +600,18 @@ def get_preset_commands(preset_name, preset_type="battle"):
     return None # Return None if not found or error
 
 def find_data_file(filename):
-    """Placeholder for finding a data file."""
-    # TODO: Implement logic to find the file, possibly checking multiple locations.
-    logging.warning(f"find_data_file not implemented. Called for: {filename}")
-    filepath = os.path.join(DATA_DIR, filename)
-    if os.path.exists(filepath):
-        return filepath
+    """Finds a data file, preferring the user's copy.
+
+    Args:
+        filename (str): Path relative to the data directory (e.g. "npcs.json").
+
+    Returns:
+        str: The file in the user overlay if it exists there, else the one in
+             DATA_DIR; None if neither exists.
+    """
+    for filepath in (overlay_path(filename), os.path.join(DATA_DIR, filename)):
+        if filepath is not None and os.path.exists(filepath):
+            return filepath
     return None
 
 def list_json_files(directory):
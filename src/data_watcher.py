@@ -0,0 +1,160 @@
+"""
+Background watcher that hot-reloads the data directory.
+
+The watcher wakes up when something in the data directory may have changed
+and calls Catalog.refresh_changes(), which re-parses only the files whose
+mtime moved and applies record-level differences to the catalog and its
+indexes. Catalog change listeners (e.g. the GUI push in app.py) then receive
+the changes.
+
+Both the bundled data directory and the user overlay directory (if any) are
+watched. On Linux the watcher blocks on inotify, so an edit is picked up almost
+immediately; everywhere else (or if inotify cannot be set up) it falls back
+to a cheap mtime sweep every `interval` seconds.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import sys
+import threading
+import time
+from typing import List, Optional
+
+# Seconds between two mtime sweeps when polling.
+POLL_INTERVAL = 1.0
+# After an inotify event, wait this long for an editor to finish writing.
+SETTLE_DELAY = 0.1
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+
+class _Inotify:
+    """Minimal inotify wrapper over libc; only used as a wake-up signal."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watched = set()
+
+    def watch(self, directory) -> bool:
+        """Starts watching a directory; True if a new watch was added."""
+        if directory in self._watched or not os.path.isdir(directory):
+            return False
+        if self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            logging.warning(f"Could not watch {directory} (errno {ctypes.get_errno()})")
+            return False
+        self._watched.add(directory)
+        return True
+
+    def wait(self, timeout) -> bool:
+        """Blocks up to `timeout` seconds; True if any event arrived."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        return bool(ready)
+
+    def drain(self):
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _open_inotify() -> Optional[_Inotify]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return _Inotify()
+    except (OSError, AttributeError) as e:
+        logging.info(f"inotify unavailable ({e}); polling the data directory instead.")
+        return None
+
+
+class DataWatcher:
+    """Keeps a catalog in sync with its data directory from a daemon thread."""
+
+    def __init__(self, catalog, interval=POLL_INTERVAL, use_inotify=True):
+        self.catalog = catalog
+        self.interval = interval
+        self._use_inotify = use_inotify
+        self._inotify: Optional[_Inotify] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def _watch_directories(self) -> bool:
+        """Adds inotify watches for every data and overlay directory; True if any is new."""
+        roots = [self.catalog.data_dir]
+        if self.catalog.overlay_dir:
+            roots.append(self.catalog.overlay_dir)
+        directories = set(roots)
+        for root in roots:
+            for relpath in self.catalog.source_paths():
+                directories.add(os.path.dirname(os.path.join(root, relpath)))
+        return any([self._inotify.watch(directory) for directory in directories])
+
+    def check(self) -> List:
+        """Runs one refresh now and returns the CatalogChange list."""
+        changes = self.catalog.refresh_changes()
+        if changes and self._inotify is not None:
+            self._watch_directories()  # A rebuild may reference new directories
+        return changes
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        if self._use_inotify:
+            self._inotify = _open_inotify()
+            if self._inotify is not None:
+                self._watch_directories()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="DataWatcher", daemon=True)
+        self._thread.start()
+        logging.info(f"Watching {self.catalog.data_dir} for changes ({self.mode}).")
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                if not self._inotify.wait(self.interval):
+                    # Overlay directories may be created after startup; once
+                    # one is watched, sweep for files written before the watch
+                    if not self._watch_directories():
+                        continue
+                time.sleep(SETTLE_DELAY)
+                self._inotify.drain()
+            elif self._stop.wait(self.interval):
+                break
+            if self._stop.is_set():
+                break
+            try:
+                self.check()
+            except Exception:
+                logging.exception("Data directory refresh failed")
@@ -0,0 +1,162 @@
+"""
+Advisory cross-process lock plus a change counter, for files that the GUI
+and the CLI may both write (the user stores, the command history).
+
+Each protected file gets a small sidecar lock file (favorites.lock next to
+favorites.json). Writers take an exclusive advisory lock on it: fcntl.flock
+on POSIX, msvcrt.locking on Windows. They hold it only while they catch up
+with the other process's writes and append their own, which takes
+microseconds; the slow part of an append, the fsync, happens after the lock
+is released.
+
+The first 8 bytes of the lock file are a generation counter that writers
+bump, so a reader learns whether anyone else has written with one small read:
+
+    even: no write in progress
+    odd:  a writer is inside its critical section (e.g. between replacing a
+          snapshot and removing its journal); readers that need a consistent
+          view wait for the lock instead of reading a half-finished change
+
+A writer that dies mid-section leaves the counter odd, and the OS drops its
+lock. Readers then take the lock (which is free) for a while, until the next
+writer makes the counter even again.
+"""
+import contextlib
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+LOCK_SUFFIX = ".lock"
+_COUNTER = struct.Struct("<Q")
+# msvcrt.locking locks a byte range, and locked bytes cannot be read by other
+# processes, so the lock byte sits after the counter.
+_LOCK_BYTE = _COUNTER.size
+# Seconds between attempts while another process holds the lock (Windows).
+RETRY_DELAY = 0.0005
+
+
+def lock_path_for(path) -> str:
+    """favorites.json -> favorites.lock, in the same directory."""
+    return os.path.splitext(path)[0] + LOCK_SUFFIX
+
+
+class FileLock:
+    """Exclusive advisory lock on a lock file, re-entrant within a process."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._mutex = threading.RLock()  # flock does not exclude threads sharing the descriptor
+        self._depth = 0
+        self._writing = 0  # Nesting of writing() blocks; only the outermost one bumps the counter
+
+    def _open(self):
+        if self._fd is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        return self._fd
+
+    def close(self):
+        with self._mutex:
+            if self._fd is not None and not self._depth:
+                os.close(self._fd)
+                self._fd = None
+
+    # --- Locking ---
+
+    def acquire(self):
+        self._mutex.acquire()
+        try:
+            if not self._depth:
+                fd = self._open()
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                elif msvcrt is not None:
+                    os.lseek(fd, _LOCK_BYTE, os.SEEK_SET)
+                    while True:
+                        try:
+                            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                            break
+                        except OSError:
+                            time.sleep(RETRY_DELAY)
+            self._depth += 1
+        except BaseException:
+            self._mutex.release()
+            raise
+
+    def release(self):
+        try:
+            self._depth -= 1
+            if not self._depth:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    os.lseek(self._fd, _LOCK_BYTE, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            self._mutex.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    # --- Generation counter ---
+
+    def generation(self) -> int:
+        """The change counter; odd while a writer is inside writing()."""
+        with self._mutex:
+            fd = self._open()
+            if hasattr(os, "pread"):
+                data = os.pread(fd, _COUNTER.size, 0)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                data = os.read(fd, _COUNTER.size)
+            return _COUNTER.unpack(data)[0] if len(data) == _COUNTER.size else 0
+
+    def _set_generation(self, value):
+        data = _COUNTER.pack(value)
+        if hasattr(os, "pwrite"):
+            os.pwrite(self._fd, data, 0)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, data)
+
+    @contextlib.contextmanager
+    def writing(self):
+        """Holds the lock for one change, with the counter odd until it is done.
+
+        Yields a list that holds the final (even) generation once the block
+        has finished, so the writer can tell its own change from later ones.
+        Nested blocks belong to the outermost one and leave the counter odd.
+        """
+        done = []
+        with self:
+            if not self._writing:
+                generation = self.generation()
+                self._set_generation(generation + 1 if generation % 2 == 0 else generation)
+            self._writing += 1
+            try:
+                yield done
+            finally:
+                self._writing -= 1
+                generation = self.generation()
+                if not self._writing:
+                    generation += 1
+                    self._set_generation(generation)
+                done.append(generation)
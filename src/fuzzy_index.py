@@ -0,0 +1,158 @@
+"""
+Typo-tolerant matching over catalog names and cell IDs.
+
+Names and IDs are reduced to a compact form (lowercase letters and digits only,
+so "Cheydinhal Fighter's Guild" and "CheydinhalFightersGuild" both become
+"cheydinhalfightersguild") and indexed by their trigrams. A lookup first uses
+the shared-trigram count to discard terms that cannot be within the allowed
+edit distance, then runs a banded Levenshtein check on the few survivors.
+"""
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+# Individual name words shorter than this are not indexed on their own.
+MIN_WORD_LENGTH = 4
+DEFAULT_LIMIT = 5
+
+
+def compact(text):
+    """Lowercases text and strips everything but letters and digits."""
+    return _NON_ALNUM_RE.sub('', (text or '').lower())
+
+
+def trigrams(term):
+    """Returns the set of padded trigrams of a compact term."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def default_max_distance(term):
+    """Allowed edits for a term: 1 for short words, up to 3 for long IDs."""
+    if len(term) <= 4:
+        return 1
+    if len(term) <= 10:
+        return 2
+    return 3
+
+
+def bounded_levenshtein(a, b, max_distance):
+    """Edit distance between a and b, or None if it exceeds max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    previous = list(range(len(a) + 1))
+    for j, char_b in enumerate(b, 1):
+        current = [j] + [0] * len(a)
+        row_min = j
+        for i, char_a in enumerate(a, 1):
+            cost = 0 if char_a == char_b else 1
+            current[i] = min(previous[i] + 1, current[i - 1] + 1, previous[i - 1] + cost)
+            if current[i] < row_min:
+                row_min = current[i]
+        if row_min > max_distance:
+            return None
+        previous = current
+    distance = previous[-1]
+    return distance if distance <= max_distance else None
+
+
+class FuzzyIndex:
+    """Trigram index returning catalog records within a bounded edit distance."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+        self._term_records: Dict[str, Set[int]] = {}
+        self._trigram_terms: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def _terms_for(record):
+        terms = {compact(record.name), compact(record.ref)}
+        for word in re.split(r"\s+", record.name.replace("'", "")):
+            word = compact(word)
+            if len(word) >= MIN_WORD_LENGTH:
+                terms.add(word)
+        terms.discard('')
+        return terms
+
+    # --- Catalog index protocol ---
+
+    def add(self, record_id, record):
+        for term in self._terms_for(record):
+            holders = self._term_records.get(term)
+            if holders is None:
+                holders = self._term_records[term] = set()
+                for gram in trigrams(term):
+                    self._trigram_terms.setdefault(gram, set()).add(term)
+            holders.add(record_id)
+
+    def remove(self, record_id, record):
+        for term in self._terms_for(record):
+            holders = self._term_records.get(term)
+            if holders is None:
+                continue
+            holders.discard(record_id)
+            if not holders:
+                del self._term_records[term]
+                for gram in trigrams(term):
+                    terms = self._trigram_terms.get(gram)
+                    if terms is not None:
+                        terms.discard(term)
+                        if not terms:
+                            del self._trigram_terms[gram]
+
+    # --- Querying ---
+
+    def exact(self, text, kind=None) -> List[int]:
+        """Record IDs whose compact name or ID equals the compact text."""
+        holders = self._term_records.get(compact(text), ())
+        return [rid for rid in holders if kind is None or self._catalog.kind_of(rid) == kind]
+
+    def match(self, text, kind=None, max_distance: Optional[int] = None,
+              limit: Optional[int] = DEFAULT_LIMIT) -> List[Tuple[int, int]]:
+        """Finds records whose name, ID or name word is close to `text`.
+
+        Args:
+            text (str): Possibly misspelled name or cell ID.
+            kind (str, optional): Restrict to "item", "npc" or "location".
+            max_distance (int, optional): Maximum edit distance; defaults to
+                a value scaled by the length of the query.
+            limit (int, optional): Maximum number of results.
+
+        Returns:
+            list: (edit distance, record_id) tuples, closest first.
+        """
+        term = compact(text)
+        if not term:
+            return []
+        if max_distance is None:
+            max_distance = default_max_distance(term)
+
+        query_grams = trigrams(term)
+        shared: Dict[str, int] = {}
+        for gram in query_grams:
+            for candidate in self._trigram_terms.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        # Each edit touches at most 3 trigrams, so a match within max_distance
+        # must still share all but 3 * max_distance of the query's trigrams.
+        required = len(query_grams) - 3 * max_distance
+        best: Dict[int, int] = {}
+        for candidate, count in shared.items():
+            if count < required:
+                continue
+            distance = bounded_levenshtein(term, candidate, max_distance)
+            if distance is None:
+                continue
+            for record_id in self._term_records[candidate]:
+                if kind is not None and self._catalog.kind_of(record_id) != kind:
+                    continue
+                if distance < best.get(record_id, max_distance + 1):
+                    best[record_id] = distance
+
+        ranked = sorted(best.items(), key=lambda item: (item[1], self._catalog.name_of(item[0])))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(distance, record_id) for record_id, distance in ranked]
@@ -0,0 +1,365 @@
+"""
+Streaming importer for external item/NPC/cell dumps.
+
+Reads a local CSV/TSV, JSON Lines or saved HTML table (e.g. a UESP page) row
+by row, normalizes the IDs, drops rows the catalog already has and merges the
+rest into one category file, which is written once at the end. Only the
+target file and the set of IDs seen so far are kept in memory, whatever the
+size of the input.
+
+    python -m src.importer dump.csv armor/heavy_iron.json
+    python -m src.importer npcs.html npcs.json --kind npc --dry-run
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from src import data_loader, json_codec
+from src.attribute_store import NUMERIC_FIELDS
+from src.catalog import Catalog, KIND_ITEM, KIND_LOCATION, KIND_NPC
+from src.command_builder import format_form_id, parse_form_id
+from src.manifest import MANIFEST_FILE, write_manifest
+
+FORMAT_CSV = "csv"
+FORMAT_TSV = "tsv"
+FORMAT_JSONL = "jsonl"
+FORMAT_HTML = "html"
+
+_FORMATS_BY_EXTENSION = {
+    ".csv": FORMAT_CSV, ".tsv": FORMAT_TSV,
+    ".jsonl": FORMAT_JSONL, ".ndjson": FORMAT_JSONL,
+    ".html": FORMAT_HTML, ".htm": FORMAT_HTML,
+}
+
+# Normalized header names tried, in order, when no column is given explicitly.
+NAME_COLUMNS = ("name", "itemname", "npcname", "cellname", "location", "title")
+ID_COLUMNS = {
+    KIND_ITEM: ("formid", "baseid", "id", "objectid", "refid"),
+    KIND_NPC: ("formid", "baseid", "id", "refid"),
+    KIND_LOCATION: ("cellid", "editorid", "id"),
+}
+
+_CHUNK_SIZE = 64 * 1024
+SUMMARY_SAMPLE = 10  # Names listed per section of the printed summary
+
+
+def normalize_header(header) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(header or "").lower())
+
+
+# --- Row readers (all generators) ---
+
+def iter_csv_rows(path, delimiter=",") -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from csv.DictReader(f, delimiter=delimiter)
+
+
+def iter_jsonl_rows(path) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json_codec.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"{path}:{line_number}: not valid JSON, skipped.")
+                continue
+            if isinstance(row, dict):
+                yield row
+
+
+class _TableParser(HTMLParser):
+    """Collects <tr> rows as lists of cell text; drained after every feed()."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[str]] = []
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.rows.append(None)  # Marks the start of a new table
+        elif tag == "tr":
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+        elif tag == "br" and self._cell is not None:
+            self._cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if self._cell is not None:
+                self.handle_endtag("td")
+            self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def iter_html_rows(path) -> Iterator[dict]:
+    """Rows of every table in a saved HTML page, keyed by that table's header row."""
+    parser = _TableParser()
+    header = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            if chunk:
+                parser.feed(chunk)
+            else:
+                parser.close()
+            rows, parser.rows = parser.rows, []
+            for cells in rows:
+                if cells is None:
+                    header = None
+                elif header is None:
+                    header = cells
+                else:
+                    yield dict(zip(header, cells))
+            if not chunk:
+                break
+
+
+def iter_rows(path, fmt=None) -> Iterator[dict]:
+    fmt = fmt or _FORMATS_BY_EXTENSION.get(os.path.splitext(path)[1].lower())
+    if fmt == FORMAT_CSV:
+        return iter_csv_rows(path)
+    if fmt == FORMAT_TSV:
+        return iter_csv_rows(path, delimiter="\t")
+    if fmt == FORMAT_JSONL:
+        return iter_jsonl_rows(path)
+    if fmt == FORMAT_HTML:
+        return iter_html_rows(path)
+    raise ValueError(f"Unknown input format for {path}; use --format")
+
+
+# --- Importing ---
+
+class ImportSummary(NamedTuple):
+    target: str
+    rows: int
+    added: List[str]
+    updated: List[str]
+    unchanged: int
+    duplicate_rows: int          # Same ID twice in the input (first one wins)
+    conflicts: List[str]         # ID already used by a different catalog file, or name taken by another ID
+    invalid: int                 # No name or an ID that does not parse
+    written: bool
+
+
+def _pick_column(columns: Dict[str, str], explicit, candidates):
+    if explicit:
+        return columns.get(normalize_header(explicit), explicit)
+    for candidate in candidates:
+        if candidate in columns:
+            return columns[candidate]
+    return None
+
+
+def _number(text):
+    if isinstance(text, (int, float)) and not isinstance(text, bool):
+        return text
+    try:
+        number = float(str(text).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def normalize_ref(value, kind) -> Optional[str]:
+    """Canonical reference for a row: 8-digit form ID, or the stripped cell ID."""
+    if kind == KIND_LOCATION:
+        ref = str(value or "").strip()
+        return ref or None
+    form_id = parse_form_id(str(value or "").strip().strip("[]"))
+    return format_form_id(form_id) if form_id is not None else None
+
+
+def _entry_ref(entry):
+    return entry.get("id") if isinstance(entry, dict) else entry
+
+
+def _entry_refs(entry):
+    """References an existing entry holds; a name shared by several cells maps to a list."""
+    return [_entry_ref(each) for each in entry] if isinstance(entry, list) else [_entry_ref(entry)]
+
+
+def import_rows(rows, target, kind=KIND_ITEM, data_dir=None, catalog=None,
+                name_column=None, id_column=None, dry_run=False) -> ImportSummary:
+    """Merges rows into the category file `target` (relative to data_dir).
+
+    Rows whose ID the catalog already knows from another file are reported
+    as conflicts and skipped. Item rows keep any numeric attribute columns
+    (weight, value, ...) when the target file stores full records.
+    """
+    data_dir = data_dir or data_loader.DATA_DIR
+    catalog = catalog or Catalog(data_dir).load()
+    target_path = os.path.join(data_dir, target)
+    existing = {}
+    if os.path.exists(target_path):
+        with open(target_path, "r", encoding="utf-8") as f:
+            loaded = json_codec.load(f)
+        if not isinstance(loaded, dict):
+            raise ValueError(f"{target} does not contain a JSON object")
+        existing = loaded
+    # Full records unless the file already maps names to plain ID strings
+    full_records = kind == KIND_ITEM and not any(isinstance(v, str) for v in existing.values())
+    names_by_ref = {}
+    for name, entry in existing.items():
+        for value in _entry_refs(entry):
+            ref = normalize_ref(value, kind)
+            if ref is not None:
+                names_by_ref[ref] = name
+
+    merged = dict(existing)
+    seen = set()
+    added, updated, conflicts = [], [], []
+    counts = {"rows": 0, "unchanged": 0, "duplicate": 0, "invalid": 0}
+    columns = None
+    for row in rows:
+        counts["rows"] += 1
+        if columns is None:
+            columns = {normalize_header(key): key for key in row}
+            name_key = _pick_column(columns, name_column, NAME_COLUMNS)
+            id_key = _pick_column(columns, id_column, ID_COLUMNS[kind])
+            if name_key is None or id_key is None:
+                raise ValueError(f"Could not find name/ID columns in {sorted(row)}; "
+                                 f"use --name-column/--id-column")
+            attribute_keys = {field: columns[field] for field in NUMERIC_FIELDS if field in columns}
+        name = str(row.get(name_key) or "").strip()
+        ref = normalize_ref(row.get(id_key), kind)
+        if not name or ref is None:
+            counts["invalid"] += 1
+            continue
+        if ref in seen:
+            counts["duplicate"] += 1
+            continue
+        seen.add(ref)
+
+        sources = (catalog.get(rid).source for rid in catalog.ref_index.lookup_ids(ref, kind))
+        other_files = [source for source in sources if source != target]
+        if other_files:
+            conflicts.append(f"{name} ({ref} already in {other_files[0]})")
+            continue
+        current_name = names_by_ref.get(ref)
+        # Adding or renaming onto a name that holds other references would drop them
+        if name in merged and ref not in (normalize_ref(value, kind) for value in _entry_refs(merged[name])):
+            used_by = ", ".join(str(value) for value in _entry_refs(merged[name]))
+            conflicts.append(f"{name} ({ref}; name already used by {used_by})")
+            continue
+        shared = merged.get(current_name) if current_name is not None else None
+        if isinstance(shared, list):
+            # One of several references under one name: keep the others there
+            if current_name == name:
+                counts["unchanged"] += 1
+                continue
+            rest = [each for each in shared if normalize_ref(_entry_ref(each), kind) != ref]
+            if rest:
+                merged[current_name] = rest[0] if len(rest) == 1 else rest
+            else:
+                del merged[current_name]
+            merged[name] = ref if not full_records else {"id": ref}
+            names_by_ref[ref] = name
+            updated.append(name)
+            continue
+
+        if full_records:
+            entry = dict(merged.get(current_name) or {}) if current_name else {}
+            entry["id"] = ref
+            for field, key in attribute_keys.items():
+                number = _number(row.get(key))
+                if number is not None:
+                    entry[field] = number
+        else:
+            entry = ref
+        if current_name is None:
+            added.append(name)
+        elif current_name != name or merged[current_name] != entry:
+            del merged[current_name]
+            updated.append(name)
+        else:
+            counts["unchanged"] += 1
+            continue
+        merged[name] = entry
+        names_by_ref[ref] = name
+
+    written = False
+    if (added or updated) and not dry_run:
+        os.makedirs(os.path.dirname(target_path) or data_dir, exist_ok=True)
+        temp_path = target_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json_codec.dump(dict(sorted(merged.items())), f, pretty=True)
+            f.write("\n")
+        os.replace(temp_path, target_path)
+        written = True
+        if os.path.exists(os.path.join(data_dir, MANIFEST_FILE)):
+            write_manifest(data_dir)  # Keep record counts current
+    return ImportSummary(target, counts["rows"], added, updated, counts["unchanged"],
+                         counts["duplicate"], conflicts, counts["invalid"], written)
+
+
+def format_summary(summary: ImportSummary) -> str:
+    lines = [f"{summary.target}: {summary.rows} rows read, {len(summary.added)} added, "
+             f"{len(summary.updated)} updated, {summary.unchanged} unchanged, "
+             f"{summary.duplicate_rows} duplicate rows, {len(summary.conflicts)} conflicts, "
+             f"{summary.invalid} invalid."]
+    for sign, names in (("+", summary.added), ("~", summary.updated), ("!", summary.conflicts)):
+        for name in names[:SUMMARY_SAMPLE]:
+            lines.append(f"  {sign} {name}")
+        if len(names) > SUMMARY_SAMPLE:
+            lines.append(f"  {sign} ... and {len(names) - SUMMARY_SAMPLE} more")
+    if not summary.written:
+        lines.append("Nothing written." if not (summary.added or summary.updated) else "Dry run, nothing written.")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import an item/NPC/cell dump into a category file.")
+    parser.add_argument("source", help="CSV, TSV, JSON Lines or saved HTML file")
+    parser.add_argument("target", help="Category file to merge into, relative to the data dir (e.g. npcs.json)")
+    parser.add_argument("--kind", choices=(KIND_ITEM, KIND_NPC, KIND_LOCATION), default=None,
+                        help="Record kind (default: npc for npcs.json, location under locations/, else item)")
+    parser.add_argument("--format", choices=(FORMAT_CSV, FORMAT_TSV, FORMAT_JSONL, FORMAT_HTML),
+                        help="Input format (default: from the file extension)")
+    parser.add_argument("--name-column", help="Column holding the display name")
+    parser.add_argument("--id-column", help="Column holding the form ID / cell ID")
+    parser.add_argument("--data-dir", default=data_loader.DATA_DIR, help="Data directory to import into")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the summary")
+    args = parser.parse_args(argv)
+
+    target = args.target.replace("\\", "/")
+    kind = args.kind
+    if kind is None:
+        if target == data_loader.NPCS_FILE:
+            kind = KIND_NPC
+        elif target.startswith(f"{data_loader.LOCATIONS_SUBDIR}/"):
+            kind = KIND_LOCATION
+        else:
+            kind = KIND_ITEM
+    try:
+        summary = import_rows(iter_rows(args.source, args.format), target, kind, args.data_dir,
+                              name_column=args.name_column, id_column=args.id_column,
+                              dry_run=args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}")
+        return 1
+    print(format_summary(summary))
+    if summary.written and target not in Catalog(args.data_dir).load().source_paths():
+        print(f"Note: {target} is not listed in a category index file, so the app will not show it yet.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+JSON encode/decode used for all catalog and user-store file I/O.
+
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise (set ES4R_JSON_CODEC=json to force the fallback). Both raise
+json.JSONDecodeError on bad input, so callers keep catching that.
+
+Output is compact unless `pretty` is requested; pretty output (2-space
+indent) is meant for files people edit by hand.
+
+    python -m src.json_codec            # Parse/dump times per catalog file
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+CODEC_ENV = "ES4R_JSON_CODEC"
+BACKEND_STDLIB = "json"
+BACKEND_ORJSON = "orjson"
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _StdlibCodec:
+    name = BACKEND_STDLIB
+
+    @staticmethod
+    def loads(data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("utf-8-sig")
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(obj, pretty=False) -> str:
+        if pretty:
+            return json.dumps(obj, indent=2, ensure_ascii=False)
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+class _OrjsonCodec:
+    name = BACKEND_ORJSON
+
+    @staticmethod
+    def loads(data):
+        if isinstance(data, str):
+            data = data.lstrip("\ufeff")
+        elif data[:3] == b"\xef\xbb\xbf":
+            data = data[3:]
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(obj, pretty=False) -> str:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=option).decode("utf-8")
+
+
+def _select_codec(requested=None):
+    requested = requested or os.environ.get(CODEC_ENV)
+    if requested == BACKEND_STDLIB or orjson is None:
+        return _StdlibCodec
+    return _OrjsonCodec
+
+
+_codec = _select_codec()
+BACKEND = _codec.name
+
+
+def loads(data):
+    """Parses JSON from str or bytes (a UTF-8 BOM is ignored)."""
+    return _codec.loads(data)
+
+
+def load(fp):
+    """Parses JSON from an open file (text or binary mode)."""
+    return _codec.loads(fp.read())
+
+
+def dumps(obj, pretty=False) -> str:
+    return _codec.dumps(obj, pretty)
+
+
+def dump(obj, fp, pretty=False):
+    """Writes JSON to a file opened in text mode."""
+    fp.write(_codec.dumps(obj, pretty))
+
+
+# --- Benchmark ---
+
+def _best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def benchmark(data_dir=None, repeat=5) -> List[Dict[str, object]]:
+    """Times parse and compact dump of every catalog file with each available backend.
+
+    Returns:
+        list: One {"file", "bytes", "<backend>_parse", "<backend>_dump"} dict
+              per readable file, times in milliseconds.
+    """
+    from src import data_loader
+    from src.manifest import discover_category_files
+
+    data_dir = data_dir or data_loader.DATA_DIR
+    codecs = [_StdlibCodec] + ([_OrjsonCodec] if orjson is not None else [])
+
+    def read(relpath):
+        try:
+            with open(os.path.join(data_dir, relpath), "rb") as f:
+                return _StdlibCodec.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    relpaths = [data_loader.ITEM_CATEGORIES_FILE, data_loader.LOCATION_CATEGORIES_FILE,
+                data_loader.BATTLES_FILE, data_loader.FAVORITES_FILE]
+    relpaths += sorted(discover_category_files(read))
+    rows = []
+    for relpath in relpaths:
+        try:
+            with open(os.path.join(data_dir, relpath), "rb") as f:
+                raw = f.read()
+            parsed = _StdlibCodec.loads(raw)
+        except (OSError, ValueError):
+            continue
+        row = {"file": relpath, "bytes": len(raw)}
+        for codec in codecs:
+            row[f"{codec.name}_parse"] = _best_of(lambda: codec.loads(raw), repeat) * 1000
+            row[f"{codec.name}_dump"] = _best_of(lambda: codec.dumps(parsed), repeat) * 1000
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JSON parse/dump on the catalog files.")
+    parser.add_argument("--data-dir", default=None, help="Data directory to read")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is kept)")
+    args = parser.parse_args(argv)
+
+    rows = benchmark(args.data_dir, args.repeat)
+    backends = [BACKEND_STDLIB] + ([BACKEND_ORJSON] if orjson is not None else [])
+    print(f"Active codec: {BACKEND}")
+    header = f"{'file':<44} {'KiB':>7}" + "".join(f" {b + ' parse':>13} {b + ' dump':>12}" for b in backends)
+    print(header + "   (ms)")
+    totals: Dict[str, float] = {}
+    for row in rows:
+        line = f"{row['file']:<44} {row['bytes'] / 1024:>7.1f}"
+        for backend in backends:
+            for op, width in (("parse", 13), ("dump", 12)):
+                key = f"{backend}_{op}"
+                totals[key] = totals.get(key, 0.0) + row[key]
+                line += f" {row[key]:>{width}.3f}"
+        print(line)
+    line = f"{'total (' + str(len(rows)) + ' files)':<44} {sum(r['bytes'] for r in rows) / 1024:>7.1f}"
+    for backend in backends:
+        line += f" {totals.get(backend + '_parse', 0):>13.3f} {totals.get(backend + '_dump', 0):>12.3f}"
+    print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
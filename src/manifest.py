@@ -0,0 +1,372 @@
+"""
+Manifest describing every catalog file in the data directory.
+
+The manifest (data/manifest.json) is generated from the data directory with
+
+    python -m src.manifest            # write data/manifest.json
+    python -m src.manifest --check    # only report; exit non-zero if any file has problems
+
+and records, for each file referenced by the category index files, its record
+count, content hash, schema kind, duplicate IDs/names and a status flag
+(ok / missing / empty / invalid / placeholder). JSON files that no category
+points at are listed separately.
+
+A manifest is trusted when its version matches and the hashes of the category
+index files it was built from still match the ones on disk. The loaders then
+take file lists, missing-file flags and record counts from it instead of
+checking or listing the data directory. Each listed file's size and mtime are
+still compared on load (one stat per file); a file that differs is hashed,
+and described again in memory if its content changed, so record counts stay
+right after an edit. Cross-file duplicate IDs are only updated by regenerating.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from src import data_loader, json_codec
+from src.command_builder import format_form_id, parse_form_id
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+STATUS_OK = "ok"
+STATUS_MISSING = "missing"
+STATUS_EMPTY = "empty"
+STATUS_INVALID = "invalid"
+STATUS_PLACEHOLDER = "placeholder"
+
+# Schema kinds
+SCHEMA_ID_MAP = "id_map"            # {name: "ID"}
+SCHEMA_RECORD_MAP = "record_map"    # {name: {"id": "ID", ...stats}}
+SCHEMA_CELL_LIST_MAP = "cell_list_map"  # {name: "Cell" or ["Cell", ...]}
+SCHEMA_MIXED = "mixed"
+
+# Category index files, relative to the data directory.
+ITEM_CATEGORIES_FILE = data_loader.ITEM_CATEGORIES_FILE
+LOCATION_CATEGORIES_FILE = data_loader.LOCATION_CATEGORIES_FILE
+NPCS_FILE = data_loader.NPCS_FILE
+LOCATIONS_SUBDIR = data_loader.LOCATIONS_SUBDIR
+
+# Files in the data directory that are not catalog files.
+_NON_CATALOG_FILES = {
+    MANIFEST_FILE,
+    ITEM_CATEGORIES_FILE,
+    LOCATION_CATEGORIES_FILE,
+    data_loader.BATTLES_FILE,
+    data_loader.FAVORITES_FILE,
+}
+
+_PLACEHOLDER_PREFIX = "placeholder"
+_ZERO_FORM_ID = 0
+
+
+class CategoryFile(NamedTuple):
+    """Where a catalog file sits in the category index files."""
+    kind: str                  # "item", "npc" or "location"
+    category: str
+    subcategory: Optional[str]
+
+
+def _read_bytes(data_dir, relpath):
+    try:
+        with open(os.path.join(data_dir, relpath), 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _mtime_ns(data_dir, relpath):
+    try:
+        return os.stat(os.path.join(data_dir, relpath)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _parse(raw):
+    try:
+        return json_codec.loads(raw)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+
+
+def discover_category_files(read_json) -> Dict[str, CategoryFile]:
+    """Builds the {relpath: CategoryFile} map from the category index files.
+
+    Args:
+        read_json (callable): relpath -> parsed JSON (or None), so callers can
+            route reads through their own logging.
+    """
+    files = {}
+    item_categories = read_json(ITEM_CATEGORIES_FILE)
+    if isinstance(item_categories, dict):
+        for item_type, subcategories in item_categories.items():
+            if not isinstance(subcategories, dict):
+                continue
+            for sub_name, relpath in subcategories.items():
+                files[relpath] = CategoryFile("item", item_type, sub_name)
+    files[NPCS_FILE] = CategoryFile("npc", "NPCs", None)
+    location_categories = read_json(LOCATION_CATEGORIES_FILE)
+    if isinstance(location_categories, dict):
+        for category_name, filename in location_categories.items():
+            relpath = f"{LOCATIONS_SUBDIR}/{filename}"
+            files[relpath] = CategoryFile("location", category_name, None)
+    return files
+
+
+def _ref_key(ref, kind):
+    """Case/zero-padding independent key used to spot duplicate IDs."""
+    if kind == "location":
+        return ref.strip().lower()
+    form_id = parse_form_id(ref)
+    return format_form_id(form_id) if form_id is not None else ref.strip().upper()
+
+
+def describe_file(raw, kind) -> dict:
+    """Summarizes one catalog file's content (raw bytes, or None if missing)."""
+    if raw is None:
+        return {"status": STATUS_MISSING, "schema": None, "records": 0,
+                "sha256": None, "size": 0, "duplicate_ids": [], "duplicate_names": []}
+    entry = {"sha256": hashlib.sha256(raw).hexdigest(), "size": len(raw),
+             "schema": None, "records": 0, "duplicate_ids": [], "duplicate_names": []}
+    if not raw.strip():
+        entry["status"] = STATUS_EMPTY
+        return entry
+    data = _parse(raw)
+    if not isinstance(data, dict):
+        entry["status"] = STATUS_INVALID
+        return entry
+
+    shapes = set()
+    refs = []
+    for name, value in data.items():
+        if isinstance(value, dict):
+            shapes.add(SCHEMA_RECORD_MAP)
+            value = value.get("id")
+        elif isinstance(value, list):
+            shapes.add(SCHEMA_CELL_LIST_MAP)
+        else:
+            shapes.add(SCHEMA_ID_MAP)
+        for ref in value if isinstance(value, list) else [value]:
+            if isinstance(ref, str) and ref.strip():
+                refs.append(ref)
+    if kind == "location" and shapes and shapes <= {SCHEMA_ID_MAP, SCHEMA_CELL_LIST_MAP}:
+        shapes = {SCHEMA_CELL_LIST_MAP}  # A single cell is just a one-element list
+    if shapes:
+        entry["schema"] = shapes.pop() if len(shapes) == 1 else SCHEMA_MIXED
+    entry["records"] = len(refs)
+
+    seen_refs, duplicate_refs = set(), set()
+    for ref in refs:
+        key = _ref_key(ref, kind)
+        (duplicate_refs if key in seen_refs else seen_refs).add(key)
+    seen_names, duplicate_names = set(), set()
+    for name in data:
+        key = name.strip().lower()
+        (duplicate_names if key in seen_names else seen_names).add(name)
+    entry["duplicate_ids"] = sorted(duplicate_refs)
+    entry["duplicate_names"] = sorted(duplicate_names)
+
+    placeholder = bool(data) and (
+        all(name.lower().startswith(_PLACEHOLDER_PREFIX) for name in data)
+        or (kind != "location" and refs and all(parse_form_id(ref) == _ZERO_FORM_ID for ref in refs)))
+    if placeholder:
+        entry["status"] = STATUS_PLACEHOLDER
+    elif not refs:
+        entry["status"] = STATUS_EMPTY
+    else:
+        entry["status"] = STATUS_OK
+    return entry
+
+
+def _index_hashes(data_dir):
+    hashes = {}
+    for relpath in (ITEM_CATEGORIES_FILE, LOCATION_CATEGORIES_FILE):
+        raw = _read_bytes(data_dir, relpath)
+        hashes[relpath] = hashlib.sha256(raw).hexdigest() if raw is not None else None
+    return hashes
+
+
+def build_manifest(data_dir=None) -> dict:
+    """Scans the data directory and returns the manifest as a dict."""
+    data_dir = data_dir or data_loader.DATA_DIR
+    def read_json(relpath):
+        raw = _read_bytes(data_dir, relpath)
+        return _parse(raw) if raw is not None else None
+
+    category_files = discover_category_files(read_json)
+    files = {}
+    first_seen_ids: Dict[str, str] = {}  # "kind:id" -> first file using it
+    cross_file_duplicates: Dict[str, list] = {}
+    for relpath, category_file in category_files.items():
+        raw = _read_bytes(data_dir, relpath)
+        entry = {"kind": category_file.kind, "category": category_file.category,
+                 "subcategory": category_file.subcategory}
+        entry.update(describe_file(raw, category_file.kind))
+        entry["mtime_ns"] = _mtime_ns(data_dir, relpath)
+        files[relpath] = entry
+        data = _parse(raw) if raw else None
+        if entry["status"] != STATUS_OK or not isinstance(data, dict):
+            continue
+        for value in data.values():
+            ref = value.get("id") if isinstance(value, dict) else value
+            for single in ref if isinstance(ref, list) else [ref]:
+                if not isinstance(single, str) or not single.strip():
+                    continue
+                key = f"{category_file.kind}:{_ref_key(single, category_file.kind)}"
+                first = first_seen_ids.setdefault(key, relpath)
+                if first != relpath:
+                    holders = cross_file_duplicates.setdefault(key, [first])
+                    if relpath not in holders:
+                        holders.append(relpath)
+
+    unreferenced = {}
+    for root, _, filenames in os.walk(data_dir):
+        for filename in filenames:
+            if not filename.endswith('.json'):
+                continue
+            relpath = os.path.relpath(os.path.join(root, filename), data_dir).replace("\\", "/")
+            if relpath in files or relpath in _NON_CATALOG_FILES:
+                continue
+            kind = "location" if relpath.startswith(f"{LOCATIONS_SUBDIR}/") else "item"
+            described = describe_file(_read_bytes(data_dir, relpath), kind)
+            unreferenced[relpath] = {"status": described["status"], "records": described["records"]}
+
+    problems = sorted(relpath for relpath, entry in files.items() if entry["status"] != STATUS_OK)
+    return {
+        "version": MANIFEST_VERSION,
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "index_files": _index_hashes(data_dir),
+        "files": dict(sorted(files.items())),
+        "unreferenced": dict(sorted(unreferenced.items())),
+        "duplicate_ids": dict(sorted(cross_file_duplicates.items())),
+        "summary": {
+            "files": len(files),
+            "records": sum(entry["records"] for entry in files.values() if entry["status"] == STATUS_OK),
+            "problems": problems,
+        },
+    }
+
+
+def write_manifest(data_dir=None) -> dict:
+    """Builds the manifest and writes it to <data_dir>/manifest.json."""
+    data_dir = data_dir or data_loader.DATA_DIR
+    manifest = build_manifest(data_dir)
+    with open(os.path.join(data_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json_codec.dump(manifest, f, pretty=True)
+        f.write("\n")
+    invalidate_manifest(data_dir)
+    logging.info(f"Wrote {MANIFEST_FILE}: {manifest['summary']['files']} files, "
+                 f"{manifest['summary']['records']} records.")
+    return manifest
+
+
+# --- Loading ---
+
+_trusted: Dict[str, dict] = {}
+_trusted_lock = threading.Lock()
+
+
+def load_manifest(data_dir=None) -> Optional[dict]:
+    """Returns the data directory's manifest if it is present and still valid.
+
+    A valid manifest is cached for the data directory until
+    invalidate_manifest() is called, so later loader calls touch no files.
+    """
+    data_dir = data_dir or data_loader.DATA_DIR
+    manifest = _trusted.get(data_dir)
+    if manifest is not None:
+        return manifest
+    raw = _read_bytes(data_dir, MANIFEST_FILE)
+    if raw is None:
+        return None
+    manifest = _parse(raw)
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION \
+            or not isinstance(manifest.get("files"), dict):
+        logging.warning(f"Ignoring {MANIFEST_FILE}: unknown format. Regenerate it with 'python -m src.manifest'.")
+        return None
+    if manifest.get("index_files") != _index_hashes(data_dir):
+        logging.warning(f"Ignoring stale {MANIFEST_FILE}: category index files changed. "
+                        f"Regenerate it with 'python -m src.manifest'.")
+        return None
+    _update_changed_files(data_dir, manifest)
+    with _trusted_lock:
+        _trusted[data_dir] = manifest
+    return manifest
+
+
+def _update_changed_files(data_dir, manifest):
+    """Describes again the listed files whose size or mtime no longer match the manifest."""
+    changed = []
+    for relpath, entry in manifest["files"].items():
+        try:
+            stat = os.stat(os.path.join(data_dir, relpath))
+            stamp = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            stamp = None
+        recorded = (entry.get("size"), entry.get("mtime_ns")) if entry["status"] != STATUS_MISSING else None
+        if stamp == recorded:
+            continue
+        raw = _read_bytes(data_dir, relpath) if stamp is not None else None
+        if raw is not None and entry["status"] != STATUS_MISSING \
+                and hashlib.sha256(raw).hexdigest() == entry.get("sha256"):
+            entry["mtime_ns"] = stamp[1]  # Touched (e.g. a fresh checkout), same content
+            continue
+        entry.update(describe_file(raw, entry["kind"]))
+        entry["mtime_ns"] = stamp[1] if stamp is not None else None
+        changed.append(relpath)
+    if changed:
+        files = manifest["files"]
+        manifest["summary"] = dict(
+            manifest.get("summary") or {}, files=len(files),
+            records=sum(entry["records"] for entry in files.values() if entry["status"] == STATUS_OK),
+            problems=sorted(relpath for relpath, entry in files.items() if entry["status"] != STATUS_OK))
+        logging.info(f"{MANIFEST_FILE}: {len(changed)} file(s) changed since it was generated; "
+                     f"counted again: {', '.join(changed[:5])}{' ...' if len(changed) > 5 else ''}")
+
+
+def invalidate_manifest(data_dir=None):
+    """Forgets the cached manifest (after the data directory changed)."""
+    with _trusted_lock:
+        _trusted.pop(data_dir or data_loader.DATA_DIR, None)
+
+
+def record_counts(data_dir=None) -> Dict[str, int]:
+    """{relpath: record count} for every existing category file in a trusted manifest, or {}."""
+    manifest = load_manifest(data_dir)
+    if manifest is None:
+        return {}
+    return {relpath: entry["records"] for relpath, entry in manifest["files"].items()
+            if entry["status"] != STATUS_MISSING}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate or check the data manifest.")
+    parser.add_argument("--data-dir", default=data_loader.DATA_DIR, help="Data directory to scan")
+    parser.add_argument("--check", action="store_true",
+                        help="Do not write the manifest; exit with status 1 if any category file is missing, empty, invalid or a placeholder")
+    args = parser.parse_args(argv)
+
+    # --check only validates; the manifest file is left as it is
+    manifest = build_manifest(args.data_dir) if args.check else write_manifest(args.data_dir)
+    summary = manifest["summary"]
+    print(f"{summary['files']} category files, {summary['records']} records.")
+    for relpath in summary["problems"]:
+        print(f"  {manifest['files'][relpath]['status']:<12} {relpath}")
+    for relpath, entry in manifest["files"].items():
+        if entry["duplicate_ids"]:
+            print(f"  duplicate IDs in {relpath}: {', '.join(entry['duplicate_ids'])}")
+    for key, holders in manifest["duplicate_ids"].items():
+        print(f"  {key} appears in: {', '.join(holders)}")
+    if args.check and summary["problems"]:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
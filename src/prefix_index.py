@@ -0,0 +1,129 @@
+"""
+Sorted-array prefix index used for typeahead in the GUI, CLI and TUI.
+
+Keys (lowercased display names, cell IDs and hex form IDs) are kept in one
+sorted list alongside their entries, so a completion is a binary search for
+the first key >= prefix followed by a short forward scan. Inserts use
+bisect.insort, which is cheap enough for the handful of favorites and presets
+a user adds while the app is running; a catalog load goes through add_many
+and remove_many instead, which sort or filter the whole list once.
+"""
+import bisect
+from collections import Counter
+from operator import itemgetter
+from typing import List, NamedTuple, Optional
+
+KIND_FAVORITE = "favorite"
+KIND_PRESET = "preset"
+
+DEFAULT_LIMIT = 10
+
+
+class CompletionEntry(NamedTuple):
+    kind: str    # Catalog kind ("item", "npc", "location") or "favorite"/"preset"
+    label: str   # Text shown to the user
+    value: str   # Form ID, cell ID, favorite command or preset name
+
+
+def _keys_for_record(record):
+    keys = {record.name.lower(), record.ref.lower()}
+    if record.kind != "location":
+        # Let "15b8b" find "00015B8B"
+        keys.add(record.ref.lower().lstrip('0') or '0')
+    return keys
+
+
+class PrefixIndex:
+    """Ordered (key, entry) pairs supporting top-k prefix completion."""
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._entries: List[CompletionEntry] = []
+
+    def insert(self, key, entry: CompletionEntry):
+        key = key.lower()
+        pos = bisect.bisect_right(self._keys, key)
+        self._keys.insert(pos, key)
+        self._entries.insert(pos, entry)
+
+    def delete(self, key, entry: CompletionEntry):
+        key = key.lower()
+        pos = bisect.bisect_left(self._keys, key)
+        while pos < len(self._keys) and self._keys[pos] == key:
+            if self._entries[pos] == entry:
+                del self._keys[pos]
+                del self._entries[pos]
+                return True
+            pos += 1
+        return False
+
+    # --- Catalog index protocol ---
+
+    def add(self, record_id, record):
+        entry = CompletionEntry(record.kind, record.name, record.ref)
+        for key in _keys_for_record(record):
+            self.insert(key, entry)
+
+    def remove(self, record_id, record):
+        entry = CompletionEntry(record.kind, record.name, record.ref)
+        for key in _keys_for_record(record):
+            self.delete(key, entry)
+
+    def add_many(self, pairs):
+        """add() for many (record_id, record) pairs, with one sort instead of an insort per key."""
+        merged = list(zip(self._keys, self._entries))
+        for record_id, record in pairs:
+            entry = CompletionEntry(record.kind, record.name, record.ref)
+            merged.extend((key, entry) for key in _keys_for_record(record))
+        merged.sort(key=itemgetter(0))  # Stable: equal keys stay in insertion order, as with insert()
+        self._keys = [key for key, _ in merged]
+        self._entries = [entry for _, entry in merged]
+
+    def remove_many(self, pairs):
+        """remove() for many (record_id, record) pairs, in one pass over the list."""
+        doomed = Counter()
+        for record_id, record in pairs:
+            entry = CompletionEntry(record.kind, record.name, record.ref)
+            doomed.update((key, entry) for key in _keys_for_record(record))
+        keys, entries = [], []
+        for pair in zip(self._keys, self._entries):
+            if doomed[pair]:
+                doomed[pair] -= 1  # Like delete(): the first matching pair goes
+            else:
+                keys.append(pair[0])
+                entries.append(pair[1])
+        self._keys, self._entries = keys, entries
+
+    # --- Querying ---
+
+    def complete(self, prefix, limit: Optional[int] = DEFAULT_LIMIT, kinds=None) -> List[CompletionEntry]:
+        """Returns up to `limit` distinct entries whose key starts with prefix.
+
+        Args:
+            prefix (str): Text typed so far (case-insensitive).
+            limit (int, optional): Maximum number of entries (None for all).
+            kinds (iterable, optional): Only return entries of these kinds.
+
+        Returns:
+            list: CompletionEntry tuples in key order.
+        """
+        prefix = (prefix or "").lower()
+        if not prefix:
+            return []
+        kinds = set(kinds) if kinds else None
+        results = []
+        seen = set()
+        pos = bisect.bisect_left(self._keys, prefix)
+        while pos < len(self._keys) and self._keys[pos].startswith(prefix):
+            entry = self._entries[pos]
+            pos += 1
+            if (kinds is not None and entry.kind not in kinds) or entry in seen:
+                continue
+            seen.add(entry)
+            results.append(entry)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def __len__(self):
+        return len(self._keys)
@@ -0,0 +1,128 @@
+"""
+Progress events for long-running jobs, pushed to the GUI from one thread.
+
+run_preset_battle and run_custom_battle hold their bridge call open until the
+last command ran; without progress the page can only show "running" and
+"done". Jobs report what they are doing through a JobProgress, and a single
+ProgressDispatcher thread hands the events to a sink (in app.py, a
+window.evaluate_js call into the page):
+
+    {"job": 3, "name": "preset 'Arena'", "type": "step", "step": 7, "total": 100,
+     "command": "player.placeatme 000479F5 2", "elapsed_s": 3.6, "eta_s": 48.2}
+
+Event types are "started", "step" (step i of N is about to run), "failed"
+(with "message") and "finished" (with "success"). Events are sent in batches
+no more often than every `min_interval` seconds; within a batch only the
+latest "step" of each job is kept, since the page only shows the current one.
+"started", "failed" and "finished" are never dropped. Publishing never blocks
+the job, and a failing sink is logged and ignored.
+"""
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+# Seconds between two pushes to the page.
+MIN_INTERVAL = 0.1
+
+
+class JobProgress:
+    """Reports the steps of one job; created by ProgressDispatcher.start_job."""
+
+    def __init__(self, dispatcher, job_id, name, total):
+        self._dispatcher = dispatcher
+        self.job_id = job_id
+        self.name = name
+        self.total = total
+        self._started = time.monotonic()
+        self._publish("started")
+
+    def _publish(self, event_type, **fields):
+        event = {"job": self.job_id, "name": self.name, "type": event_type, "total": self.total,
+                 "elapsed_s": round(time.monotonic() - self._started, 2)}
+        event.update(fields)
+        self._dispatcher.publish(event)
+
+    def step(self, index, command=None):
+        """Step `index` (0-based) is about to run."""
+        elapsed = time.monotonic() - self._started
+        eta = elapsed / index * (self.total - index) if index else None
+        self._publish("step", step=index + 1, command=command,
+                      eta_s=round(eta, 1) if eta is not None else None)
+
+    def failed(self, index, command=None, message=None):
+        """Step `index` failed (-1: the job failed before its first step)."""
+        self._publish("failed", step=index + 1, command=command, message=message)
+
+    def finish(self, success, message=None):
+        self._publish("finished", success=bool(success), message=message)
+
+
+class ProgressDispatcher:
+    """Batches job events and delivers them to `sink` from one daemon thread."""
+
+    def __init__(self, sink: Callable[[List[dict]], None], min_interval=MIN_INTERVAL):
+        self._sink = sink
+        self.min_interval = min_interval
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._job_ids = itertools.count(1)
+        self._thread: Optional[threading.Thread] = None
+        self.batches = self.events_sent = self.events_dropped = 0
+
+    def start_job(self, name, total) -> JobProgress:
+        return JobProgress(self, next(self._job_ids), name, total)
+
+    def publish(self, event: dict):
+        self._queue.put(event)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ProgressDispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Sends what is still queued, then ends the thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    @staticmethod
+    def coalesce(events: List[dict]) -> List[dict]:
+        """Drops every "step" event followed by a later step of the same job."""
+        latest_step = {event["job"]: i for i, event in enumerate(events) if event["type"] == "step"}
+        return [event for i, event in enumerate(events)
+                if event["type"] != "step" or latest_step[event["job"]] == i]
+
+    def _run(self):
+        last_push = 0.0
+        stopping = False
+        while not stopping:
+            event = self._queue.get()
+            if event is None:
+                break
+            events = [event]
+            # Collect everything arriving until the next push is allowed
+            deadline = last_push + self.min_interval
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    event = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                events.append(event)
+            batch = self.coalesce(events)
+            self.events_dropped += len(events) - len(batch)
+            try:
+                self._sink(batch)
+            except Exception:
+                logging.exception("Failed to deliver job progress")
+            self.batches += 1
+            self.events_sent += len(batch)
+            last_push = time.monotonic()
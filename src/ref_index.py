@@ -0,0 +1,74 @@
+"""
+Reverse lookup from form IDs and cell IDs back to catalog records.
+
+Stored commands only carry raw references ("player.placeatme 000479F5 2",
+"coc ICMarketDistrict"); this index lets favorites, presets and history be
+shown with readable names without re-reading any catalog file. Form IDs are
+keyed by their integer value so "F", "0xf" and "0000000F" all resolve to the
+same record; cell IDs are matched case-insensitively.
+"""
+from typing import Dict, List
+
+from src.command_builder import parse_form_id
+
+
+def normalize_cell_id(ref) -> str:
+    return (ref or "").strip().lower()
+
+
+class RefIndex:
+    """Maps integer form IDs / folded cell IDs to the catalog records using them."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+        self._form_ids: Dict[int, List[int]] = {}
+        self._cells: Dict[str, List[int]] = {}
+
+    def _slot(self, record):
+        if record.form_id is None:
+            return self._cells, normalize_cell_id(record.ref)
+        return self._form_ids, record.form_id
+
+    # --- Catalog index protocol ---
+
+    def add(self, record_id, record):
+        table, key = self._slot(record)
+        table.setdefault(key, []).append(record_id)
+
+    def remove(self, record_id, record):
+        table, key = self._slot(record)
+        ids = table.get(key)
+        if ids and record_id in ids:
+            ids.remove(record_id)
+            if not ids:
+                del table[key]
+
+    # --- Querying ---
+
+    def lookup_ids(self, ref, kind=None) -> List[int]:
+        """Record IDs using `ref`.
+
+        Args:
+            ref (str or int): Form ID (any case, with or without leading zeros,
+                or an integer) or cell ID.
+            kind (str, optional): "item", "npc" or "location"; without it form
+                IDs are tried before cell IDs.
+        """
+        if kind != "location":
+            form_id = parse_form_id(ref)
+            ids = [rid for rid in self._form_ids.get(form_id, ())
+                   if kind is None or self._catalog.kind_of(rid) == kind]
+            if ids:
+                return ids
+        if kind in (None, "location") and isinstance(ref, str):
+            return list(self._cells.get(normalize_cell_id(ref), ()))
+        return []
+
+    def lookup(self, ref, kind=None):
+        """Returns the first record using `ref`, or None (see lookup_ids)."""
+        ids = self.lookup_ids(ref, kind)
+        return self._catalog.get(ids[0]) if ids else None
+
+    def __len__(self):
+        return sum(len(ids) for ids in self._form_ids.values()) + \
+            sum(len(ids) for ids in self._cells.values())
@@ -0,0 +1,73 @@
+"""
+Versioned, pre-serialized responses for the catalog list endpoints.
+
+get_npcs, get_items_in_category and get_locations_in_category_api send whole
+category files over the pywebview bridge, and the GUI asks for the same ones
+every time a dropdown changes. Each response therefore carries the version
+of the data it was built from (Catalog.version of its file), and the GUI
+sends back the version it already holds:
+
+    same version:  {"version": v, "not_modified": True}   (a few bytes)
+    otherwise:     {"version": v, "body": "<JSON>"}       (body from this cache)
+
+The body is serialized once per (request, version) and kept as a string, so
+repeat requests after a change, or from a page that dropped its cache, skip
+both building and encoding the payload; the bridge only has to quote one
+string. Responses without a version (data the catalog does not hold) are
+built and sent every time.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from src import json_codec
+
+# Distinct requests (endpoint, file, sort) kept serialized; least recently used go first.
+MAX_ENTRIES = 64
+
+
+class ResponseCache:
+    """Serialized responses keyed by request, each valid for one data version."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (version, body)
+        self._lock = threading.Lock()
+        self.not_modified = self.hits = self.misses = 0
+
+    def respond(self, key: Hashable, version: Optional[str], known_version: Optional[str],
+                build: Callable[[], object]) -> dict:
+        """The reply for one request.
+
+        Args:
+            key: Identifies the request (endpoint and arguments).
+            version: Version of the data the request reads now; None if unversioned.
+            known_version: Version the caller already holds, if any.
+            build: Returns the response payload (anything json_codec can encode).
+        """
+        if version is not None and known_version == version:
+            self.not_modified += 1
+            return {"version": version, "not_modified": True}
+        if version is not None:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None and cached[0] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return {"version": version, "body": cached[1]}
+        body = json_codec.dumps(build())
+        self.misses += 1
+        if version is not None:
+            with self._lock:
+                self._entries[key] = (version, body)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return {"version": version, "body": body}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,191 @@
+"""
+Token-based inverted index over catalog records.
+
+Each record's display name and ID are split into lowercase tokens
+("BravilMagesGuild2ndFloor" -> bravil, mages, guild, 2nd, floor) and every
+token maps to the set of record IDs containing it. A query matches records
+that contain all of its tokens; the last query token also matches as a prefix
+so results appear while the user is still typing.
+"""
+import bisect
+import heapq
+import re
+from typing import Dict, List, Optional, Set
+
+from src.command_builder import parse_form_id
+
+_CAMEL_SPLIT_RE = re.compile(r'[A-Z]{2,}(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+(?:st|nd|rd|th)?|\d+')
+_SPLIT_RE = re.compile(r'[^0-9A-Za-z]+')
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+DEFAULT_LIMIT = 25
+
+
+def normalize(text):
+    """Lowercases text and drops apostrophes ("Arch-Mage's" -> "arch-mages")."""
+    return text.lower().replace("'", "").replace("’", "")
+
+
+def tokenize(text):
+    """Splits a name or ID into index tokens.
+
+    Words are split on punctuation and on CamelCase boundaries; the full
+    lowercased word is kept as well so "ICMarketDistrict" is reachable both as
+    one token and as "ic", "market", "district".
+    """
+    if not text:
+        return []
+    tokens = []
+    for word in _SPLIT_RE.split(text.replace("'", "").replace("’", "")):
+        if not word:
+            continue
+        lowered = word.lower()
+        tokens.append(lowered)
+        parts = _CAMEL_SPLIT_RE.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    # Preserve order but drop duplicates
+    return list(dict.fromkeys(tokens))
+
+
+class SearchIndex:
+    """Inverted index supporting ranked, filtered lookups by token."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []  # Sorted, for prefix expansion
+        self._names: Dict[int, str] = {}  # record_id -> normalized "plain words" name
+
+    # --- Catalog index protocol ---
+
+    def add(self, record_id, record):
+        for token in self._add_postings(record_id, record):
+            bisect.insort(self._vocabulary, token)
+
+    def remove(self, record_id, record):
+        for token in self._remove_postings(record_id, record):
+            pos = bisect.bisect_left(self._vocabulary, token)
+            if pos < len(self._vocabulary) and self._vocabulary[pos] == token:
+                del self._vocabulary[pos]
+
+    def add_many(self, pairs):
+        """add() for many (record_id, record) pairs; the vocabulary is sorted once (catalog loads)."""
+        new_tokens = [token for record_id, record in pairs for token in self._add_postings(record_id, record)]
+        if new_tokens:
+            self._vocabulary.extend(new_tokens)
+            self._vocabulary.sort()
+
+    def remove_many(self, pairs):
+        """remove() for many (record_id, record) pairs; the vocabulary is filtered once."""
+        emptied = {token for record_id, record in pairs for token in self._remove_postings(record_id, record)}
+        if emptied:
+            self._vocabulary = [token for token in self._vocabulary if token not in emptied]
+
+    def _add_postings(self, record_id, record):
+        """Indexes one record; returns the tokens that are new to the vocabulary."""
+        self._names[record_id] = " ".join(_WORD_RE.findall(normalize(record.name)))
+        new_tokens = []
+        for token in set(tokenize(record.name) + tokenize(record.ref)):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                new_tokens.append(token)
+            postings.add(record_id)
+        return new_tokens
+
+    def _remove_postings(self, record_id, record):
+        """Unindexes one record; returns the tokens no record uses any more."""
+        self._names.pop(record_id, None)
+        emptied = []
+        for token in set(tokenize(record.name) + tokenize(record.ref)):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(record_id)
+            if not postings:
+                del self._postings[token]
+                emptied.append(token)
+        return emptied
+
+    # --- Querying ---
+
+    def _prefix_matches(self, prefix):
+        """Returns the union of postings for every token starting with prefix."""
+        matches = set()
+        pos = bisect.bisect_left(self._vocabulary, prefix)
+        while pos < len(self._vocabulary) and self._vocabulary[pos].startswith(prefix):
+            matches |= self._postings[self._vocabulary[pos]]
+            pos += 1
+        return matches
+
+    def _candidates(self, query_tokens, exact_hits=None) -> Set[int]:
+        """Records containing every token (the last one as a prefix)."""
+        candidates = None
+        for i, token in enumerate(query_tokens):
+            exact = self._postings.get(token, set())
+            if i == len(query_tokens) - 1:
+                matched = self._prefix_matches(token)
+            else:
+                matched = exact
+            if exact_hits is not None:
+                for record_id in exact:
+                    exact_hits[record_id] = exact_hits.get(record_id, 0) + 1
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return set()
+        return candidates or set()
+
+    def match_ids(self, query) -> Set[int]:
+        """Unranked set of record IDs matching `query` (see search())."""
+        return set(self._candidates(_WORD_RE.findall(normalize(query or ""))))
+
+    def search(self, query, kind=None, category=None, limit: Optional[int] = DEFAULT_LIMIT):
+        """Finds records whose tokens contain every query token.
+
+        Args:
+            query (str): Free text typed by the user.
+            kind (str, optional): Restrict to "item", "npc" or "location".
+            category (str, optional): Restrict to a category or sub-category
+                name (case-insensitive).
+            limit (int, optional): Maximum number of results (None for all).
+
+        Returns:
+            tuple: (list of (record_id, record), total number of matches)
+        """
+        query_tokens = _WORD_RE.findall(normalize(query or ""))
+        exact_hits: Dict[int, int] = {}
+        candidates = self._candidates(query_tokens, exact_hits)
+        if not candidates:
+            return [], 0
+
+        catalog = self._catalog
+        category_filter = category.lower() if category else None
+        normalized_query = " ".join(query_tokens)
+        query_form_id = parse_form_id(normalized_query)
+        scored = []
+        for record_id in candidates:
+            name = self._names[record_id]
+            if kind and catalog.kind_of(record_id) != kind:
+                continue
+            if category_filter:
+                record = catalog.get(record_id)
+                if category_filter != record.category.lower() and \
+                        category_filter != (record.subcategory or "").lower():
+                    continue
+            score = exact_hits.get(record_id, 0)
+            form_id = catalog.form_id_of(record_id)
+            if name == normalized_query or \
+                    (form_id is not None and form_id == query_form_id) or \
+                    (form_id is None and catalog.cell_of(record_id).lower() == normalized_query):
+                score += 10
+            elif name.startswith(normalized_query):
+                score += 5
+            scored.append((-score, len(name), name, record_id))
+
+        total = len(scored)
+        scored = heapq.nsmallest(limit, scored) if limit is not None else sorted(scored)
+        return [(record_id, catalog.get(record_id)) for *_, record_id in scored], total
+
+    def __len__(self):
+        return len(self._names)
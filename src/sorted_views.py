@@ -0,0 +1,269 @@
+"""
+Cached, read-only sorted views of the catalog for the dropdown endpoints.
+
+The GUI asks for the same category lists over and over (every time a
+dropdown changes). Instead of re-reading and re-sorting a file per request,
+SortedViews keeps one ordering per (file, sort key) and the {name: value}
+mapping built from it, and hands out the same object on every call. Views
+are dropped when the catalog adds or removes a record from that file and
+rebuilt on next use. The list endpoints use the ID-only form of a view
+({name: form/cell ID}); full item records are fetched one at a time.
+
+Paged lists (Api.list_page) use listing(): the record IDs of one file or of
+every record of a kind, by name, optionally narrowed by a search query. The
+last few listings are kept, so scrolling through one is a slice per page.
+
+Views are FrozenDicts: plain dict subclasses (so pywebview and json still
+serialize them) that refuse modification, since every caller shares them.
+freeze() makes the same kind of read-only copy of nested data (FrozenDict
+and FrozenList); copy.deepcopy of either gives plain, modifiable containers.
+
+    python -m src.sorted_views      # Allocation per request, cached vs re-sorted
+"""
+import argparse
+import copy
+import logging
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+SORT_KEYS = ("name", "value", "weight")
+# Filtered listings kept for paging; each is one tuple of record IDs.
+LISTING_CACHE = 16
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("Cached catalog data is read-only; copy it (dict(view), list(view) or copy.deepcopy) first")
+
+
+class FrozenDict(dict):
+    """A dict that cannot be modified after construction."""
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+
+class FrozenList(list):
+    """A list that cannot be modified after construction."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(value, memo) for value in self]
+
+
+def freeze(value):
+    """A read-only copy of JSON data: dicts and lists (at any depth) become FrozenDict/FrozenList."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(each)) for key, each in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(each) for each in value)
+    return value
+
+
+class SortedViews:
+    """Catalog index holding per-file sorted orderings and views."""
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+        self._orderings: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+        self._views: Dict[Tuple[str, str, bool], FrozenDict] = {}
+        self._all_locations: Optional[FrozenDict] = None
+        self._kind_orderings: Dict[str, Tuple[int, ...]] = {}
+        self._listings: "OrderedDict[Tuple, Tuple[int, ...]]" = OrderedDict()
+
+    def _invalidate(self, record):
+        for key in SORT_KEYS:
+            self._orderings.pop((record.source, key), None)
+            self._views.pop((record.source, key, True), None)
+            self._views.pop((record.source, key, False), None)
+        if record.kind == "location":
+            self._all_locations = None
+        self._kind_orderings.pop(record.kind, None)
+        self._listings.clear()
+
+    # --- Catalog index protocol ---
+
+    def add(self, record_id, record):
+        self._invalidate(record)
+
+    def remove(self, record_id, record):
+        self._invalidate(record)
+
+    # --- Views ---
+
+    def ordering(self, relpath, key="name") -> Tuple[int, ...]:
+        """Record IDs of one file, sorted by name or by a numeric field.
+
+        Records missing the field come last; ties keep name order.
+        """
+        if key not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{key}'")
+        cache_key = (relpath, key)
+        ordering = self._orderings.get(cache_key)
+        if ordering is None:
+            catalog = self._catalog
+            with catalog.lock:
+                record_ids = sorted(catalog.file_record_ids(relpath), key=catalog.name_of)
+                if key != "name":
+                    values = catalog.attributes
+                    def numeric(record_id):
+                        number = values.value(record_id, key)
+                        return (number is None, number or 0)
+                    record_ids.sort(key=numeric)
+                ordering = self._orderings[cache_key] = tuple(record_ids)
+        return ordering
+
+    def view(self, relpath, key="name", details=True) -> FrozenDict:
+        """{name: value} for one catalog file in `key` order.
+
+        Values have the file's shape: the item record dict, or the form/cell
+        ID string; with details=False always the ID. A name listing several
+        records (e.g. a location with several cells) maps to the list.
+        """
+        cache_key = (relpath, key, details)
+        view = self._views.get(cache_key)
+        if view is None:
+            catalog = self._catalog
+            with catalog.lock:
+                entries = {}
+                for record_id in self.ordering(relpath, key):
+                    record = catalog.get(record_id)
+                    value = record.details if details and record.details is not None else record.ref
+                    if record.name not in entries:
+                        entries[record.name] = value
+                    elif isinstance(entries[record.name], list):
+                        entries[record.name].append(value)
+                    else:
+                        entries[record.name] = [entries[record.name], value]
+                view = self._views[cache_key] = FrozenDict(entries)
+        return view
+
+    def kind_ordering(self, kind) -> Tuple[int, ...]:
+        """Record IDs of every record of one kind, sorted by name."""
+        ordering = self._kind_orderings.get(kind)
+        if ordering is None:
+            catalog = self._catalog
+            with catalog.lock:
+                record_ids = [record_id for relpath in catalog.source_paths()
+                              if catalog.source_file(relpath).kind == kind
+                              for record_id in catalog.file_record_ids(relpath)]
+                record_ids.sort(key=lambda record_id: (catalog.name_of(record_id), record_id))
+                ordering = self._kind_orderings[kind] = tuple(record_ids)
+        return ordering
+
+    def listing(self, kind=None, relpath=None, query=None) -> Tuple[int, ...]:
+        """Record IDs for a paged list, by name.
+
+        The list holds one file's records (`relpath`) or every record of
+        `kind`, narrowed to those matching `query` (see SearchIndex.match_ids).
+        """
+        query = " ".join((query or "").lower().split())
+        cache_key = (kind, relpath, query)
+        listing = self._listings.get(cache_key)
+        if listing is not None:
+            self._listings.move_to_end(cache_key)
+            return listing
+        catalog = self._catalog
+        with catalog.lock:
+            base = self.ordering(relpath) if relpath is not None else self.kind_ordering(kind)
+            if not query:
+                listing = base
+            else:
+                matches = catalog.search_index.match_ids(query)
+                if relpath is None and len(matches) * 8 < len(base):
+                    # A narrow query: sorting the matches beats scanning the whole kind
+                    listing = tuple(sorted((record_id for record_id in matches if catalog.kind_of(record_id) == kind),
+                                           key=lambda record_id: (catalog.name_of(record_id), record_id)))
+                else:
+                    listing = tuple(record_id for record_id in base if record_id in matches)
+            self._listings[cache_key] = listing
+            while len(self._listings) > LISTING_CACHE:
+                self._listings.popitem(last=False)
+        return listing
+
+    def all_locations(self) -> FrozenDict:
+        """Every location {name: cell ID(s)} by name; the first file wins on duplicate names."""
+        view = self._all_locations
+        if view is None:
+            catalog = self._catalog
+            with catalog.lock:
+                merged = {}
+                for relpath in sorted(catalog.source_paths()):
+                    source = catalog.source_file(relpath)
+                    if source is None or source.kind != "location":
+                        continue
+                    for name, value in self.view(relpath).items():
+                        merged.setdefault(name, value)
+                view = self._all_locations = FrozenDict(sorted(merged.items()))
+        return view
+
+
+# --- Benchmark ---
+
+def benchmark(catalog, relpaths, requests=200):
+    """Per-request allocation and time: cached view vs re-reading and sorting the file.
+
+    Returns:
+        dict: {"cached": (peak bytes per request, µs per request),
+               "resorted": (peak bytes per request, µs per request)}
+    """
+    from src.data_loader import load_json_data
+
+    def resorted(relpath):
+        data = load_json_data(relpath)
+        return dict(sorted(data.items())) if isinstance(data, dict) else {}
+
+    results = {}
+    for label, func in (("cached", catalog.sorted_views.view), ("resorted", resorted)):
+        for relpath in relpaths:
+            func(relpath)  # Warm up (builds the cached views once)
+        start = time.perf_counter()
+        for _ in range(requests):
+            for relpath in relpaths:
+                func(relpath)
+        elapsed = time.perf_counter() - start
+        peaks = 0
+        tracemalloc.start()
+        for relpath in relpaths:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            result = func(relpath)
+            peaks += tracemalloc.get_traced_memory()[1] - baseline
+            del result
+        tracemalloc.stop()
+        results[label] = (peaks / len(relpaths), elapsed / (requests * len(relpaths)) * 1e6)
+    return results
+
+
+def main(argv=None):
+    from src.catalog import get_catalog
+
+    parser = argparse.ArgumentParser(description="Compare cached sorted views with re-sorting per request.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per file")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)  # The re-sorting path logs every file read
+
+    catalog = get_catalog()
+    relpaths = catalog.source_paths()
+    results = benchmark(catalog, relpaths, args.requests)
+    print(f"{len(relpaths)} catalog files, {args.requests} requests each")
+    for label, (allocated, micros) in results.items():
+        print(f"  {label:<9} {allocated:>10.0f} bytes allocated/request  {micros:>8.1f} µs/request")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""
+Optional SQLite backend for the user stores (favorites, battle presets) and
+command history.
+
+Selected with ES4R_USER_STORE=sqlite (see data_loader.user_store); the JSON
+files stay the default. The database lives in the user data directory (or
+the data directory when there is no overlay) and runs in WAL mode, so the GUI
+and the CLI can read it while the other one writes.
+
+Each user store is a table with the same interface as JournaledStore, plus
+lookups the JSON files cannot do cheaply:
+
+    favorites / presets: name (primary key), position (insertion order), type,
+                         value (the entry as JSON), use_count, last_used,
+                         rank (usage_rank.rank_score of the two)
+    history:             id, command, source, ran_at
+
+name, type, last_used and rank are indexed. SqliteHistory gives the history
+table the log interface command_history.CommandHistory writes through. On
+first open, favorites.json and
+battles.json (with their journals) are copied in once; the files are left
+in place as a backup.
+"""
+import contextlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from src import json_codec
+from src.usage_rank import LAST_USED_FIELD, USE_COUNT_FIELD, rank_score, usage_of
+
+DB_FILENAME = "user_store.sqlite3"
+SCHEMA_VERSION = 2
+MIGRATED_KEY = "migrated_from_json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS {table} (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    type TEXT,
+    value TEXT NOT NULL,
+    use_count INTEGER NOT NULL DEFAULT 0,
+    last_used REAL,
+    rank REAL
+);
+CREATE INDEX IF NOT EXISTS {table}_type ON {table}(type);
+CREATE INDEX IF NOT EXISTS {table}_last_used ON {table}(last_used);
+CREATE INDEX IF NOT EXISTS {table}_position ON {table}(position);
+"""
+# Version 1 databases predate the rank column
+_RANK_INDEX = "CREATE INDEX IF NOT EXISTS {table}_rank ON {table}(rank)"
+_HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    command TEXT NOT NULL,
+    source TEXT,
+    ran_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_ran_at ON history(ran_at);
+CREATE INDEX IF NOT EXISTS history_command ON history(command);
+"""
+
+
+class SqliteTable:
+    """One user store in the database, with the JournaledStore interface.
+
+    Args:
+        key_field: For list-shaped stores (favorites) the field holding each
+                   entry's name; None for {name: value} stores (presets).
+    """
+
+    def __init__(self, db: "SqliteUserStore", table, key_field=None):
+        self._db = db
+        self.table = table
+        self.key_field = key_field
+
+    def _type_of(self, value):
+        return value.get("type") if isinstance(value, dict) else None
+
+    def _decode(self, rows):
+        values = [(name, json_codec.loads(value)) for name, value in rows]
+        if self.key_field is None:
+            return {name: value for name, value in values}
+        return [value for _, value in values]
+
+    # --- Reading ---
+
+    def data(self):
+        """All entries in insertion order, shaped like the JSON file (list or dict)."""
+        return self._decode(self._db.query(f"SELECT name, value FROM {self.table} ORDER BY position"))
+
+    def get(self, key, default=None):
+        rows = self._db.query(f"SELECT value FROM {self.table} WHERE name = ?", (key,))
+        return json_codec.loads(rows[0][0]) if rows else default
+
+    def __contains__(self, key):
+        return bool(self._db.query(f"SELECT 1 FROM {self.table} WHERE name = ?", (key,)))
+
+    def __len__(self):
+        return self._db.query(f"SELECT COUNT(*) FROM {self.table}")[0][0]
+
+    def by_type(self, entry_type):
+        """Entries of one type (e.g. favorites of type "additem"), in insertion order."""
+        return self._decode(self._db.query(
+            f"SELECT name, value FROM {self.table} WHERE type = ? ORDER BY position", (entry_type,)))
+
+    def recently_used(self, limit=10):
+        """Entries by last use, most recent first; never-used entries are left out."""
+        return self._decode(self._db.query(
+            f"SELECT name, value FROM {self.table} WHERE last_used IS NOT NULL "
+            f"ORDER BY last_used DESC LIMIT ?", (limit,)))
+
+    def most_used(self, limit=None) -> List[str]:
+        """Names ranked by usage (see usage_rank), best first; never-used entries are left out."""
+        rows = self._db.query(f"SELECT name FROM {self.table} WHERE rank IS NOT NULL "
+                              f"ORDER BY rank DESC, name LIMIT ?", (-1 if limit is None else limit,))
+        return [name for name, in rows]
+
+    # --- Editing ---
+
+    def _insert(self, conn, key, value, position=None):
+        if position is None:
+            position = conn.execute(f"SELECT COALESCE(MAX(position), 0) + 1 FROM {self.table}").fetchone()[0]
+        # Favorites copied from JSON carry their usage in the entry; it belongs in the columns here
+        use_count, last_used = usage_of(value)
+        if isinstance(value, dict):
+            value = {field: v for field, v in value.items() if field not in (USE_COUNT_FIELD, LAST_USED_FIELD)}
+        conn.execute(f"INSERT INTO {self.table} (name, position, type, value, use_count, last_used, rank) "
+                     f"VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (key, position, self._type_of(value), json_codec.dumps(value),
+                      use_count if isinstance(use_count, int) else 0, last_used, rank_score(use_count, last_used)))
+
+    def add(self, key, value) -> str:
+        """Returns "success", "exists" or "error", like JournaledStore.add."""
+        try:
+            with self._db.transaction() as conn:
+                self._insert(conn, key, value)
+            return "success"
+        except sqlite3.IntegrityError:
+            return "exists"
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.error(f"Could not add '{key}' to {self.table}: {e}")
+            return "error"
+
+    def put(self, key, value) -> bool:
+        try:
+            with self._db.transaction() as conn:
+                updated = conn.execute(f"UPDATE {self.table} SET type = ?, value = ? WHERE name = ?",
+                                       (self._type_of(value), json_codec.dumps(value), key)).rowcount
+                if not updated:
+                    self._insert(conn, key, value)
+            return True
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.error(f"Could not save '{key}' to {self.table}: {e}")
+            return False
+
+    def delete(self, key) -> str:
+        try:
+            with self._db.transaction() as conn:
+                deleted = conn.execute(f"DELETE FROM {self.table} WHERE name = ?", (key,)).rowcount
+            return "success" if deleted else "missing"
+        except sqlite3.Error as e:
+            logging.error(f"Could not delete '{key}' from {self.table}: {e}")
+            return "error"
+
+    def touch(self, key, when=None) -> bool:
+        """Records a use of an entry (use_count, last_used) and re-ranks it."""
+        when = time.time() if when is None else when
+        try:
+            with self._db.transaction() as conn:
+                row = conn.execute(f"SELECT use_count FROM {self.table} WHERE name = ?", (key,)).fetchone()
+                if row is None:
+                    return False
+                conn.execute(f"UPDATE {self.table} SET use_count = ?, last_used = ?, rank = ? WHERE name = ?",
+                             (row[0] + 1, when, rank_score(row[0] + 1, when), key))
+                return True
+        except sqlite3.Error as e:
+            logging.error(f"Could not record use of '{key}' in {self.table}: {e}")
+            return False
+
+    def _entries(self, data) -> Dict:
+        if self.key_field is None:
+            return dict(data) if isinstance(data, dict) else {}
+        return {entry[self.key_field]: entry for entry in data if isinstance(entry, dict) and entry.get(self.key_field)}
+
+    def replace(self, data) -> bool:
+        """Replaces every entry with snapshot-shaped `data`; usage of kept names survives."""
+        expected = dict if self.key_field is None else list
+        if not isinstance(data, expected):
+            logging.error(f"Refusing to replace {self.table} with a {type(data).__name__}.")
+            return False
+        try:
+            with self._db.transaction() as conn:
+                usage = {name: (count, last, rank) for name, count, last, rank in
+                         conn.execute(f"SELECT name, use_count, last_used, rank FROM {self.table}")}
+                conn.execute(f"DELETE FROM {self.table}")
+                for position, (key, value) in enumerate(self._entries(data).items(), 1):
+                    self._insert(conn, key, value, position)
+                    if key in usage:
+                        conn.execute(f"UPDATE {self.table} SET use_count = ?, last_used = ?, rank = ? "
+                                     f"WHERE name = ?", usage[key] + (key,))
+            return True
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.error(f"Could not replace {self.table}: {e}")
+            return False
+
+    def compact(self) -> bool:
+        return True  # Nothing to fold; SQLite checkpoints its WAL itself
+
+    def flush(self) -> bool:
+        return True  # Every edit is committed before it returns
+
+    def reload(self):
+        pass  # Every read goes to the database
+
+
+class SqliteUserStore:
+    """The user database: a favorites table, a presets table and the command history."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._migrated = False
+        # One connection shared by the pywebview call threads, guarded by _lock
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for table in ("favorites", "presets"):
+            self._conn.executescript(_SCHEMA.format(table=table))
+            self._add_rank_column(table)
+        self._conn.executescript(_HISTORY_SCHEMA)
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+        self.favorites = SqliteTable(self, "favorites", key_field="name")
+        self.presets = SqliteTable(self, "presets")
+        self.command_log = SqliteHistory(self)
+
+    def _add_rank_column(self, table):
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if "rank" not in columns:
+            with self.transaction() as conn:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN rank REAL")
+                for name, use_count, last_used in conn.execute(
+                        f"SELECT name, use_count, last_used FROM {table} WHERE last_used IS NOT NULL").fetchall():
+                    conn.execute(f"UPDATE {table} SET rank = ? WHERE name = ?", (rank_score(use_count, last_used), name))
+        self._conn.execute(_RANK_INDEX.format(table=table))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def query(self, sql, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def transaction(self):
+        """Context manager running the block in one write transaction."""
+        return _Transaction(self)
+
+    # --- Migration ---
+
+    @property
+    def migrated(self) -> bool:
+        """True once the JSON stores have been copied in (by this run or an earlier one)."""
+        return self._migrated
+
+    def migrate_from_json(self, sources: Dict[str, Callable]) -> bool:
+        """Copies JSON user stores in once.
+
+        Args:
+            sources: {table name: callable returning the store's current data}.
+
+        Returns:
+            bool: True if this call did the migration.
+        """
+        with self._lock:
+            if self._migrated or self.query("SELECT 1 FROM meta WHERE key = ?", (MIGRATED_KEY,)):
+                self._migrated = True
+                return False
+            counts = {}
+            for table_name, load in sources.items():
+                table = getattr(self, table_name)
+                data = load()
+                if data and not len(table):
+                    if not table.replace(data):
+                        return False
+                    counts[table_name] = len(table)
+            with self.transaction() as conn:
+                conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (MIGRATED_KEY, str(time.time())))
+            self._migrated = True
+            logging.info(f"Migrated user stores into {self.path}: {counts or 'nothing to copy'}")
+            return True
+
+    # --- Command history ---
+
+    def add_history(self, command, source=None, when=None):
+        with self.transaction() as conn:
+            conn.execute("INSERT INTO history (command, source, ran_at) VALUES (?, ?, ?)",
+                         (command, source, time.time() if when is None else when))
+
+    def history(self, limit=50, prefix=None) -> List[str]:
+        """Most recent commands first, optionally only those starting with `prefix`."""
+        if prefix:
+            # Range scan on the command index instead of LIKE (which ignores it for
+            # case-sensitive prefixes)
+            rows = self.query("SELECT command FROM history WHERE command >= ? AND command < ? "
+                              "ORDER BY ran_at DESC, id DESC LIMIT ?", (prefix, prefix + "\U0010ffff", limit))
+        else:
+            rows = self.query("SELECT command FROM history ORDER BY ran_at DESC, id DESC LIMIT ?", (limit,))
+        return [command for command, in rows]
+
+
+class SqliteHistory:
+    """The history table as a command log, with the command_history.HistoryFile interface."""
+
+    def __init__(self, db: SqliteUserStore):
+        self._db = db
+        self._last_id = 0
+
+    def locked(self):
+        """No extra locking: SQLite serializes writers across processes itself."""
+        return contextlib.nullcontext()
+
+    def append(self, command, source, at):
+        try:
+            self._db.add_history(command, source=source, when=at)
+        except sqlite3.Error as e:
+            raise OSError(f"Could not add to {self._db.path} history: {e}") from e
+
+    def read_new(self):
+        """(rows added since the last call as (command, source, at), False)."""
+        try:
+            rows = self._db.query("SELECT id, command, source, ran_at FROM history WHERE id > ? ORDER BY id",
+                                  (self._last_id,))
+        except sqlite3.Error as e:
+            raise OSError(f"Could not read {self._db.path} history: {e}") from e
+        if rows:
+            self._last_id = rows[-1][0]
+        return [(command, source, ran_at) for _, command, source, ran_at in rows], False
+
+    def rewrite(self, entries):
+        """Keeps only the newest len(entries) rows."""
+        try:
+            with self._db.transaction() as conn:
+                conn.execute("DELETE FROM history WHERE id NOT IN "
+                             "(SELECT id FROM history ORDER BY id DESC LIMIT ?)", (len(entries),))
+        except sqlite3.Error as e:
+            raise OSError(f"Could not trim {self._db.path} history: {e}") from e
+
+
+class _Transaction:
+    def __init__(self, db: SqliteUserStore):
+        self._db = db
+
+    def __enter__(self):
+        self._db._lock.acquire()
+        try:
+            self._db._conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._db._lock.release()
+            raise
+        return self._db._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._db._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._db._lock.release()
+        return False
+
+
+_stores: Dict[str, SqliteUserStore] = {}
+
+
+def open_store(path) -> SqliteUserStore:
+    """The shared SqliteUserStore for a database path."""
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = SqliteUserStore(path)
+    return store
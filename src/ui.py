@@ -2,8 +2,10 @@
 
 from . import data_loader
 from . import command_builder
+from .catalog import get_catalog
 import os
 import platform
+import time
 # from inquirerpy import prompt # Remove inquirerpy import
 # from inquirerpy.base.control import Choice # Remove inquirerpy import
 import pick # Add pick import
@@ -25,6 +27,9 @@ def clear_screen():
 class GoBack: pass
 GO_BACK = GoBack()
 
+# Lists longer than this ask for a prefix before opening the picker.
+PREFIX_FILTER_THRESHOLD = 30
+
 def _get_numeric_input(prompt, min_val=None, max_val=None, allow_zero=False):
     """Gets and validates numeric input from the user."""
     while True:
@@ -90,6 +95,24 @@ def _select_from_list(items, prompt_prefix):
     except KeyboardInterrupt:
         return GO_BACK
 
+def _narrow_by_prefix(items, kind):
+    """For long (name, id) lists, asks for a name/ID prefix and keeps only matches.
+       Returns the original list if the user enters nothing or nothing matches.
+    """
+    if len(items) <= PREFIX_FILTER_THRESHOLD:
+        return items
+    prefix = input(f"{len(items)} entries. Type the start of a name or form ID to narrow (Enter for all): ").strip()
+    if not prefix:
+        return items
+    matches = get_catalog().prefix_index.complete(prefix, limit=None, kinds=(kind,))
+    wanted = {(entry.label, entry.value) for entry in matches}
+    narrowed = [item for item in items if (item[0], item[1]) in wanted]
+    if not narrowed:
+        print(f"Nothing starts with '{prefix}', showing all entries.")
+        time.sleep(1)
+        return items
+    return narrowed
+
 def _get_quantity(prompt="Enter the quantity (or 0 to go back): "):
     """Gets a positive quantity from the user, allows 0 for 'Go Back'."""
     value = _get_numeric_input(prompt, min_val=0, allow_zero=True)
@@ -114,7 +137,7 @@ def handle_npc_spawn():
     if not npc_data:
         return None
 
-    npc_list = list(npc_data.items()) # List of (name, id) tuples
+    npc_list = _narrow_by_prefix(list(npc_data.items()), "npc") # List of (name, id) tuples
     selected_npc = _select_from_list(npc_list, "NPC Spawn")
 
     if selected_npc is GO_BACK:
@@ -208,7 +231,7 @@ def handle_battle_stage():
     if not npc_data:
         print("Error: Cannot load npc data for Battle Stage.")
         return None
-    npc_list = list(npc_data.items()) # List of (name, id) tuples
+    npc_list = _narrow_by_prefix(list(npc_data.items()), "npc") # List of (name, id) tuples
 
     while True:
         clear_screen()
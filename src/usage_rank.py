@@ -0,0 +1,87 @@
+"""
+Usage ranking for favorites: most-used first, with recent use counting more.
+
+A favorite's rank blends how often and how recently it was run:
+
+    score = log2(use_count) + last_used / HALF_LIFE
+
+i.e. use_count * 2 ** (last_used / HALF_LIFE) on a log scale. Running a
+favorite twice as often is worth as much as having run it one half-life more
+recently. Ageing every score by the time since its last use would subtract
+the same amount from all of them, so the order never changes while nothing is
+run, and a score only moves when its favorite is.
+
+UsageRanking keeps the scored keys in one sorted list, so recording a use is
+a binary search to drop the old position and one to insert the new one
+(bisect.insort, like the prefix index), and the top k is a slice. Keys that
+were never used are not in the list; callers put them after the ranked ones.
+"""
+import bisect
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds of recency worth as much as doubling the use count.
+HALF_LIFE = 7 * 24 * 3600.0
+# Fields a JSON favorite keeps its usage in.
+USE_COUNT_FIELD = "use_count"
+LAST_USED_FIELD = "last_used"
+
+
+def rank_score(use_count, last_used) -> Optional[float]:
+    """The ranking score for an entry's usage, or None if it was never used."""
+    try:
+        if not use_count or use_count < 1 or last_used is None:
+            return None
+        return math.log2(use_count) + last_used / HALF_LIFE
+    except (TypeError, ValueError):  # Hand-edited favorites.json
+        return None
+
+
+def usage_of(entry) -> Tuple[int, Optional[float]]:
+    """(use_count, last_used) recorded in a favorite entry; (0, None) if none."""
+    if not isinstance(entry, dict):
+        return 0, None
+    return entry.get(USE_COUNT_FIELD) or 0, entry.get(LAST_USED_FIELD)
+
+
+class UsageRanking:
+    """Keys ordered by rank_score, best first, kept sorted as uses come in."""
+
+    def __init__(self):
+        self._order: List[Tuple[float, str]] = []  # (-score, key), ascending = best first
+        self._scores: Dict[str, float] = {}        # key -> -score
+
+    def update(self, key, use_count, last_used):
+        """Re-ranks `key` for its new usage (or drops it if it has none)."""
+        self.remove(key)
+        score = rank_score(use_count, last_used)
+        if score is None:
+            return
+        self._scores[key] = -score
+        bisect.insort(self._order, (-score, key))
+
+    def remove(self, key):
+        negated = self._scores.pop(key, None)
+        if negated is None:
+            return
+        pos = bisect.bisect_left(self._order, (negated, key))
+        del self._order[pos]
+
+    def rebuild(self, usages: Iterable[Tuple[str, int, Optional[float]]]):
+        """Replaces the ranking with (key, use_count, last_used) triples."""
+        self._scores = {}
+        for key, use_count, last_used in usages:
+            score = rank_score(use_count, last_used)
+            if score is not None:
+                self._scores[key] = -score
+        self._order = sorted((negated, key) for key, negated in self._scores.items())
+
+    def top(self, limit=None) -> List[str]:
+        """Ranked keys, best first; only the first `limit` if given."""
+        return [key for _, key in self._order[:limit]]
+
+    def __contains__(self, key):
+        return key in self._scores
+
+    def __len__(self):
+        return len(self._order)
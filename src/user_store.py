@@ -0,0 +1,548 @@
+"""
+Append-only journal for the user stores (favorites, battle presets).
+
+A store is an ordered {key: value} mapping kept in two files:
+
+- the snapshot: the usual favorites.json / battles.json, only rewritten when
+  the journal is compacted (or the whole store is replaced);
+- the journal: one JSON line per edit, {"op": "add"|"update"|"delete",
+  "key": ..., "value": ...}, appended and fsynced next to the snapshot.
+
+An edit costs one appended line instead of a rewrite of the whole file. A
+crash can at worst lose the line being written: a torn last line is skipped
+on replay and cut off before the next append. Replaying is idempotent, so a
+crash between writing a compacted snapshot and removing the journal only
+replays edits the snapshot already has.
+
+Edits are write-behind: they change the in-memory copy and return, and a
+background writer appends them once no edit has come in for FLUSH_DELAY
+seconds (or FLUSH_MAX_DELAY after the first one), so a burst of edits costs
+one write and one fsync. Consecutive edits of the same key are coalesced.
+flush() writes pending edits now; flush_all() runs at interpreter exit.
+A failed write is kept in write_error (and retried) until a flush succeeds;
+while it is set, further edits are refused, so the caller learns that
+earlier "successful" edits have not reached the disk yet.
+
+The GUI and the CLI may run at the same time on the same files. With a lock
+file (see file_lock), every write happens under an advisory cross-process
+lock: the writer first replays whatever the other process appended since
+its last read, then appends its own lines, so neither process cuts off or
+overwrites the other's edits. Readers check the lock file's generation
+counter (and the files' stamps) on each access and refresh only when the
+other process has written, replaying just the new journal lines unless the
+snapshot itself was replaced. If both processes edit the same key before
+seeing each other's line, the later append wins on replay and a warning is
+logged.
+
+Stores keyed by a field (favorites) also record uses: touch() journals the
+entry with its use_count and last_used bumped, and most_used() reads the
+keys off a usage_rank.UsageRanking kept up to date with every edit.
+
+The store does not know where or how the snapshot is stored; data_loader
+passes in callables for that (see data_loader.user_store).
+"""
+import atexit
+import contextlib
+import copy
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src import json_codec
+from src.file_lock import FileLock
+from src.usage_rank import LAST_USED_FIELD, USE_COUNT_FIELD, UsageRanking, usage_of
+
+OP_ADD = "add"
+OP_UPDATE = "update"
+OP_DELETE = "delete"
+JOURNAL_SUFFIX = ".journal"
+# Journal lines after which the journal is folded into the snapshot.
+COMPACT_AFTER = 200
+# Seconds without edits before pending edits are written...
+FLUSH_DELAY = 0.5
+# ...but an edit never waits longer than this.
+FLUSH_MAX_DELAY = 5.0
+
+
+def journal_path_for(snapshot_path) -> str:
+    """favorites.json -> favorites.journal, in the same directory."""
+    return os.path.splitext(snapshot_path)[0] + JOURNAL_SUFFIX
+
+
+def _journal_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class JournaledStore:
+    """Ordered {key: value} store persisted as a snapshot plus an append-only journal.
+
+    Args:
+        journal_path: Journal file; created on the first edit.
+        load_snapshot: Returns the parsed snapshot, or None if missing/unreadable.
+        save_snapshot: Writes snapshot-shaped data atomically; returns bool.
+        stamp: Returns a value that changes whenever the snapshot changes on
+               disk (e.g. its mtime); the store re-reads both files when it,
+               or the journal, changed behind its back.
+        key_field: For list-shaped snapshots (favorites) the field holding
+                   each entry's key; None for {key: value} snapshots (presets).
+        compact_after: Journal lines after which the journal is compacted.
+        flush_delay: Seconds of quiet before pending edits are written; None
+                     writes every edit before returning (write-through).
+        flush_max_delay: Longest time an edit stays pending.
+        lock_path: Lock file shared with other processes using the same
+                   files (see file_lock); None for a single-process store.
+    """
+
+    def __init__(self, journal_path, load_snapshot: Callable, save_snapshot: Callable,
+                 stamp: Callable = lambda: None, key_field=None, compact_after=COMPACT_AFTER,
+                 flush_delay=FLUSH_DELAY, flush_max_delay=FLUSH_MAX_DELAY, lock_path=None):
+        self.journal_path = journal_path
+        self._load_snapshot = load_snapshot
+        self._save_snapshot = save_snapshot
+        self._stamp = stamp
+        self.key_field = key_field
+        self.compact_after = compact_after
+        self.flush_delay = flush_delay
+        self.flush_max_delay = flush_max_delay
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(lock_path) if lock_path else None
+        self._pending: List[Tuple[object, dict, bytes]] = []  # (key, record, encoded line) not yet written
+        self._entries: Optional[Dict] = None
+        self._ranking = UsageRanking()
+        self._invalid = None        # Snapshot of the wrong shape; served as-is, never overwritten
+        self._missing = False       # No snapshot and nothing journaled yet
+        self._journal_lines = 0
+        self._journal_valid = 0     # Bytes of the journal that end in a complete line
+        self._loaded_stamp = None   # (file stamps, generation) the in-memory copy reflects
+        self.write_error: Optional[str] = None  # Why the last flush failed; None once one succeeds
+
+    # --- Loading ---
+
+    def _current_stamp(self):
+        return self._stamp(), _journal_stamp(self.journal_path)
+
+    def _generation(self):
+        return self._file_lock.generation() if self._file_lock is not None else None
+
+    def _entries_from(self, snapshot) -> Dict:
+        self._invalid = None
+        self._missing = snapshot is None
+        if snapshot is None:
+            return {}
+        if self.key_field is None:
+            if isinstance(snapshot, dict):
+                return dict(snapshot)
+        elif isinstance(snapshot, list):
+            entries = {}
+            for entry in snapshot:
+                if isinstance(entry, dict) and entry.get(self.key_field):
+                    entries[entry[self.key_field]] = entry
+                else:
+                    logging.warning(f"Skipping entry without '{self.key_field}' in {self.journal_path} snapshot: {entry}")
+            return entries
+        logging.error(f"Snapshot for {self.journal_path} has the wrong shape; the store is read-only.")
+        self._invalid = snapshot
+        return {}
+
+    def _replay(self, entries, start=0):
+        """Applies the journal from byte `start` on to `entries`.
+
+        Returns:
+            (complete lines read, offset just past the last one, keys they edited)
+        """
+        lines, valid, keys = 0, start, set()
+        try:
+            f = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return lines, valid, keys
+        with f:
+            f.seek(start)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    logging.warning(f"Ignoring torn last line in {self.journal_path}.")
+                    break
+                valid += len(raw)
+                lines += 1
+                try:
+                    record = json_codec.loads(raw)
+                    _apply(entries, record)
+                    keys.add(record["key"])
+                except (ValueError, KeyError, TypeError) as e:
+                    logging.warning(f"Skipping bad line at byte {valid - len(raw)} in {self.journal_path}: {e}")
+        return lines, valid, keys
+
+    def _ensure_loaded(self):
+        generation = self._generation()
+        if self._entries is not None and (self._current_stamp(), generation) == self._loaded_stamp:
+            return
+        if generation is not None and generation % 2:
+            with self._file_lock:  # Another process is mid-change; wait for it to finish
+                self._refresh()
+            return
+        self._refresh()
+        if generation is not None and self._generation() != generation:
+            with self._file_lock:  # Changed while we were reading; read again without racing it
+                self._refresh()
+
+    def _refresh(self):
+        """Brings the in-memory copy up to date with the files (and re-applies pending edits)."""
+        generation = self._generation()
+        stamp = self._current_stamp()
+        snapshot_stamp, journal_stamp = stamp
+        if (self._entries is not None and self._loaded_stamp is not None
+                and snapshot_stamp == self._loaded_stamp[0][0]
+                and journal_stamp is not None and journal_stamp[0] >= self._journal_valid):
+            # Same snapshot, longer journal: only the lines appended since the last read are new
+            entries = self._entries
+            lines = 0
+            if journal_stamp[0] > self._journal_valid:
+                lines, self._journal_valid, keys = self._replay(entries, start=self._journal_valid)
+            if not lines:
+                self._loaded_stamp = (stamp, generation)
+                return
+            self._journal_lines += lines
+            overlap = keys.intersection(key for key, _, _ in self._pending)
+            if overlap:
+                logging.warning(f"Another process also edited {sorted(overlap)} in {self.journal_path}; "
+                                f"this process's edits are newer and will replace them.")
+        else:
+            entries = self._entries_from(self._load_snapshot())
+            self._journal_lines, self._journal_valid, _ = self._replay(entries)
+        for _, record, _ in self._pending:  # Edits not written yet are newer than anything on disk
+            _apply(entries, record)
+        if self._journal_lines or self._pending:
+            self._missing = False
+        self._set_entries(entries)
+        self._loaded_stamp = (stamp, generation)
+
+    @contextlib.contextmanager
+    def _exclusive(self):
+        """Holds the cross-process lock for one change, then records the files as seen.
+
+        The block should start with _refresh() so it works on the latest data.
+        """
+        if self._file_lock is None:
+            yield
+            self._loaded_stamp = (self._current_stamp(), None)
+            return
+        with self._file_lock.writing() as done:
+            yield
+            stamp = self._current_stamp()
+        self._loaded_stamp = (stamp, done[0])
+
+    def _set_entries(self, entries):
+        self._entries = entries
+        if self.key_field is not None:
+            self._ranking.rebuild((key, *usage_of(value)) for key, value in entries.items())
+
+    def reload(self):
+        """Forgets the in-memory copy; the next access re-reads both files."""
+        with self._lock:
+            self._entries = None
+
+    # --- Reading ---
+
+    def data(self):
+        """A copy in the snapshot's shape (a list of entries or a dict).
+
+        None if there is no snapshot and nothing was journaled; a snapshot of
+        the wrong shape is returned unchanged.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if self._invalid is not None:
+                return copy.deepcopy(self._invalid)
+            if self._missing:
+                return None
+            return self._shaped(self._entries)
+
+    def _shaped(self, entries):
+        if self.key_field is None:
+            return copy.deepcopy(entries)
+        return [copy.deepcopy(value) for value in entries.values()]
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._ensure_loaded()
+            value = self._entries.get(key, default)
+            return copy.deepcopy(value)
+
+    def __contains__(self, key):
+        with self._lock:
+            self._ensure_loaded()
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+
+    # --- Editing ---
+
+    def _append(self, data, count):
+        """Appends journal lines; call inside _exclusive() after catching up (fsync is left to _sync_journal)."""
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, "ab") as f:
+            if f.tell() > self._journal_valid:
+                f.truncate(self._journal_valid)  # Cut off a torn line left by a crash
+            f.write(data)
+            f.flush()
+            self._journal_valid = f.tell()
+        self._journal_lines += count
+
+    def _sync_journal(self):
+        """fsyncs the journal; done outside the cross-process lock, as it can take milliseconds."""
+        try:
+            fd = os.open(self.journal_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+        except FileNotFoundError:
+            return  # Already compacted into a snapshot (which was fsynced)
+        try:
+            os.fsync(fd)
+        except OSError as e:
+            logging.warning(f"Could not fsync {self.journal_path}: {e}")
+        finally:
+            os.close(fd)
+
+    def _write(self, op, key, value=None) -> bool:
+        """Applies one edit in memory and queues its journal line; False (and unchanged) on failure."""
+        if self._invalid is not None:
+            logging.error(f"Refusing to edit {self.journal_path}: its snapshot has the wrong shape.")
+            return False
+        if self.write_error is not None and not self.flush():
+            logging.error(f"Refusing to edit {self.journal_path}: earlier edits are still unsaved ({self.write_error}).")
+            return False
+        record = {"op": op, "key": key}
+        if op != OP_DELETE:
+            record["value"] = copy.deepcopy(value)
+        try:
+            line = (json_codec.dumps(record) + "\n").encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logging.error(f"Could not encode edit of '{key}' for {self.journal_path}: {e}")
+            return False
+        _apply(self._entries, record)
+        if self.key_field is not None:
+            self._ranking.update(key, *usage_of(record.get("value")))
+        self._missing = False
+        if self._pending and self._pending[-1][0] == key:
+            self._pending[-1] = (key, record, line)  # Only the last of consecutive edits matters
+        else:
+            self._pending.append((key, record, line))
+        if self.flush_delay is None:
+            if not self.flush():
+                self._pending.clear()
+                self._entries = None  # Re-read from disk, which does not have the edit
+                return False
+        else:
+            _writer.schedule(self)
+        return True
+
+    def flush(self) -> bool:
+        """Writes pending edits to the journal in one append; True if nothing is left pending."""
+        with self._lock:
+            if not self._pending:
+                self.write_error = None
+                return True
+            try:
+                with self._exclusive():
+                    self._refresh()  # Another process may have appended since our last read
+                    self._append(b"".join(line for _, _, line in self._pending), len(self._pending))
+            except OSError as e:
+                logging.error(f"Could not append to {self.journal_path}: {e}")
+                self.write_error = f"Could not save {os.path.basename(self.journal_path)}: {e}"
+                return False
+            self.write_error = None
+            self._pending.clear()
+            _writer.cancel(self)
+            self._sync_journal()
+            if self._journal_lines >= self.compact_after:
+                self.compact()
+            return True
+
+    def add(self, key, value) -> str:
+        """Adds a new entry.
+
+        Returns:
+            str: "success", "exists" if the key is taken, or "error".
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if key in self._entries:
+                return "exists"
+            return "success" if self._write(OP_ADD, key, value) else "error"
+
+    def put(self, key, value) -> bool:
+        """Adds or replaces an entry (an existing entry keeps its position)."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._write(OP_UPDATE if key in self._entries else OP_ADD, key, value)
+
+    def delete(self, key) -> str:
+        """Removes an entry.
+
+        Returns:
+            str: "success", "missing" if there is no such key, or "error".
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if key not in self._entries:
+                return "missing"
+            return "success" if self._write(OP_DELETE, key) else "error"
+
+    def touch(self, key, when=None) -> bool:
+        """Records a use of an entry (use_count, last_used) and re-ranks it.
+
+        Only stores keyed by a field have entries to keep usage in; {key: value}
+        stores (presets) do not track it and return False.
+        """
+        if self.key_field is None:
+            return False
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(key)
+            if not isinstance(entry, dict):
+                return False
+            use_count, _ = usage_of(entry)
+            used = dict(entry)
+            used[USE_COUNT_FIELD] = (use_count if isinstance(use_count, int) else 0) + 1
+            used[LAST_USED_FIELD] = time.time() if when is None else when
+            return self._write(OP_UPDATE, key, used)
+
+    def most_used(self, limit=None) -> List:
+        """Keys ranked by usage (see usage_rank), best first; never-used keys are left out."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._ranking.top(limit)
+
+    # --- Snapshots ---
+
+    def _write_snapshot(self, data) -> bool:
+        """Saves `data` as the snapshot, then drops the journal it replaces."""
+        if not self._save_snapshot(data):
+            return False
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # The journal replays onto the new snapshot without changing it
+            logging.warning(f"Could not remove {self.journal_path} after compaction: {e}")
+            self._entries = None
+            return True
+        self._journal_lines = self._journal_valid = 0
+        return True
+
+    def compact(self) -> bool:
+        """Folds the journal into a fresh snapshot."""
+        with self._lock, self._exclusive():
+            self._refresh()
+            if self._invalid is not None:
+                return False
+            if not self._journal_lines and not self._pending:
+                return True
+            logging.debug(f"Compacting {self._journal_lines} journal lines and {len(self._pending)} "
+                          f"pending edits into {self.journal_path} snapshot.")
+            if not self._write_snapshot(self._shaped(self._entries)):
+                return False
+            self._drop_pending()
+            return True
+
+    def replace(self, data) -> bool:
+        """Replaces the whole store with snapshot-shaped `data` (a full save)."""
+        with self._lock, self._exclusive():
+            if not self._write_snapshot(data):
+                return False
+            self._drop_pending()
+            self._set_entries(self._entries_from(data))
+            return True
+
+    def _drop_pending(self):
+        """Forgets pending edits that a new snapshot already contains (or overrides)."""
+        self._pending.clear()
+        _writer.cancel(self)
+
+
+def _apply(entries, record):
+    op, key = record["op"], record["key"]
+    if op == OP_DELETE:
+        entries.pop(key, None)
+    elif op in (OP_ADD, OP_UPDATE):
+        entries[key] = record["value"]
+    else:
+        raise ValueError(f"unknown op '{op}'")
+
+
+class _WriteBehind:
+    """One daemon thread flushing stores once their edits have settled."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        # store -> (flush deadline from its first pending edit, deadline from its last one)
+        self._due: Dict[JournaledStore, Tuple[float, float]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, store, delay=None):
+        now = time.monotonic()
+        with self._cond:
+            first = self._due[store][0] if store in self._due else now + store.flush_max_delay
+            self._due[store] = (first, now + (store.flush_delay if delay is None else delay))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="UserStoreWriter", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self, store):
+        with self._cond:
+            self._due.pop(store, None)
+
+    def _next_ready(self) -> List[JournaledStore]:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready = [store for store, deadlines in self._due.items() if min(deadlines) <= now]
+                if ready:
+                    for store in ready:
+                        del self._due[store]
+                    return ready
+                timeout = min(min(deadlines) for deadlines in self._due.values()) - now if self._due else None
+                self._cond.wait(timeout)
+
+    def _run(self):
+        while True:
+            for store in self._next_ready():
+                try:
+                    flushed = store.flush()
+                except Exception:
+                    logging.exception(f"Flushing {store.journal_path} failed")
+                    flushed = False
+                if not flushed:
+                    self.schedule(store, delay=store.flush_max_delay)  # Retry, e.g. after a full disk
+
+    def flush_all(self) -> bool:
+        """Flushes every store with pending edits now; True if all succeeded."""
+        with self._cond:
+            stores = list(self._due)
+        return all([store.flush() for store in stores])
+
+
+_writer = _WriteBehind()
+
+
+def flush_all() -> bool:
+    """Writes the pending edits of every store (called at shutdown and from tests)."""
+    return _writer.flush_all()
+
+
+def _flush_at_exit():
+    if not flush_all():
+        logging.error("Some user store edits could not be saved before exiting; they are lost.")
+
+
+atexit.register(_flush_at_exit)
@@ -1,4 +1,5 @@
 import unittest
+import json
 from unittest.mock import patch, MagicMock, ANY, call
 import os
 import sys
@@ -13,6 +14,7 @@ from src import app_logic
 import app
 from src import data_loader # Needed for constants like FAVORITES_FILE
 from src.automator import WindowAutomator # <-- Added this import
+from src.response_cache import ResponseCache
 from app_logic import (
     # ... other functions ...
     add_item_logic,
@@ -170,7 +172,8 @@ class TestAppLogic(unittest.TestCase):
         # Act
         result = app_logic.get_presets_logic("test_type")
         # Assert
-        self.assertEqual(result, {"presets": ["Preset1", "Preset2"]})
+        self.assertEqual(result, {"presets": ["Preset1", "Preset2"],
+                                  "descriptions": {"Preset1": "cmd1", "Preset2": "cmd2"}})
         mock_load.assert_called_once_with("test_types.json")
 
     @patch('src.app_logic.load_json_data')
@@ -180,7 +183,7 @@ class TestAppLogic(unittest.TestCase):
         # Act
         result = app_logic.get_presets_logic("test_type")
         # Assert
-        self.assertEqual(result, {"presets": []})
+        self.assertEqual(result, {"presets": [], "descriptions": {}})
         mock_load.assert_called_once_with("test_types.json")
 
     # Test run_command_sequence_logic
@@ -233,6 +236,20 @@ class TestAppLogic(unittest.TestCase):
         ])
         self.mock_automator.close_console.assert_called_once_with(verbose=False)
 
+    def test_run_command_sequence_logic_reports_progress(self):
+        self.mock_automator.open_console.return_value = True
+        self.mock_automator.execute_command_in_console.side_effect = [True, False]
+        self.mock_automator.close_console.return_value = True
+        progress = MagicMock()
+        job = progress.start_job.return_value
+        result = app_logic.run_command_sequence_logic(["cmd1", "cmd2", "cmd3"], "test_seq", progress=progress)
+        self.assertFalse(result['success'])
+        progress.start_job.assert_called_once_with("test_seq", 3)
+        job.step.assert_has_calls([call(0, "cmd1"), call(1, "cmd2")])
+        self.assertEqual(job.step.call_count, 2)  # Stopped at the failure
+        job.failed.assert_called_once_with(1, "cmd2", ANY)
+        job.finish.assert_called_once_with(False, result['message'])
+
     def test_run_command_sequence_debug_mode(self):
          # Arrange: Automator starts in debug mode
         self.mock_automator.is_in_debug_mode.return_value = True
@@ -280,27 +297,41 @@ class TestAppLogic(unittest.TestCase):
 
     # ... other test methods remain the same, assuming they don't directly rely on game_found ...
 
-    # Example for favorite logic tests (needs mocking load/save)
+    # Favorite logic tests run against a real user store in a temp data dir
+    def _favorites_store(self, favorites):
+        import shutil
+        import tempfile
+        data_dir = tempfile.mkdtemp(prefix='favorites_test_')
+        self.addCleanup(shutil.rmtree, data_dir, True)
+        with open(os.path.join(data_dir, data_loader.FAVORITES_FILE), 'w') as f:
+            json.dump(favorites, f)
+        for name, value in (('DATA_DIR', data_dir), ('USER_DATA_DIR', None)):
+            patcher = patch.object(data_loader, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return data_loader.user_store(data_loader.FAVORITES_FILE)
+
     def test_save_favorite_logic_success(self):
         # Arrange
-        self.mock_load_json.return_value = [] # Start with empty favorites
-        self.mock_save_json.return_value = True
+        store = self._favorites_store([]) # Start with empty favorites
         # Act
         result = app_logic.save_favorite_logic("Fav Name", "cmd", "type")
         # Assert
         self.assertEqual(result['status'], "success")
-        self.mock_load_json.assert_called_once_with(data_loader.FAVORITES_FILE)
-        self.mock_save_json.assert_called_once_with(data_loader.FAVORITES_FILE, [{'name': 'Fav Name', 'command': 'cmd', 'type': 'type'}])
+        self.assertEqual(store.data(), [{'name': 'Fav Name', 'command': 'cmd', 'type': 'type'}])
+        self.assertTrue(store.flush())
+        self.assertTrue(os.path.exists(store.journal_path)) # Appended, not rewritten
+        self.mock_save_json.assert_not_called()
 
     def test_save_favorite_logic_exists(self):
         # Arrange
-        self.mock_load_json.return_value = [{'name': 'Fav Name', 'command': 'old_cmd', 'type': 'old_type'}]
+        store = self._favorites_store([{'name': 'Fav Name', 'command': 'old_cmd', 'type': 'old_type'}])
         # Act
         result = app_logic.save_favorite_logic("Fav Name", "new_cmd", "new_type")
         # Assert
         self.assertEqual(result['status'], "exists")
-        self.mock_load_json.assert_called_once_with(data_loader.FAVORITES_FILE)
-        self.mock_save_json.assert_not_called()
+        self.assertEqual(store.get("Fav Name")['command'], "old_cmd")
+        self.assertFalse(os.path.exists(store.journal_path))
 
     def test_save_favorite_logic_empty_name(self):
         # Act
@@ -309,36 +340,36 @@ class TestAppLogic(unittest.TestCase):
         self.assertEqual(result['status'], "error")
         self.assertIn("cannot be empty", result['message'])
 
-    @patch('src.app_logic.load_json_data')
-    @patch('src.app_logic.save_json_data')
-    def test_save_favorite_logic_save_fails(self, mock_save, mock_load):
+    def test_save_favorite_logic_flush_fails(self):
         # Arrange
-        mock_load.return_value = []
-        mock_save.return_value = False # Simulate save failure
-        
+        store = self._favorites_store([])
         # Act
-        result = app_logic.save_favorite_logic("Fav Name", "cmd", "single")
+        self.mock_automator.hwnd = 12345
+        self.mock_automator.is_in_debug_mode.return_value = False
+        with patch.object(store, '_append', side_effect=OSError("disk full")): # Simulate save failure
+            result = app_logic.save_favorite_logic("Fav Name", "cmd", "single")
+            flushed = store.flush()
+            status = app_logic.check_game_status_logic()
+            next_result = app_logic.save_favorite_logic("Other", "cmd", "single")
         
-        # Assert
-        self.assertEqual(result['status'], "error")
-        self.assertIn("Failed to save", result['message'])
-        mock_load.assert_called_once()
-        mock_save.assert_called_once() # Save was attempted
-
-    @patch('src.app_logic.load_json_data')
-    @patch('src.app_logic.save_json_data')
-    def test_delete_favorite_logic_success(self, mock_save, mock_load):
+        # Assert: the edit is written behind, so its failure is reported by the next calls
+        self.assertEqual(result['status'], "success")
+        self.assertFalse(flushed)
+        self.assertEqual(status['save_errors'], [f"Could not save {os.path.basename(store.journal_path)}: disk full"])
+        self.assertEqual(next_result['status'], "error")
+        self.assertEqual([fav['name'] for fav in store.data()], ["Fav Name"]) # Still pending, retried
+        self.assertTrue(store.flush())
+        self.assertNotIn('save_errors', app_logic.check_game_status_logic())
+        store.reload()
+        self.assertEqual(store.data()[0]['name'], "Fav Name")
+
+    def test_delete_favorite_logic_success(self):
         # Arrange
         fav_to_delete = "Delete Me"
-        initial_favs = [
+        store = self._favorites_store([
             {"name": "Keep Me", "command": "cmd1", "type": "single"},
             {"name": fav_to_delete, "command": "cmd2", "type": "additem"}
-        ]
-        expected_saved_favs = [
-            {"name": "Keep Me", "command": "cmd1", "type": "single"}
-        ]
-        mock_load.return_value = initial_favs
-        mock_save.return_value = True
+        ])
         
         # Act
         result = app_logic.delete_favorite_logic(fav_to_delete)
@@ -346,17 +377,14 @@ class TestAppLogic(unittest.TestCase):
         # Assert
         self.assertTrue(result['success'])
         self.assertIn("deleted successfully", result['message'])
-        mock_load.assert_called_once()
-        mock_save.assert_called_once_with(data_loader.FAVORITES_FILE, expected_saved_favs)
+        store.reload() # Replays the journal from disk
+        self.assertEqual(store.data(), [{"name": "Keep Me", "command": "cmd1", "type": "single"}])
 
-    @patch('src.app_logic.load_json_data')
-    @patch('src.app_logic.save_json_data')
-    def test_delete_favorite_logic_not_found(self, mock_save, mock_load):
+    def test_delete_favorite_logic_not_found(self):
         # Arrange
-        initial_favs = [
+        store = self._favorites_store([
             {"name": "Keep Me", "command": "cmd1", "type": "single"}
-        ]
-        mock_load.return_value = initial_favs
+        ])
         
         # Act
         result = app_logic.delete_favorite_logic("Does Not Exist")
@@ -364,35 +392,87 @@ class TestAppLogic(unittest.TestCase):
         # Assert
         self.assertFalse(result['success'])
         self.assertIn("not found", result['message'])
-        mock_load.assert_called_once()
-        mock_save.assert_not_called()
+        self.assertFalse(os.path.exists(store.journal_path))
         
-    @patch('src.app_logic.load_json_data')
-    @patch('src.app_logic.save_json_data')
-    def test_delete_favorite_logic_save_fails(self, mock_save, mock_load):
+    def test_delete_favorite_logic_flush_fails(self):
         # Arrange
         fav_to_delete = "Delete Me"
-        initial_favs = [{"name": fav_to_delete, "command": "cmd2", "type": "additem"}]
-        mock_load.return_value = initial_favs
-        mock_save.return_value = False # Simulate save failure
+        store = self._favorites_store([{"name": fav_to_delete, "command": "cmd2", "type": "additem"}])
         
         # Act
-        result = app_logic.delete_favorite_logic(fav_to_delete)
+        with patch.object(store, '_append', side_effect=OSError("disk full")): # Simulate save failure
+            result = app_logic.delete_favorite_logic(fav_to_delete)
+            flushed = store.flush()
+            next_result = app_logic.save_favorite_logic(fav_to_delete, "cmd3", "single")
         
-        # Assert
-        self.assertFalse(result['success'])
-        self.assertIn("Failed to save", result['message'])
-        mock_load.assert_called_once()
-        mock_save.assert_called_once() # Save was attempted
+        # Assert: deleted in memory and written once the disk accepts it; meanwhile edits are refused
+        self.assertTrue(result['success'])
+        self.assertFalse(flushed)
+        self.assertIn("disk full", store.write_error)
+        self.assertEqual(next_result['status'], "error")
+        self.assertNotIn(fav_to_delete, store)
+        self.assertTrue(store.flush())
+        store.reload()
+        self.assertNotIn(fav_to_delete, store)
         
+    def test_load_favorites_logic_ranks_by_usage(self):
+        store = self._favorites_store([{"name": name, "command": "tgm", "type": "single"}
+                                       for name in ("Ghost", "Walk", "Gold", "Kitty")])
+        store.touch("Gold", when=100.0)
+        store.touch("Gold", when=200.0)
+        store.touch("Kitty", when=300.0)
+        self.mock_load_json.side_effect = lambda filename: store.data()
+        with patch.object(app_logic, 'QUICK_SLOTS', 1):
+            result = app_logic.load_favorites_logic()
+        self.assertEqual([fav['name'] for fav in result['favorites']], ["Gold", "Kitty", "Ghost", "Walk"])
+        self.assertEqual(result['quick'], ["Gold"])
+
+        with patch('src.app_logic.run_single_command_logic', return_value={"success": True}):
+            app_logic.run_favorite_logic("Walk")  # Just used: 1 use now beats 1 use a while ago
+        self.assertEqual(app_logic.load_favorites_logic()['quick'][:2], ["Walk", "Gold"])
+
+    def test_command_history_logic(self):
+        self._favorites_store([])  # Temp data dir; the history file lives next to favorites.json
+        for command in ["player.placeatme 000479F5 1", "tgm", "tgm", "player.placeatme 00023A74 2"]:
+            app_logic.record_command_logic(command, source="gui")
+        self.assertFalse(app_logic.record_command_logic(None)['recorded'])
+        result = app_logic.get_history_logic(prefix="player.placeatme", limit=1)
+        self.assertEqual(result, {"history": ["player.placeatme 00023A74 2"], "total": 3})
+        self.assertEqual(app_logic.get_history_logic(contains="TGM")['history'], ["tgm"])
+        self.assertTrue(os.path.exists(os.path.join(data_loader.DATA_DIR, data_loader.HISTORY_FILE)))
+
+    @patch('src.app_logic.get_location_tree_logic', return_value={"nodes": [], "path": []})
+    @patch('src.app_logic.get_location_categories_logic', return_value={"categories": {}, "counts": {}})
+    @patch('src.app_logic.load_favorites_logic')
+    @patch('src.app_logic.list_page_logic', return_value={"success": False, "message": "npcs.json unreadable"})
+    @patch('src.app_logic.get_item_categories_logic', return_value={"categories": {}, "counts": {}})
+    @patch('src.app_logic.get_presets_logic', return_value={"presets": ["Arena"], "descriptions": {}})
+    @patch('src.app_logic.check_game_status_logic', return_value={"status": "Game Found"})
+    def test_bootstrap_logic(self, mock_status, mock_presets, mock_types, mock_npcs, mock_favs,
+                             mock_location_categories, mock_tree):
+        mock_favs.side_effect = [{"success": True, "favorites": [{"name": "Kitty"}], "quick": []},
+                                 {"success": True, "favorites": [{"name": "Kitty"}, {"name": "Gold"}], "quick": []}]
+        first = app_logic.bootstrap_logic()
+        self.assertTrue(first['success'])
+        self.assertEqual(set(first['sections']), {"status", "presets", "item_types", "favorites",
+                                                  "location_categories", "location_tree"})
+        self.assertEqual(first['sections']['presets'], {"presets": ["Arena"], "descriptions": {}})
+        self.assertEqual(first['errors'], {"npcs": "npcs.json unreadable"})  # One failure does not sink the rest
+        self.assertEqual(set(first['versions']), set(first['sections']))
+        mock_favs.assert_called_with(annotate=True)
+
+        second = app_logic.bootstrap_logic()
+        for name in ("status", "presets", "item_types", "location_tree"):
+            self.assertEqual(second['versions'][name], first['versions'][name])
+        self.assertNotEqual(second['versions']['favorites'], first['versions']['favorites'])
+
     @patch('src.app_logic.load_favorites_logic')
     @patch('src.app_logic.run_single_command_logic')
     def test_run_favorite_logic_success(self, mock_run_single, mock_load_favs):
         # Arrange
         fav_name = "Run Me"
         fav_cmd = "tgm"
-        favs = [{"name": fav_name, "command": fav_cmd, "type": "single"}]
-        mock_load_favs.return_value = {"success": True, "favorites": favs}
+        store = self._favorites_store([{"name": fav_name, "command": fav_cmd, "type": "single"}])
         mock_run_single.return_value = {"success": True, "message": "Command executed"} # Simulate success
         
         # Act
@@ -401,14 +481,15 @@ class TestAppLogic(unittest.TestCase):
         # Assert
         self.assertTrue(result['success'])
         self.assertIn(f"Ran favorite '{fav_name}'", result['message']) 
-        mock_load_favs.assert_called_once()
+        mock_load_favs.assert_not_called()  # Looked up by name, not by loading the whole list
         mock_run_single.assert_called_once_with(fav_cmd)
+        self.assertEqual(store.most_used(), [fav_name])
 
     @patch('src.app_logic.load_favorites_logic')
     @patch('src.app_logic.run_single_command_logic')
     def test_run_favorite_logic_not_found(self, mock_run_single, mock_load_favs):
         # Arrange
-        mock_load_favs.return_value = {"success": True, "favorites": []} # No favorites
+        self._favorites_store([]) # No favorites
         
         # Act
         result = app_logic.run_favorite_logic("Not Found")
@@ -416,7 +497,7 @@ class TestAppLogic(unittest.TestCase):
         # Assert
         self.assertFalse(result['success'])
         self.assertIn("not found", result['message'])
-        mock_load_favs.assert_called_once()
+        mock_load_favs.assert_not_called()
         mock_run_single.assert_not_called()
         
     @patch('src.app_logic.load_favorites_logic')
@@ -425,8 +506,7 @@ class TestAppLogic(unittest.TestCase):
         # Arrange
         fav_name = "Fail Me"
         fav_cmd = "badcmd"
-        favs = [{"name": fav_name, "command": fav_cmd, "type": "single"}]
-        mock_load_favs.return_value = {"success": True, "favorites": favs}
+        self._favorites_store([{"name": fav_name, "command": fav_cmd, "type": "single"}])
         mock_run_single.return_value = {"success": False, "message": "Execution failed"} # Simulate failure
         
         # Act
@@ -436,9 +516,200 @@ class TestAppLogic(unittest.TestCase):
         self.assertFalse(result['success'])
         self.assertIn(f"Ran favorite '{fav_name}'", result['message']) 
         self.assertIn("Execution failed", result['message']) 
-        mock_load_favs.assert_called_once()
+        mock_load_favs.assert_not_called()
         mock_run_single.assert_called_once_with(fav_cmd)
         
+    # Test search_catalog_logic
+    def test_search_catalog_logic_empty_query(self):
+        self.assertEqual(app_logic.search_catalog_logic("  "), {"results": [], "total": 0})
+
+    @patch('src.app_logic.get_catalog')
+    def test_search_catalog_logic_flattens_records(self, mock_get_catalog):
+        from src.catalog import CatalogRecord
+        record = CatalogRecord("npc", "Cat", "000479F5", "NPCs", None, "npcs.json", None)
+        mock_get_catalog.return_value.search_index.search.return_value = ([(0, record)], 1)
+        result = app_logic.search_catalog_logic("cat", kind="npc")
+        self.assertEqual(result, {"results": [{"name": "Cat", "id": "000479F5", "kind": "npc",
+                                               "category": "NPCs", "subcategory": None}],
+                                  "total": 1})
+        mock_get_catalog.return_value.search_index.search.assert_called_once_with(
+            "cat", kind="npc", category=None, limit=25)
+
+    # Test teleport_to_location_logic cell validation
+    def _catalog_from_test_data(self):
+        import shutil
+        from src.catalog import Catalog
+        from tests.test_catalog import make_test_data_dir
+        data_dir = make_test_data_dir()
+        self.addCleanup(shutil.rmtree, data_dir, True)
+        return Catalog(data_dir).load()
+
+    def test_list_page_logic_pages_filters_and_validates(self):
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()):
+            first = app_logic.list_page_logic("location", offset=0, limit=2)
+            rest = app_logic.list_page_logic("location", offset=2, limit=10)
+            guilds = app_logic.list_page_logic("location", "bravil", source="locations/guilds.json")
+            wrong_file = app_logic.list_page_logic("npc", source="locations/guilds.json")
+            unknown = app_logic.list_page_logic("spell")
+        self.assertEqual((first['total'], len(first['rows']), len(rest['rows'])), (5, 2, 3))
+        names = [row['name'] for row in first['rows'] + rest['rows']]
+        self.assertEqual(names, sorted(names))
+        self.assertEqual([row['id'] for row in guilds['rows']], ["BravilMagesGuild", "BravilMagesGuild2ndFloor"])
+        self.assertTrue(guilds['version'].startswith("c"))
+        self.assertFalse(wrong_file['success'])
+        self.assertFalse(unknown['success'])
+
+    def test_teleport_to_known_cell_sends_command(self):
+        self.mock_automator.execute_command.return_value = True
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()):
+            result = app_logic.teleport_to_location_logic("BravilMagesGuild")
+        self.assertTrue(result['success'])
+        self.mock_automator.execute_command.assert_called_once_with("coc BravilMagesGuild", verbose=False)
+
+    def test_teleport_to_unknown_cell_suggests_instead_of_sending(self):
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()):
+            result = app_logic.teleport_to_location_logic("BravilMageGuild")
+        self.assertFalse(result['success'])
+        self.assertIsNone(result['command'])
+        self.assertEqual(result['suggestions'][0]['id'], "BravilMagesGuild")
+        self.assertIn("Did you mean", result['message'])
+        self.mock_automator.execute_command.assert_not_called()
+
+    def test_teleport_force_skips_validation(self):
+        self.mock_automator.execute_command.return_value = True
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()):
+            result = app_logic.teleport_to_location_logic("SomeModdedCell", force=True)
+        self.assertTrue(result['success'])
+        self.mock_automator.execute_command.assert_called_once_with("coc SomeModdedCell", verbose=False)
+
+    # Test location hierarchy
+    def test_location_tree_and_related_locations(self):
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()):
+            regions = app_logic.get_location_tree_logic()
+            bravil = app_logic.get_location_tree_logic("Bravil")
+            related = app_logic.get_related_locations_logic("BravilMagesGuild2ndFloor")
+            unknown = app_logic.get_location_tree_logic("NoSuchArea")
+        self.assertEqual([node['label'] for node in regions['nodes']], ["Anvil", "Bravil", "Bruma", "Cheydinhal"])
+        self.assertEqual(bravil['nodes'], [{"key": "bravilmagesguild", "label": "Bravil Mages Guild",
+                                            "cell": "BravilMagesGuild", "children": 1}])
+        self.assertEqual([(node['cell'], node['depth']) for node in related['floors']],
+                         [("BravilMagesGuild", 0), ("BravilMagesGuild2ndFloor", 1)])
+        self.assertEqual(related['siblings'], [])
+        self.assertEqual((unknown['nodes'], unknown['path']), (regions['nodes'], []))
+
+    # Test query_items_logic
+    def _attribute_catalog(self):
+        import shutil
+        from src.catalog import Catalog
+        from tests.test_attribute_store import make_attribute_data_dir
+        data_dir = make_attribute_data_dir()
+        self.addCleanup(shutil.rmtree, data_dir, True)
+        return Catalog(data_dir).load()
+
+    def test_query_items_logic_filters_sorts_and_pages(self):
+        with patch('src.app_logic.get_catalog', return_value=self._attribute_catalog()):
+            result = app_logic.query_items_logic(
+                [{"field": "weight", "op": "between", "value": [1, 5]}],
+                sort="value", descending=True, limit=2, offset=0, category="Armor", subcategory="light")
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total'], 3)
+        self.assertEqual([r['name'] for r in result['results']], ["Leather Boots", "Leather Gauntlets"])
+        self.assertEqual(result['results'][0]['attributes'], {"weight": 3, "value": 6, "armor": 1})
+
+    def test_query_items_logic_name_contains(self):
+        with patch('src.app_logic.get_catalog', return_value=self._attribute_catalog()):
+            result = app_logic.query_items_logic([{"field": "name", "op": "contains", "value": "arr"},
+                                                  {"field": "damage", "op": ">", "value": 6}])
+        self.assertEqual([r['name'] for r in result['results']], ["Glass Arrow", "Steel Arrow"])
+
+    def test_query_items_logic_rejects_bad_predicates(self):
+        with patch('src.app_logic.get_catalog', return_value=self._attribute_catalog()):
+            unknown = app_logic.query_items_logic([{"field": "speed", "op": "<", "value": 1}])
+            malformed = app_logic.query_items_logic([{"field": "weight", "op": "between", "value": 3}])
+        self.assertFalse(unknown['success'])
+        self.assertIn("speed", unknown['message'])
+        self.assertFalse(malformed['success'])
+
+    def test_get_items_in_category_logic_serves_cached_view(self):
+        catalog = self._attribute_catalog()
+        relpath = next(p for p in catalog.source_paths() if catalog.source_file(p).kind == "item")
+        with patch('src.app_logic.get_catalog', return_value=catalog):
+            first = app_logic.get_items_in_category_logic(relpath)
+            again = app_logic.get_items_in_category_logic(relpath)
+            by_weight = app_logic.get_items_in_category_logic(relpath, sort="weight")
+            bad = app_logic.get_items_in_category_logic(relpath, sort="colour")
+            details = [app_logic.get_item_details_logic(item_id)['item'] for item_id in by_weight['items'].values()]
+        self.assertIs(first['items'], again['items'])
+        self.assertEqual(list(first['items']), sorted(first['items']))
+        self.assertTrue(all(isinstance(item_id, str) for item_id in first['items'].values()))  # Names and IDs only
+        weights = [item.get('weight', float('inf')) for item in details]
+        self.assertEqual(weights, sorted(weights))
+        self.assertEqual(bad['items'], {})
+        self.mock_load_json.assert_not_called()
+
+    def test_get_item_details_logic(self):
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()):
+            boots = app_logic.get_item_details_logic("1c6d4")
+            npc = app_logic.get_item_details_logic("000479F5")
+            missing = app_logic.get_item_details_logic("not an id")
+        self.assertTrue(boots['success'])
+        self.assertEqual((boots['item']['name'], boots['item']['id']), ("Iron Boots", "0001C6D4"))
+        self.assertFalse(npc['success'])  # Cat is an NPC, not an item
+        self.assertFalse(missing['success'])
+
+    def test_get_items_in_category_versioned_logic(self):
+        catalog = self._attribute_catalog()
+        relpath = next(p for p in catalog.source_paths() if catalog.source_file(p).kind == "item")
+        with patch('src.app_logic.get_catalog', return_value=catalog), \
+             patch('src.app_logic._responses', ResponseCache()):
+            first = app_logic.get_items_in_category_versioned_logic(relpath)
+            known = app_logic.get_items_in_category_versioned_logic(relpath, known_version=first['version'])
+            missing = app_logic.get_items_in_category_versioned_logic("nowhere.json", known_version=None)
+            expected = app_logic.get_items_in_category_logic(relpath)
+        self.assertEqual(json.loads(first['body']), json.loads(json.dumps(expected)))
+        self.assertEqual(known, {"version": first['version'], "not_modified": True})
+        self.assertIsNone(missing['version'])  # Not in the catalog: always sent in full
+
+    # Test describe_command / annotations
+    def test_describe_command_uses_reverse_index(self):
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()):
+            self.assertEqual(app_logic.describe_command("player.placeatme 479f5 2"), "Cat x2")
+            self.assertEqual(app_logic.describe_command("player.additem 0001C6D4 1"), "Iron Boots x1")
+            self.assertEqual(app_logic.describe_command("coc bravilmagesguild"), "Bravil Mages Guild (Guild Halls)")
+            self.assertIsNone(app_logic.describe_command("player.additem 000479F5 1")) # NPC, not an item
+            self.assertIsNone(app_logic.describe_command("tgm"))
+            self.assertEqual(app_logic.describe_commands(["player.placeatme 000055BD 3", "tgm"]), "Bandit x3, tgm")
+
+    @patch('src.app_logic.load_json_data')
+    def test_load_favorites_annotate_does_not_touch_stored_favorites(self, mock_load):
+        stored = [{"name": "Kitty", "command": "player.placeatme 000479F5 1", "type": "npc"}]
+        mock_load.return_value = stored
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()):
+            result = app_logic.load_favorites_logic(annotate=True)
+        self.assertEqual(result['favorites'][0]['description'], "Cat x1")
+        self.assertNotIn('description', stored[0])
+
+    # Test complete_logic
+    def test_complete_logic_completes_command_arguments(self):
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()), \
+             patch('src.app_logic.load_json_data', return_value=[]):
+            result = app_logic.complete_logic("player.additem iron c")
+            self.assertEqual(result['completions'], [{"label": "Iron Cuirass", "value": "0001C6D6",
+                                                      "kind": "item", "command": "player.additem 0001C6D6 1"}])
+            coc = app_logic.complete_logic("coc Cheyd")
+            self.assertEqual([c['command'] for c in coc['completions']], ["coc CheydinhalFightersGuild"])
+
+    def test_complete_logic_includes_favorites(self):
+        favorites = [{"name": "Iron Pile", "command": "player.additem 0001C6D4 50"}]
+        with patch('src.app_logic.get_catalog', return_value=self._catalog_from_test_data()), \
+             patch('src.app_logic.load_json_data', side_effect=lambda f: favorites if f == data_loader.FAVORITES_FILE else {}):
+            result = app_logic.complete_logic("iron")
+        kinds = {c['label']: c['kind'] for c in result['completions']}
+        self.assertEqual(kinds, {"Iron Boots": "item", "Iron Cuirass": "item", "Iron Pile": "favorite"})
+
+    def test_complete_logic_empty_text(self):
+        self.assertEqual(app_logic.complete_logic(" "), {"completions": []})
+
 # You would typically have other test classes for other logic functions here
 # class TestAppLogicOther(...):
 #     ...
@@ -0,0 +1,96 @@
+import unittest
+import os
+import sys
+import shutil
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog
+from tests.test_catalog import make_test_data_dir, write_json, bump_mtime
+
+
+def make_attribute_data_dir():
+    """Test data dir with light/heavy armor and arrows carrying numeric fields."""
+    data_dir = make_test_data_dir()
+    write_json(data_dir, 'item_categories.json', {
+        "Armor": {"Iron (Heavy)": "armor/heavy_iron.json", "Leather (Light)": "armor/light_leather.json"},
+        "Arrows": {"Mundane": "arrows/arrows_mundane.json"},
+    })
+    write_json(data_dir, 'armor/light_leather.json', {
+        "Leather Boots": {"id": "00025056", "weight": 3.0, "value": 6, "armor": 1.0},
+        "Leather Cuirass": {"id": "00025058", "weight": 15.0, "value": 25, "armor": 5.0},
+        "Leather Gauntlets": {"id": "00025059", "weight": 2.0, "value": 4, "armor": 1.0},
+        "Leather Helmet": {"id": "0002505A", "weight": 2.0, "value": None, "armor": 1.5},
+    })
+    write_json(data_dir, 'arrows/arrows_mundane.json', {
+        "Iron Arrow": {"id": "00017829", "weight": 0.1, "value": 1, "damage": 6},
+        "Steel Arrow": {"id": "0001782A", "weight": 0.1, "value": 2, "damage": 7},
+        "Glass Arrow": {"id": "00017830", "weight": 0.1, "value": 12, "damage": 13},
+        "Quest Arrow": {"id": "00017831", "weight": 0.1},
+    })
+    return data_dir
+
+
+class TestAttributeStore(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_attribute_data_dir()
+        self.catalog = Catalog(self.data_dir).load()
+        self.store = self.catalog.attributes
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def names(self, record_ids):
+        return [self.catalog.name_of(int(rid)) for rid in record_ids]
+
+    def test_light_armor_under_weight_sorted_by_value(self):
+        ids, total = self.store.query(category="armor", subcategory="light",
+                                      filters=[("weight", "<", 5)], sort="value")
+        # The helmet has no value, so it sorts last
+        self.assertEqual(self.names(ids), ["Leather Gauntlets", "Leather Boots", "Leather Helmet"])
+        self.assertEqual(total, 3)
+
+    def test_top_arrows_by_damage_with_limit(self):
+        ids, total = self.store.query(category="Arrows", sort="damage", descending=True, limit=2)
+        self.assertEqual(self.names(ids), ["Glass Arrow", "Steel Arrow"])
+        self.assertEqual(total, 4)
+
+    def test_missing_values_never_match_filters(self):
+        ids, _ = self.store.query(filters=[("value", "<", 100)], category="Armor", subcategory="light")
+        self.assertNotIn("Leather Helmet", self.names(ids))
+        ids, _ = self.store.query(filters=[("damage", ">=", 0)])
+        self.assertEqual(sorted(self.names(ids)), ["Glass Arrow", "Iron Arrow", "Steel Arrow"])
+
+    def test_offset_and_value(self):
+        ids, total = self.store.query(kind="item", sort="value", descending=True, offset=1, limit=1)
+        self.assertEqual(self.names(ids), ["Leather Cuirass"])  # After the Iron Cuirass (60)
+        self.assertEqual((total, self.store.value(int(ids[0]), "weight")), (10, 15))
+        self.assertIsNone(self.store.value(int(ids[0]), "damage"))
+
+    def test_name_sort_and_within(self):
+        ids, _ = self.store.query(category="Armor", subcategory="light", sort="name", descending=True, limit=2)
+        self.assertEqual(self.names(ids), ["Leather Helmet", "Leather Gauntlets"])
+        wanted = self.catalog.search_index.match_ids("iron")
+        ids, total = self.store.query(kind="item", within=wanted, sort="name")
+        self.assertEqual((self.names(ids), total), (["Iron Arrow", "Iron Boots", "Iron Cuirass"], 3))
+
+    def test_unknown_field_or_operator(self):
+        with self.assertRaises(ValueError):
+            self.store.query(filters=[("speed", "<", 1)])
+        with self.assertRaises(ValueError):
+            self.store.query(filters=[("weight", "~", 1)])
+
+    def test_refresh_updates_columns(self):
+        write_json(self.data_dir, 'arrows/arrows_mundane.json', {
+            "Iron Arrow": {"id": "00017829", "weight": 0.1, "value": 1, "damage": 6},
+        })
+        bump_mtime(self.data_dir, 'arrows/arrows_mundane.json')
+        self.catalog.refresh()
+        ids, total = self.store.query(category="Arrows", sort="damage")
+        self.assertEqual((self.names(ids), total), (["Iron Arrow"], 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
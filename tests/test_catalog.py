@@ -0,0 +1,189 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog, KIND_ITEM, KIND_NPC, KIND_LOCATION, records_from_data
+
+
+def write_json(data_dir, relpath, data):
+    filepath = os.path.join(data_dir, relpath)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def bump_mtime(data_dir, relpath):
+    """Moves a file's mtime forward so refresh() sees it as changed."""
+    filepath = os.path.join(data_dir, relpath)
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def make_test_data_dir():
+    """Creates a small but complete data directory and returns its path."""
+    data_dir = tempfile.mkdtemp(prefix='catalog_test_')
+    write_json(data_dir, 'item_categories.json', {
+        "Armor": {"Iron (Heavy)": "armor/heavy_iron.json"},
+        "Keys": {"Default": "keys/keys.json"},
+    })
+    write_json(data_dir, 'armor/heavy_iron.json', {
+        "Iron Boots": {"id": "0001C6D4", "weight": 12.0, "value": 15, "armor": 2.0},
+        "Iron Cuirass": {"id": "0001C6D6", "weight": 30.0, "value": 60, "armor": 7.5},
+    })
+    write_json(data_dir, 'keys/keys.json', {
+        "Arch-Mage's Key": {"id": "00028C3A", "weight": 0, "value": 0},
+    })
+    write_json(data_dir, 'npcs.json', {"Cat": "000479F5", "Bandit": "000055BD"})
+    write_json(data_dir, 'location_categories.json', {
+        "Guild Halls": "guilds.json",
+        "Chapels": "chapels.json",
+        "Caves": "caves.json",  # Listed but missing on disk
+    })
+    write_json(data_dir, 'locations/guilds.json', {
+        "Bravil Mages Guild": "BravilMagesGuild",
+        "Bravil Mages Guild 2nd Floor": "BravilMagesGuild2ndFloor",
+        "Cheydinhal Fighters Guild": "CheydinhalFightersGuild",
+    })
+    write_json(data_dir, 'locations/chapels.json', {
+        "Chapel Hall": ["AnvilChapelHall", "BrumaChapelHall"],
+    })
+    return data_dir
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        self.catalog = Catalog(self.data_dir).load()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_records_from_data_handles_value_shapes(self):
+        records = records_from_data({
+            "Plain": "0000000F",
+            "Detailed": {"id": "00000010", "value": 5},
+            "Multi": ["CellA", "CellB"],
+            "Broken": {"value": 1},
+        }, KIND_ITEM, "Misc", None, "misc.json")
+        self.assertEqual([r.ref for r in records], ["0000000F", "00000010", "CellA", "CellB"])
+        self.assertEqual(records[1].details, {"id": "00000010", "value": 5})
+
+    def test_load_collects_every_kind(self):
+        kinds = {record.kind for _, record in self.catalog.items()}
+        self.assertEqual(kinds, {KIND_ITEM, KIND_NPC, KIND_LOCATION})
+        # 2 armor + 1 key + 2 NPCs + 3 guilds + 2 chapel cells
+        self.assertEqual(len(self.catalog), 10)
+
+    def test_refresh_reloads_only_changed_files(self):
+        self.assertEqual(self.catalog.refresh(), [])
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479F5", "Goblin": "00031317"})
+        bump_mtime(self.data_dir, 'npcs.json')
+
+        changed = self.catalog.refresh()
+
+        self.assertEqual(changed, ['npcs.json'])
+        names = {r.name for _, r in self.catalog.items() if r.kind == KIND_NPC}
+        self.assertEqual(names, {"Cat", "Goblin"})
+        results, _ = self.catalog.search_index.search("bandit")
+        self.assertEqual(results, [])
+        results, _ = self.catalog.search_index.search("goblin")
+        self.assertEqual([r.ref for _, r in results], ["00031317"])
+
+    def test_refresh_rebuilds_when_category_index_changes(self):
+        write_json(self.data_dir, 'item_categories.json', {
+            "Armor": {"Iron (Heavy)": "armor/heavy_iron.json"},
+        })
+        bump_mtime(self.data_dir, 'item_categories.json')
+        self.catalog.refresh()
+        self.assertFalse(any(r.category == "Keys" for _, r in self.catalog.items()))
+
+    def test_versions_change_only_with_records(self):
+        npcs, keys, whole = (self.catalog.version('npcs.json'), self.catalog.version('keys/keys.json'),
+                             self.catalog.version())
+        bump_mtime(self.data_dir, 'npcs.json')  # Same content
+        self.catalog.refresh()
+        self.assertEqual(self.catalog.version(), whole)
+
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479F5"})
+        bump_mtime(self.data_dir, 'npcs.json')
+        self.catalog.refresh()
+        self.assertGreater(self.catalog.version('npcs.json'), npcs)
+        self.assertEqual(self.catalog.version('keys/keys.json'), keys)
+        self.assertGreater(self.catalog.version(), whole)
+        self.assertEqual(self.catalog.version('missing.json'), 0)
+
+    def test_form_ids_are_integer_keys(self):
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479f5", "Gold Cat": "F", "Bad": "not-an-id"})
+        bump_mtime(self.data_dir, 'npcs.json')
+        self.catalog.refresh()
+        npcs = {r.name: r for _, r in self.catalog.items() if r.kind == KIND_NPC}
+        self.assertEqual(set(npcs), {"Cat", "Gold Cat"})  # Invalid ID skipped
+        self.assertEqual((npcs["Cat"].form_id, npcs["Cat"].ref), (0x479F5, "000479F5"))
+        self.assertEqual((npcs["Gold Cat"].form_id, npcs["Gold Cat"].ref), (0xF, "0000000F"))
+        self.assertIsNone(self.catalog.ref_index.lookup("BravilMagesGuild").form_id)
+
+    def test_deleted_rows_are_reused(self):
+        rows = len(self.catalog._kinds)
+        for _ in range(3):
+            bump_mtime(self.data_dir, 'npcs.json')
+            self.catalog.refresh()
+        self.assertEqual(len(self.catalog._kinds), rows)
+        self.assertEqual(len(self.catalog), 10)
+
+    def test_refresh_changes_are_record_level(self):
+        cat_id = self.catalog.ref_index.lookup_ids("000479F5")[0]
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479f5", "Goblin": "00031317"})
+        bump_mtime(self.data_dir, 'npcs.json')
+        seen = []
+        self.catalog.add_listener(seen.append)
+
+        changes = self.catalog.refresh_changes()
+
+        self.assertEqual(len(changes), 1)
+        change = changes[0]
+        self.assertEqual((change.source, change.kind, change.records), ('npcs.json', KIND_NPC, 2))
+        self.assertEqual((change.added, change.removed, change.changed), (["Goblin"], ["Bandit"], []))
+        self.assertEqual(self.catalog.ref_index.lookup_ids("000479F5"), [cat_id])  # Untouched record
+        self.assertEqual(seen, [changes])
+
+    def test_refresh_changes_reports_changed_details(self):
+        write_json(self.data_dir, 'keys/keys.json', {
+            "Arch-Mage's Key": {"id": "00028C3A", "weight": 0, "value": 5},
+        })
+        bump_mtime(self.data_dir, 'keys/keys.json')
+        change, = self.catalog.refresh_changes()
+        self.assertEqual(change.changed, ["Arch-Mage's Key"])
+        record = self.catalog.ref_index.lookup("00028C3A")
+        self.assertEqual(self.catalog.attributes.value(self.catalog.ref_index.lookup_ids("00028C3A")[0], "value"), 5)
+        self.assertEqual(record.details["value"], 5)
+        # Touching a file without editing it reports nothing
+        bump_mtime(self.data_dir, 'keys/keys.json')
+        self.assertEqual(self.catalog.refresh_changes(), [])
+
+    def test_user_overlay_is_merged_and_watched(self):
+        overlay_dir = tempfile.mkdtemp(prefix='catalog_overlay_')
+        self.addCleanup(shutil.rmtree, overlay_dir, ignore_errors=True)
+        write_json(overlay_dir, 'item_categories.json', {"Misc": {"Custom": "custom/mine.json"}})
+        write_json(overlay_dir, 'custom/mine.json', {"Lucky Coin": {"id": "0000000F", "value": 1}})
+        write_json(overlay_dir, 'npcs.json', {"Bandit": None})
+        catalog = Catalog(self.data_dir, overlay_dir).load()
+
+        self.assertEqual(catalog.ref_index.lookup("F").name, "Lucky Coin")
+        self.assertIsNone(catalog.ref_index.lookup("000055BD"))  # Removed by the overlay
+        self.assertIsNotNone(catalog.ref_index.lookup("0001C6D4"))  # Bundled categories kept
+
+        write_json(overlay_dir, 'npcs.json', {})
+        bump_mtime(overlay_dir, 'npcs.json')
+        change, = catalog.refresh_changes()
+        self.assertEqual((change.source, change.added), ('npcs.json', ["Bandit"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+import shutil
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import cell_index
+from src.catalog import Catalog
+from src.cell_index import word_starts
+from tests.test_catalog import make_test_data_dir, write_json, bump_mtime
+
+
+class TestCellHierarchy(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        write_json(self.data_dir, 'locations/guilds.json', {
+            "Bravil Mages Guild": "BravilMagesGuild",
+            "Bravil Mages Guild 2nd Floor": "BravilMagesGuild2ndFloor",
+            "Bravil Mages Guild Basement": "BravilMagesGuildBasement",
+            "Bravil Fighters Guild": "BravilFightersGuild",
+            "Cheydinhal Fighters Guild": "CheydinhalFightersGuild",
+            "Arcane University": "ICArcaneUniversity",
+        })
+        self.catalog = Catalog(self.data_dir).load()
+        self.cells = self.catalog.cells
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_word_starts(self):
+        self.assertEqual(word_starts("BravilMagesGuild2ndFloor"), [0, 6, 11, 16, 19])
+        self.assertEqual(word_starts("ICArcaneUniversity"), [0, 2, 8])
+
+    def test_regions_buildings_and_floors(self):
+        self.assertEqual([node.label for node in self.cells.roots()],
+                         ["Anvil", "Bravil", "Bruma", "Cheydinhal", "Imperial City"])
+        self.assertEqual([node.cell for node in self.cells.children_of("region:bravil")],
+                         ["BravilFightersGuild", "BravilMagesGuild"])
+        self.assertEqual([node.cell for node in self.cells.children_of("BravilMagesGuild")],
+                         ["BravilMagesGuild2ndFloor", "BravilMagesGuildBasement"])
+        floor = self.cells.node("bravilmagesguild2ndfloor")
+        self.assertEqual((floor.parent, floor.depth), ("bravilmagesguild", 2))
+        self.assertEqual([node.label for node in self.cells.path_of(floor.cell)],
+                         ["Bravil", "Bravil Mages Guild", "Bravil Mages Guild 2nd Floor"])
+        self.assertEqual(len(self.cells), 8)
+
+    def test_siblings_and_floors_of(self):
+        self.assertEqual([node.cell for node in self.cells.siblings_of("BravilMagesGuildBasement")],
+                         ["BravilMagesGuild2ndFloor"])
+        self.assertEqual([node.cell for node in self.cells.floors_of("BravilMagesGuildBasement")],
+                         ["BravilMagesGuild", "BravilMagesGuild2ndFloor", "BravilMagesGuildBasement"])
+        self.assertEqual(self.cells.floors_of("NoSuchCell"), [])
+        self.assertEqual(self.cells.children_of("NoSuchCell"), ())
+
+    def test_large_regions_are_split_into_districts(self):
+        old_threshold = cell_index.DISTRICT_THRESHOLD
+        cell_index.DISTRICT_THRESHOLD = 2
+        self.addCleanup(setattr, cell_index, "DISTRICT_THRESHOLD", old_threshold)
+        write_json(self.data_dir, 'locations/chapels.json', {
+            "Temple of the One": "ICTempleDistrictTempleOfTheOne",
+            "Hall of Records": "ICTempleDistrictHallOfRecords",
+        })
+        bump_mtime(self.data_dir, 'locations/chapels.json')
+        self.catalog.refresh()
+
+        children = self.cells.children_of("region:ic")
+        self.assertEqual([(node.label, node.cell) for node in children],
+                         [("Arcane University", "ICArcaneUniversity"), ("Temple District", None)])
+        self.assertEqual(len(self.cells.children_of(children[1].key)), 2)
+
+    def test_rebuilds_after_location_changes(self):
+        self.assertIsNone(self.cells.node("BravilMagesGuild3rdFloor"))
+        write_json(self.data_dir, 'locations/chapels.json', {"Third Floor": "BravilMagesGuild3rdFloor"})
+        bump_mtime(self.data_dir, 'locations/chapels.json')
+        self.catalog.refresh()
+
+        self.assertEqual(self.cells.node("BravilMagesGuild3rdFloor").parent, "bravilmagesguild")
+        self.assertIsNone(self.cells.node("AnvilChapelHall"))
+        self.assertNotIn("Anvil", [node.label for node in self.cells.roots()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,7 +10,10 @@ from command_builder import (
     build_simple_command,
     build_placeatme_command,
     build_additem_command,
-    build_teleport_command
+    build_teleport_command,
+    format_form_id,
+    parse_command,
+    parse_form_id
 )
 
 class TestCommandBuilder(unittest.TestCase):
@@ -30,7 +33,9 @@ class TestCommandBuilder(unittest.TestCase):
         self.assertIsNone(build_placeatme_command("12345", 0))
         self.assertIsNone(build_placeatme_command("12345", -1))
         self.assertIsNone(build_placeatme_command("12345", None))
-        self.assertIsNone(build_placeatme_command(12345, 1))
+        # Integer form IDs are formatted as 8 hex digits
+        self.assertEqual(build_placeatme_command(0x479F5, 2), "player.placeatme 000479F5 2")
+        self.assertIsNone(build_placeatme_command(0x100000000, 1))
 
     def test_build_additem_command(self):
         self.assertEqual(build_additem_command("0800BA54", 1), "player.additem 0800BA54 1")
@@ -40,7 +45,8 @@ class TestCommandBuilder(unittest.TestCase):
         self.assertIsNone(build_additem_command("54321", 0))
         self.assertIsNone(build_additem_command("54321", -5))
         self.assertIsNone(build_additem_command("54321", None))
-        self.assertIsNone(build_additem_command(54321, 1))
+        self.assertEqual(build_additem_command(0xF, 100), "player.additem 0000000F 100")
+        self.assertIsNone(build_additem_command(-1, 1))
 
     def test_build_teleport_command(self):
         """Tests the Center on Cell (coc) command builder."""
@@ -51,5 +57,27 @@ class TestCommandBuilder(unittest.TestCase):
         # Assuming the builder doesn't modify the ID itself, just prepends 'coc '
         self.assertEqual(build_teleport_command("Location With Spaces"), 'coc Location With Spaces')
 
+    def test_parse_and_format_form_id(self):
+        """Tests that every spelling of a form ID maps to one integer key."""
+        for spelling in ("0000000F", "f", "0xF", " 0000000f ", 15):
+            self.assertEqual(parse_form_id(spelling), 15)
+        self.assertEqual(parse_form_id("000243cd"), parse_form_id("000243CD"))
+        self.assertIsNone(parse_form_id("BravilMagesGuild"))
+        self.assertIsNone(parse_form_id("123456789"))
+        self.assertIsNone(parse_form_id(None))
+        self.assertEqual(format_form_id(0x1C6CE), "0001C6CE")
+
+    def test_parse_command(self):
+        """Tests splitting built commands back into verb, ref and quantity."""
+        self.assertEqual(parse_command("player.placeatme 000479F5 2"),
+                         {"verb": "player.placeatme", "ref": "000479F5", "quantity": 2})
+        self.assertEqual(parse_command("Player.AddItem F"),
+                         {"verb": "player.additem", "ref": "F", "quantity": 1})
+        self.assertEqual(parse_command("coc ICMarketDistrict"),
+                         {"verb": "coc", "ref": "ICMarketDistrict", "quantity": None})
+        self.assertIsNone(parse_command("tgm"))
+        self.assertIsNone(parse_command("player.additem F lots"))
+        self.assertIsNone(parse_command(None))
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
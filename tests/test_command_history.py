@@ -0,0 +1,79 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.command_history import CommandHistory, HistoryFile
+
+
+class TestCommandHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='history_test_')
+        self.path = os.path.join(self.data_dir, 'history.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def _history(self, capacity=100):
+        return CommandHistory(HistoryFile(self.path), capacity=capacity)
+
+    def _lines(self):
+        with open(self.path) as f:
+            return f.read().splitlines()
+
+    def test_consecutive_repeats_are_recorded_once(self):
+        history = self._history()
+        for command in ["tgm", "tgm", " tgm ", "coc Bravil", "tgm", ""]:
+            history.add(command, source="cli")
+        self.assertEqual(len(history), 3)
+        self.assertEqual(len(self._lines()), 3)  # Appended, one line per recorded command
+        self.assertEqual(history.search(), ["tgm", "coc Bravil"])  # Distinct, most recent first
+
+    def test_prefix_and_substring_lookups(self):
+        history = self._history()
+        for command in ["player.placeatme 000479F5 1", "player.additem f 100", "coc Bravil",
+                        "player.placeatme 00023A74 2", "player.additem 0001C6D4 1"]:
+            history.add(command)
+        self.assertEqual(history.last("player.placeatme"), "player.placeatme 00023A74 2")
+        self.assertEqual(history.last("PLAYER.ADD"), "player.additem 0001C6D4 1")
+        self.assertIsNone(history.last("tcl"))
+        self.assertEqual(history.search(contains="79f5"), ["player.placeatme 000479F5 1"])
+        self.assertEqual(history.search(contains=" 1"), ["player.additem 0001C6D4 1", "player.additem f 100",
+                                                         "player.placeatme 000479F5 1"])
+        self.assertEqual(history.search(prefix="player.", contains="additem", limit=1), ["player.additem 0001C6D4 1"])
+
+    def test_ring_forgets_the_oldest_commands(self):
+        history = self._history(capacity=3)
+        for command in ["coc A", "coc B", "coc A", "coc C", "coc D"]:
+            history.add(command)
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.search(prefix="coc"), ["coc D", "coc C", "coc A"])  # "coc B" fell off
+        self.assertEqual(history.search(contains="c b"), [])
+
+    def test_shared_between_processes_and_sessions(self):
+        gui, cli = self._history(), self._history()
+        gui.add("tgm", source="gui")
+        cli.add("tcl", source="cli")
+        self.assertEqual(gui.search(), ["tcl", "tgm"])
+        with open(self.path, 'ab') as f:
+            f.write(b'{"command": "half a li')  # Another process mid-append
+        self.assertEqual(self._history().search(), ["tcl", "tgm"])
+
+    def test_log_is_trimmed_once_it_doubles(self):
+        history = self._history(capacity=3)
+        for i in range(6):
+            history.add(f"cmd {i}")
+        self.assertEqual(len(self._lines()), 6)
+        history.add("cmd 6")  # Seventh line: rewritten with the newest three
+        self.assertEqual(len(self._lines()), 3)
+        self.assertEqual(self._history(capacity=3).search(), ["cmd 6", "cmd 5", "cmd 4"])
+        self.assertEqual(history.search(), ["cmd 6", "cmd 5", "cmd 4"])
+
+
+if __name__ == '__main__':
+    unittest.main()
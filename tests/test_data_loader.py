@@ -1,3 +1,4 @@
+import copy
 import unittest
 import os
 import json
@@ -437,6 +438,80 @@ class TestJsonUtilities(unittest.TestCase):
         pass 
 
     # ... other tests from the original TestDataLoader ...
-        
+
+
+class TestUserOverlay(unittest.TestCase):
+    """Bundled data with a writable user overlay layered on top."""
+
+    def setUp(self):
+        import tempfile
+        self.bundled_dir = tempfile.mkdtemp(prefix='bundled_')
+        self.user_dir = os.path.join(tempfile.mkdtemp(prefix='user_'), 'ES4RCompanion')
+        self.saved = (src_data_loader.DATA_DIR, src_data_loader.USER_DATA_DIR)
+        src_data_loader.DATA_DIR = self.bundled_dir
+        src_data_loader.USER_DATA_DIR = self.user_dir
+        with open(os.path.join(self.bundled_dir, 'battles.json'), 'w') as f:
+            json.dump({"Bundled": ["cmd a"], "Other": ["cmd b"]}, f)
+
+    def tearDown(self):
+        src_data_loader.DATA_DIR, src_data_loader.USER_DATA_DIR = self.saved
+        src_data_loader._merged_cache.clear()
+        shutil.rmtree(self.bundled_dir, ignore_errors=True)
+        shutil.rmtree(os.path.dirname(self.user_dir), ignore_errors=True)
+
+    def test_merge_overlay(self):
+        merged = src_data_loader.merge_overlay(
+            {"Armor": {"Iron": "a.json", "Steel": "b.json"}, "Keys": {"Default": "k.json"}, "List": [1]},
+            {"Armor": {"Custom": "c.json"}, "Keys": None, "List": [2]})
+        self.assertEqual(merged, {"Armor": {"Iron": "a.json", "Steel": "b.json", "Custom": "c.json"},
+                                  "List": [2]})
+
+    def test_saves_go_to_the_overlay(self):
+        presets = src_data_loader.load_json_data('battles.json')
+        presets["Mine"] = ["cmd c"]
+        del presets["Other"]
+        self.assertTrue(src_data_loader.save_json_data('battles.json', presets))
+
+        with open(os.path.join(self.bundled_dir, 'battles.json')) as f:
+            self.assertEqual(set(json.load(f)), {"Bundled", "Other"})  # Bundled file untouched
+        with open(os.path.join(self.user_dir, 'battles.json')) as f:
+            self.assertIsNone(json.load(f)["Other"])  # Deletion kept as a null
+        self.assertEqual(src_data_loader.load_json_data('battles.json'),
+                         {"Bundled": ["cmd a"], "Mine": ["cmd c"]})
+
+    def test_merged_view_is_cached_until_the_overlay_changes(self):
+        src_data_loader.save_json_data('battles.json', {"Bundled": ["cmd a"], "Other": ["cmd b"], "X": []})
+        first = src_data_loader.load_json_data('battles.json')
+        first["Mutated"] = []  # Callers get a copy
+        with patch('src.data_loader._read_json_file') as mock_read:
+            self.assertNotIn("Mutated", src_data_loader.load_json_data('battles.json'))
+            mock_read.assert_not_called()
+        user_path = os.path.join(self.user_dir, 'battles.json')
+        with open(user_path, 'w') as f:
+            json.dump({"Y": []}, f)
+        stat = os.stat(user_path)
+        os.utime(user_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(set(src_data_loader.load_json_data('battles.json')), {"Bundled", "Other", "Y"})
+
+    def test_overlaid_files_are_shared_read_only(self):
+        with open(os.path.join(self.bundled_dir, 'npcs.json'), 'w') as f:
+            json.dump({"Cat": "000479F5", "Guards": ["0001", "0002"]}, f)
+        os.makedirs(self.user_dir, exist_ok=True)
+        with open(os.path.join(self.user_dir, 'npcs.json'), 'w') as f:
+            json.dump({"Bandit": "000055BD"}, f)
+
+        first = src_data_loader.load_json_data('npcs.json')
+        self.assertIs(src_data_loader.load_json_data('npcs.json'), first)  # No copy per read
+        self.assertEqual(first, {"Cat": "000479F5", "Guards": ["0001", "0002"], "Bandit": "000055BD"})
+        with self.assertRaises(TypeError):
+            first["Mutated"] = "x"
+        with self.assertRaises(TypeError):
+            first["Guards"].append("0003")
+        copied = copy.deepcopy(first)  # What a caller that changes the data works on
+        copied["Guards"].append("0003")
+        self.assertEqual(type(copied), dict)
+        self.assertEqual(first["Guards"], ["0001", "0002"])
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
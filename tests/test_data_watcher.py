@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+import shutil
+import threading
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog
+from src.data_watcher import DataWatcher
+from tests.test_catalog import make_test_data_dir, write_json, bump_mtime
+
+
+class TestDataWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        self.catalog = Catalog(self.data_dir).load()
+        self.received = []
+        self.changed = threading.Event()
+
+        def listener(changes):
+            self.received.extend(changes)
+            self.changed.set()
+        self.catalog.add_listener(listener)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_check_applies_changes_when_polling(self):
+        watcher = DataWatcher(self.catalog, use_inotify=False)
+        self.assertEqual(watcher.check(), [])
+        write_json(self.data_dir, 'locations/guilds.json', {"Bravil Mages Guild": "BravilMagesGuild"})
+        bump_mtime(self.data_dir, 'locations/guilds.json')
+
+        changes = watcher.check()
+
+        self.assertEqual([c.source for c in changes], ['locations/guilds.json'])
+        self.assertEqual(sorted(changes[0].removed),
+                         ["Bravil Mages Guild 2nd Floor", "Cheydinhal Fighters Guild"])
+        self.assertIsNone(self.catalog.ref_index.lookup("CheydinhalFightersGuild"))
+        self.assertEqual(watcher.mode, "polling")
+
+    def test_background_thread_picks_up_edits(self):
+        watcher = DataWatcher(self.catalog, interval=0.05).start()
+        try:
+            write_json(self.data_dir, 'keys/keys.json', {
+                "Arch-Mage's Key": {"id": "00028C3A"},
+                "Skeleton Key": {"id": "0000000B"},
+            })
+            bump_mtime(self.data_dir, 'keys/keys.json')
+            self.assertTrue(self.changed.wait(5), f"no change seen ({watcher.mode})")
+        finally:
+            watcher.stop()
+        self.assertEqual(self.received[0].added, ["Skeleton Key"])
+        self.assertEqual(self.catalog.ref_index.lookup("B").name, "Skeleton Key")
+
+    def test_category_index_change_reports_rebuild(self):
+        write_json(self.data_dir, 'item_categories.json', {"Keys": {"Default": "keys/keys.json"}})
+        bump_mtime(self.data_dir, 'item_categories.json')
+        changes = DataWatcher(self.catalog, use_inotify=False).check()
+        self.assertTrue(changes[0].rebuilt)
+        self.assertEqual(self.received, changes)
+
+
+if __name__ == '__main__':
+    unittest.main()
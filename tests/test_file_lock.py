@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.file_lock import FileLock, lock_path_for
+
+
+class TestFileLock(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='file_lock_test_')
+        self.path = lock_path_for(os.path.join(self.data_dir, 'favorites.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_generation_is_odd_only_while_writing(self):
+        lock, other = FileLock(self.path), FileLock(self.path)
+        self.assertEqual(self.path, os.path.join(self.data_dir, 'favorites.lock'))
+        self.assertEqual(other.generation(), 0)
+        with lock.writing() as done:
+            self.assertEqual(other.generation() % 2, 1)
+            with lock.writing():  # Re-entrant
+                pass
+        self.assertEqual(other.generation(), done[0])
+        self.assertEqual(done[0] % 2, 0)
+        self.assertGreater(done[0], 0)
+
+    def test_writer_that_died_mid_change_is_recovered(self):
+        with open(self.path, 'wb') as f:
+            f.write((3).to_bytes(8, 'little'))  # Counter left odd
+        lock = FileLock(self.path)
+        with lock.writing() as done:
+            pass
+        self.assertEqual(done[0], 4)
+
+    def test_second_holder_waits_for_release(self):
+        lock, other = FileLock(self.path), FileLock(self.path)  # Separate descriptors, as in two processes
+        acquired = threading.Event()
+
+        def take_other():
+            with other:
+                acquired.set()
+
+        with lock:
+            thread = threading.Thread(target=take_other)
+            thread.start()
+            self.assertFalse(acquired.wait(0.1))
+        self.assertTrue(acquired.wait(5))
+        thread.join(5)
+        lock.close()
+        other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog
+from src.fuzzy_index import bounded_levenshtein, compact
+from tests.test_catalog import make_test_data_dir
+
+
+class TestFuzzyHelpers(unittest.TestCase):
+
+    def test_compact(self):
+        self.assertEqual(compact("Cheydinhal Fighter's Guild"), "cheydinhalfightersguild")
+        self.assertEqual(compact("CheydinhalFightersGuild"), "cheydinhalfightersguild")
+
+    def test_bounded_levenshtein(self):
+        self.assertEqual(bounded_levenshtein("leyawiin", "leyawin", 2), 1)
+        self.assertEqual(bounded_levenshtein("kitten", "sitting", 3), 3)
+        self.assertIsNone(bounded_levenshtein("kitten", "sitting", 2))
+        self.assertIsNone(bounded_levenshtein("a", "abcdef", 2))
+
+
+class TestFuzzyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        self.catalog = Catalog(self.data_dir).load()
+        self.index = self.catalog.fuzzy_index
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def refs(self, matches):
+        return [self.catalog.get(record_id).ref for _, record_id in matches]
+
+    def test_misspelled_cell_id(self):
+        matches = self.index.match("ChedinhalFightersGild", kind="location")
+        self.assertEqual(self.refs(matches), ["CheydinhalFightersGuild"])
+        self.assertEqual(matches[0][0], 2)
+
+    def test_misspelled_name_word(self):
+        matches = self.index.match("Cheydinal", kind="location")
+        self.assertEqual(self.refs(matches), ["CheydinhalFightersGuild"])
+
+    def test_punctuation_is_ignored(self):
+        matches = self.index.match("arch mages key")
+        self.assertEqual(matches[0][0], 0)
+        self.assertEqual(self.refs(matches), ["00028C3A"])
+
+    def test_distance_is_bounded(self):
+        self.assertEqual(self.index.match("Zzzzzzzz"), [])
+        self.assertEqual(self.index.match("BravilMagesGuild2ndFlor", max_distance=0), [])
+
+    def test_exact(self):
+        record_ids = self.index.exact("bravilmagesguild", kind="location")
+        self.assertEqual([self.catalog.get(rid).ref for rid in record_ids], ["BravilMagesGuild"])
+
+    def test_match_is_fast_enough_per_keystroke(self):
+        start = time.perf_counter()
+        for _ in range(50):
+            self.index.match("BravilMageGuild2ndFlor")
+        self.assertLess((time.perf_counter() - start) / 50, 0.005)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+from unittest.mock import patch
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog, KIND_LOCATION, KIND_NPC
+from src.importer import import_rows, iter_rows, format_summary, normalize_ref
+from tests.test_catalog import make_test_data_dir, write_json
+
+
+def write_text(data_dir, relpath, text):
+    filepath = os.path.join(data_dir, relpath)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return filepath
+
+
+def read_json(data_dir, relpath):
+    with open(os.path.join(data_dir, relpath), encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestImporter(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        self.catalog = Catalog(self.data_dir).load()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_normalize_ref(self):
+        self.assertEqual(normalize_ref(" 0x1c6d4 ", "item"), "0001C6D4")
+        self.assertEqual(normalize_ref("[000479f5]", KIND_NPC), "000479F5")
+        self.assertIsNone(normalize_ref("n/a", "item"))
+        self.assertEqual(normalize_ref(" AnvilChapelHall ", KIND_LOCATION), "AnvilChapelHall")
+
+    def test_csv_import_merges_and_dedupes(self):
+        source = write_text(self.data_dir, 'dump.csv',
+                            "Name,Form ID,Weight,Value\n"
+                            "Iron Boots,0001C6D4,12,15\n"        # Unchanged
+                            "Iron Cuirass,1c6d6,30,65\n"         # Value changed
+                            "Iron Gauntlets,0001C6D8,2,7\n"      # New
+                            "Iron Gauntlets,1C6D8,2,7\n"         # Duplicate row
+                            "Arch-Mage's Key,00028C3A,0,0\n"     # Belongs to keys/keys.json
+                            "Broken,,1,1\n")
+
+        summary = import_rows(iter_rows(source), 'armor/heavy_iron.json', data_dir=self.data_dir,
+                              catalog=self.catalog)
+
+        self.assertEqual((summary.rows, summary.added, summary.updated, summary.unchanged),
+                         (6, ["Iron Gauntlets"], ["Iron Cuirass"], 1))
+        self.assertEqual((summary.duplicate_rows, len(summary.conflicts), summary.invalid), (1, 1, 1))
+        data = read_json(self.data_dir, 'armor/heavy_iron.json')
+        self.assertEqual(data["Iron Gauntlets"], {"id": "0001C6D8", "weight": 2, "value": 7})
+        self.assertEqual(data["Iron Cuirass"]["value"], 65)
+        self.assertEqual(data["Iron Cuirass"]["armor"], 7.5)  # Fields not in the dump are kept
+        self.assertIn("+ Iron Gauntlets", format_summary(summary))
+
+    def test_html_table_import_keeps_plain_id_files(self):
+        source = write_text(self.data_dir, 'npcs.html',
+                            "<html><body><table><tr><td>unrelated</td></tr></table>"
+                            "<table class='wikitable'><tr><th>Name</th><th>Base ID</th></tr>"
+                            "<tr><td><a href='/Goblin'>Goblin</a></td><td>00031317</td></tr>"
+                            "<tr><td>Cat</td><td>000479F5</td></tr></table></body></html>")
+
+        summary = import_rows(iter_rows(source), 'npcs.json', KIND_NPC, self.data_dir, self.catalog)
+
+        self.assertEqual((summary.added, summary.unchanged), (["Goblin"], 1))
+        self.assertEqual(read_json(self.data_dir, 'npcs.json')["Goblin"], "00031317")
+
+    def test_jsonl_dry_run_writes_nothing(self):
+        source = write_text(self.data_dir, 'cells.jsonl',
+                            '{"name": "Chorrol Chapel Hall", "cell id": "ChorrolChapelHall"}\n\nnot json\n')
+        before = read_json(self.data_dir, 'locations/chapels.json')
+        summary = import_rows(iter_rows(source), 'locations/chapels.json', KIND_LOCATION,
+                              self.data_dir, self.catalog, dry_run=True)
+        self.assertEqual(summary.added, ["Chorrol Chapel Hall"])
+        self.assertFalse(summary.written)
+        self.assertEqual(read_json(self.data_dir, 'locations/chapels.json'), before)
+
+    def test_list_valued_entries_match_each_cell(self):
+        # locations/chapels.json maps "Chapel Hall" to two cells
+        source = write_text(self.data_dir, 'chapels.csv',
+                            "Name,Cell ID\n"
+                            "Chapel Hall,LeyawiinChapelHall\n"        # Name taken by the list
+                            "Chapel Hall,AnvilChapelHall\n"           # Already listed
+                            "Bruma Chapel Hall,BrumaChapelHall\n")    # Renamed out of the list
+
+        summary = import_rows(iter_rows(source), 'locations/chapels.json', KIND_LOCATION,
+                              self.data_dir, self.catalog)
+
+        self.assertEqual((summary.added, summary.updated, summary.unchanged),
+                         ([], ["Bruma Chapel Hall"], 1))
+        self.assertEqual(summary.conflicts,
+                         ["Chapel Hall (LeyawiinChapelHall; name already used by AnvilChapelHall, BrumaChapelHall)"])
+        self.assertEqual(read_json(self.data_dir, 'locations/chapels.json'),
+                         {"Chapel Hall": "AnvilChapelHall", "Bruma Chapel Hall": "BrumaChapelHall"})
+
+    def test_rename_onto_used_name_is_a_conflict(self):
+        source = write_text(self.data_dir, 'npcs.csv', "Name,Form ID\nBandit,000479F5\n")  # Cat's ID
+
+        summary = import_rows(iter_rows(source), 'npcs.json', KIND_NPC, self.data_dir, self.catalog)
+
+        self.assertEqual((summary.updated, summary.conflicts),
+                         ([], ["Bandit (000479F5; name already used by 000055BD)"]))
+        self.assertEqual(read_json(self.data_dir, 'npcs.json'), {"Cat": "000479F5", "Bandit": "000055BD"})
+
+    def test_moving_cells_out_of_lists(self):
+        write_json(self.data_dir, 'locations/chapels.json', {
+            "Chapel Hall": ["AnvilChapelHall", "BrumaChapelHall"],
+            "Crypt": ["AnvilCrypt"],
+            "Bruma Hall": "BrumaHall",
+        })
+        catalog = Catalog(self.data_dir).load()
+        source = write_text(self.data_dir, 'chapels.csv',
+                            "Name,Cell ID\n"
+                            "Bruma Hall,BrumaChapelHall\n"   # Name holds another cell
+                            "Anvil Crypt,AnvilCrypt\n")      # Last cell of its list
+
+        summary = import_rows(iter_rows(source), 'locations/chapels.json', KIND_LOCATION,
+                              self.data_dir, catalog)
+
+        self.assertEqual(summary.updated, ["Anvil Crypt"])
+        self.assertEqual(summary.conflicts, ["Bruma Hall (BrumaChapelHall; name already used by BrumaHall)"])
+        self.assertEqual(read_json(self.data_dir, 'locations/chapels.json'), {
+            "Anvil Crypt": "AnvilCrypt",
+            "Bruma Hall": "BrumaHall",
+            "Chapel Hall": ["AnvilChapelHall", "BrumaChapelHall"],
+        })
+
+    def test_large_dump_is_read_row_by_row(self):
+        source = os.path.join(self.data_dir, 'big.jsonl')
+        with open(source, 'w', encoding='utf-8') as f:
+            for i in range(30000):
+                f.write(json.dumps({"name": f"Thing {i}", "formid": f"{0x100000 + i:08X}", "weight": i % 50}) + "\n")
+        read = []
+
+        def counted(rows):
+            for row in rows:
+                read.append(row["name"])
+                yield row
+
+        with patch('src.importer.json_codec.loads', side_effect=json.loads) as loads:
+            rows = counted(iter_rows(source))
+            next(rows)
+            self.assertEqual(loads.call_count, 1)  # Nothing parsed ahead of the consumer
+
+            summary = import_rows(rows, 'misc/things.json', data_dir=self.data_dir, catalog=self.catalog)
+        self.assertEqual(len(read), 30000)
+        self.assertEqual((summary.rows, len(summary.added)), (29999, 29999))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import json_codec
+from tests.test_catalog import make_test_data_dir
+
+CODECS = [json_codec._StdlibCodec] + ([json_codec._OrjsonCodec] if json_codec.orjson is not None else [])
+
+
+class TestJsonCodec(unittest.TestCase):
+
+    def test_round_trip_and_layout(self):
+        data = {"Iron Boots": {"id": "0001C6D4", "weight": 12.5}, "Ümlaut": [1, None]}
+        for codec in CODECS:
+            with self.subTest(codec=codec.name):
+                compact = codec.dumps(data)
+                self.assertNotIn("\n", compact)
+                self.assertEqual(codec.dumps(data, pretty=True), json.dumps(data, indent=2, ensure_ascii=False))
+                self.assertEqual(codec.loads(compact), data)
+                self.assertEqual(codec.loads(compact.encode("utf-8")), data)
+
+    def test_bom_and_errors(self):
+        for codec in CODECS:
+            with self.subTest(codec=codec.name):
+                self.assertEqual(codec.loads(b'\xef\xbb\xbf{"a": 1}'), {"a": 1})
+                with self.assertRaises(json.JSONDecodeError):
+                    codec.loads(b"   ")
+
+    def test_select_codec_honours_override(self):
+        self.assertIs(json_codec._select_codec(json_codec.BACKEND_STDLIB), json_codec._StdlibCodec)
+
+    def test_benchmark_reports_every_readable_file(self):
+        data_dir = make_test_data_dir()
+        self.addCleanup(shutil.rmtree, data_dir, ignore_errors=True)
+        rows = json_codec.benchmark(data_dir, repeat=1)
+        files = {row["file"] for row in rows}
+        self.assertIn("armor/heavy_iron.json", files)
+        self.assertNotIn("locations/caves.json", files)  # Missing on disk
+        self.assertTrue(all(row["json_parse"] >= 0 for row in rows))
+
+
+if __name__ == '__main__':
+    unittest.main()
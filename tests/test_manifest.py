@@ -0,0 +1,104 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+from unittest.mock import patch
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import manifest
+from src.catalog import Catalog
+from tests.test_catalog import make_test_data_dir, write_json
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        write_json(self.data_dir, 'armor.json', {"PlaceholderArmor": "00000000"})
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479F5", "Kitty": "479f5", "Bandit": "000055BD"})
+        self.addCleanup(manifest.invalidate_manifest, self.data_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_build_describes_every_category_file(self):
+        result = manifest.build_manifest(self.data_dir)
+        files = result["files"]
+        self.assertEqual(files["locations/caves.json"]["status"], manifest.STATUS_MISSING)
+        self.assertEqual(files["armor/heavy_iron.json"]["schema"], manifest.SCHEMA_RECORD_MAP)
+        self.assertEqual(files["locations/chapels.json"]["schema"], manifest.SCHEMA_CELL_LIST_MAP)
+        self.assertEqual(files["locations/chapels.json"]["records"], 2)
+        self.assertEqual(files["npcs.json"]["duplicate_ids"], ["000479F5"])
+        self.assertEqual(result["unreferenced"]["armor.json"]["status"], manifest.STATUS_PLACEHOLDER)
+        self.assertEqual(result["summary"]["problems"], ["locations/caves.json"])
+        self.assertEqual(result["summary"]["records"], 11)
+
+    def test_placeholder_and_empty_files(self):
+        self.assertEqual(manifest.describe_file(b'{"PlaceholderHorse": "00000000"}', "item")["status"],
+                         manifest.STATUS_PLACEHOLDER)
+        self.assertEqual(manifest.describe_file(b'  \n', "location")["status"], manifest.STATUS_EMPTY)
+        self.assertEqual(manifest.describe_file(b'\\{}', "location")["status"], manifest.STATUS_INVALID)
+
+    def test_trusted_until_category_index_changes(self):
+        self.assertIsNone(manifest.load_manifest(self.data_dir))
+        manifest.write_manifest(self.data_dir)
+        self.assertIsNotNone(manifest.load_manifest(self.data_dir))
+        self.assertEqual(manifest.record_counts(self.data_dir)["npcs.json"], 3)
+        self.assertNotIn("locations/caves.json", manifest.record_counts(self.data_dir))
+
+        write_json(self.data_dir, 'location_categories.json', {"Guild Halls": "guilds.json"})
+        manifest.invalidate_manifest(self.data_dir)
+        self.assertIsNone(manifest.load_manifest(self.data_dir))
+
+    def test_edited_files_are_counted_again(self):
+        manifest.write_manifest(self.data_dir)
+        npcs_path = os.path.join(self.data_dir, 'npcs.json')
+        stat = os.stat(npcs_path)
+        os.utime(npcs_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # Same content
+        manifest.invalidate_manifest(self.data_dir)
+        with patch('src.manifest.describe_file') as mock_describe:
+            self.assertEqual(manifest.record_counts(self.data_dir)["npcs.json"], 3)
+            mock_describe.assert_not_called()
+
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479F5"})
+        write_json(self.data_dir, 'locations/caves.json', {"Cave": "SomeCave"})
+        manifest.invalidate_manifest(self.data_dir)
+        counts = manifest.record_counts(self.data_dir)
+        self.assertEqual((counts["npcs.json"], counts["locations/caves.json"]), (1, 1))
+        self.assertEqual(manifest.load_manifest(self.data_dir)["summary"]["problems"], [])
+
+    def test_catalog_refresh_forgets_the_manifest(self):
+        manifest.write_manifest(self.data_dir)
+        catalog = Catalog(self.data_dir).load()
+        self.assertEqual(manifest.record_counts(self.data_dir)["npcs.json"], 3)
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479F5"})
+        npcs_path = os.path.join(self.data_dir, 'npcs.json')
+        stat = os.stat(npcs_path)
+        os.utime(npcs_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertTrue(catalog.refresh_changes())
+        self.assertEqual(manifest.record_counts(self.data_dir)["npcs.json"], 1)
+
+    def test_catalog_skips_missing_files_listed_in_manifest(self):
+        manifest.write_manifest(self.data_dir)
+        with patch.object(Catalog, '_read', autospec=True, side_effect=Catalog._read) as mock_read:
+            catalog = Catalog(self.data_dir).load()
+        read_paths = [call.args[1] for call in mock_read.call_args_list]
+        self.assertNotIn("locations/caves.json", read_paths)
+        self.assertNotIn("item_categories.json", read_paths)
+        self.assertEqual(len(catalog), 11)
+
+    def test_main_check_reports_problems(self):
+        manifest_path = os.path.join(self.data_dir, manifest.MANIFEST_FILE)
+        with patch('builtins.print'):
+            self.assertEqual(manifest.main(["--data-dir", self.data_dir, "--check"]), 1)
+            self.assertFalse(os.path.exists(manifest_path))  # Checking writes nothing
+            self.assertEqual(manifest.main(["--data-dir", self.data_dir]), 0)
+        with open(manifest_path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["version"], manifest.MANIFEST_VERSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
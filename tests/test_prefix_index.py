@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog
+from src.prefix_index import CompletionEntry, PrefixIndex, KIND_FAVORITE
+from tests.test_catalog import make_test_data_dir, write_json, bump_mtime
+
+
+class TestPrefixIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        self.catalog = Catalog(self.data_dir).load()
+        self.index = self.catalog.prefix_index
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def labels(self, entries):
+        return [entry.label for entry in entries]
+
+    def test_name_prefix_is_case_insensitive(self):
+        self.assertEqual(self.labels(self.index.complete("iron")), ["Iron Boots", "Iron Cuirass"])
+        self.assertEqual(self.labels(self.index.complete("IRON C")), ["Iron Cuirass"])
+
+    def test_form_id_prefix_with_and_without_leading_zeros(self):
+        self.assertEqual(self.index.complete("0001c6d4"), [CompletionEntry("item", "Iron Boots", "0001C6D4")])
+        self.assertEqual(self.labels(self.index.complete("1c6d")), ["Iron Boots", "Iron Cuirass"])
+
+    def test_cell_id_prefix_and_kind_filter(self):
+        entries = self.index.complete("bravilmages", kinds=("location",))
+        self.assertEqual([entry.value for entry in entries], ["BravilMagesGuild", "BravilMagesGuild2ndFloor"])
+        self.assertEqual(self.index.complete("bravil", kinds=("npc",)), [])
+
+    def test_entries_are_not_repeated(self):
+        # "Cat" matches by name and by its own key only once
+        self.assertEqual(self.labels(self.index.complete("c", kinds=("npc",))), ["Cat"])
+
+    def test_limit_and_empty_prefix(self):
+        self.assertEqual(len(self.index.complete("b", limit=1)), 1)
+        self.assertEqual(self.index.complete(""), [])
+
+    def test_insert_and_delete(self):
+        index = PrefixIndex()
+        entry = CompletionEntry(KIND_FAVORITE, "Gold", "player.additem 0000000F 100")
+        index.insert("Gold", entry)
+        self.assertEqual(index.complete("go"), [entry])
+        self.assertTrue(index.delete("Gold", entry))
+        self.assertFalse(index.delete("Gold", entry))
+        self.assertEqual(index.complete("go"), [])
+
+    def test_bulk_load_matches_one_by_one_inserts(self):
+        one_by_one = PrefixIndex()
+        for record_id, record in self.catalog.items():
+            one_by_one.add(record_id, record)
+        pairs = lambda index: sorted(zip(index._keys, index._entries))
+        self.assertEqual(pairs(self.index), pairs(one_by_one))
+        self.assertEqual(self.index._keys, sorted(self.index._keys))
+
+        self.catalog.load()  # Rebuild: every record removed and added again in bulk
+        self.assertEqual(pairs(self.index), pairs(one_by_one))
+        one_by_one.remove_many(list(self.catalog.items()))
+        self.assertEqual(len(one_by_one), 0)
+
+    def test_refresh_updates_completions(self):
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479F5", "Bandit Archer": "000055BE"})
+        bump_mtime(self.data_dir, 'npcs.json')
+        self.catalog.refresh()
+        self.assertEqual(self.labels(self.index.complete("bandit")), ["Bandit Archer"])
+
+    def test_completion_is_fast_on_large_index(self):
+        index = PrefixIndex()
+        for i in range(50000):
+            index.insert(f"item {i:05d}", CompletionEntry("item", f"Item {i:05d}", f"{i:08X}"))
+        start = time.perf_counter()
+        for _ in range(100):
+            index.complete("item 4", limit=10)
+        self.assertLess((time.perf_counter() - start) / 100, 0.005)
+
+
+if __name__ == '__main__':
+    unittest.main()
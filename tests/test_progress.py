@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.progress import ProgressDispatcher
+
+
+class TestProgress(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def _sink(self, batch):
+        with self.lock:
+            self.batches.append(batch)
+
+    def test_coalesce_keeps_latest_step_per_job_and_every_other_event(self):
+        events = [{"job": 1, "type": "started"}, {"job": 1, "type": "step", "step": 1},
+                  {"job": 2, "type": "step", "step": 1}, {"job": 1, "type": "step", "step": 2},
+                  {"job": 1, "type": "failed", "step": 2}, {"job": 1, "type": "finished"}]
+        kept = ProgressDispatcher.coalesce(events)
+        self.assertEqual([(e["job"], e["type"], e.get("step")) for e in kept],
+                         [(1, "started", None), (2, "step", 1), (1, "step", 2), (1, "failed", 2), (1, "finished", None)])
+
+    def test_job_reports_steps_with_eta(self):
+        dispatcher = ProgressDispatcher(self._sink)  # Not started: events stay queued
+        job = dispatcher.start_job("custom battle", 4)
+        job.step(0, "tgm")
+        time.sleep(0.2)
+        job.step(2, "tcl")
+        job.failed(2, "tcl", "Command failed")
+        job.finish(False, "One or more commands failed")
+        events = [dispatcher._queue.get_nowait() for _ in range(5)]
+        self.assertEqual([e["type"] for e in events], ["started", "step", "step", "failed", "finished"])
+        self.assertIsNone(events[1]["eta_s"])  # Nothing to extrapolate from yet
+        self.assertEqual((events[2]["step"], events[2]["total"], events[2]["command"]), (3, 4, "tcl"))
+        self.assertGreaterEqual(events[2]["eta_s"], 0.2)  # Two steps took 0.2 s, two are left
+        self.assertFalse(events[4]["success"])
+
+    def test_fast_jobs_are_batched_and_rate_limited(self):
+        dispatcher = ProgressDispatcher(self._sink, min_interval=0.05).start()
+        job = dispatcher.start_job("preset 'Arena'", 100)
+        for i in range(100):
+            job.step(i, f"cmd{i}")
+            time.sleep(0.001)
+        job.finish(True)
+        dispatcher.stop()
+        events = [event for batch in self.batches for event in batch]
+        self.assertLess(len(self.batches), 20)  # ~0.1 s of steps, at most one push per 50 ms
+        self.assertEqual(events[0]["type"], "started")
+        self.assertEqual([e["type"] for e in events[-2:]], ["step", "finished"])
+        self.assertEqual(events[-2]["step"], 100)
+        self.assertEqual(dispatcher.events_sent + dispatcher.events_dropped, 102)
+
+    def test_failing_sink_does_not_stop_the_dispatcher(self):
+        calls = []
+        def sink(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise RuntimeError("page reloading")
+        dispatcher = ProgressDispatcher(sink, min_interval=0).start()
+        dispatcher.start_job("a", 1)
+        time.sleep(0.05)
+        dispatcher.start_job("b", 1)
+        dispatcher.stop()
+        self.assertEqual([batch[0]["name"] for batch in calls], ["a", "b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import os
+import sys
+import shutil
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog
+from tests.test_catalog import make_test_data_dir, write_json, bump_mtime
+
+
+class TestRefIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        self.catalog = Catalog(self.data_dir).load()
+        self.index = self.catalog.ref_index
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_lookup_form_id_in_any_spelling(self):
+        for ref in ("000479F5", "479f5", "0x000479f5", 0x479F5):
+            self.assertEqual(self.index.lookup(ref).name, "Cat")
+        self.assertEqual(self.index.lookup("0001c6d6", kind="item").name, "Iron Cuirass")
+        self.assertIsNone(self.index.lookup("000479F5", kind="item"))
+
+    def test_lookup_cell_id(self):
+        record = self.index.lookup("brumachapelhall")
+        self.assertEqual((record.name, record.category), ("Chapel Hall", "Chapels"))
+        self.assertIsNone(self.index.lookup("BrumaChapelHall", kind="npc"))
+
+    def test_refresh_updates_lookup(self):
+        write_json(self.data_dir, 'npcs.json', {"Big Cat": "000479F5"})
+        bump_mtime(self.data_dir, 'npcs.json')
+        self.catalog.refresh()
+        self.assertEqual(self.index.lookup("000479F5").name, "Big Cat")
+        self.assertIsNone(self.index.lookup("000055BD"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import os
+import sys
+import json
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.builds = 0
+
+    def _build(self):
+        self.builds += 1
+        return {"npcs": {"Cat": "000479F5"}}
+
+    def test_known_version_is_not_modified(self):
+        cache = ResponseCache()
+        first = cache.respond(("npcs",), "c1", None, self._build)
+        self.assertEqual(first["version"], "c1")
+        self.assertEqual(json.loads(first["body"]), {"npcs": {"Cat": "000479F5"}})
+        self.assertEqual(cache.respond(("npcs",), "c1", "c1", self._build), {"version": "c1", "not_modified": True})
+        self.assertEqual(self.builds, 1)
+
+    def test_body_is_serialized_once_per_version(self):
+        cache = ResponseCache()
+        first = cache.respond(("npcs",), "c1", None, self._build)
+        again = cache.respond(("npcs",), "c1", "c0", self._build)  # Stale client, same data
+        self.assertIs(again["body"], first["body"])
+        self.assertEqual(self.builds, 1)
+        cache.respond(("npcs",), "c2", "c1", self._build)  # Data changed
+        self.assertEqual(self.builds, 2)
+        self.assertEqual((cache.hits, cache.misses, cache.not_modified), (1, 2, 0))
+
+    def test_unversioned_responses_are_not_kept(self):
+        cache = ResponseCache()
+        cache.respond(("items", "missing.json"), None, None, self._build)
+        reply = cache.respond(("items", "missing.json"), None, None, self._build)
+        self.assertNotIn("not_modified", reply)
+        self.assertEqual((self.builds, len(cache)), (2, 0))
+
+    def test_least_recently_used_entries_are_dropped(self):
+        cache = ResponseCache(max_entries=2)
+        for key in ("a", "b"):
+            cache.respond(key, "c1", None, self._build)
+        cache.respond("a", "c1", None, self._build)  # "a" is now the most recent
+        cache.respond("c", "c1", None, self._build)
+        self.assertEqual(self.builds, 3)
+        cache.respond("a", "c1", None, self._build)
+        self.assertEqual(self.builds, 3)
+        cache.respond("b", "c1", None, self._build)
+        self.assertEqual(self.builds, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
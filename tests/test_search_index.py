@@ -0,0 +1,91 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog
+from src.search_index import tokenize
+from tests.test_catalog import make_test_data_dir
+
+
+class TestTokenize(unittest.TestCase):
+
+    def test_splits_camel_case_cell_ids(self):
+        tokens = tokenize("BravilMagesGuild2ndFloor")
+        self.assertIn("bravilmagesguild2ndfloor", tokens)
+        for part in ("bravil", "mages", "guild", "2nd", "floor"):
+            self.assertIn(part, tokens)
+
+    def test_drops_apostrophes_and_punctuation(self):
+        self.assertEqual(tokenize("Arch-Mage's Key"), ["arch", "mages", "key"])
+
+    def test_keeps_acronym_prefixes(self):
+        self.assertIn("ic", tokenize("ICMarketDistrict"))
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        self.catalog = Catalog(self.data_dir).load()
+        self.index = self.catalog.search_index
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def names(self, results):
+        return [record.name for _, record in results]
+
+    def test_bulk_load_keeps_vocabulary_sorted(self):
+        self.assertEqual(self.index._vocabulary, sorted(self.index._postings))
+        self.catalog.load()  # Rebuild: every record removed and added again in bulk
+        self.assertEqual(self.index._vocabulary, sorted(self.index._postings))
+        self.index.remove_many(list(self.catalog.items()))
+        self.assertEqual((self.index._vocabulary, self.index._postings), ([], {}))
+
+    def test_all_tokens_must_match(self):
+        results, total = self.index.search("bravil guild")
+        self.assertEqual(total, 2)
+        self.assertEqual(self.names(results)[0], "Bravil Mages Guild")
+
+    def test_last_token_matches_as_prefix(self):
+        results, _ = self.index.search("cheyd")
+        self.assertEqual(self.names(results), ["Cheydinhal Fighters Guild"])
+
+    def test_search_by_form_id_is_case_insensitive(self):
+        results, _ = self.index.search("000479f5")
+        self.assertEqual(self.names(results), ["Cat"])
+
+    def test_search_by_cell_id(self):
+        results, _ = self.index.search("BravilMagesGuild2ndFloor")
+        self.assertEqual([r.ref for _, r in results], ["BravilMagesGuild2ndFloor"])
+
+    def test_filters_by_kind_and_category(self):
+        results, _ = self.index.search("iron", kind="npc")
+        self.assertEqual(results, [])
+        results, total = self.index.search("iron", category="iron (heavy)")
+        self.assertEqual(total, 2)
+        results, _ = self.index.search("chapel hall", kind="location", category="Chapels")
+        self.assertEqual(sorted(r.ref for _, r in results), ["AnvilChapelHall", "BrumaChapelHall"])
+
+    def test_limit_keeps_total(self):
+        results, total = self.index.search("iron", limit=1)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(total, 2)
+
+    def test_empty_query(self):
+        self.assertEqual(self.index.search("  "), ([], 0))
+
+    def test_query_is_fast(self):
+        start = time.perf_counter()
+        for _ in range(100):
+            self.index.search("guild")
+        self.assertLess((time.perf_counter() - start) / 100, 0.001)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import shutil
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.catalog import Catalog
+from src.sorted_views import FrozenDict
+from tests.test_catalog import make_test_data_dir, write_json, bump_mtime
+
+
+class TestSortedViews(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = make_test_data_dir()
+        write_json(self.data_dir, 'armor/heavy_iron.json', {
+            "Iron Cuirass": {"id": "0001C6D6", "weight": 30.0, "value": 60},
+            "Iron Boots": {"id": "0001C6D4", "weight": 12.0, "value": 15},
+            "Iron Helmet": {"id": "0001C6D9", "weight": 5.0},
+        })
+        self.catalog = Catalog(self.data_dir).load()
+        self.views = self.catalog.sorted_views
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_views_are_sorted_shared_and_read_only(self):
+        view = self.views.view('armor/heavy_iron.json')
+        self.assertEqual(list(view), ["Iron Boots", "Iron Cuirass", "Iron Helmet"])
+        self.assertEqual(view["Iron Boots"]["value"], 15)
+        self.assertIs(self.views.view('armor/heavy_iron.json'), view)
+        self.assertIsInstance(view, dict)
+        with self.assertRaises(TypeError):
+            view["Iron Boots"] = "x"
+        self.assertEqual(self.views.view('armor/heavy_iron.json', details=False),
+                         {"Iron Boots": "0001C6D4", "Iron Cuirass": "0001C6D6", "Iron Helmet": "0001C6D9"})
+
+    def test_numeric_sort_puts_missing_values_last(self):
+        self.assertEqual(list(self.views.view('armor/heavy_iron.json', "value")),
+                         ["Iron Boots", "Iron Cuirass", "Iron Helmet"])
+        self.assertEqual(list(self.views.view('armor/heavy_iron.json', "weight")),
+                         ["Iron Helmet", "Iron Boots", "Iron Cuirass"])
+        with self.assertRaises(ValueError):
+            self.views.ordering('armor/heavy_iron.json', "armor rating")
+
+    def test_location_views_keep_file_shape(self):
+        self.assertEqual(self.views.view('locations/chapels.json'),
+                         {"Chapel Hall": ["AnvilChapelHall", "BrumaChapelHall"]})
+        self.assertEqual(list(self.views.all_locations())[:2], ["Bravil Mages Guild", "Bravil Mages Guild 2nd Floor"])
+        self.assertEqual(self.views.view('npcs.json'), {"Bandit": "000055BD", "Cat": "000479F5"})
+
+    def test_views_rebuild_only_for_changed_files(self):
+        armor = self.views.view('armor/heavy_iron.json')
+        npcs = self.views.view('npcs.json')
+        locations = self.views.all_locations()
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479F5", "Ant": "00000001"})
+        bump_mtime(self.data_dir, 'npcs.json')
+        self.catalog.refresh()
+
+        self.assertIs(self.views.view('armor/heavy_iron.json'), armor)
+        self.assertIs(self.views.all_locations(), locations)
+        self.assertEqual(list(self.views.view('npcs.json')), ["Ant", "Cat"])
+        self.assertIsNot(self.views.view('npcs.json'), npcs)
+
+    def test_listings_span_files_filter_and_follow_changes(self):
+        name = self.catalog.name_of
+        items = self.views.listing("item")
+        self.assertEqual([name(r) for r in items], ["Arch-Mage's Key", "Iron Boots", "Iron Cuirass", "Iron Helmet"])
+        self.assertIs(self.views.listing("item"), items)  # Paging reuses the listing
+        self.assertEqual([name(r) for r in self.views.listing("item", query="iron cui")], ["Iron Cuirass"])
+        self.assertEqual([name(r) for r in self.views.listing("location", 'locations/guilds.json', "BRAVIL")],
+                         ["Bravil Mages Guild", "Bravil Mages Guild 2nd Floor"])
+
+        write_json(self.data_dir, 'npcs.json', {"Cat": "000479F5", "Ant": "00000001"})
+        bump_mtime(self.data_dir, 'npcs.json')
+        self.catalog.refresh()
+        self.assertEqual([name(r) for r in self.views.listing("npc")], ["Ant", "Cat"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import data_loader, sqlite_store
+from src.sqlite_store import SqliteUserStore
+
+
+class TestSqliteUserStore(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='sqlite_store_test_')
+        self.db = SqliteUserStore(os.path.join(self.data_dir, 'user_store.sqlite3'))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_favorites_have_the_journaled_store_interface(self):
+        favorites = self.db.favorites
+        self.assertEqual(favorites.add("Gold", {"name": "Gold", "command": "player.additem f 100", "type": "additem"}), "success")
+        self.assertEqual(favorites.add("Gold", {"name": "Gold", "command": "x", "type": "single"}), "exists")
+        self.assertEqual(favorites.add("Kitty", {"name": "Kitty", "command": "player.placeatme 000479F5 1", "type": "npc"}), "success")
+        self.assertTrue(favorites.put("Gold", {"name": "Gold", "command": "player.additem f 200", "type": "additem"}))
+        self.assertEqual([fav["name"] for fav in favorites.data()], ["Gold", "Kitty"])  # Update keeps position
+        self.assertEqual(favorites.get("Gold")["command"], "player.additem f 200")
+        self.assertEqual([fav["name"] for fav in favorites.by_type("npc")], ["Kitty"])
+        self.assertEqual(favorites.delete("Gold"), "success")
+        self.assertEqual(favorites.delete("Gold"), "missing")
+        self.assertEqual(len(favorites), 1)
+
+    def test_usage_is_indexed_and_survives_full_saves(self):
+        presets = self.db.presets
+        presets.replace({"Duel": ["cmd a"], "Horde": ["cmd b"], "Idle": []})
+        presets.touch("Duel", when=100.0)
+        presets.touch("Horde", when=200.0)
+        self.assertEqual(list(presets.recently_used()), ["Horde", "Duel"])
+        presets.replace({"Duel": ["cmd a2"], "New": []})
+        self.assertEqual(presets.recently_used(), {"Duel": ["cmd a2"]})
+        self.assertFalse(presets.replace(["not", "a", "dict"]))
+
+        plan = self.db.query("EXPLAIN QUERY PLAN SELECT name FROM presets WHERE last_used IS NOT NULL "
+                             "ORDER BY last_used DESC")
+        self.assertIn("presets_last_used", " ".join(str(row) for row in plan))
+
+    def test_most_used_is_served_from_the_rank_index(self):
+        favorites = self.db.favorites
+        for name in ("Gold", "Kitty", "Ghost"):
+            favorites.add(name, {"name": name, "type": "single"})
+        for when in (100.0, 200.0):
+            favorites.touch("Gold", when=when)
+        favorites.touch("Kitty", when=300.0)
+        self.assertEqual(favorites.most_used(), ["Gold", "Kitty"])
+        self.assertEqual(favorites.most_used(1), ["Gold"])
+        favorites.replace(favorites.data())  # Full saves keep the ranking
+        self.assertEqual(favorites.most_used(), ["Gold", "Kitty"])
+
+        plan = self.db.query("EXPLAIN QUERY PLAN SELECT name FROM favorites WHERE rank IS NOT NULL "
+                             "ORDER BY rank DESC, name LIMIT 5")
+        self.assertIn("favorites_rank", " ".join(str(row) for row in plan))
+
+    def test_version_1_database_gains_the_rank_column(self):
+        path = os.path.join(self.data_dir, 'old.sqlite3')
+        old = sqlite3.connect(path)
+        old.executescript(sqlite_store._SCHEMA.replace("    last_used REAL,\n    rank REAL\n", "    last_used REAL\n")
+                          .format(table="favorites"))
+        old.execute("INSERT INTO favorites (name, position, value, use_count, last_used) "
+                    "VALUES ('Gold', 1, '{}', 4, 100.0)")
+        old.commit()
+        old.close()
+        db = SqliteUserStore(path)
+        try:
+            self.assertEqual(db.favorites.most_used(), ["Gold"])
+        finally:
+            db.close()
+
+    def test_history_prefix_lookup(self):
+        for when, command in enumerate(["player.additem f 1", "coc Bravil", "player.placeatme 000479F5 1",
+                                        "player.additem f 2"]):
+            self.db.add_history(command, source="cli", when=float(when))
+        self.assertEqual(self.db.history(limit=2), ["player.additem f 2", "player.placeatme 000479F5 1"])
+        self.assertEqual(self.db.history(prefix="player.additem"), ["player.additem f 2", "player.additem f 1"])
+
+    def test_history_table_backs_command_history(self):
+        from src.command_history import CommandHistory
+        history = CommandHistory(self.db.command_log, capacity=2)
+        for command in ["coc Bravil", "coc Bravil", "tgm", "tcl"]:
+            history.add(command, source="gui")
+        self.assertEqual(self.db.history(), ["tcl", "tgm", "coc Bravil"])  # Repeat skipped
+        self.assertEqual(CommandHistory(sqlite_store.SqliteHistory(self.db), capacity=2).search(), ["tcl", "tgm"])
+        history.add("coc Chorrol")
+        history.add("tgm")  # More than twice the capacity written: old rows deleted
+        self.assertEqual(self.db.history(), ["tgm", "coc Chorrol"])
+
+    def test_wal_mode_lets_another_connection_read(self):
+        self.assertEqual(self.db.query("PRAGMA journal_mode")[0][0], "wal")
+        self.db.favorites.add("A", {"name": "A"})
+        with self.db.transaction() as conn:  # Writer holds its transaction open
+            conn.execute("UPDATE favorites SET value = ? WHERE name = 'A'", (json.dumps({"name": "A", "x": 1}),))
+            reader = sqlite3.connect(self.db.path, timeout=0.1)
+            try:
+                self.assertEqual(reader.execute("SELECT value FROM favorites").fetchone()[0], '{"name":"A"}')
+            finally:
+                reader.close()
+
+
+class TestSqliteBackendMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='sqlite_backend_test_')
+        with open(os.path.join(self.data_dir, 'favorites.json'), 'w') as f:
+            json.dump([{"name": "Kitty", "command": "player.placeatme 000479F5 1", "type": "npc",
+                        "use_count": 2, "last_used": 100.0}], f)
+        with open(os.path.join(self.data_dir, 'battles.json'), 'w') as f:
+            json.dump({"Duel": ["cmd a"]}, f)
+        for name, value in (('DATA_DIR', self.data_dir), ('USER_DATA_DIR', None),
+                            ('USER_STORE_BACKEND', data_loader.USER_STORE_SQLITE)):
+            patcher = patch.object(data_loader, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _close_databases(self):
+        for path in list(sqlite_store._stores):
+            if path.startswith(self.data_dir):
+                sqlite_store._stores.pop(path).close()
+        data_loader._databases.clear()
+        data_loader._store_handles.clear()
+
+    def tearDown(self):
+        self._close_databases()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_json_stores_are_migrated_once(self):
+        self.assertEqual(data_loader.add_battle_preset("Journaled", ["cmd j"]), "success")  # Migrates first
+        self.assertEqual(data_loader.load_json_data('battles.json'), {"Duel": ["cmd a"], "Journaled": ["cmd j"]})
+        self.assertEqual(data_loader.load_json_data('favorites.json')[0]["name"], "Kitty")
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, 'user_store.sqlite3')))
+        with open(os.path.join(self.data_dir, 'battles.json')) as f:
+            self.assertEqual(json.load(f), {"Duel": ["cmd a"]})  # JSON left as a backup
+        self.assertEqual(data_loader.user_store('favorites.json').most_used(), ["Kitty"])  # Usage copied in
+        self.assertNotIn("use_count", data_loader.load_json_data('favorites.json')[0])
+
+        data_loader.user_store('favorites.json').delete("Kitty")
+        self._close_databases()  # Reopen: the now-empty table must not be re-migrated
+        self.assertEqual(data_loader.load_json_data('favorites.json'), [])
+
+    def test_store_handles_are_reused_after_migration(self):
+        favorites = data_loader.user_store('favorites.json')
+        with patch.object(data_loader, 'open_store', side_effect=AssertionError("reopened")):
+            self.assertIs(data_loader.user_store('favorites.json'), favorites)
+            self.assertIs(data_loader.user_database(), favorites._db)
+
+
+if __name__ == '__main__':
+    unittest.main()
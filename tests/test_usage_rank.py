@@ -0,0 +1,42 @@
+import unittest
+import os
+import sys
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.usage_rank import HALF_LIFE, UsageRanking, rank_score
+
+NOW = 1_700_000_000.0
+
+
+class TestUsageRanking(unittest.TestCase):
+
+    def test_frequency_is_blended_with_recency(self):
+        # Twice the uses is worth exactly one half-life of recency
+        self.assertAlmostEqual(rank_score(8, NOW - HALF_LIFE), rank_score(4, NOW))
+        self.assertGreater(rank_score(50, NOW - HALF_LIFE), rank_score(2, NOW))
+        self.assertGreater(rank_score(2, NOW), rank_score(50, NOW - 10 * HALF_LIFE))
+        for unused in ((0, NOW), (3, None), ("many", NOW)):
+            self.assertIsNone(rank_score(*unused))
+
+    def test_updates_keep_the_order(self):
+        ranking = UsageRanking()
+        ranking.rebuild([("Gold", 10, NOW - HALF_LIFE), ("Kitty", 1, NOW), ("Ghost", 0, None)])
+        self.assertEqual(ranking.top(), ["Gold", "Kitty"])
+        self.assertNotIn("Ghost", ranking)
+
+        ranking.update("Kitty", 20, NOW)
+        ranking.update("Ghost", 1, NOW - HALF_LIFE)
+        self.assertEqual(ranking.top(), ["Kitty", "Gold", "Ghost"])
+        self.assertEqual(ranking.top(2), ["Kitty", "Gold"])
+
+        ranking.remove("Kitty")
+        ranking.remove("Never Ranked")
+        ranking.update("Gold", 0, None)  # Usage cleared
+        self.assertEqual(ranking.top(), ["Ghost"])
+        self.assertEqual(len(ranking), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+from unittest.mock import patch
+
+# Ensure src is importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import data_loader, user_store
+from src.file_lock import lock_path_for
+from src.user_store import JournaledStore, journal_path_for
+
+
+class TestJournaledStore(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='user_store_test_')
+        self.snapshot_path = os.path.join(self.data_dir, 'favorites.json')
+        self.saves = 0
+        self._write_snapshot([{"name": "Kitty", "command": "player.placeatme 000479F5 1", "type": "npc"}])
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def _write_snapshot(self, data):
+        with open(self.snapshot_path, 'w') as f:
+            json.dump(data, f)
+
+    def _load(self):
+        try:
+            with open(self.snapshot_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _save(self, data):
+        self.saves += 1
+        self._write_snapshot(data)
+        return True
+
+    def _stamp(self):
+        try:
+            return os.stat(self.snapshot_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _store(self, **kwargs):
+        return JournaledStore(journal_path_for(self.snapshot_path), self._load, self._save,
+                              stamp=self._stamp, key_field="name", **kwargs)
+
+    def test_edits_append_and_replay(self):
+        store = self._store()
+        self.assertEqual(store.add("Gold", {"name": "Gold", "command": "player.additem f 100"}), "success")
+        self.assertEqual(store.add("Gold", {"name": "Gold", "command": "other"}), "exists")
+        self.assertTrue(store.put("Kitty", {"name": "Kitty", "command": "player.placeatme 000479F5 2"}))
+        self.assertEqual(store.delete("Gold"), "success")
+        self.assertEqual(store.delete("Gold"), "missing")
+        self.assertTrue(store.flush())
+        self.assertEqual(self.saves, 0)
+        self.assertEqual(self._load()[0]["command"], "player.placeatme 000479F5 1")  # Snapshot untouched
+
+        with open(store.journal_path) as f:
+            self.assertEqual([json.loads(line)["op"] for line in f], ["add", "update", "delete"])
+        self.assertEqual(self._store().data(), [{"name": "Kitty", "command": "player.placeatme 000479F5 2"}])
+
+    def test_torn_last_line_is_ignored_and_cut_off(self):
+        store = self._store()
+        store.add("Gold", {"name": "Gold"})
+        store.flush()
+        with open(store.journal_path, 'ab') as f:
+            f.write(b'{"op": "add", "key": "Half", "val')  # Crash mid-append
+
+        store = self._store()
+        self.assertEqual([fav["name"] for fav in store.data()], ["Kitty", "Gold"])
+        store.add("Arrows", {"name": "Arrows"})
+        store.flush()
+        self.assertEqual([fav["name"] for fav in self._store().data()], ["Kitty", "Gold", "Arrows"])
+
+    def test_compaction_writes_snapshot_and_drops_journal(self):
+        store = self._store(compact_after=3)
+        for name in ("A", "B", "C"):
+            store.add(name, {"name": name})
+        self.assertEqual(self.saves, 0)
+        store.flush()  # One append of three lines, then compaction
+        self.assertEqual(self.saves, 1)
+        self.assertFalse(os.path.exists(store.journal_path))
+        self.assertEqual([fav["name"] for fav in self._load()], ["Kitty", "A", "B", "C"])
+        self.assertEqual(len(store), 4)
+
+    def test_replay_after_crash_during_compaction_is_harmless(self):
+        store = self._store()
+        store.add("A", {"name": "A"})
+        store.delete("Kitty")
+        store.flush()
+        self._write_snapshot([{"name": "A"}])  # Snapshot written, journal not yet removed
+        self.assertEqual(self._store().data(), [{"name": "A"}])
+
+    def test_reloads_when_files_change_on_disk(self):
+        store = self._store()
+        self.assertEqual(len(store), 1)
+        self._write_snapshot([{"name": "Edited"}])
+        os.utime(self.snapshot_path, ns=(0, self._stamp() + 1_000_000_000))
+        self.assertEqual(store.data(), [{"name": "Edited"}])
+
+        other = self._store()  # e.g. a second store on the same files
+        other.add("B", {"name": "B"})
+        other.flush()
+        self.assertIn("B", store)
+
+    def test_processes_sharing_a_lock_never_drop_each_others_edits(self):
+        lock_path = lock_path_for(self.snapshot_path)
+        gui, cli = self._store(flush_delay=60, lock_path=lock_path), self._store(flush_delay=60, lock_path=lock_path)
+        self.assertEqual(len(gui), 1)
+        self.assertEqual(len(cli), 1)
+        gui.add("Gold", {"name": "Gold"})
+        cli.add("Arrows", {"name": "Arrows"})
+        cli.put("Kitty", {"name": "Kitty", "command": "cli"})
+        self.assertTrue(gui.flush())
+        self.assertTrue(cli.flush())  # Must not cut off the line gui appended
+
+        expected = ["Kitty", "Gold", "Arrows"]
+        self.assertEqual([fav["name"] for fav in self._store().data()], expected)
+        with patch.object(gui, '_load_snapshot', side_effect=AssertionError("full reload")):
+            self.assertEqual([fav["name"] for fav in gui.data()], expected)  # Only the new lines are replayed
+            self.assertEqual(gui.get("Kitty")["command"], "cli")
+
+    def test_concurrent_processes_keep_every_edit(self):
+        script = (
+            "import sys; sys.path.insert(0, sys.argv[1])\n"
+            "from src.user_store import JournaledStore, journal_path_for\n"
+            "from src.file_lock import lock_path_for\n"
+            "import json\n"
+            "path = sys.argv[2]\n"
+            "def load():\n"
+            "    with open(path) as f: return json.load(f)\n"
+            "store = JournaledStore(journal_path_for(path), load, lambda data: False, key_field='name',\n"
+            "                       flush_delay=None, compact_after=10**6, lock_path=lock_path_for(path))\n"
+            "for i in range(40):\n"
+            "    assert store.add(f'{sys.argv[3]}{i}', {'name': f'{sys.argv[3]}{i}'}) == 'success'\n"
+        )
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        processes = [subprocess.Popen([sys.executable, "-c", script, root, self.snapshot_path, prefix])
+                     for prefix in ("gui", "cli")]
+        for process in processes:
+            self.assertEqual(process.wait(60), 0)
+        names = {fav["name"] for fav in self._store().data()}
+        self.assertEqual(len(names), 81)
+
+    def test_edits_are_written_behind_and_coalesced(self):
+        store = self._store(flush_delay=0.05)
+        for count in range(1, 51):  # A burst of edits to one favorite
+            store.put("Kitty", {"name": "Kitty", "command": f"player.placeatme 000479F5 {count}"})
+        store.add("Gold", {"name": "Gold"})
+        self.assertFalse(os.path.exists(store.journal_path))  # Returned before any disk write
+        self.assertEqual(store.get("Kitty")["command"], "player.placeatme 000479F5 50")
+
+        deadline = time.monotonic() + 5
+        while not os.path.exists(store.journal_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(store.flush())
+        with open(store.journal_path) as f:
+            self.assertEqual([json.loads(line)["key"] for line in f], ["Kitty", "Gold"])
+
+    def test_pending_edits_survive_failed_flushes_and_reloads(self):
+        store = self._store(flush_delay=60)
+        store.add("Gold", {"name": "Gold"})
+        with patch.object(store, '_append', side_effect=OSError("disk full")):
+            self.assertFalse(store.flush())
+            self.assertFalse(store.put("Ghost", {"name": "Ghost"}))  # Refused until the retry works
+        self.assertIn("disk full", store.write_error)
+        self._write_snapshot([{"name": "Edited"}])  # Someone else rewrote the file meanwhile
+        os.utime(self.snapshot_path, ns=(0, self._stamp() + 1_000_000_000))
+        self.assertEqual([fav["name"] for fav in store.data()], ["Edited", "Gold"])
+        self.assertTrue(user_store.flush_all())
+        self.assertIsNone(store.write_error)
+        self.assertEqual([fav["name"] for fav in self._store().data()], ["Edited", "Gold"])
+
+    def test_write_through_failure_leaves_memory_unchanged(self):
+        store = self._store(flush_delay=None)
+        with patch.object(store, '_append', side_effect=OSError("disk full")):
+            self.assertEqual(store.add("Gold", {"name": "Gold"}), "error")
+        self.assertNotIn("Gold", store)
+
+    def test_touch_records_usage_and_ranks_entries(self):
+        store = self._store()
+        store.add("Gold", {"name": "Gold"})
+        store.add("Ghost", {"name": "Ghost"})
+        self.assertEqual(store.most_used(), [])
+        for when in (100.0, 200.0, 300.0):
+            self.assertTrue(store.touch("Gold", when=when))
+        self.assertTrue(store.touch("Kitty", when=400.0))
+        self.assertFalse(store.touch("Missing"))
+        self.assertEqual(store.most_used(), ["Gold", "Kitty"])
+        self.assertEqual(store.most_used(1), ["Gold"])
+        self.assertEqual((store.get("Gold")["use_count"], store.get("Gold")["last_used"]), (3, 300.0))
+
+        store.flush()
+        replayed = self._store()  # Usage is journaled like any other edit
+        self.assertEqual(replayed.most_used(), ["Gold", "Kitty"])
+        replayed.delete("Gold")
+        self.assertEqual(replayed.most_used(), ["Kitty"])
+
+    def test_wrong_shape_is_served_but_never_overwritten(self):
+        self._write_snapshot({"not": "a list"})
+        store = self._store()
+        self.assertEqual(store.data(), {"not": "a list"})
+        self.assertEqual(store.add("A", {"name": "A"}), "error")
+        self.assertFalse(os.path.exists(store.journal_path))
+
+    def test_missing_snapshot_reads_as_none(self):
+        os.remove(self.snapshot_path)
+        store = self._store()
+        self.assertIsNone(store.data())
+        store.add("A", {"name": "A"})
+        self.assertEqual(store.data(), [{"name": "A"}])
+
+
+class TestDataLoaderUserStores(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='user_store_loader_')
+        self.saved = (data_loader.DATA_DIR, data_loader.USER_DATA_DIR)
+        data_loader.DATA_DIR, data_loader.USER_DATA_DIR = self.data_dir, None
+        with open(os.path.join(self.data_dir, 'battles.json'), 'w') as f:
+            json.dump({"Bundled": ["cmd a"]}, f)
+
+    def tearDown(self):
+        data_loader.DATA_DIR, data_loader.USER_DATA_DIR = self.saved
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_presets_are_journaled_and_full_saves_reset_the_journal(self):
+        self.assertEqual(data_loader.add_battle_preset("Mine", ["cmd b"]), "success")
+        self.assertEqual(data_loader.add_battle_preset("Mine", ["cmd c"]), "exists")
+        self.assertTrue(data_loader.flush_user_stores())
+        journal = os.path.join(self.data_dir, 'battles.journal')
+        self.assertTrue(os.path.exists(journal))
+        self.assertEqual(data_loader.load_json_data('battles.json'), {"Bundled": ["cmd a"], "Mine": ["cmd b"]})
+
+        self.assertTrue(data_loader.save_json_data('battles.json', {"Only": []}))
+        self.assertFalse(os.path.exists(journal))
+        self.assertEqual(data_loader.load_json_data('battles.json'), {"Only": []})
+        self.assertEqual([name for name in os.listdir(self.data_dir) if name.endswith('.tmp')], [])
+        self.assertFalse(data_loader.user_store('battles.json').touch("Only"))  # Presets do not track usage
+
+
+if __name__ == '__main__':
+    unittest.main()